@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark AcroForm field extraction: fast path vs. PyPDF2.
+
+Runs both extractors over the real submission PDFs, checks that they return
+identical fields, and reports parse time and peak traced memory per file.
+
+Usage:
+    python bench_pdf_extraction.py
+    python bench_pdf_extraction.py --repeat 20
+    python bench_pdf_extraction.py --data-dir /path/to/pdfs --stream
+"""
+
+import argparse
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'pdf-processor'))
+
+import PyPDF2  # noqa: E402
+from acroform import AcroFormReader  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(
+    os.path.dirname(__file__), '..', '..', '2025-11-11_UCD_Winner_Formatting', 'data'
+)
+
+
+def extract_pypdf2(pdf_bytes: bytes) -> dict:
+    """The extraction extract_pdf_fields used before the fast path."""
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    fields = {}
+    for field_name, field_data in (reader.get_fields() or {}).items():
+        value = field_data.get('/V', '')
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', errors='ignore')
+        fields[field_name] = str(value)
+    return fields
+
+
+def extract_fast(pdf_bytes: bytes, stream: bool = False) -> dict:
+    source = io.BytesIO(pdf_bytes) if stream else pdf_bytes
+    return AcroFormReader(source).fields()
+
+
+def measure(func, repeat: int):
+    """Return (median seconds, peak traced bytes, result)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak, result
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark PDF form field extraction")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Directory searched recursively for PDFs')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per file and extractor')
+    parser.add_argument('--stream', action='store_true',
+                        help='Feed the fast path a file object (ranged reads) instead of bytes')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.data_dir, '**', '*.pdf'), recursive=True))
+    if not paths:
+        print(f"✗ No PDFs found under {args.data_dir}")
+        sys.exit(1)
+
+    print(f"{'File':<42} {'KB':>7} {'Fields':>6} {'PyPDF2 ms':>10} {'Fast ms':>8} {'Speedup':>8} "
+          f"{'PyPDF2 peak KB':>15} {'Fast peak KB':>13}")
+    print("=" * 117)
+
+    totals = {'pypdf2_time': 0.0, 'fast_time': 0.0, 'pypdf2_peak': [], 'fast_peak': []}
+    mismatches = []
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            pdf_bytes = f.read()
+
+        slow_time, slow_peak, slow_fields = measure(lambda: extract_pypdf2(pdf_bytes), args.repeat)
+        fast_time, fast_peak, fast_fields = measure(lambda: extract_fast(pdf_bytes, args.stream), args.repeat)
+
+        if slow_fields != fast_fields or list(slow_fields) != list(fast_fields):
+            mismatches.append(path)
+
+        totals['pypdf2_time'] += slow_time
+        totals['fast_time'] += fast_time
+        totals['pypdf2_peak'].append(slow_peak)
+        totals['fast_peak'].append(fast_peak)
+
+        name = os.path.basename(os.path.dirname(path))[:40]
+        print(f"{name:<42} {len(pdf_bytes) / 1024:>7.0f} {len(fast_fields):>6} {slow_time * 1000:>10.2f} "
+              f"{fast_time * 1000:>8.2f} {slow_time / fast_time:>7.1f}x "
+              f"{slow_peak / 1024:>15.0f} {fast_peak / 1024:>13.0f}")
+
+    print("=" * 117)
+    print(f"Files:               {len(paths)}")
+    print(f"Total parse time:    PyPDF2 {totals['pypdf2_time'] * 1000:.1f} ms, "
+          f"fast path {totals['fast_time'] * 1000:.1f} ms "
+          f"({totals['pypdf2_time'] / totals['fast_time']:.1f}x)")
+    print(f"Median peak memory:  PyPDF2 {statistics.median(totals['pypdf2_peak']) / 1024:.0f} KB, "
+          f"fast path {statistics.median(totals['fast_peak']) / 1024:.0f} KB")
+    print(f"Max peak memory:     PyPDF2 {max(totals['pypdf2_peak']) / 1024:.0f} KB, "
+          f"fast path {max(totals['fast_peak']) / 1024:.0f} KB")
+
+    if mismatches:
+        print(f"✗ {len(mismatches)} file(s) returned different fields:")
+        for path in mismatches:
+            print(f"   {path}")
+        sys.exit(1)
+    print("✓ Fast path matches PyPDF2 on every file")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Decode benchmark for process_image (photo-processor) by megapixel class.
+
+For each class a synthetic JPEG of a typical camera resolution (smooth
+shapes plus grain, about 0.5 bytes per pixel like a camera JPEG) is run
+through process_image twice in fresh interpreters:
+
+- full:   decoded at native resolution, then resized (draft_image disabled,
+          as before reduced-scale decoding)
+- draft:  decoded at the largest DCT reduction that still covers
+          MAX_DIMENSION (draft_scale, draft_image), then resized
+
+Reported per class and path: CPU time per photo (median of --runs) and the
+peak resident memory above what the process held before the call (Linux
+VmHWM, reset through /proc/self/clear_refs), plus how close the two outputs are
+(PSNR of draft against full, in dB; above about 35 the two cannot be told
+apart by eye, and the grain of the synthetic photos is where they differ most).
+
+JPEG decoders scale by 1/2, 1/4 or 1/8 only, so a photo is decoded smaller
+only when it is at least twice MAX_DIMENSION on its long side (8192 px):
+the 40 MP class (7728 px) is decoded at full size on both paths.
+
+Usage:
+    python bench_photo_decode.py
+    python bench_photo_decode.py --classes 24,45,61 --runs 5
+    python bench_photo_decode.py --json decode.json
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PHOTO_DIR = os.path.join(BENCH_DIR, '..', 'photo-processor')
+
+# Megapixels -> typical 3:2 / 4:3 camera resolution
+CLASSES = {
+    12: (4000, 3000),    # phones
+    20: (5472, 3648),    # drones (1" sensor)
+    24: (6000, 4000),    # APS-C / full frame
+    40: (7728, 5152),    # high resolution bodies
+    45: (8192, 5464),    # high resolution bodies, medium format drones
+    61: (9504, 6336),    # high resolution bodies
+    100: (11648, 8736),  # medium format
+}
+PATHS = ('full', 'draft')
+
+
+def photo_like(width: int, height: int) -> bytes:
+    """A JPEG with smooth shapes plus grain, so both decode cost and resampling error resemble a photo."""
+    from PIL import Image
+
+    channels = []
+    for _ in range(3):
+        shapes = Image.effect_noise((width // 64 + 1, height // 64 + 1), 64).resize(
+            (width, height), Image.Resampling.BICUBIC)
+        channels.append(Image.blend(shapes, Image.effect_noise((width, height), 32), 0.5))
+    buffer = io.BytesIO()
+    Image.merge('RGB', channels).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def memory_kb(field: str) -> int:
+    """A memory figure of this process from /proc/self/status (VmRSS, VmHWM), in KB."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+# ── Child: one path over one photo ──────────────────────────────────
+
+def run_child(path: str, input_path: str, output_path: str, runs: int):
+    """Run process_image `runs` times in this (fresh) interpreter and print the costs as JSON."""
+    import logging
+
+    sys.path.insert(0, PHOTO_DIR)
+    import main
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if path == 'full':
+        main.draft_image = lambda image, scale: 1
+
+    from PIL import Image
+
+    with open(input_path, 'rb') as f:
+        data = f.read()
+    scale = main.probe_image(io.BytesIO(data))[1].scale
+    # Restart the high-water mark at the current RSS, past reading the file
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline_kb = memory_kb('VmRSS')
+
+    cpu = []
+    for _ in range(runs):
+        started = time.process_time()
+        output, _, _ = main.process_image(io.BytesIO(data), 'photo.jpg')
+        cpu.append(time.process_time() - started)
+    peak_kb = memory_kb('VmHWM')
+
+    with open(output_path, 'wb') as f:
+        f.write(output.getvalue())
+    with Image.open(output_path) as image:
+        size = list(image.size)
+    print(json.dumps({'cpu_ms': [round(c * 1000, 2) for c in cpu],
+                      'peak_mb': round((peak_kb - baseline_kb) / 1024, 1),
+                      'scale': scale, 'output': size, 'max_dimension': main.MAX_DIMENSION}))
+
+
+# ── Parent: drive the runs and report ───────────────────────────────
+
+def measure(path: str, input_path: str, output_path: str, runs: int) -> dict:
+    """One child run. Returns CPU ms per photo, peak MB, decode scale and output size."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', path, input_path, output_path, str(runs)],
+        capture_output=True, text=True, cwd=BENCH_DIR
+    )
+    if result.returncode != 0:
+        print(f"✗ {path} run failed:")
+        print(result.stderr[-3000:])
+        sys.exit(1)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def psnr(first: str, second: str) -> float:
+    """PSNR in dB between two images of the same size (inf if identical)."""
+    from PIL import Image, ImageChops, ImageStat
+
+    with Image.open(first) as a, Image.open(second) as b:
+        if a.size != b.size:
+            return 0.0
+        difference = ImageChops.difference(a.convert('RGB'), b.convert('RGB'))
+        mse = statistics.mean(s ** 2 + v for s, v in zip(ImageStat.Stat(difference).mean,
+                                                           ImageStat.Stat(difference).var))
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure process_image CPU time and peak memory with and without reduced-scale decoding",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--classes', default=','.join(str(mp) for mp in CLASSES),
+                        help=f"Megapixel classes to run, from {', '.join(str(mp) for mp in CLASSES)}")
+    parser.add_argument('--runs', type=int, default=3, help='Photos processed per class and path')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    parser.add_argument('--child', nargs=4, metavar=('PATH', 'INPUT', 'OUTPUT', 'RUNS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        path, input_path, output_path, runs = args.child
+        run_child(path, input_path, output_path, int(runs))
+        return
+
+    classes = [int(mp) for mp in args.classes.split(',')]
+    unknown = [mp for mp in classes if mp not in CLASSES]
+    if unknown:
+        print(f"✗ Unknown megapixel class(es): {unknown}")
+        sys.exit(1)
+
+    print(f"🔄 {len(classes)} megapixel classes, {args.runs} photos per class and path")
+    print("=" * 72)
+    print(f"{'class':<8}{'pixels':>13}{'scale':>7}{'cpu ms':>16}{'':>8}{'peak MB':>14}{'':>7}{'PSNR':>7}")
+    print(f"{'':<28}{'full':>8}{'draft':>8}{'':>8}{'full':>7}{'draft':>7}{'':>7}{'dB':>7}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for mp in classes:
+            width, height = CLASSES[mp]
+            input_path = os.path.join(workdir, f'{mp}mp.jpg')
+            with open(input_path, 'wb') as f:
+                f.write(photo_like(width, height))
+
+            result = {'size': [width, height]}
+            for path in PATHS:
+                costs = measure(path, input_path, os.path.join(workdir, f'{mp}mp-{path}.jpg'), args.runs)
+                result[path] = {'cpu_ms': statistics.median(costs['cpu_ms']), 'peak_mb': costs['peak_mb']}
+                if path == 'draft':
+                    result.update({key: costs[key] for key in ('scale', 'output', 'max_dimension')})
+            os.remove(input_path)
+            result['psnr_db'] = psnr(*(os.path.join(workdir, f'{mp}mp-{path}.jpg') for path in PATHS))
+
+            full, draft = result['full'], result['draft']
+            print(f"{mp:>3} MP  {width:>6}x{height:<6}{'1/' + str(result['scale']):>7}"
+                  f"{full['cpu_ms']:>8.0f}{draft['cpu_ms']:>8.0f}{full['cpu_ms'] / draft['cpu_ms']:>7.1f}x"
+                  f"{full['peak_mb']:>7.0f}{draft['peak_mb']:>7.0f}{full['peak_mb'] / max(draft['peak_mb'], 1):>6.1f}x"
+                  f"{result['psnr_db']:>7.1f}")
+            results[f'{mp}mp'] = result
+
+    print("\nChecks")
+    ok = True
+    for label, result in results.items():
+        if max(result['output']) > result['max_dimension']:
+            print(f"✗ {label}: output {result['output']} exceeds MAX_DIMENSION")
+            ok = False
+        if result['scale'] == 1 and result['psnr_db'] != math.inf:
+            print(f"✗ {label}: decoded at full size on both paths, but the outputs differ")
+            ok = False
+        elif result['psnr_db'] < 32:
+            print(f"⚠ {label}: draft output only {result['psnr_db']:.1f} dB from full decode")
+    if ok:
+        print("✓ All outputs within MAX_DIMENSION; photos decoded at full size are unchanged")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2, default=str)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
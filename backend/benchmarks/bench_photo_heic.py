@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+HEIC benchmark for process_image (photo-processor).
+
+Each sample HEIC is run through process_image in a fresh interpreter:
+
+- no decoder:   pillow-heif not registered, as before register_heif_decoder:
+                the original is uploaded as is
+- N threads:    decoded by libheif with HEIF_DECODE_THREADS=N (one run per
+                --threads value), resized and encoded to JPEG with renditions
+
+Reported per sample and path: the outcome (Drive file name, MIME type and
+size), CPU and wall time, and the peak resident memory above what the
+process held before the call (Linux VmHWM, as in bench_photo_decode).
+
+libheif decodes the tiles of a grid image in parallel, and iPhones store
+HEIC photos as grids of 512 px tiles. Synthetic samples (camera-like images
+encoded by pillow-heif, --sizes) are single images, so decoder threads only
+show on real phone photos: pass a directory of them with --samples.
+
+Usage:
+    python bench_photo_heic.py
+    python bench_photo_heic.py --samples ~/Pictures/iphone --threads 1,2,4
+    python bench_photo_heic.py --sizes 12 --json heic.json
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PHOTO_DIR = os.path.join(BENCH_DIR, '..', 'photo-processor')
+sys.path.insert(0, BENCH_DIR)
+
+from bench_photo_decode import memory_kb, photo_like  # noqa: E402
+
+# Megapixels -> phone camera resolution
+SIZES = {
+    12: (4032, 3024),   # iPhone main camera, binned
+    48: (8064, 6048),   # iPhone 14 Pro and later, ProRAW-class resolution
+}
+
+
+def synthetic_heic(width: int, height: int) -> bytes:
+    """A camera-like photo (see bench_photo_decode) encoded as HEIC."""
+    import pillow_heif
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(photo_like(width, height)))
+    output = io.BytesIO()
+    # x265's slowest presets take minutes per photo; decoding cost barely depends on it
+    pillow_heif.from_pillow(image).save(output, quality=80, enc_params={'preset': 'ultrafast'})
+    return output.getvalue()
+
+
+# ── Child: one path over one sample ─────────────────────────────────
+
+def run_child(path: str, input_path: str):
+    """Run process_image once in this (fresh) interpreter and print the outcome and costs as JSON."""
+    import logging
+
+    if path != 'no decoder':
+        os.environ['HEIF_DECODE_THREADS'] = path.split()[0]
+    sys.path.insert(0, PHOTO_DIR)
+    import main
+    from PIL import Image
+
+    logging.getLogger().setLevel(logging.ERROR)
+    if path == 'no decoder':
+        main.register_heif_decoder = lambda: False
+
+    filename = os.path.basename(input_path)
+    with open(input_path, 'rb') as f:
+        data = f.read()
+    # Restart the high-water mark at the current RSS, past reading the file
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline_kb = memory_kb('VmRSS')
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    output, mime_type, rendered = main.process_image(io.BytesIO(data), filename, main.RENDITIONS)
+    wall, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    peak_kb = memory_kb('VmHWM')
+
+    result = {'name': main.processed_filename(filename, mime_type), 'mime_type': mime_type,
+              'kb': round(len(output.getvalue()) / 1024), 'renditions': sorted(rendered),
+              'sha256': hashlib.sha256(output.getvalue()).hexdigest(),
+              'cpu_ms': round(cpu * 1000, 1), 'wall_ms': round(wall * 1000, 1),
+              'peak_mb': round((peak_kb - baseline_kb) / 1024, 1), 'max_dimension': main.MAX_DIMENSION}
+    if rendered:
+        result['size'] = list(Image.open(output).size)
+    print(json.dumps(result))
+
+
+# ── Parent: drive the runs and report ───────────────────────────────
+
+def measure(path: str, input_path: str) -> dict:
+    """One child run. Returns the outcome and costs."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', path, input_path],
+        capture_output=True, text=True, cwd=BENCH_DIR
+    )
+    if result.returncode != 0:
+        print(f"✗ {path} run on {os.path.basename(input_path)} failed:")
+        print(result.stderr[-3000:])
+        sys.exit(1)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure decoding HEIC photos in process_image against uploading them as is",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--samples', help='Directory of sample .heic/.heif files (default: synthetic)')
+    parser.add_argument('--sizes', default=','.join(str(mp) for mp in SIZES),
+                        help=f"Synthetic sample megapixels, from {', '.join(str(mp) for mp in SIZES)}")
+    parser.add_argument('--threads', default='1,4', help='HEIF_DECODE_THREADS values to run')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    parser.add_argument('--child', nargs=2, metavar=('PATH', 'INPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    paths = ['no decoder'] + [f"{n} thread{'s' if int(n) > 1 else ''}" for n in args.threads.split(',')]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.samples:
+            samples = sorted(p for p in glob.glob(os.path.join(args.samples, '*'))
+                             if p.lower().endswith(('.heic', '.heif')))
+            if not samples:
+                print(f"✗ No .heic/.heif files in {args.samples}")
+                sys.exit(1)
+        else:
+            samples = []
+            for mp in (int(mp) for mp in args.sizes.split(',')):
+                if mp not in SIZES:
+                    print(f"✗ Unknown sample size: {mp} MP")
+                    sys.exit(1)
+                print(f"🔄 Encoding a {mp} MP sample HEIC...")
+                samples.append(os.path.join(workdir, f'IMG_{mp:04d}.HEIC'))
+                with open(samples[-1], 'wb') as f:
+                    f.write(synthetic_heic(*SIZES[mp]))
+
+        print(f"🔄 {len(samples)} sample(s), paths: {', '.join(paths)}")
+        print("=" * 72)
+        print(f"{'sample':<18}{'path':<14}{'outcome':<28}{'cpu ms':>8}{'wall ms':>9}{'peak MB':>9}")
+
+        results = {}
+        for sample in samples:
+            name = os.path.basename(sample)
+            results[name] = {'kb': round(os.path.getsize(sample) / 1024)}
+            for i, path in enumerate(paths):
+                run = results[name][path] = measure(path, sample)
+                size = 'x'.join(str(v) for v in run.get('size', [])) or 'as is'
+                print(f"{name if i == 0 else '':<18}{path:<14}{run['name'] + ' ' + size:<28}"
+                      f"{run['cpu_ms']:>8.0f}{run['wall_ms']:>9.0f}{run['peak_mb']:>9.0f}")
+
+    print("\nChecks")
+    ok = True
+    for name, result in results.items():
+        decoded = [result[path] for path in paths[1:]]
+        for run in decoded:
+            if run['mime_type'] != 'image/jpeg' or not run['name'].endswith('.jpg') or not run['renditions']:
+                ok = False
+                print(f"✗ {name}: not converted to JPEG ({run['name']}, {run['mime_type']})")
+            elif max(run['size']) > run['max_dimension']:
+                ok = False
+                print(f"✗ {name}: output {run['size']} exceeds MAX_DIMENSION")
+        if len({run['sha256'] for run in decoded}) > 1:
+            ok = False
+            print(f"✗ {name}: output differs between thread counts")
+        if result['no decoder']['mime_type'] not in ('image/heic', 'image/heif'):
+            ok = False
+            print(f"✗ {name}: original uploaded as {result['no decoder']['mime_type']}")
+    if ok:
+        print("✓ Every sample converted to JPEG with renditions, the same for every thread count; "
+              "originals typed image/heic")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
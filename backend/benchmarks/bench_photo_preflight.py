@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Pre-flight benchmark for process_image (photo-processor): what a photo
+costs before its pixels are read.
+
+Each input is run through process_image in a fresh interpreter twice:
+
+- no preflight:  every file Pillow opens is decoded and anything else is
+                 uploaded as is, under Pillow's own decompression bomb limit
+                 (89 MP warned, 179 MP refused), as before probe_image
+- preflight:     probe_image reads the header, picks the decode scale and
+                 rejects files over --budget MP or that are not images
+
+Inputs:
+
+- photo:          24 MP camera-like JPEG (see bench_photo_decode)
+- large JPEG:     100 MP JPEG, which --budget may force below MAX_DIMENSION
+- PNG bomb:       --bomb-mp MP of black RGB, a few hundred KB on disk
+- not an image:   1 MB of random bytes named photo.jpg
+- truncated JPEG: the photo cut in half (valid header, broken pixels)
+
+Reported per input and path: the outcome, CPU time and peak resident memory
+above what the process held before the call (Linux VmHWM, as in
+bench_photo_decode). The default budget of 24 MP is the photo processor's
+setting on a 256 MB instance (terraform/functions.tf).
+
+Usage:
+    python bench_photo_preflight.py
+    python bench_photo_preflight.py --budget 80 --bomb-mp 400
+    python bench_photo_preflight.py --json preflight.json
+"""
+
+import argparse
+import io
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PHOTO_DIR = os.path.join(BENCH_DIR, '..', 'photo-processor')
+sys.path.insert(0, BENCH_DIR)
+
+from bench_photo_decode import CLASSES, memory_kb, photo_like  # noqa: E402
+
+PATHS = ('no preflight', 'preflight')
+
+
+def png_bomb(megapixels: float) -> bytes:
+    """A black RGB PNG of about `megapixels`, compressed row by row so it is never held decoded."""
+    side = int((megapixels * 1_000_000) ** 0.5)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    compressor = zlib.compressobj(9)
+    row = bytes(1 + side * 3)  # filter byte, then black pixels
+    idat = b''.join(compressor.compress(row) for _ in range(side)) + compressor.flush()
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', side, side, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', idat) + chunk(b'IEND', b''))
+
+
+def build_inputs(bomb_mp: float) -> dict:
+    """Input name -> (file name the photo was uploaded as, bytes)."""
+    photo = photo_like(*CLASSES[24])
+    return {
+        'photo': ('photo.jpg', photo),
+        'large JPEG': ('large.jpg', photo_like(*CLASSES[100])),
+        'PNG bomb': ('bomb.png', png_bomb(bomb_mp)),
+        'not an image': ('photo.jpg', os.urandom(1024 * 1024)),
+        'truncated JPEG': ('photo.jpg', photo[:len(photo) // 2]),
+    }
+
+
+# ── Child: one path over one input ──────────────────────────────────
+
+def run_child(path: str, input_path: str, filename: str, budget: float):
+    """Run process_image once in this (fresh) interpreter and print the outcome and costs as JSON."""
+    import logging
+
+    os.environ['MAX_DECODE_MEGAPIXELS'] = str(budget if path == 'preflight' else 10 ** 9)
+    sys.path.insert(0, PHOTO_DIR)
+    import main
+    from PIL import Image
+
+    logging.getLogger().setLevel(logging.ERROR)
+    if path == 'no preflight':
+        # Pillow's default, which main.py lifts in favour of the header probe
+        Image.MAX_IMAGE_PIXELS = int(1024 * 1024 * 1024 // 4 // 3)
+
+        def open_only(image_file):
+            # Decode whatever opens; anything else falls back to the original
+            image = Image.open(image_file)
+            scale = main.draft_scale(*image.size, main.MAX_DIMENSION) if image.format == 'JPEG' else 1
+            return image, main.ImageProbe(image.format, *image.size, image.mode, 1, None, scale, 'decode')
+
+        main.probe_image = open_only
+
+    with open(input_path, 'rb') as f:
+        data = f.read()
+    # Restart the high-water mark at the current RSS, past reading the file
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline_kb = memory_kb('VmRSS')
+
+    started = time.process_time()
+    try:
+        output, mime_type, rendered = main.process_image(io.BytesIO(data), filename)
+        if rendered:
+            outcome = 'processed ' + 'x'.join(str(v) for v in Image.open(output).size)
+        else:
+            outcome = f"original ({mime_type})"
+    except main.PhotoRejected as e:
+        outcome = f"rejected ({e.reason})"
+    cpu = time.process_time() - started
+
+    print(json.dumps({'outcome': outcome, 'cpu_ms': round(cpu * 1000, 1),
+                      'peak_mb': round((memory_kb('VmHWM') - baseline_kb) / 1024, 1)}))
+
+
+# ── Parent: drive the runs and report ───────────────────────────────
+
+def measure(path: str, input_path: str, filename: str, budget: float) -> dict:
+    """One child run. Returns the outcome, CPU ms and peak MB."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', path, input_path, filename, str(budget)],
+        capture_output=True, text=True, cwd=BENCH_DIR
+    )
+    if result.returncode != 0:
+        # A decode the instance can't afford may be killed outright
+        return {'outcome': f"failed (exit {result.returncode})", 'cpu_ms': None, 'peak_mb': None}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure what process_image spends on oversized and bogus inputs with and without the header probe",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--budget', type=float, default=24, help='MAX_DECODE_MEGAPIXELS for the preflight path')
+    parser.add_argument('--bomb-mp', type=float, default=144, help='Megapixels of the PNG bomb')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    parser.add_argument('--child', nargs=4, metavar=('PATH', 'INPUT', 'FILENAME', 'BUDGET'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        path, input_path, filename, budget = args.child
+        run_child(path, input_path, filename, float(budget))
+        return
+
+    print(f"🔄 Budget {args.budget:g} MP, PNG bomb {args.bomb_mp:g} MP")
+    print("=" * 72)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, (filename, data) in build_inputs(args.bomb_mp).items():
+            input_path = os.path.join(workdir, filename)
+            with open(input_path, 'wb') as f:
+                f.write(data)
+            results[name] = {'kb': round(len(data) / 1024)}
+            results[name].update({path: measure(path, input_path, filename, args.budget) for path in PATHS})
+            os.remove(input_path)
+
+    print(f"{'input':<16}{'KB':>7}  {'path':<14}{'outcome':<30}{'cpu ms':>8}{'peak MB':>9}")
+    for name, result in results.items():
+        for i, path in enumerate(PATHS):
+            run = result[path]
+            cpu = f"{run['cpu_ms']:.0f}" if run['cpu_ms'] is not None else '-'
+            peak = f"{run['peak_mb']:.0f}" if run['peak_mb'] is not None else '-'
+            print(f"{name if i == 0 else '':<16}{result['kb'] if i == 0 else '':>7}  {path:<14}"
+                  f"{run['outcome']:<30}{cpu:>8}{peak:>9}")
+
+    print("\nChecks")
+    ok = True
+    for name, result in results.items():
+        run = result['preflight']
+        if run['peak_mb'] is None:
+            ok = False
+            print(f"✗ {name}: preflight run failed: {run['outcome']}")
+        elif run['peak_mb'] > args.budget * 3 * 3:
+            ok = False
+            print(f"✗ {name}: peak {run['peak_mb']:.0f} MB, over three copies of {args.budget:g} MP of RGB")
+    if not results['PNG bomb']['preflight']['outcome'].startswith('rejected'):
+        ok = False
+        print("✗ PNG bomb was not rejected")
+    if not results['not an image']['preflight']['outcome'].startswith('rejected'):
+        ok = False
+        print("✗ Random bytes were not rejected")
+    if results['photo']['preflight']['outcome'] != results['photo']['no preflight']['outcome']:
+        ok = False
+        print("✗ The photo within budget came out differently")
+    if ok:
+        print(f"✓ Every input within three copies of {args.budget:g} MP of RGB; bomb and random bytes rejected")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Rendition benchmark for process_image (photo-processor).
+
+Renders a project of --photos synthetic photos (see bench_photo_decode)
+three ways and reports CPU time per photo:
+
+- full only:        the processed full-size photo, as uploaded to Drive
+- one decode:       full plus RENDITIONS from the same decoded pixels
+                    (process_image with renditions)
+- decode each:      full, then every rendition decoded from the original
+                    again, as a separate pass per size would
+
+and the bytes a client downloads per project for each rendition, i.e. what
+a gallery of thumbnails or previews costs compared with the full-size
+photos it would otherwise fetch.
+
+Usage:
+    python bench_photo_renditions.py
+    python bench_photo_renditions.py --photos 20 --photo-size 8192x5464
+    python bench_photo_renditions.py --json renditions.json
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'photo-processor'))
+
+from bench_photo_decode import photo_like  # noqa: E402
+import main as photo_main  # noqa: E402
+from PIL import Image  # noqa: E402
+
+
+def decode_each(data: bytes) -> dict:
+    """The full-size photo plus every rendition, each decoded from the original on its own."""
+    output, _, rendered = photo_main.process_image(io.BytesIO(data), 'photo.jpg')
+    for rendition in photo_main.RENDITIONS:
+        image = Image.open(io.BytesIO(data))
+        photo_main.draft_image(image, photo_main.draft_scale(*image.size, rendition.max_dimension))
+        image.thumbnail((rendition.max_dimension, rendition.max_dimension), Image.Resampling.LANCZOS)
+        rendered[rendition.name] = photo_main.encode_jpeg(image, rendition.quality)
+    return rendered
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure rendering photo renditions from one decode against decoding per rendition",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--photos', type=int, default=10, help='Photos in the project')
+    parser.add_argument('--photo-size', default='6000x4000', help='Synthetic photo size, WIDTHxHEIGHT')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    width, height = (int(v) for v in args.photo_size.lower().split('x'))
+    # A few distinct photos, reused, keep setup short
+    photos = [photo_like(width, height) for _ in range(min(args.photos, 3))]
+    renditions = ', '.join(f"{r.name} {r.max_dimension} px q{r.quality}" for r in photo_main.RENDITIONS)
+
+    print(f"🔄 {args.photos} photos of {width}x{height} ({len(photos[0]) / 1024 / 1024:.1f} MB each)")
+    print(f"   Renditions: {photo_main.FULL_RENDITION} {photo_main.MAX_DIMENSION} px q{photo_main.JPEG_QUALITY}, "
+          f"{renditions or 'none (PHOTO_RENDITIONS is empty)'}")
+    print("=" * 72)
+
+    paths = {
+        'full only': lambda data: photo_main.process_image(io.BytesIO(data), 'photo.jpg')[2],
+        'one decode': lambda data: photo_main.process_image(io.BytesIO(data), 'photo.jpg', photo_main.RENDITIONS)[2],
+        'decode each': decode_each,
+    }
+    results = {'cpu_ms': {}, 'project_kb': {}, 'sizes': {}}
+    outputs = {}
+    for label, render in paths.items():
+        cpu = []
+        project = {}
+        for i in range(args.photos):
+            started = time.process_time()
+            rendered = render(photos[i % len(photos)])
+            cpu.append(time.process_time() - started)
+            for name, data in rendered.items():
+                project[name] = project.get(name, 0) + data.getbuffer().nbytes
+        results['cpu_ms'][label] = round(statistics.median(cpu) * 1000, 1)
+        outputs[label] = rendered
+        if label == 'one decode':
+            results['project_kb'] = {name: round(size / 1024) for name, size in project.items()}
+            results['sizes'] = {name: list(Image.open(data).size) for name, data in rendered.items()}
+
+    base = results['cpu_ms']['full only']
+    print(f"{'CPU per photo':<24}{'ms':>10}{'vs full only':>16}")
+    for label, ms in results['cpu_ms'].items():
+        print(f"{label:<24}{ms:>10.0f}{(ms - base) / base * 100:>+15.0f}%")
+
+    full_kb = results['project_kb'][photo_main.FULL_RENDITION]
+    print(f"\n{'Per project':<24}{'size':>12}{'KB':>12}{'vs full':>12}")
+    for name, kb in sorted(results['project_kb'].items(), key=lambda item: item[1]):
+        size = 'x'.join(str(v) for v in results['sizes'][name])
+        print(f"{name:<24}{size:>12}{kb:>12,}{full_kb / kb:>11.0f}x")
+
+    print("\nChecks")
+    ok = True
+    limits = {r.name: r.max_dimension for r in photo_main.RENDITIONS}
+    limits[photo_main.FULL_RENDITION] = photo_main.MAX_DIMENSION
+    for name, size in results['sizes'].items():
+        if max(size) > limits[name]:
+            ok = False
+            print(f"✗ {name} is {size[0]}x{size[1]}, over {limits[name]} px")
+    if set(outputs['one decode']) != set(outputs['decode each']):
+        ok = False
+        print(f"✗ Renditions differ: {sorted(outputs['one decode'])} vs {sorted(outputs['decode each'])}")
+    if ok:
+        print(f"✓ {len(results['sizes'])} renditions per photo, each within its max dimension")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the submission pipeline against in-memory fakes.
+
+Loads the real process_pdf and process_photo entry points. GCS, Secret
+Manager, Drive and Sheets are served by the stand-ins in fakes.py. For each
+submission the benchmark stores the sample PDF (and optional synthetic
+photos) in the fake submissions bucket and delivers a CloudEvent for each
+object to the entry points. At the end, staged sheet rows are flushed.
+
+Reported:
+- throughput (submissions/s)
+- p50/p95/max latency per entry point
+- p50/p95 per stage, from the tracing spans
+- API calls per submission, by service and method
+- peak RSS
+- checks: one sheet row and one distinct Awards ID per submission, every
+  photo in its own submission's project folder, and its renditions written
+
+Deliveries run on --concurrency threads in one process, like one instance
+handling concurrent requests: module-level caches and clients are shared.
+
+Usage:
+    python bench_pipeline.py                                  # every sample PDF once
+    python bench_pipeline.py -n 200 --concurrency 8 --photos 2
+    python bench_pipeline.py --latency drive=150 --latency sheets=200 --latency gcs=20
+    python bench_pipeline.py --error-rate sheets=0.05 --retries 3 --seed 7
+    python bench_pipeline.py -n 300 --quota drive=600                  # Drive's per-minute budget
+    python bench_pipeline.py --no-state-bucket                # local-development code paths
+    python bench_pipeline.py -n 8 --photos 20 --photo-batch   # photos per submission, across cores
+    python bench_pipeline.py --json results.json              # machine-readable summary
+"""
+
+import argparse
+import glob
+import importlib.util
+import io
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import SERVICES, Faults, FakeGoogle  # noqa: E402
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_DATA_DIR = os.path.join(BACKEND_DIR, '..', '2025-11-11_UCD_Winner_Formatting', 'data')
+
+SUBMISSIONS_BUCKET = 'bench-submissions'
+STATE_BUCKET = 'bench-state'
+RENDITIONS_BUCKET = 'bench-renditions'
+SHEET_ID = 'bench-sheet'
+YEAR = '2025'
+
+
+class SpanCollector(logging.Handler):
+    """Collects the JSON spans tracing.py writes, instead of printing them."""
+
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            span = json.loads(record.getMessage())
+        except ValueError:
+            return
+        with self._lock:
+            self.spans.append(span)
+
+
+def parse_service_values(pairs: List[str], scale: float = 1.0) -> Dict[str, float]:
+    """Parse SERVICE=VALUE options (e.g. drive=150) into {service: value * scale}."""
+    values = {}
+    for pair in pairs or []:
+        service, _, value = pair.partition('=')
+        services = SERVICES if service == 'all' else (service,)
+        for name in services:
+            if name not in SERVICES:
+                raise SystemExit(f"Unknown service {name!r} (expected one of {', '.join(SERVICES)} or all)")
+            values[name] = float(value) * scale
+    return values
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_processor(module_name: str, directory: str, google: FakeGoogle):
+    """
+    Import a processor's main.py and install the fake clients.
+
+    The processors create their clients on first use, so the fakes stay
+    installed for the rest of the run.
+    """
+    google.install()
+    sys.path.insert(0, directory)
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, 'main.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(directory)
+
+    # No OAuth token is needed by the fakes
+    module.get_user_credentials = lambda: None
+    return module
+
+
+def synthetic_photo(width: int, height: int) -> bytes:
+    """A noisy JPEG, so decode and re-encode cost resembles a real photo."""
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 64)
+    image = Image.merge('RGB', (noise, noise.rotate(90, expand=False), noise.transpose(Image.FLIP_LEFT_RIGHT)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def deliver(entry_point, bucket: str, name: str, retries: int):
+    """Deliver one event, redelivering failed attempts. Returns (latencies, ok, error)."""
+    event = SimpleNamespace(data={'bucket': bucket, 'name': name})
+    latencies = []
+    error = None
+    for _ in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            entry_point(event)
+            latencies.append(time.perf_counter() - started)
+            return latencies, True, None
+        except Exception as e:
+            latencies.append(time.perf_counter() - started)
+            error = e
+    return latencies, False, error
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark process_pdf / process_photo end to end against in-memory fakes",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Directory searched recursively for PDFs')
+    parser.add_argument('-n', '--submissions', type=int, default=None,
+                        help='Submissions to replay, cycling through the PDFs (default: one per PDF)')
+    parser.add_argument('--photos', type=int, default=0, help='Synthetic photos per submission')
+    parser.add_argument('--photo-size', default='3000x2000', help='Synthetic photo size, WIDTHxHEIGHT')
+    parser.add_argument('--concurrency', type=int, default=4, help='Submissions processed concurrently')
+    parser.add_argument('--latency', action='append', metavar='SERVICE=MS',
+                        help=f"Latency added to every call ({', '.join(SERVICES)} or all); repeatable")
+    parser.add_argument('--error-rate', action='append', metavar='SERVICE=FRACTION',
+                        help='Fraction of calls failing with 429; repeatable')
+    parser.add_argument('--quota', action='append', metavar='SERVICE=PER_MINUTE',
+                        help='Requests per minute before the service answers 429; repeatable')
+    parser.add_argument('--retries', type=int, default=2, help='Redeliveries of a failed event')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for error injection')
+    parser.add_argument('--photo-batch', action='store_true',
+                        help="Batch mode: photos processed per submission from its completion marker")
+    parser.add_argument('--no-state-bucket', action='store_true',
+                        help='Run without STATE_BUCKET (sheet-scan IDs, direct appends, no ledger)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the summary as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show processor logs')
+    args = parser.parse_args()
+
+    pdf_paths = sorted(glob.glob(os.path.join(args.data_dir, '**', '*.pdf'), recursive=True))
+    if not pdf_paths:
+        print(f"✗ No PDFs found under {args.data_dir}")
+        sys.exit(1)
+    submissions = args.submissions or len(pdf_paths)
+
+    faults = Faults(
+        latency=parse_service_values(args.latency, scale=0.001),
+        error_rate=parse_service_values(args.error_rate),
+        quota={service: int(limit) for service, limit in parse_service_values(args.quota).items()},
+        seed=args.seed
+    )
+    google = FakeGoogle(faults)
+    root_folder_id = google.drive.add_folder('Awards Root')
+    google.secret_manager.secrets.update({
+        'bench-drive-folder': root_folder_id,
+        'bench-awards-sheet-id': SHEET_ID,
+        'awards-production-user-oauth-token': json.dumps(
+            {'refresh_token': 'x', 'client_id': 'x', 'client_secret': 'x'}),
+    })
+
+    # Processor configuration is read at import; explicit environment settings win
+    os.environ.setdefault('GCP_PROJECT_ID', 'bench-project')
+    os.environ.setdefault('DRIVE_FOLDER_SECRET', 'bench-drive-folder')
+    os.environ.setdefault('AWARDS_SHEET_ID_SECRET', 'bench-awards-sheet-id')
+    os.environ.setdefault('SUBMISSIONS_BUCKET', SUBMISSIONS_BUCKET)
+    os.environ['STATE_BUCKET'] = '' if args.no_state_bucket else STATE_BUCKET
+    os.environ.setdefault('RENDITIONS_BUCKET', RENDITIONS_BUCKET)
+    os.environ['PHOTO_BATCH'] = 'true' if args.photo_batch else ''
+    # Measure the pipeline, not the per-instance request budgets; set these to production values
+    # together with --quota to see the rate limiter at work
+    os.environ.setdefault('DRIVE_REQUESTS_PER_MINUTE', '1000000')
+    os.environ.setdefault('SHEETS_REQUESTS_PER_MINUTE', '1000000')
+
+    pdf_main = load_processor('pdf_processor_main', os.path.join(BACKEND_DIR, 'pdf-processor'), google)
+    # As 'main' and left on sys.path: batch workers are started by a forkserver,
+    # which imports the module by name to unpickle render_photo
+    photo_main = load_processor('main', os.path.join(BACKEND_DIR, 'photo-processor'), google)
+    sys.path.append(os.path.join(BACKEND_DIR, 'photo-processor'))
+    google.sheets.add_spreadsheet(SHEET_ID, [list(sys.modules['submission'].SHEET_COLUMNS)])
+
+    # Failed attempts are redelivered and reported below; tracebacks only with --verbose
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.CRITICAL)
+    collector = SpanCollector()
+    span_logger = logging.getLogger('tracing.spans')
+    span_logger.handlers = [collector]
+
+    # Stage the objects (setup calls are not counted)
+    submissions_bucket = google.storage.bucket(SUBMISSIONS_BUCKET)
+    photo_bytes = None
+    if args.photos:
+        width, height = (int(v) for v in args.photo_size.lower().split('x'))
+        photo_bytes = synthetic_photo(width, height)
+    jobs = []
+    pdf_bytes_total = 0
+    for i in range(submissions):
+        path = pdf_paths[i % len(pdf_paths)]
+        with open(path, 'rb') as f:
+            data = f.read()
+        pdf_bytes_total += len(data)
+        submission_id = f"bench-{i:05d}"
+        pdf_name = f"submissions/{YEAR}/{submission_id}/pdf/{os.path.basename(path)}"
+        submissions_bucket.put(pdf_name, data, 'application/pdf')
+        photo_names = []
+        for j in range(args.photos):
+            photo_name = f"submissions/{YEAR}/{submission_id}/photos/photo-{j + 1}.jpg"
+            submissions_bucket.put(photo_name, photo_bytes, 'image/jpeg')
+            photo_names.append(photo_name)
+        if args.photo_batch and args.photos:
+            # Written by the frontend once every file is uploaded
+            marker_name = f"submissions/{YEAR}/{submission_id}/{photo_main.COMPLETION_MARKER}"
+            submissions_bucket.put(marker_name, b'{}', 'application/json')
+            photo_names.append(marker_name)
+        jobs.append((submission_id, pdf_name, photo_names))
+
+    print(f"🔄 Replaying {submissions} submissions ({len(pdf_paths)} distinct PDFs, "
+          f"{args.photos} photo(s) each) with concurrency {args.concurrency}")
+    if args.photo_batch:
+        print(f"   Photo batch mode:      {photo_main.PHOTO_WORKERS} worker processes, "
+              f"{photo_main.PHOTO_IO_THREADS} I/O threads")
+    if faults.latency:
+        print("   Injected latency (ms): " + ', '.join(f"{s}={v * 1000:g}" for s, v in sorted(faults.latency.items())))
+    if faults.error_rate:
+        print("   Injected 429 rate:     " + ', '.join(f"{s}={v:g}" for s, v in sorted(faults.error_rate.items())))
+    if faults.quota:
+        print("   Quota (per minute):    " + ', '.join(f"{s}={v}" for s, v in sorted(faults.quota.items())))
+    print("=" * 72)
+
+    latencies = defaultdict(list)       # entry point -> seconds per delivery attempt
+    attempts = Counter()
+    failures = []
+    results_lock = threading.Lock()
+
+    def run_submission(job):
+        submission_id, pdf_name, photo_names = job
+        events = [('process_pdf', pdf_main.process_pdf, pdf_name)]
+        events += [('process_photo', photo_main.process_photo, name) for name in photo_names]
+        for label, entry_point, name in events:
+            taken, ok, error = deliver(entry_point, SUBMISSIONS_BUCKET, name, args.retries)
+            with results_lock:
+                latencies[label].extend(taken)
+                attempts[label] += len(taken)
+                if not ok:
+                    failures.append((label, name, error))
+            if not ok and label == 'process_pdf':
+                return  # Photos need the project folder
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run_submission, jobs))
+    processing_seconds = time.perf_counter() - started
+
+    flush_seconds = 0.0
+    if not args.no_state_bucket:
+        flush_started = time.perf_counter()
+        for _ in range(args.retries + 1):
+            try:
+                pdf_main.flush_sheet_rows(SimpleNamespace(args={'force': '1'}))
+                break
+            except Exception as e:
+                failures.append(('flush_sheet_rows', '', e))
+        flush_seconds = time.perf_counter() - flush_started
+    wall_seconds = time.perf_counter() - started
+
+    # ── Checks ──────────────────────────────────────────────────────
+    sheet_rows = google.sheets.rows(SHEET_ID)[1:]
+    awards_column = sys.modules['submission'].SHEET_COLUMNS.index('Awards ID')
+    awards_ids = [row[awards_column] for row in sheet_rows if len(row) > awards_column]
+    uploaded = [f for f in google.drive.files_by_id.values() if 'size' in f]
+    pdf_failures = {name for label, name, _ in failures if label == 'process_pdf'}
+    # Photos belong in Project/Photos next to their submission's PDF
+    folders = google.drive.files_by_id
+    pdfs_per_project = Counter(f['parents'][0] for f in uploaded if f['name'].lower().endswith('.pdf'))
+    photos_per_project = Counter(folders[f['parents'][0]]['parents'][0]
+                                 for f in uploaded if not f['name'].lower().endswith('.pdf'))
+    misrouted_photos = sum(abs(photos_per_project[project] - pdfs * args.photos)
+                           for project, pdfs in pdfs_per_project.items()) // 2
+    expected_rows = submissions - len(pdf_failures)
+    renditions_bucket = os.environ['RENDITIONS_BUCKET']
+    renditions = len(google.storage.bucket(renditions_bucket).names()) if renditions_bucket else 0
+    photo_uploads = sum(photos_per_project.values())
+    expected_renditions = photo_uploads * (len(photo_main.RENDITIONS) + 1) if renditions_bucket else 0
+
+    # ── Report ──────────────────────────────────────────────────────
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    summary = {
+        'submissions': submissions,
+        'photos_per_submission': args.photos,
+        'photo_batch': args.photo_batch,
+        'concurrency': args.concurrency,
+        'state_bucket': not args.no_state_bucket,
+        'latency_ms': {s: v * 1000 for s, v in faults.latency.items()},
+        'error_rate': faults.error_rate,
+        'wall_seconds': round(wall_seconds, 3),
+        'processing_seconds': round(processing_seconds, 3),
+        'flush_seconds': round(flush_seconds, 3),
+        'submissions_per_second': round(submissions / wall_seconds, 2),
+        'pdf_mb_per_second': round(pdf_bytes_total / 1024 / 1024 / wall_seconds, 2),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'latency': {},
+        'stages': {},
+        'api_calls_per_submission': {},
+        'api_calls_by_method': {f"{service}.{method}": count for (service, method), count in sorted(faults.calls.items())},
+        'injected_429s': sum(faults.errors.values()),
+        'throttled': sum(faults.throttled.values()),
+        'delivery_attempts': dict(attempts),
+        'failed_events': len(failures),
+        'sheet_rows': len(sheet_rows),
+        'distinct_awards_ids': len(set(awards_ids)),
+        'drive_uploads': len(uploaded),
+        'misrouted_photos': misrouted_photos,
+        'renditions': renditions,
+    }
+
+    print(f"Wall time:            {wall_seconds:.2f}s (processing {processing_seconds:.2f}s, "
+          f"final sheet flush {flush_seconds:.2f}s)")
+    print(f"Throughput:           {summary['submissions_per_second']:.2f} submissions/s, "
+          f"{summary['pdf_mb_per_second']:.2f} MB/s of PDF")
+    print(f"Peak RSS:             {peak_rss_mb:.1f} MB")
+
+    print(f"\n{'Entry point':<16} {'Attempts':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for label, values in sorted(latencies.items()):
+        stats = {'p50_ms': percentile(values, 50) * 1000, 'p95_ms': percentile(values, 95) * 1000,
+                 'max_ms': max(values) * 1000}
+        summary['latency'][label] = {k: round(v, 1) for k, v in stats.items()}
+        print(f"{label:<16} {attempts[label]:>8} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+    by_stage = defaultdict(list)
+    for span in collector.spans:
+        if span.get('span') != 'invocation':
+            by_stage[(span['function'], span['span'])].append(span['duration_ms'])
+    print(f"\n{'Stage':<30} {'Count':>7} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9}")
+    for (function, stage), values in sorted(by_stage.items(), key=lambda item: -sum(item[1])):
+        key = f"{function}.{stage}"
+        summary['stages'][key] = {'count': len(values), 'p50_ms': percentile(values, 50),
+                                  'p95_ms': percentile(values, 95), 'total_s': round(sum(values) / 1000, 3)}
+        print(f"{key:<30} {len(values):>7} {percentile(values, 50):>9.1f} {percentile(values, 95):>9.1f} "
+              f"{sum(values) / 1000:>9.2f}")
+
+    print(f"\n{'API calls per submission':<30} {'calls':>9}")
+    for service, count in sorted(faults.by_service().items()):
+        summary['api_calls_per_submission'][service] = round(count / submissions, 2)
+        print(f"{service:<30} {count / submissions:>9.2f}")
+    for (service, method), count in sorted(faults.calls.items()):
+        print(f"  {service + '.' + method:<28} {count / submissions:>9.2f}")
+    if faults.errors:
+        print(f"Injected 429s:        {summary['injected_429s']} ({summary['throttled']} over quota)")
+
+    print("\nChecks")
+    ok = True
+    if failures:
+        ok = False
+        print(f"✗ {len(failures)} event(s) still failing after {args.retries} redeliveries")
+        for label, name, error in failures[:5]:
+            print(f"   {label} {name}: {error}")
+    if len(sheet_rows) != expected_rows:
+        ok = False
+        print(f"✗ Sheet has {len(sheet_rows)} rows, expected {expected_rows}")
+    if len(set(awards_ids)) != len(awards_ids):
+        ok = False
+        print(f"✗ Duplicate Awards IDs: {len(awards_ids) - len(set(awards_ids))}")
+    if misrouted_photos and not failures:
+        ok = False
+        print(f"✗ {misrouted_photos} photo(s) uploaded to another submission's project folder")
+    if renditions != expected_renditions and not failures:
+        ok = False
+        print(f"✗ {renditions} photo renditions written, expected {expected_renditions}")
+    if ok:
+        print(f"✓ {len(sheet_rows)} sheet rows, {len(set(awards_ids))} distinct Awards IDs, "
+              f"{len(uploaded)} Drive uploads, {renditions} photo renditions")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Wrote summary to {args.json}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
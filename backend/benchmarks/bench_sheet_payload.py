@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Payload and read-latency benchmark for full reads of the awards sheet.
+
+Builds an awards sheet of --rows submissions from the sample PDFs, once
+with the narrative answers in full (as without a state bucket) and once
+with --excerpt-chars excerpts (the full text in the narrative store, see
+narratives.py). Each version is served from a local HTTP server standing
+in for the Sheets API, and the code that reads Sheet1!A:ZZ runs against it
+through a real discovery client:
+
+- find_highest_awards_number  (pdf-processor: Awards ID seed without a store)
+- get_sheet_data              (scripts/mark-winner.py)
+- get_winners                 (scripts/export-winners-teams.py)
+
+--mbps limits the server's send rate (a full-sheet read from Google is
+bandwidth-bound). Reported per version: the response size, raw and gzipped
+(Google compresses responses), and p50/p95 latency per operation.
+
+Usage:
+    python bench_sheet_payload.py
+    python bench_sheet_payload.py --rows 10000 --mbps 20
+    python bench_sheet_payload.py --excerpt-chars 60 --json payload.json
+"""
+
+import argparse
+import contextlib
+import glob
+import gzip
+import importlib.util
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, '..')
+SCRIPTS_DIR = os.path.join(BACKEND_DIR, '..', 'scripts')
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'pdf-processor'))
+
+from bench_pipeline import DEFAULT_DATA_DIR, percentile  # noqa: E402
+from bench_transport import FakeGoogleApiServer, build_sheets  # noqa: E402
+import google_api  # noqa: E402
+import http_pool  # noqa: E402
+from submission import NARRATIVE_COLUMNS, SHEET_COLUMNS, extract_pdf_fields, format_submission_row  # noqa: E402
+
+YEAR = '2025'
+SUBMISSIONS_PER_YEAR = 1000
+
+
+def load_module(name: str, path: str):
+    """Import a module from a file path (main.py, hyphen-named scripts)."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_rows(fields: list, count: int, excerpt_chars=None) -> list:
+    """Header plus `count` submission rows, newest year last, every 20th a winner."""
+    rows = [list(SHEET_COLUMNS)]
+    years = (count - 1) // SUBMISSIONS_PER_YEAR + 1
+    for i in range(count):
+        year = int(YEAR) - years + 1 + i // SUBMISSIONS_PER_YEAR
+        rows.append(format_submission_row(
+            fields[i % len(fields)], f"payload-{i:06d}", f"https://drive.google.com/file/d/payload-{i}/view",
+            f"folder-{i}", f"AW-{year}-{i % SUBMISSIONS_PER_YEAR + 1:03d}",
+            submitted_at='2025-01-01T00:00:00',
+            status='winner' if i % 20 == 0 else 'pending',
+            winner_category='Project of the Year' if i % 20 == 0 else '',
+            excerpt_chars=excerpt_chars
+        ))
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure full-sheet read payloads and latency with and without narrative excerpts",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--rows', type=int, default=3000, help='Submissions in the sheet (1000 a year)')
+    parser.add_argument('--excerpt-chars', type=int, default=120,
+                        help='Narrative excerpt length (NARRATIVE_EXCERPT_CHARS)')
+    parser.add_argument('--reads', type=int, default=5, help='Reads per operation')
+    parser.add_argument('--mbps', type=float, default=50, help='Server send rate in Mbit/s (0: unlimited)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Delay on every request')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Sample PDFs to build rows from')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    fields = []
+    for path in sorted(glob.glob(os.path.join(args.data_dir, '**', '*.pdf'), recursive=True)):
+        with open(path, 'rb') as f:
+            extracted = extract_pdf_fields(f.read())
+        if '_error' not in extracted:
+            fields.append(extracted)
+    if not fields:
+        print(f"✗ No sample PDFs found under {args.data_dir}")
+        sys.exit(1)
+
+    pdf_main = load_module('pdf_processor_main', os.path.join(BACKEND_DIR, 'pdf-processor', 'main.py'))
+    mark_winner = load_module('mark_winner', os.path.join(SCRIPTS_DIR, 'mark-winner.py'))
+    export_teams = load_module('export_winners_teams', os.path.join(SCRIPTS_DIR, 'export-winners-teams.py'))
+    logging.getLogger().setLevel(logging.CRITICAL)
+    google_api.configure('sheets', requests_per_minute=1e9, burst=10 ** 6)
+
+    operations = {
+        'find_highest_awards_number': lambda service: pdf_main.find_highest_awards_number(service, 'bench', YEAR),
+        'get_sheet_data': lambda service: mark_winner.get_sheet_data(service, 'bench'),
+        'get_winners': lambda service: export_teams.get_winners(service, 'bench', YEAR),
+    }
+
+    print(f"🔄 {args.rows} submissions, {args.reads} reads per operation, "
+          f"{args.mbps:g} Mbit/s, {args.latency_ms:g} ms latency")
+    print("=" * 72)
+
+    results = {}
+    for label, excerpt_chars in (('full', None), (f"excerpt {args.excerpt_chars}", args.excerpt_chars)):
+        rows = build_rows(fields, args.rows, excerpt_chars)
+        body = json.dumps({'range': 'Sheet1!A1:BH', 'majorDimension': 'ROWS', 'values': rows}).encode()
+        server = FakeGoogleApiServer(0, args.latency_ms / 1000, body,
+                                     args.mbps * 1e6 / 8 if args.mbps else None)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        service = build_sheets(server.endpoint, http_pool.PooledHttp(http_pool.get_pool()))
+
+        result = {'bytes': len(body), 'gzip_bytes': len(gzip.compress(body, 6)), 'operations': {}, 'answers': {}}
+        for name, operation in operations.items():
+            timings = []
+            for _ in range(args.reads):
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    answer = operation(service)
+                timings.append(time.perf_counter() - started)
+            # What the caller gets out of the read, which excerpts must not change
+            result['answers'][name] = answer if isinstance(answer, int) else len(answer)
+            result['operations'][name] = {
+                'p50_ms': round(percentile(timings, 50) * 1000, 1),
+                'p95_ms': round(percentile(timings, 95) * 1000, 1),
+            }
+        server.shutdown()
+        results[label] = result
+
+    full, excerpted = results.values()
+    print(f"{'':<30}{'full':>14}{'excerpted':>14}{'ratio':>10}")
+    print(f"{'response KB':<30}{full['bytes'] / 1024:>14.0f}{excerpted['bytes'] / 1024:>14.0f}"
+          f"{full['bytes'] / excerpted['bytes']:>9.1f}x")
+    print(f"{'response KB (gzip)':<30}{full['gzip_bytes'] / 1024:>14.0f}{excerpted['gzip_bytes'] / 1024:>14.0f}"
+          f"{full['gzip_bytes'] / excerpted['gzip_bytes']:>9.1f}x")
+    for name in operations:
+        before, after = full['operations'][name]['p50_ms'], excerpted['operations'][name]['p50_ms']
+        print(f"{name + ' p50 ms':<30}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+    sizes = {}
+    for label, excerpt_chars in (('full', None), ('excerpt', args.excerpt_chars)):
+        rows = build_rows(fields, min(args.rows, len(fields)), excerpt_chars)[1:]
+        sizes[label] = sum(len(json.dumps([row[c] for c in NARRATIVE_COLUMNS])) for row in rows)
+    print(f"{'narrative cells only':<30}{'':>28}{sizes['full'] / sizes['excerpt']:>9.1f}x")
+
+    print("\nChecks")
+    if full['answers'] == excerpted['answers']:
+        print(f"✓ Same answers from both sheets: {full['answers']}")
+    else:
+        print(f"✗ Answers differ: full {full['answers']}, excerpted {excerpted['answers']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results,
+                       'narrative_ratio': round(sizes['full'] / sizes['excerpt'], 2)}, f, indent=2)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
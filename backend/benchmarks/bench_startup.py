@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Cloud Functions.
+
+Each run starts a fresh interpreter under `python -X importtime`, as a new
+instance would, and measures:
+
+- framework:  importing functions_framework, which the runtime loads
+              before our source (reported, not part of cold start)
+- import:     importing the function's main.py
+- libraries:  loading the Google client libraries that the first request
+              would otherwise load (see below)
+- first:      the first invocation
+- warm:       a second invocation in the same process
+
+cold start = import + libraries + first.
+
+The function talks to the in-memory stand-ins from fakes.py. Installing
+them has to import google.cloud.storage, secretmanager and
+googleapiclient.discovery to patch them. That is done after main.py is
+imported, so the import phase is measured clean. The libraries phase is
+what main.py defers to its first invocation, and it is counted in cold
+start.
+
+The -X importtime log of the first run is split by phase. The modules with
+the largest cumulative import time are listed for each phase, which shows
+what to make lazy next.
+
+Usage:
+    python bench_startup.py                          # both functions, 5 cold starts each
+    python bench_startup.py --function pdf --runs 10
+    python bench_startup.py --top 20                 # longer import breakdown
+    python bench_startup.py --json startup.json      # machine-readable summary
+    python bench_startup.py --baseline startup.json  # compare with an earlier --json run
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, '..')
+FUNCTIONS = {'pdf': 'pdf-processor', 'photo': 'photo-processor'}
+PHASES = ('framework', 'import', 'libraries', 'first', 'warm')
+METRICS = ('import', 'libraries', 'first', 'warm', 'cold')
+MARKER = '# bench-startup phase: '
+
+SUBMISSIONS_BUCKET = 'bench-submissions'
+STATE_BUCKET = 'bench-state'
+SHEET_ID = 'bench-sheet'
+YEAR = '2025'
+
+
+# ── Child: one cold start ───────────────────────────────────────────
+
+def phase(name: str):
+    """Mark the start of a phase in the -X importtime log (written to stderr)."""
+    sys.stderr.write(f"{MARKER}{name}\n")
+    sys.stderr.flush()
+
+
+def run_child(function: str, input_path: str):
+    """Cold-start one function in this (fresh) interpreter and print timings as JSON."""
+    import importlib.util
+    from types import SimpleNamespace
+
+    os.environ.update({
+        'GCP_PROJECT_ID': 'bench-project',
+        'DRIVE_FOLDER_SECRET': 'bench-drive-folder',
+        'AWARDS_SHEET_ID_SECRET': 'bench-awards-sheet-id',
+        'SUBMISSIONS_BUCKET': SUBMISSIONS_BUCKET,
+        'STATE_BUCKET': STATE_BUCKET,
+        'RENDITIONS_BUCKET': 'bench-renditions',
+        'DRIVE_REQUESTS_PER_MINUTE': '1000000',
+        'SHEETS_REQUESTS_PER_MINUTE': '1000000',
+    })
+    with open(input_path, 'rb') as f:
+        data = f.read()
+
+    timings = {}
+    phase('framework')
+    started = time.perf_counter()
+    importlib.import_module('functions_framework')
+    timings['framework'] = time.perf_counter() - started
+
+    sys.path.insert(0, BENCH_DIR)
+    # Used by install(); loaded now so it counts as harness cost, not ours
+    importlib.import_module('unittest.mock')
+
+    from fakes import FakeGoogle
+
+    google = FakeGoogle()
+    root_folder_id = google.drive.add_folder('Awards Root')
+    google.secret_manager.secrets.update({
+        'bench-drive-folder': root_folder_id,
+        'bench-awards-sheet-id': SHEET_ID,
+        'awards-production-user-oauth-token': json.dumps(
+            {'refresh_token': 'x', 'client_id': 'x', 'client_secret': 'x'}),
+    })
+
+    directory = os.path.join(BACKEND_DIR, FUNCTIONS[function])
+    sys.path.insert(0, directory)
+    phase('import')
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('main', os.path.join(directory, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['main'] = module
+    spec.loader.exec_module(module)
+    timings['import'] = time.perf_counter() - started
+
+    phase('libraries')
+    started = time.perf_counter()
+    google.install()
+    timings['libraries'] = time.perf_counter() - started
+    # No OAuth token is needed by the fakes
+    module.get_user_credentials = lambda: None
+
+    bucket = google.storage.bucket(SUBMISSIONS_BUCKET)
+    if function == 'pdf':
+        google.sheets.add_spreadsheet(SHEET_ID, [['Awards ID']])
+        entry_point = module.process_pdf
+        names = [f"submissions/{YEAR}/startup-{i}/pdf/{os.path.basename(input_path)}" for i in (1, 2)]
+        content_type = 'application/pdf'
+    else:
+        year_folder_id = google.drive.add_folder(YEAR, root_folder_id)
+        project_folder_id = google.drive.add_folder('Startup Project', year_folder_id)
+        # As stamped by pdf-processor
+        google.drive.files_by_id[project_folder_id]['appProperties'] = {'submission_id': 'startup-1'}
+        entry_point = module.process_photo
+        names = [f"submissions/{YEAR}/startup-1/photos/photo-{i}.jpg" for i in (1, 2)]
+        content_type = 'image/jpeg'
+    for name in names:
+        bucket.put(name, data, content_type)
+
+    for label, name in zip(('first', 'warm'), names):
+        phase(label)
+        started = time.perf_counter()
+        entry_point(SimpleNamespace(data={'bucket': SUBMISSIONS_BUCKET, 'name': name}))
+        timings[label] = time.perf_counter() - started
+
+    phase('done')
+    print(json.dumps({key: round(value * 1000, 2) for key, value in timings.items()}))
+
+
+# ── Parent: drive the runs and report ───────────────────────────────
+
+def parse_importtime(log: str, top: int) -> Dict[str, List[Tuple[str, float]]]:
+    """Top-level imports per phase, by cumulative milliseconds, largest first."""
+    per_phase = {name: [] for name in PHASES}
+    current = None
+    for line in log.splitlines():
+        if line.startswith(MARKER):
+            current = line[len(MARKER):].strip()
+            continue
+        if current not in per_phase or not line.startswith('import time:'):
+            continue
+        try:
+            _, cumulative, name = line[len('import time:'):].split('|', 2)
+            cumulative_us = int(cumulative)
+        except ValueError:
+            continue  # The header line
+        # Nested imports are indented by two spaces per level below the first
+        if len(name) - len(name.lstrip()) <= 1:
+            per_phase[current].append((name.strip(), cumulative_us / 1000))
+    return {name: sorted(entries, key=lambda e: -e[1])[:top] for name, entries in per_phase.items()}
+
+
+def make_input(function: str, workdir: str) -> str:
+    """Write the object the function processes: a sample PDF or a synthetic photo."""
+    if function == 'pdf':
+        data_dir = os.path.join(BACKEND_DIR, '..', '2025-11-11_UCD_Winner_Formatting', 'data')
+        paths = sorted(glob.glob(os.path.join(data_dir, '**', '*.pdf'), recursive=True))
+        if not paths:
+            print(f"✗ No PDFs found under {data_dir}")
+            sys.exit(1)
+        return paths[0]
+
+    # Generated here, not in the child, so the child does not import Pillow early
+    from bench_pipeline import synthetic_photo
+
+    path = os.path.join(workdir, 'photo.jpg')
+    with open(path, 'wb') as f:
+        f.write(synthetic_photo(3000, 2000))
+    return path
+
+
+def cold_start(function: str, input_path: str) -> Tuple[Dict[str, float], str]:
+    """One cold start in a new interpreter. Returns (timings in ms, importtime log)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', function, input_path],
+        capture_output=True, text=True, cwd=BENCH_DIR
+    )
+    if result.returncode != 0:
+        print(f"✗ {function} cold start failed:")
+        print(result.stderr[-3000:])
+        sys.exit(1)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['cold'] = timings['import'] + timings['libraries'] + timings['first']
+    return timings, result.stderr
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure import and first-invocation time of the Cloud Functions",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--function', choices=sorted(FUNCTIONS), action='append',
+                        help='Function to measure; repeatable (default: all)')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts per function')
+    parser.add_argument('--top', type=int, default=8, help='Imports listed per phase')
+    parser.add_argument('--json', metavar='PATH', help='Also write the summary as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='Earlier --json output to compare with')
+    parser.add_argument('--child', nargs=2, metavar=('FUNCTION', 'INPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('functions', {})
+
+    summary = {'python': sys.version.split()[0], 'runs': args.runs, 'functions': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for function in args.function or sorted(FUNCTIONS):
+            input_path = make_input(function, workdir)
+            print(f"🔄 {FUNCTIONS[function]}: {args.runs} cold starts")
+            runs = []
+            imports = {}
+            for i in range(args.runs):
+                timings, log = cold_start(function, input_path)
+                runs.append(timings)
+                if i == 0:
+                    imports = parse_importtime(log, args.top)
+
+            medians = {key: statistics.median(run[key] for run in runs) for key in ('framework',) + METRICS}
+            print("=" * 72)
+            print(f"{'':<12}{'median ms':>12}{'min':>10}{'max':>10}{'baseline':>12}{'change':>10}")
+            for key in METRICS:
+                values = [run[key] for run in runs]
+                line = f"{key:<12}{medians[key]:>12.1f}{min(values):>10.1f}{max(values):>10.1f}"
+                before = baseline.get(function, {}).get('median_ms', {}).get(key)
+                if before:
+                    line += f"{before:>12.1f}{(medians[key] - before) / before * 100:>+9.0f}%"
+                print(line)
+            print(f"(functions_framework, loaded by the runtime first: {medians['framework']:.1f} ms)")
+
+            for name in ('import', 'libraries', 'first'):
+                if imports.get(name):
+                    print(f"\n  Slowest imports during {name} (cumulative ms, first run):")
+                    for module, ms in imports[name]:
+                        print(f"    {ms:>8.1f}  {module}")
+            print()
+
+            summary['functions'][function] = {
+                'median_ms': {key: round(value, 2) for key, value in medians.items()},
+                'runs': runs,
+                'slowest_imports': {name: [[module, round(ms, 2)] for module, ms in entries]
+                                    for name, entries in imports.items() if entries},
+            }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Connection reuse benchmark for the Drive/Sheets transport.
+
+Real discovery clients (googleapiclient, bundled Sheets v4 document) send
+spreadsheets.values.get requests to a local HTTP/1.1 server standing in
+for www.googleapis.com. The server counts the connections it accepts. It
+sleeps --handshake-ms on each new one, the cost a TCP connect plus TLS
+handshake adds to Google's APIs, and --latency-ms on every request.
+
+Transports compared:
+- fresh:      a new client (and connection) for every request, as with a
+              client built per event or after every reset
+- per-thread: one client per worker thread, the best case without sharing
+- pooled:     one client on http_pool.PooledHttp, shared by all threads,
+              borrowing keep-alive connections from the pool
+
+Reported per transport: throughput, p50/p95 latency, connections opened,
+reuse rate (1 - connections / requests) and, for pooled, the pool's own
+counters, which should match the server's. The fresh transport's latency
+includes building the client, which is part of what a per-request client
+costs.
+
+Usage:
+    python bench_transport.py
+    python bench_transport.py --requests 1000 --threads 16 --handshake-ms 60
+    python bench_transport.py --transport pooled --pool-size 4   # fewer idle connections than threads
+    python bench_transport.py --json transport.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'pdf-processor'))
+
+from bench_pipeline import percentile  # noqa: E402
+import http_pool  # noqa: E402
+
+TRANSPORTS = ('fresh', 'per-thread', 'pooled')
+
+
+EMPTY_RANGE = json.dumps({'range': 'Sheet1!A1:A1', 'majorDimension': 'ROWS', 'values': []}).encode()
+
+
+class FakeGoogleApiServer(ThreadingHTTPServer):
+    """Keep-alive HTTP server that answers every request with the same JSON body (an empty values range by default)."""
+
+    daemon_threads = True
+
+    def __init__(self, handshake: float, latency: float, body: bytes = EMPTY_RANGE,
+                 bytes_per_second: float = None):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.handshake = handshake
+        self.latency = latency
+        self.body = body
+        # Simulated download bandwidth; None sends at loopback speed
+        self.bytes_per_second = bytes_per_second
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def reset(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake)
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.requests += 1
+        body = self.server.body
+        delay = self.server.latency
+        if self.server.bytes_per_second:
+            delay += len(body) / self.server.bytes_per_second
+        time.sleep(delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_sheets(endpoint: str, http):
+    """A Sheets v4 client from the bundled discovery document, pointed at the local server."""
+    from googleapiclient.discovery import build
+
+    return build('sheets', 'v4', http=http, static_discovery=True, cache_discovery=False,
+                 client_options={'api_endpoint': endpoint})
+
+
+def run_transport(transport: str, server: FakeGoogleApiServer, requests: int, threads: int,
+                  pool_size: int) -> dict:
+    """Send `requests` values.get calls on `threads` threads; return the measurements."""
+    from googleapiclient.http import build_http
+
+    server.reset()
+    pool = http_pool.configure(max_idle=pool_size) if transport == 'pooled' else None
+    shared = build_sheets(server.endpoint, http_pool.PooledHttp(pool)).spreadsheets().values() if pool else None
+    local = threading.local()
+
+    # Resource objects are built once per client: googleapiclient regenerates a
+    # collection's methods on every spreadsheets().values() call, which is CPU
+    # cost this benchmark isn't about
+    def values():
+        if transport == 'pooled':
+            return shared
+        if transport == 'fresh':
+            return build_sheets(server.endpoint, build_http()).spreadsheets().values()
+        if not hasattr(local, 'values'):
+            local.values = build_sheets(server.endpoint, build_http()).spreadsheets().values()
+        return local.values
+
+    def one(i):
+        started = time.perf_counter()
+        values().get(spreadsheetId='bench-sheet', range='Sheet1!A1:A1').execute()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    result = {
+        'transport': transport,
+        'requests': server.requests,
+        'connections': server.connections,
+        'reuse_rate': round(1 - server.connections / server.requests, 4),
+        'wall_seconds': round(wall, 3),
+        'requests_per_second': round(requests / wall, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+    }
+    if pool:
+        result['pool'] = pool.stats()
+    return result
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compare connection reuse of the Drive/Sheets transports against a local server",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--transport', choices=TRANSPORTS, action='append',
+                        help='Transport to measure; repeatable (default: all)')
+    parser.add_argument('--requests', type=int, default=400, help='Requests per transport')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent requests')
+    parser.add_argument('--handshake-ms', type=float, default=40,
+                        help='Delay on each new connection (TCP + TLS handshake)')
+    parser.add_argument('--latency-ms', type=float, default=5, help='Delay on every request')
+    parser.add_argument('--pool-size', type=int, default=8, help='Idle connections the pool keeps')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    server = FakeGoogleApiServer(args.handshake_ms / 1000, args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"🔄 {args.requests} values.get requests per transport on {args.threads} threads "
+          f"(handshake {args.handshake_ms:g} ms, latency {args.latency_ms:g} ms)")
+    print("=" * 72)
+    print(f"{'Transport':<12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'conns':>8}{'reuse':>9}")
+
+    results = []
+    for transport in args.transport or TRANSPORTS:
+        result = run_transport(transport, server, args.requests, args.threads, args.pool_size)
+        results.append(result)
+        print(f"{transport:<12}{result['requests_per_second']:>9.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p95_ms']:>9.1f}{result['connections']:>8}{result['reuse_rate']:>9.1%}")
+    server.shutdown()
+
+    print("\nChecks")
+    ok = True
+    for result in results:
+        pool = result.get('pool')
+        if pool and pool['connections_opened'] != result['connections']:
+            ok = False
+            print(f"✗ Pool counted {pool['connections_opened']} connections, server accepted {result['connections']}")
+        if result['requests'] != args.requests:
+            ok = False
+            print(f"✗ {result['transport']}: server saw {result['requests']} of {args.requests} requests")
+    if ok:
+        print("✓ Every request answered; pool connection counts match the server")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
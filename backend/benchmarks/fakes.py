@@ -0,0 +1,759 @@
+"""
+In-memory stand-ins for the Google services the processors call.
+
+The benchmarks use these to run the real Cloud Function entry points
+offline. Each stand-in covers only the calls the processors make:
+
+- FakeStorageClient: buckets and blobs with generations and
+  if_generation_match preconditions, plus ranged reads through blob.open()
+- FakeSecretManagerClient: access_secret_version()
+- FakeDrive: files().list() for the q expressions we build,
+  files().create() with or without media, and files().update() of metadata
+- FakeSheets: spreadsheets().get() and batchUpdate() (addSheet), and
+  values().get(), append(), update(), clear() and batchUpdate()
+
+Every API request goes through a Faults instance. It counts calls per
+service and method, sleeps for the service's injected latency, and fails
+the way the real client would:
+- randomly, with 429 at the configured error rate
+- when a per-minute quota is used up (429, like Sheets' 60 requests per
+  minute per user)
+- with scripted statuses queued by Faults.fail_next()
+
+FakeGoogle.install() (or the patch() context manager) puts the stand-ins
+in place of storage.Client, SecretManagerServiceClient and
+googleapiclient.discovery.build. The processors create their clients on
+first use, so keep the fakes installed while driving them, not just while
+importing.
+"""
+import hashlib
+import io
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+SERVICES = ('gcs', 'secrets', 'drive', 'sheets')
+
+
+def http_error(service: str, status: int, message: Optional[str] = None) -> Exception:
+    """The exception a real client raises for an HTTP error status on this service."""
+    message = message or ('Rate Limit Exceeded' if status == 429 else f"HTTP {status}")
+    if service in ('drive', 'sheets'):
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        content = json.dumps({'error': {'code': status, 'message': message}}).encode()
+        return HttpError(httplib2.Response({'status': status}), content)
+
+    from google.api_core.exceptions import from_http_status
+    return from_http_status(status, f"{service}: {message}")
+
+
+class Faults:
+    """Per-service latency, quotas and failure injection, plus API call counters."""
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None,
+                 error_rate: Optional[Dict[str, float]] = None,
+                 quota: Optional[Dict[str, int]] = None, quota_window: float = 60.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            latency: Seconds added to every call, by service
+            error_rate: Fraction of calls that fail with 429, by service
+            quota: Requests allowed per quota_window, by service; requests
+                over quota fail with 429 and do not use up quota
+            quota_window: Quota window in seconds (shorten it to compress
+                a long run; the real APIs use one minute)
+            seed: Seed for the error injection RNG (reproducible runs)
+        """
+        self.latency = dict(latency or {})
+        self.error_rate = dict(error_rate or {})
+        self.quota = dict(quota or {})
+        self.quota_window = quota_window
+        self.calls = Counter()      # (service, method) -> calls
+        self.errors = Counter()     # (service, method) -> injected failures (all causes)
+        self.throttled = Counter()  # (service, method) -> failures from quota exhaustion
+        self._windows = {}          # service -> deque of request times inside the window
+        self._scripted = {}         # service -> deque of statuses to fail with next
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fail_next(self, service: str, *statuses: int):
+        """Make the next len(statuses) requests to service fail with these HTTP statuses."""
+        with self._lock:
+            self._scripted.setdefault(service, deque()).extend(statuses)
+
+    def _over_quota(self, service: str, count: int) -> bool:
+        limit = self.quota.get(service)
+        if limit is None:
+            return False
+        now = time.monotonic()
+        window = self._windows.setdefault(service, deque())
+        while window and window[0] <= now - self.quota_window:
+            window.popleft()
+        if len(window) + count > limit:
+            return True
+        window.extend([now] * count)
+        return False
+
+    def call(self, service: str, method: str, count: int = 1):
+        """Account for `count` API requests; sleep and maybe raise like the real service."""
+        with self._lock:
+            self.calls[(service, method)] += count
+            status = None
+            scripted = self._scripted.get(service)
+            if scripted:
+                status = scripted.popleft()
+            elif self._over_quota(service, count):
+                status = 429
+                self.throttled[(service, method)] += 1
+            elif self._random.random() < self.error_rate.get(service, 0.0):
+                status = 429
+            if status is not None:
+                self.errors[(service, method)] += 1
+
+        delay = self.latency.get(service, 0.0)
+        if delay:
+            time.sleep(delay * count)
+        if status is not None:
+            raise http_error(service, status)
+
+    def by_service(self, counter: Optional[Counter] = None) -> Counter:
+        totals = Counter()
+        for (service, _), count in (counter if counter is not None else self.calls).items():
+            totals[service] += count
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+            self.throttled.clear()
+            self._windows.clear()
+            self._scripted.clear()
+
+
+# ── Cloud Storage ───────────────────────────────────────────────────
+
+class FakeStorageClient:
+    """storage.Client stand-in; buckets are created on first use."""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name: str) -> 'FakeBucket':
+        with self._lock:
+            if name not in self._buckets:
+                self._buckets[name] = FakeBucket(name, self.faults)
+            return self._buckets[name]
+
+    def list_blobs(self, bucket_name: str, prefix: str = ''):
+        return self.bucket(bucket_name).list_blobs(prefix=prefix)
+
+
+class FakeBucket:
+    def __init__(self, name: str, faults: Faults):
+        self.name = name
+        self.faults = faults
+        self._objects = {}  # name -> (data, generation, content_type)
+        self._generations = itertools.count(1_000_000)
+        self._lock = threading.Lock()
+
+    def blob(self, name: str) -> 'FakeBlob':
+        return FakeBlob(self, name)
+
+    def list_blobs(self, prefix: str = ''):
+        self.faults.call('gcs', 'list')
+        with self._lock:
+            names = sorted(name for name in self._objects if name.startswith(prefix))
+            return [self._loaded_blob(name) for name in names]
+
+    def put(self, name: str, data: bytes, content_type: str = 'application/octet-stream') -> int:
+        """Store an object without counting an API call (test setup)."""
+        with self._lock:
+            generation = next(self._generations)
+            self._objects[name] = (data, generation, content_type)
+            return generation
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Read an object without counting an API call (test checks)."""
+        with self._lock:
+            entry = self._objects.get(name)
+            return entry[0] if entry else None
+
+    def names(self, prefix: str = '') -> List[str]:
+        with self._lock:
+            return sorted(name for name in self._objects if name.startswith(prefix))
+
+    def _loaded_blob(self, name: str) -> 'FakeBlob':
+        blob = FakeBlob(self, name)
+        data, blob.generation, blob.content_type = self._objects[name]
+        blob.size = len(data)
+        return blob
+
+
+class FakeBlob:
+    def __init__(self, bucket: FakeBucket, name: str):
+        self.bucket = bucket
+        self.name = name
+        self.generation = None
+        self.size = None
+        self.content_type = None
+
+    def _entry(self):
+        from google.api_core.exceptions import NotFound
+
+        entry = self.bucket._objects.get(self.name)
+        if entry is None:
+            raise NotFound(f"gs://{self.bucket.name}/{self.name}")
+        return entry
+
+    def exists(self) -> bool:
+        self.bucket.faults.call('gcs', 'exists')
+        with self.bucket._lock:
+            return self.name in self.bucket._objects
+
+    def reload(self):
+        self.bucket.faults.call('gcs', 'reload')
+        with self.bucket._lock:
+            data, self.generation, self.content_type = self._entry()
+        self.size = len(data)
+
+    def download_as_bytes(self, start: Optional[int] = None, end: Optional[int] = None, **kwargs) -> bytes:
+        self.bucket.faults.call('gcs', 'download')
+        with self.bucket._lock:
+            data, self.generation, self.content_type = self._entry()
+        self.size = len(data)
+        if start is not None or end is not None:
+            return data[start or 0:(end + 1) if end is not None else None]
+        return data
+
+    def upload_from_string(self, data, content_type: Optional[str] = None,
+                           if_generation_match: Optional[int] = None, **kwargs):
+        from google.api_core.exceptions import PreconditionFailed
+
+        self.bucket.faults.call('gcs', 'upload')
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.bucket._lock:
+            current = self.bucket._objects.get(self.name)
+            current_generation = current[1] if current else 0
+            if if_generation_match is not None and if_generation_match != current_generation:
+                raise PreconditionFailed(f"gs://{self.bucket.name}/{self.name}: generation mismatch")
+            self.generation = next(self.bucket._generations)
+            self.bucket._objects[self.name] = (bytes(data), self.generation, content_type)
+        self.size = len(data)
+        self.content_type = content_type
+
+    def delete(self, if_generation_match: Optional[int] = None, **kwargs):
+        from google.api_core.exceptions import PreconditionFailed
+
+        self.bucket.faults.call('gcs', 'delete')
+        with self.bucket._lock:
+            _, generation, _ = self._entry()
+            if if_generation_match is not None and if_generation_match != generation:
+                raise PreconditionFailed(f"gs://{self.bucket.name}/{self.name}: generation mismatch")
+            del self.bucket._objects[self.name]
+
+    def open(self, mode: str = 'rb', chunk_size: Optional[int] = None, **kwargs) -> 'FakeBlobReader':
+        if mode != 'rb':
+            raise ValueError(f"FakeBlob.open only supports 'rb', not {mode!r}")
+        with self.bucket._lock:
+            data, generation, _ = self._entry()
+        if self.generation is not None and generation != self.generation:
+            from google.api_core.exceptions import PreconditionFailed
+            raise PreconditionFailed(f"gs://{self.bucket.name}/{self.name}: generation changed")
+        return FakeBlobReader(data, self.bucket.faults, chunk_size or 40 * 1024 * 1024)
+
+
+class FakeBlobReader(io.RawIOBase):
+    """Seekable reader fetching chunk_size ranges on demand, like storage's BlobReader."""
+
+    def __init__(self, data: bytes, faults: Faults, chunk_size: int):
+        super().__init__()
+        self._data = data
+        self._faults = faults
+        self._chunk_size = chunk_size
+        self._pos = 0
+        self._buffer_start = 0
+        self._buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self._data)
+        self._pos = max(0, pos)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self._data) - self._pos
+        out = bytearray()
+        while size > 0 and self._pos < len(self._data):
+            offset = self._pos - self._buffer_start
+            if not 0 <= offset < len(self._buffer):
+                # Ranged GET of max(chunk_size, what the caller asked for)
+                self._faults.call('gcs', 'range_read')
+                self._buffer_start = self._pos
+                self._buffer = self._data[self._pos:self._pos + max(self._chunk_size, size)]
+                offset = 0
+            piece = self._buffer[offset:offset + size]
+            out += piece
+            self._pos += len(piece)
+            size -= len(piece)
+        return bytes(out)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+# ── Secret Manager ──────────────────────────────────────────────────
+
+class FakeSecretManagerClient:
+    """SecretManagerServiceClient stand-in serving the latest value of each secret."""
+
+    def __init__(self, faults: Faults, secrets: Optional[Dict[str, str]] = None):
+        self.faults = faults
+        self.secrets = dict(secrets or {})
+
+    def access_secret_version(self, request: Optional[dict] = None, name: Optional[str] = None, **kwargs):
+        from google.api_core.exceptions import NotFound
+
+        self.faults.call('secrets', 'access')
+        name = name or (request or {})['name']
+        match = re.match(r'projects/[^/]+/secrets/([^/]+)/versions/[^/]+$', name)
+        if not match or match.group(1) not in self.secrets:
+            raise NotFound(f"Secret {name} not found")
+        return SimpleNamespace(payload=SimpleNamespace(data=self.secrets[match.group(1)].encode('utf-8')))
+
+
+# ── Drive and Sheets ────────────────────────────────────────────────
+
+class FakeRequest:
+    """An API request; the call is accounted for (and may fail) on execute()."""
+
+    def __init__(self, faults: Faults, service: str, method: str, handler, count: int = 1):
+        self._faults = faults
+        self._service = service
+        self._method = method
+        self._handler = handler
+        self._count = count
+
+    def execute(self, num_retries: int = 0, **kwargs):
+        self._faults.call(self._service, self._method, self._count)
+        return self._handler()
+
+
+_Q_TERM = re.compile(
+    r"""\s*(?:
+        (?P<field>name|mimeType)\s*=\s*'(?P<value>(?:[^'\\]|\\.)*)'
+      | '(?P<parent>(?:[^'\\]|\\.)*)'\s+in\s+parents
+      | trashed\s*=\s*(?P<trashed>true|false)
+      | appProperties\s+has\s+\{\s*key\s*=\s*'(?P<key>(?:[^'\\]|\\.)*)'
+            \s+and\s+value\s*=\s*'(?P<prop>(?:[^'\\]|\\.)*)'\s*\}
+    )\s*""",
+    re.VERBOSE
+)
+
+
+def parse_drive_query(q: str):
+    """
+    Compile a Drive files.list q expression into a predicate over file dicts.
+
+    Supports the terms the processors build, joined with 'and':
+    name='...', mimeType='...', '<id>' in parents, trashed=true|false and
+    appProperties has { key='...' and value='...' }.
+    """
+    checks = []
+    # Split on 'and' outside quotes and outside appProperties braces
+    for term in re.split(r"\s+and\s+(?=(?:[^']*'[^']*')*[^']*$)(?![^{]*\})", q.strip()):
+        match = _Q_TERM.fullmatch(term)
+        if not match:
+            raise ValueError(f"Unsupported Drive query term: {term!r}")
+        if match.group('field'):
+            field, value = match.group('field'), re.sub(r'\\(.)', r'\1', match.group('value'))
+            checks.append(lambda f, field=field, value=value: f.get(field) == value)
+        elif match.group('key') is not None:
+            key, value = (re.sub(r'\\(.)', r'\1', match.group(g)) for g in ('key', 'prop'))
+            checks.append(lambda f, key=key, value=value: f.get('appProperties', {}).get(key) == value)
+        elif match.group('parent') is not None:
+            parent = re.sub(r'\\(.)', r'\1', match.group('parent'))
+            checks.append(lambda f, parent=parent: parent in f.get('parents', ()))
+        else:
+            trashed = match.group('trashed') == 'true'
+            checks.append(lambda f, trashed=trashed: f.get('trashed', False) == trashed)
+    return lambda f: all(check(f) for check in checks)
+
+
+class FakeDrive:
+    """Drive v3 service stand-in (files().list / get / create / update)."""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+        self.files_by_id = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add_folder(self, name: str, parent_id: Optional[str] = None) -> str:
+        """Create a folder without counting an API call (test setup)."""
+        return self._create({
+            'name': name,
+            'mimeType': 'application/vnd.google-apps.folder',
+            'parents': [parent_id] if parent_id else []
+        })['id']
+
+    def _create(self, body: dict, content: Optional[bytes] = None) -> dict:
+        with self._lock:
+            file_id = f"fake-{next(self._ids):08d}"
+            record = dict(body, id=file_id, trashed=False)
+            record['parents'] = list(body.get('parents', []))
+            record['webViewLink'] = f"https://drive.google.com/file/d/{file_id}/view"
+            if content is not None:
+                record['size'] = len(content)
+                record['sha256'] = hashlib.sha256(content).hexdigest()
+            self.files_by_id[file_id] = record
+            return dict(record)
+
+    def files(self):
+        return _DriveFiles(self)
+
+
+class _DriveFiles:
+    def __init__(self, drive: FakeDrive):
+        self._drive = drive
+
+    def list(self, q: str = '', pageSize: int = 100, pageToken: Optional[str] = None, **kwargs) -> FakeRequest:
+        def handler():
+            matches = parse_drive_query(q) if q else (lambda f: True)
+            with self._drive._lock:
+                found = [dict(f) for f in self._drive.files_by_id.values() if matches(f)]
+            start = int(pageToken or 0)
+            page = found[start:start + pageSize]
+            response = {'files': page}
+            if start + pageSize < len(found):
+                response['nextPageToken'] = str(start + pageSize)
+            return response
+        return FakeRequest(self._drive.faults, 'drive', 'files.list', handler)
+
+    def get(self, fileId: str, fields: Optional[str] = None, **kwargs) -> FakeRequest:
+        def handler():
+            with self._drive._lock:
+                record = self._drive.files_by_id.get(fileId)
+                if record is None:
+                    raise http_error('drive', 404, f"File not found: {fileId}")
+                return dict(record)
+        return FakeRequest(self._drive.faults, 'drive', 'files.get', handler)
+
+    def create(self, body: dict, media_body=None, fields: Optional[str] = None, **kwargs) -> FakeRequest:
+        content = None
+        requests = 1
+        if media_body is not None:
+            size = media_body.size()
+            content = media_body.getbytes(0, size)
+            if media_body.resumable():
+                # Session start plus one PUT per chunk
+                requests = 1 + max(1, math.ceil(size / media_body.chunksize()))
+        def handler():
+            with self._drive._lock:
+                missing = [p for p in body.get('parents', []) if p not in self._drive.files_by_id]
+            if missing:
+                raise http_error('drive', 404, f"File not found: {missing[0]}")
+            return self._drive._create(body, content)
+        return FakeRequest(self._drive.faults, 'drive', 'files.create', handler, count=requests)
+
+    def update(self, fileId: str, body: Optional[dict] = None, fields: Optional[str] = None,
+               **kwargs) -> FakeRequest:
+        def handler():
+            with self._drive._lock:
+                record = self._drive.files_by_id.get(fileId)
+                if record is None:
+                    raise http_error('drive', 404, f"File not found: {fileId}")
+                for field, value in (body or {}).items():
+                    if field in ('appProperties', 'properties'):
+                        # Drive merges property maps key by key; None removes a key
+                        merged = dict(record.get(field, {}), **value)
+                        record[field] = {k: v for k, v in merged.items() if v is not None}
+                    else:
+                        record[field] = value
+                return dict(record)
+        return FakeRequest(self._drive.faults, 'drive', 'files.update', handler)
+
+
+_A1 = re.compile(r'^(?P<col>[A-Z]*)(?P<row>\d*)$')
+
+
+def column_index(letters: str) -> int:
+    """A -> 0, Z -> 25, AA -> 26."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+
+def parse_range(range_name: str):
+    """
+    Split an A1 range into (sheet title, first row, first col, last row, last col).
+
+    Rows and columns are 0-based; a missing bound is None ("A:Z" has no rows,
+    "1:1" has no columns).
+    """
+    title, _, cells = range_name.rpartition('!')
+    title = title.strip("'").replace("''", "'") if title else 'Sheet1'
+    start, _, end = cells.partition(':')
+    first, last = _A1.match(start.upper()), _A1.match((end or start).upper())
+    if not first or not last:
+        raise ValueError(f"Unsupported A1 range: {range_name!r}")
+
+    def bound(match, group, convert):
+        value = match.group(group)
+        return convert(value) if value else None
+
+    return (
+        title,
+        bound(first, 'row', lambda v: int(v) - 1), bound(first, 'col', column_index),
+        bound(last, 'row', lambda v: int(v) - 1), bound(last, 'col', column_index),
+    )
+
+
+class FakeSheets:
+    """Sheets v4 service stand-in; every spreadsheet is a dict of title -> rows."""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+        self.spreadsheets_by_id = {}
+        self._lock = threading.Lock()
+
+    def add_spreadsheet(self, spreadsheet_id: str, rows: Optional[List[list]] = None, title: str = 'Sheet1'):
+        """Create a spreadsheet without counting an API call (test setup)."""
+        with self._lock:
+            self.spreadsheets_by_id[spreadsheet_id] = {title: [list(row) for row in rows or []]}
+
+    def rows(self, spreadsheet_id: str, title: str = 'Sheet1') -> List[list]:
+        with self._lock:
+            return [list(row) for row in self.spreadsheets_by_id[spreadsheet_id][title]]
+
+    def _tabs(self, spreadsheet_id: str) -> Dict[str, List[list]]:
+        try:
+            return self.spreadsheets_by_id[spreadsheet_id]
+        except KeyError:
+            raise http_error('sheets', 404, f"Requested entity was not found: {spreadsheet_id}") from None
+
+    def _grid(self, spreadsheet_id: str, title: str) -> List[list]:
+        try:
+            return self._tabs(spreadsheet_id)[title]
+        except KeyError:
+            raise http_error('sheets', 400, f"Unable to parse range: {title}") from None
+
+    def _write(self, spreadsheet_id: str, range_name: str, values: List[list]) -> dict:
+        """Write values with their top-left cell at the start of range_name (lock held)."""
+        title, row0, col0, _, _ = parse_range(range_name)
+        row0, col0 = row0 or 0, col0 or 0
+        grid = self._grid(spreadsheet_id, title)
+        for offset, new_row in enumerate(values):
+            while len(grid) <= row0 + offset:
+                grid.append([])
+            row = grid[row0 + offset]
+            if len(row) < col0 + len(new_row):
+                row.extend([''] * (col0 + len(new_row) - len(row)))
+            row[col0:col0 + len(new_row)] = list(new_row)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': range_name,
+            'updatedRows': len(values),
+            'updatedColumns': max((len(row) for row in values), default=0),
+            'updatedCells': sum(len(row) for row in values)
+        }
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+
+class _Spreadsheets:
+    def __init__(self, sheets: FakeSheets):
+        self._sheets = sheets
+
+    def values(self):
+        return _Values(self._sheets)
+
+    def get(self, spreadsheetId: str, **kwargs) -> FakeRequest:
+        def handler():
+            with self._sheets._lock:
+                titles = list(self._sheets._tabs(spreadsheetId))
+            return {
+                'spreadsheetId': spreadsheetId,
+                'sheets': [
+                    {'properties': {'sheetId': index, 'title': title, 'index': index}}
+                    for index, title in enumerate(titles)
+                ]
+            }
+        return FakeRequest(self._sheets.faults, 'sheets', 'spreadsheets.get', handler)
+
+    def batchUpdate(self, spreadsheetId: str, body: dict, **kwargs) -> FakeRequest:
+        def handler():
+            replies = []
+            with self._sheets._lock:
+                tabs = self._sheets._tabs(spreadsheetId)
+                for request in body.get('requests', []):
+                    if 'addSheet' not in request:
+                        raise ValueError(f"Unsupported batchUpdate request: {sorted(request)}")
+                    title = request['addSheet']['properties']['title']
+                    if title in tabs:
+                        raise http_error('sheets', 400, f"A sheet with the name \"{title}\" already exists")
+                    tabs[title] = []
+                    replies.append({'addSheet': {'properties': {'sheetId': len(tabs) - 1, 'title': title}}})
+            return {'spreadsheetId': spreadsheetId, 'replies': replies}
+        return FakeRequest(self._sheets.faults, 'sheets', 'spreadsheets.batchUpdate', handler)
+
+
+class _Values:
+    def __init__(self, sheets: FakeSheets):
+        self._sheets = sheets
+
+    def get(self, spreadsheetId: str, range: str, **kwargs) -> FakeRequest:
+        def handler():
+            title, row0, col0, row1, col1 = parse_range(range)
+            with self._sheets._lock:
+                grid = self._sheets._grid(spreadsheetId, title)
+                rows = grid[row0 or 0:(row1 + 1) if row1 is not None else None]
+                values = [list(row[col0 or 0:(col1 + 1) if col1 is not None else None]) for row in rows]
+            # Sheets omits trailing empty cells and rows
+            for row in values:
+                while row and row[-1] in ('', None):
+                    row.pop()
+            while values and not values[-1]:
+                values.pop()
+            response = {'range': range, 'majorDimension': 'ROWS'}
+            if values:
+                response['values'] = values
+            return response
+        return FakeRequest(self._sheets.faults, 'sheets', 'values.get', handler)
+
+    def append(self, spreadsheetId: str, range: str, body: dict, valueInputOption: str = 'RAW',
+               insertDataOption: str = 'OVERWRITE', **kwargs) -> FakeRequest:
+        def handler():
+            title, _, col0, _, _ = parse_range(range)
+            col0 = col0 or 0
+            new_rows = body.get('values', [])
+            with self._sheets._lock:
+                grid = self._sheets._grid(spreadsheetId, title)
+                while grid and not any(cell not in ('', None) for cell in grid[-1]):
+                    grid.pop()
+                first_row = len(grid)
+                for row in new_rows:
+                    grid.append([''] * col0 + [cell for cell in row])
+            return {
+                'spreadsheetId': spreadsheetId,
+                'updates': {
+                    'updatedRange': f"{title}!A{first_row + 1}",
+                    'updatedRows': len(new_rows),
+                    'updatedCells': sum(len(row) for row in new_rows)
+                }
+            }
+        return FakeRequest(self._sheets.faults, 'sheets', 'values.append', handler)
+
+    def update(self, spreadsheetId: str, range: str, body: dict, valueInputOption: str = 'RAW',
+               **kwargs) -> FakeRequest:
+        def handler():
+            with self._sheets._lock:
+                return self._sheets._write(spreadsheetId, range, body.get('values', []))
+        return FakeRequest(self._sheets.faults, 'sheets', 'values.update', handler)
+
+    def batchUpdate(self, spreadsheetId: str, body: dict, **kwargs) -> FakeRequest:
+        def handler():
+            with self._sheets._lock:
+                responses = [
+                    self._sheets._write(spreadsheetId, data['range'], data.get('values', []))
+                    for data in body.get('data', [])
+                ]
+            return {
+                'spreadsheetId': spreadsheetId,
+                'totalUpdatedRows': sum(r['updatedRows'] for r in responses),
+                'totalUpdatedCells': sum(r['updatedCells'] for r in responses),
+                'responses': responses
+            }
+        return FakeRequest(self._sheets.faults, 'sheets', 'values.batchUpdate', handler)
+
+    def clear(self, spreadsheetId: str, range: str, body: Optional[dict] = None, **kwargs) -> FakeRequest:
+        def handler():
+            title, row0, col0, row1, col1 = parse_range(range)
+            with self._sheets._lock:
+                grid = self._sheets._grid(spreadsheetId, title)
+                for row in grid[row0 or 0:(row1 + 1) if row1 is not None else None]:
+                    end = min(len(row), col1 + 1) if col1 is not None else len(row)
+                    row[col0 or 0:end] = [''] * max(0, end - (col0 or 0))
+                while grid and not any(cell not in ('', None) for cell in grid[-1]):
+                    grid.pop()
+            return {'spreadsheetId': spreadsheetId, 'clearedRange': range}
+        return FakeRequest(self._sheets.faults, 'sheets', 'values.clear', handler)
+
+
+class FakeGoogle:
+    """All stand-ins sharing one Faults instance, plus a googleapiclient-style build()."""
+
+    def __init__(self, faults: Optional[Faults] = None, secrets: Optional[Dict[str, str]] = None):
+        self.faults = faults or Faults()
+        self.storage = FakeStorageClient(self.faults)
+        self.secret_manager = FakeSecretManagerClient(self.faults, secrets)
+        self.drive = FakeDrive(self.faults)
+        self.sheets = FakeSheets(self.faults)
+
+    def build(self, api: str, version: str, credentials=None, **kwargs):
+        """Drop-in for googleapiclient.discovery.build."""
+        services = {'drive': self.drive, 'sheets': self.sheets}
+        if api not in services:
+            raise ValueError(f"No fake for {api} {version}")
+        return services[api]
+
+    def install(self):
+        """Replace the real client constructors with the stand-ins until uninstall()."""
+        from unittest import mock
+
+        if getattr(self, '_patches', None):
+            return self
+        self._patches = [
+            mock.patch('google.cloud.storage.Client', return_value=self.storage),
+            mock.patch('google.cloud.secretmanager.SecretManagerServiceClient',
+                       return_value=self.secret_manager),
+            mock.patch('googleapiclient.discovery.build', self.build),
+        ]
+        for patcher in self._patches:
+            patcher.start()
+        return self
+
+    def uninstall(self):
+        for patcher in reversed(getattr(self, '_patches', None) or []):
+            patcher.stop()
+        self._patches = []
+
+    @contextmanager
+    def patch(self):
+        """install() for the duration of a with block (a no-op if already installed)."""
+        installed_here = not getattr(self, '_patches', None)
+        self.install()
+        try:
+            yield self
+        finally:
+            if installed_here:
+                self.uninstall()
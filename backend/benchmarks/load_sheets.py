@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Load test of the Sheets-bound code against the in-memory Google fakes.
+
+Drives the real functions at a multiple of production volume (about 100
+submissions a month, so the default of 1000 is 10x):
+
+1. submit:  generate_awards_id + append_to_sheet per submission, run
+            concurrently, once with the GCS counter and once with the
+            fallback used when STATE_BUCKET is unset
+2. mark:    mark_as_winner (scripts/mark-winner.py) for --winners submissions,
+            one after another like an admin working through the list
+3. export:  export-winners-teams.py end to end (winners, team rows, write),
+            twice, so both the create and the clear-and-rewrite paths run
+
+--history N puts N submissions from earlier years in the sheet first, to
+show how each phase scales with the years of submissions kept. --store
+runs the same phases against a SQLite submission store
+(submission_store.py), as SUBMISSION_STORE does in production: Awards IDs
+are seeded from the store, winners are marked and exported from it, and a
+mirror phase pushes the status changes to the sheet in one batch.
+
+The fake Sheets API enforces a per-minute quota (--quota-per-minute, 60
+by default like the Sheets per-user limit). The shared rate limiter in
+google_api.py is configured to the same budget. Time is compressed: one
+--quota-window (default 1 second) stands for one minute. The fake quota,
+the limiter budget, the backoff delays and the breaker cooldown are all
+scaled to it.
+
+Each phase reports wall time, p50/p95 per operation, Sheets requests by
+method, failures, and how long those requests take at the quota.
+
+Usage:
+    python load_sheets.py                                  # 1000 submissions, 50 winners
+    python load_sheets.py -n 3000 --winners 150 --concurrency 16
+    python load_sheets.py --latency sheets=120 --latency gcs=20
+    python load_sheets.py --error-rate sheets=0.05         # transient 429s on top of the quota
+    python load_sheets.py --no-limiter                     # bare execute(): no spacing, no retries
+    python load_sheets.py --no-quota                       # unlimited fake, limiter still spacing
+    python load_sheets.py --history 20000                  # with 20 years of earlier submissions
+    python load_sheets.py --history 20000 --store          # ... through the submission store
+    python load_sheets.py --json results.json              # machine-readable summary
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import DEFAULT_DATA_DIR, load_processor, parse_service_values, percentile  # noqa: E402
+from fakes import SERVICES, FakeGoogle, Faults  # noqa: E402
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SCRIPTS_DIR = os.path.join(BACKEND_DIR, '..', 'scripts')
+
+STATE_BUCKET = 'load-state'
+YEAR = '2025'
+WINNER_CATEGORIES = ['Best Concrete Project', 'Best Healthcare Project', 'Best K-12 Project',
+                     'Best Renovation', 'Project of the Year']
+
+
+def load_script(module_name: str, filename: str, google: FakeGoogle):
+    """Import a hyphen-named admin script with the fake clients installed."""
+    google.install()
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def sample_fields(data_dir: str, extract_pdf_fields) -> list:
+    """Form fields of every sample PDF, to build realistic rows from."""
+    fields = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '**', '*.pdf'), recursive=True)):
+        with open(path, 'rb') as f:
+            extracted = extract_pdf_fields(f.read())
+        if '_error' not in extracted:
+            fields.append(extracted)
+    return fields
+
+
+class Phase:
+    """Timings and API call deltas for one phase of the load test."""
+
+    def __init__(self, name: str, faults: Faults):
+        self.name = name
+        self.faults = faults
+        self.timings = {}  # operation -> [seconds]
+        self.failures = Counter()
+
+    def __enter__(self):
+        self._calls = Counter(self.faults.calls)
+        self._errors = Counter(self.faults.errors)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._started
+        self.calls = Counter(self.faults.calls)
+        self.calls.subtract(self._calls)
+        self.errors = Counter(self.faults.errors)
+        self.errors.subtract(self._errors)
+        return False
+
+    def timed(self, operation: str, fn, *args):
+        """Run fn(*args), recording its latency, or the failure if it raises."""
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except (Exception, SystemExit):
+            # The admin scripts sys.exit(1) on API errors
+            self.failures[operation] += 1
+            return None
+        finally:
+            self.timings.setdefault(operation, []).append(time.perf_counter() - started)
+
+    def report(self, quota_per_minute: int) -> dict:
+        sheets_calls = sum(count for (service, _), count in self.calls.items() if service == 'sheets')
+        print(f"\n{self.name}")
+        print("-" * 72)
+        print(f"Wall time: {self.wall:.2f}s")
+        print(f"{'Operation':<28} {'Count':>7} {'Failed':>7} {'p50 ms':>9} {'p95 ms':>9}")
+        for operation, values in self.timings.items():
+            print(f"{operation:<28} {len(values):>7} {self.failures[operation]:>7} "
+                  f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 95) * 1000:>9.1f}")
+        for (service, method), count in sorted(self.calls.items()):
+            if count:
+                failed = self.errors[(service, method)]
+                print(f"  {service + '.' + method:<26} {count:>7} requests" + (f", {failed} failed" if failed else ""))
+        minutes = sheets_calls / quota_per_minute
+        print(f"Sheets requests: {sheets_calls} = {minutes:.1f} min of quota at {quota_per_minute}/min")
+        return {
+            'wall_seconds': round(self.wall, 3),
+            'operations': {
+                operation: {
+                    'count': len(values),
+                    'failed': self.failures[operation],
+                    'p50_ms': round(percentile(values, 50) * 1000, 1),
+                    'p95_ms': round(percentile(values, 95) * 1000, 1),
+                } for operation, values in self.timings.items()
+            },
+            'sheets_requests': sheets_calls,
+            'quota_minutes': round(minutes, 2),
+        }
+
+
+def history_rows(fields: list, count: int) -> list:
+    """Rows of `count` submissions from the years before YEAR, 1000 a year."""
+    from submission import format_submission_row
+
+    rows = []
+    for i in range(count):
+        year = int(YEAR) - 1 - i // 1000
+        rows.append(format_submission_row(
+            fields[i % len(fields)], f"history-{i:06d}", f"https://drive.google.com/file/d/history-{i}/view",
+            f"history-folder-{i}", f"AW-{year}-{i % 1000 + 1:03d}"
+        ))
+    return rows
+
+
+def open_store(workdir: str, name: str, rows: list):
+    """A SQLite submission store holding `rows` (sheet rows with Awards IDs)."""
+    import submission_store
+    from submission import SHEET_COLUMNS
+
+    store = submission_store.SqliteSubmissionStore(os.path.join(workdir, f"{name}.db"))
+    awards_column = SHEET_COLUMNS.index('Awards ID')
+    store.add_many(
+        submission_store.new_record(row[awards_column], row[1], row[awards_column].split('-')[1],
+                                    SHEET_COLUMNS, row)
+        for row in rows
+    )
+    return store
+
+
+def run_submissions(label: str, google: FakeGoogle, pdf_main, sheet_id: str, fields: list,
+                    submissions: int, concurrency: int, quota_per_minute: int, store=None) -> dict:
+    """Phase 1: allocate an Awards ID and append a row per submission (recording it in the store, if any)."""
+    import submission_store
+    from submission import SHEET_COLUMNS, format_submission_row
+
+    service = google.build('sheets', 'v4')
+    pdf_main._submission_store = store
+    pdf_main.SUBMISSION_STORE = store and store.path
+    with Phase(label, google.faults) as phase:
+        def submit(i):
+            awards_id = phase.timed('generate_awards_id', pdf_main.generate_awards_id, service, sheet_id, YEAR)
+            row = format_submission_row(
+                fields[i % len(fields)], f"load-{i:05d}", f"https://drive.google.com/file/d/load-{i}/view",
+                f"folder-{i}", awards_id or ''
+            )
+            if store is not None and awards_id:
+                phase.timed('store.add', store.add, submission_store.new_record(
+                    awards_id, f"load-{i:05d}", YEAR, SHEET_COLUMNS, row))
+            phase.timed('append_to_sheet', pdf_main.append_to_sheet, service, sheet_id, row)
+            return awards_id
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            awards_ids = [awards_id for awards_id in pool.map(submit, range(submissions)) if awards_id]
+
+    result = phase.report(quota_per_minute)
+    duplicates = len(awards_ids) - len(set(awards_ids))
+    fallback = sum(1 for awards_id in awards_ids if '-TMP' in awards_id)
+    result.update(duplicate_awards_ids=duplicates, fallback_awards_ids=fallback)
+    print(f"{'✓' if not duplicates else '✗'} {len(set(awards_ids))} distinct Awards IDs, "
+          f"{duplicates} duplicates, {fallback} timestamp fallbacks")
+    return result
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Load test Awards ID allocation, sheet appends, winner marking and exports",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('-n', '--submissions', type=int, default=1000,
+                        help='Submissions to load (default: 1000, 10x a month)')
+    parser.add_argument('--winners', type=int, default=50, help='Submissions to mark as winners')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent submissions')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Sample PDFs to build rows from')
+    parser.add_argument('--latency', action='append', metavar='SERVICE=MS',
+                        help=f"Latency added to every call ({', '.join(SERVICES)} or all); repeatable")
+    parser.add_argument('--error-rate', action='append', metavar='SERVICE=FRACTION',
+                        help='Fraction of calls failing with 429; repeatable')
+    parser.add_argument('--quota-per-minute', type=int, default=60,
+                        help='Sheets requests allowed per minute (default: 60)')
+    parser.add_argument('--quota-window', type=float, default=1.0,
+                        help='Seconds standing for one minute of quota (default: 1)')
+    parser.add_argument('--no-quota', action='store_true', help='Do not answer 429 over the quota')
+    parser.add_argument('--no-limiter', action='store_true',
+                        help='Send Sheets requests unthrottled and without retries')
+    parser.add_argument('--history', type=int, default=0,
+                        help='Submissions from earlier years already in the sheet (1000 a year)')
+    parser.add_argument('--store', action='store_true',
+                        help='Run through a SQLite submission store instead of reading the sheet')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for error injection and winner choice')
+    parser.add_argument('--json', metavar='PATH', help='Also write the summary as JSON')
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency=parse_service_values(args.latency, scale=0.001),
+        error_rate=parse_service_values(args.error_rate),
+        quota=None if args.no_quota else {'sheets': args.quota_per_minute},
+        quota_window=args.quota_window,
+        seed=args.seed
+    )
+    google = FakeGoogle(faults)
+
+    os.environ.setdefault('GCP_PROJECT_ID', 'load-project')
+    os.environ['STATE_BUCKET'] = STATE_BUCKET
+    pdf_main = load_processor('pdf_processor_main', os.path.join(BACKEND_DIR, 'pdf-processor'), google)
+    mark_winner = load_script('mark_winner', 'mark-winner.py', google)
+    export_teams = load_script('export_winners_teams', 'export-winners-teams.py', google)
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    # Same module the processor and scripts imported
+    import google_api
+
+    scale = args.quota_window / 60
+    if args.no_limiter:
+        google_api.configure('sheets', requests_per_minute=1e9, burst=10 ** 6, max_attempts=1,
+                             breaker_threshold=10 ** 9)
+    else:
+        google_api.configure('sheets', requests_per_minute=args.quota_per_minute / scale,
+                             base_delay=scale, max_delay=32 * scale, breaker_cooldown=30 * scale)
+
+    from submission import SHEET_COLUMNS, extract_pdf_fields
+
+    fields = sample_fields(args.data_dir, extract_pdf_fields)
+    if not fields:
+        print(f"✗ No sample PDFs found under {args.data_dir}")
+        sys.exit(1)
+
+    print(f"🔄 Load testing with {args.submissions} submissions, {args.winners} winners, "
+          f"concurrency {args.concurrency}")
+    print(f"   {args.history} earlier submissions, "
+          f"{'SQLite submission store' if args.store else 'sheet as the only store'}")
+    print(f"   Sheets quota {'off' if args.no_quota else f'{args.quota_per_minute}/min'}, "
+          f"limiter {'off' if args.no_limiter else 'on'}, 1 min = {args.quota_window:g}s")
+    print("=" * 72)
+    summary = {}
+    workdir = tempfile.TemporaryDirectory()
+    history = history_rows(fields, args.history)
+
+    def new_sheet(sheet_id):
+        google.sheets.add_spreadsheet(sheet_id, [list(SHEET_COLUMNS)] + history)
+        return open_store(workdir.name, sheet_id, history) if args.store else None
+
+    # 1. Submissions, with the GCS counter and with the fallback for no STATE_BUCKET
+    store = new_sheet('load-sheet')
+    summary['submit_counter'] = run_submissions(
+        'submit (GCS counter)', google, pdf_main, 'load-sheet', fields,
+        args.submissions, args.concurrency, args.quota_per_minute, store)
+
+    scan_store = new_sheet('load-sheet-scan')
+    pdf_main.STATE_BUCKET = None
+    summary['submit_scan'] = run_submissions(
+        f"submit ({'store query' if args.store else 'sheet scan'}, no STATE_BUCKET)", google, pdf_main,
+        'load-sheet-scan', fields, args.submissions, args.concurrency, args.quota_per_minute, scan_store)
+
+    # 2. Winners, marked one at a time
+    service = google.build('sheets', 'v4')
+    awards_column = SHEET_COLUMNS.index('Awards ID')
+    awards_ids = [row[awards_column] for row in google.sheets.rows('load-sheet')[1 + args.history:]
+                  if len(row) > awards_column]
+    chooser = random.Random(args.seed)
+    winners = chooser.sample(awards_ids, min(args.winners, len(awards_ids)))
+    with Phase('mark_as_winner', faults) as phase, contextlib.redirect_stdout(io.StringIO()):
+        for awards_id in winners:
+            if store is not None:
+                phase.timed('mark_in_store', mark_winner.mark_in_store, store,
+                            awards_id, chooser.choice(WINNER_CATEGORIES), 'Load test')
+            else:
+                phase.timed('mark_as_winner', mark_winner.mark_as_winner, service, 'load-sheet',
+                            awards_id, chooser.choice(WINNER_CATEGORIES), 'Load test')
+        if store is not None:
+            # What sheet-row-flusher does on its next run
+            import submission_store
+
+            phase.timed('mirror_changes', submission_store.mirror_changes, store, service, 'load-sheet')
+    summary['mark_as_winner'] = phase.report(args.quota_per_minute)
+
+    # 3. Export winners' teams: first run creates the tab, second clears and rewrites it
+    def export():
+        if store is not None:
+            found = export_teams.get_store_winners(store, YEAR)
+            header_row = list(SHEET_COLUMNS)
+        else:
+            found = export_teams.get_winners(service, 'load-sheet', YEAR)
+            header_row = service.spreadsheets().values().get(
+                spreadsheetId='load-sheet', range='Sheet1!1:1').execute().get('values', [[]])[0]
+        export_teams.write_team_sheet(service, 'load-sheet', YEAR,
+                                      export_teams.format_team_rows(found, header_row))
+        return found
+
+    with Phase('export-winners-teams', faults) as phase, contextlib.redirect_stdout(io.StringIO()):
+        phase.timed('export (create tab)', export)
+        phase.timed('export (rewrite tab)', export)
+    summary['export'] = phase.report(args.quota_per_minute)
+
+    status_column = SHEET_COLUMNS.index('Status')
+    marked = sum(1 for row in google.sheets.rows('load-sheet')[1:]
+                 if len(row) > status_column and row[status_column] == 'winner')
+    tabs = google.sheets.spreadsheets_by_id['load-sheet']
+    exported = len(tabs.get(f"Project Team {YEAR}", [[]])) - 1
+    print(f"{'✓' if exported == marked else '✗'} {marked} winners marked in the sheet, {exported} team rows exported")
+    if store is not None:
+        unmirrored = len(store.unmirrored())
+        print(f"{'✓' if not unmirrored and marked == len(winners) else '✗'} "
+              f"{len(winners)} winners in the store, {unmirrored} status changes not mirrored")
+    workdir.cleanup()
+
+    total = sum(phase['sheets_requests'] for phase in summary.values())
+    print("\n" + "=" * 72)
+    print(f"Sheets requests in total: {total} "
+          f"({total / args.quota_per_minute:.1f} min at {args.quota_per_minute}/min)")
+    print(f"Injected failures: {sum(faults.errors.values())} ({sum(faults.throttled.values())} over quota)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Wrote summary to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
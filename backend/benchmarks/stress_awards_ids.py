@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Stress test for the Awards ID allocator.
+
+Fires many concurrent allocations at one year's counter and checks that every
+ID is unique and that the numbers are contiguous (no gaps, no duplicates).
+
+Usage:
+    python stress_awards_ids.py                        # 500 allocations, in-memory store
+    python stress_awards_ids.py -n 1000 -w 64 --latency 0.005
+    python stress_awards_ids.py --seed 41              # continue from AW-YYYY-041
+    python stress_awards_ids.py --bucket my-state-bucket -n 50   # real GCS (slow: ~1 write/s/object)
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'pdf-processor'))
+
+from awards_ids import AwardsIdAllocator, GcsCounterStore, InMemoryCounterStore, format_awards_id  # noqa: E402
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Stress test concurrent Awards ID allocation")
+    parser.add_argument('-n', '--allocations', type=int, default=500, help='Number of IDs to allocate')
+    parser.add_argument('-w', '--workers', type=int, default=100, help='Concurrent allocating threads')
+    parser.add_argument('--year', default='2099', help='Counter year to allocate from')
+    parser.add_argument('--seed', type=int, default=0, help='Highest existing number to seed the counter with')
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='Simulated store round-trip latency in seconds (in-memory store only)')
+    parser.add_argument('--bucket', help='Run against a real GCS bucket instead of the in-memory store')
+    args = parser.parse_args()
+
+    if args.bucket:
+        from google.cloud import storage
+        store = GcsCounterStore(storage.Client().bucket(args.bucket), prefix='stress-awards-ids/')
+    else:
+        store = InMemoryCounterStore(latency=args.latency)
+
+    allocator = AwardsIdAllocator(store, max_attempts=200)
+    seed_calls = []
+
+    def seed(year):
+        seed_calls.append(year)
+        return args.seed
+
+    def allocate(_):
+        start = time.perf_counter()
+        awards_id = allocator.allocate(args.year, seed=seed)
+        return awards_id, time.perf_counter() - start
+
+    print(f"Allocating {args.allocations} IDs with {args.workers} workers...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(allocate, range(args.allocations)))
+    elapsed = time.perf_counter() - started
+
+    ids = [awards_id for awards_id, _ in results]
+    latencies = sorted(latency for _, latency in results)
+    numbers = sorted(int(awards_id.rsplit('-', 1)[1]) for awards_id in ids)
+    expected = list(range(args.seed + 1, args.seed + args.allocations + 1))
+
+    print(f"Elapsed:        {elapsed:.2f}s ({args.allocations / elapsed:.0f} IDs/s)")
+    print(f"Latency p50:    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p95:    {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"Latency max:    {latencies[-1] * 1000:.1f} ms")
+    print(f"Seed calls:     {len(seed_calls)}")
+    if isinstance(store, InMemoryCounterStore):
+        print(f"Writes:         {store.writes}")
+        print(f"Lost races:     {store.conflicts}")
+
+    duplicates = len(ids) - len(set(ids))
+    if duplicates or numbers != expected:
+        print(f"✗ FAILED: {duplicates} duplicate IDs, numbers contiguous: {numbers == expected}")
+        sys.exit(1)
+
+    first, last = format_awards_id(args.year, numbers[0]), format_awards_id(args.year, numbers[-1])
+    print(f"✓ {len(ids)} unique, contiguous IDs ({first} .. {last})")
+
+
+if __name__ == '__main__':
+    main()
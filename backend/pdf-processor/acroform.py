@@ -0,0 +1,671 @@
+"""
+Minimal PDF reader that extracts AcroForm field values and nothing else.
+
+PyPDF2 builds a full document model before it can answer get_fields(). For
+submission forms we only need a handful of objects: the trailer, the
+cross-reference data, the catalog, the /AcroForm dictionary and the field
+tree. AcroFormReader resolves exactly those, straight from their byte
+offsets, and never touches pages, content streams or images.
+
+Results match PyPDF2.PdfReader.get_fields() as used by extract_pdf_fields:
+fields are keyed by their /TM or /T name in the same post-order PyPDF2 walks
+the tree, and each value is the field's own /V rendered the way
+str(PyPDF2 object) renders it.
+
+Anything outside that subset raises AcroFormError so the caller can fall back
+to PyPDF2. That covers encryption, non-Flate filters, broken xref offsets and
+unusual /V types.
+"""
+import codecs
+from collections import OrderedDict
+import re
+import struct
+import zlib
+from typing import Any, Dict, Tuple
+
+
+class AcroFormError(Exception):
+    """Raised when a document can't be read by the AcroForm fast path."""
+
+
+class _Truncated(Exception):
+    """Raised when a parse window ends before the object does."""
+
+
+class Name(str):
+    """A PDF name, stored with its leading slash (e.g. "/Yes")."""
+
+
+class Ref(tuple):
+    """An indirect reference (object number, generation)."""
+
+
+class Stream:
+    """A stream object: its dictionary plus the location of its raw data."""
+
+    def __init__(self, dictionary: dict, data_offset: int):
+        self.dictionary = dictionary
+        self.data_offset = data_offset
+
+
+_WS = b'\x00\t\n\x0c\r '
+_WS_RE = re.compile(rb'(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*')
+_TOKEN_RE = re.compile(rb'[^\x00\t\n\x0c\r ()<>\[\]{}/%]+')
+_REF_RE = re.compile(rb'(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])')
+_OBJ_HEADER_RE = re.compile(rb'[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj')
+_INT_RE = re.compile(rb'[+-]?\d+')
+_HEX_WS_RE = re.compile(rb'[\x00\t\n\x0c\r ]+')
+_NAME_ESCAPE_RE = re.compile(rb'#([0-9A-Fa-f]{2})')
+_LITERAL_RUN_RE = re.compile(rb'[^()\\]+')
+_STRUCT_CODES = {0: '', 1: 'B', 2: 'H', 4: 'I'}
+
+_LITERAL_ESCAPES = {
+    ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f',
+    ord('c'): b'\\c', ord('('): b'(', ord(')'): b')', ord('/'): b'/', ord('\\'): b'\\',
+    ord(' '): b' ', ord('%'): b'%', ord('<'): b'<', ord('>'): b'>', ord('['): b'[',
+    ord(']'): b']', ord('#'): b'#', ord('_'): b'_', ord('&'): b'&', ord('$'): b'$',
+}
+
+# PDFDocEncoding as implemented by PyPDF2: Latin-1 with these differences,
+# and the bytes in _PDFDOC_UNDEFINED treated as undecodable
+_PDFDOC_DIFFERENCES = {
+    0x18: '˘', 0x19: 'ˇ', 0x1a: 'ˆ', 0x1b: '˙', 0x1c: '˝',
+    0x1d: '˛', 0x1e: '˚', 0x1f: '˜', 0x80: '•', 0x81: '†',
+    0x82: '‡', 0x83: '…', 0x84: '—', 0x85: '–', 0x86: 'ƒ',
+    0x87: '⁄', 0x88: '‹', 0x89: '›', 0x8a: '−', 0x8b: '‰',
+    0x8c: '„', 0x8d: '“', 0x8e: '”', 0x8f: '‘', 0x90: '’',
+    0x91: '‚', 0x92: '™', 0x93: 'ﬁ', 0x94: 'ﬂ', 0x95: 'Ł',
+    0x96: 'Œ', 0x97: 'Š', 0x98: 'Ÿ', 0x99: 'Ž', 0x9a: 'ı',
+    0x9b: 'ł', 0x9c: 'œ', 0x9d: 'š', 0x9e: 'ž', 0xa0: '€',
+}
+_PDFDOC_UNDEFINED = re.compile(rb'[\x00\x16\x7f\x9f\xad]')
+
+# Keys whose presence makes a dictionary a field (mirrors PyPDF2's attribute list)
+_FIELD_ATTRIBUTES = ('/FT', '/Parent', '/Kids', '/T', '/TU', '/TM', '/Ff', '/V', '/DV', '/AA', '/Opt')
+
+# Initial read size when parsing an object from a file-like source
+_WINDOW = 4096
+_MAX_WINDOW = 4 * 1024 * 1024
+# File sources are read in aligned blocks; recently used blocks are kept so
+# objects that sit close together cost one range read instead of several
+_BLOCK_SIZE = 64 * 1024
+_CACHED_BLOCKS = 64
+
+
+def decode_text(raw: bytes) -> str:
+    """Decode a PDF text string the way extract_pdf_fields sees PyPDF2 values."""
+    try:
+        if raw.startswith(codecs.BOM_UTF16_BE):
+            return raw.decode('utf-16')
+        if _PDFDOC_UNDEFINED.search(raw):
+            raise UnicodeDecodeError('pdfdocencoding', raw, 0, 1, 'undefined byte')
+        return raw.decode('latin-1').translate(_PDFDOC_DIFFERENCES)
+    except UnicodeDecodeError:
+        # PyPDF2 hands back raw bytes, which extract_pdf_fields decodes as UTF-8
+        return raw.decode('utf-8', errors='ignore')
+
+
+class _Parser:
+    """Recursive-descent parser for PDF objects over a byte window."""
+
+    def __init__(self, buf, at_eof: bool):
+        self.buf = buf
+        self.at_eof = at_eof
+        # Stop short of the window end so tokens are never split by it
+        self.limit = len(buf) if at_eof else len(buf) - 64
+
+    def skip_ws(self, pos: int) -> int:
+        pos = _WS_RE.match(self.buf, pos).end()
+        if pos >= self.limit and not self.at_eof:
+            raise _Truncated()
+        return pos
+
+    def parse(self, pos: int) -> Tuple[Any, int]:
+        buf = self.buf
+        pos = self.skip_ws(pos)
+        if pos >= len(buf):
+            raise AcroFormError("unexpected end of data")
+        c = buf[pos]
+
+        if c == 0x2F:  # /
+            match = _TOKEN_RE.match(buf, pos + 1)
+            raw = match.group() if match else b''
+            end = match.end() if match else pos + 1
+            raw = _NAME_ESCAPE_RE.sub(lambda m: bytes.fromhex(m.group(1).decode()), raw)
+            try:
+                return Name('/' + raw.decode('utf-8')), end
+            except UnicodeDecodeError:
+                raise AcroFormError("non UTF-8 name")
+        if c == 0x28:  # (
+            return self._parse_literal(pos)
+        if c == 0x3C:  # <
+            if buf[pos + 1:pos + 2] == b'<':
+                return self._parse_dict(pos + 2)
+            end = buf.find(b'>', pos)
+            if end < 0:
+                if not self.at_eof:
+                    raise _Truncated()
+                raise AcroFormError("unterminated hex string")
+            digits = _HEX_WS_RE.sub(b'', buf[pos + 1:end])
+            if len(digits) % 2:
+                digits += b'0'
+            return bytes.fromhex(digits.decode('ascii')), end + 1
+        if c == 0x5B:  # [
+            items = []
+            pos += 1
+            while True:
+                pos = self.skip_ws(pos)
+                if buf[pos] == 0x5D:  # ]
+                    return items, pos + 1
+                item, pos = self.parse(pos)
+                items.append(item)
+
+        ref = _REF_RE.match(buf, pos)
+        if ref:
+            return Ref((int(ref.group(1)), int(ref.group(2)))), ref.end()
+
+        match = _TOKEN_RE.match(buf, pos)
+        if not match:
+            raise AcroFormError(f"unexpected byte {buf[pos:pos + 1]!r} at {pos}")
+        token = match.group()
+        if token == b'true':
+            return True, match.end()
+        if token == b'false':
+            return False, match.end()
+        if token == b'null':
+            return None, match.end()
+        if _INT_RE.fullmatch(token):
+            return int(token), match.end()
+        try:
+            return float(token), match.end()
+        except ValueError:
+            # Keywords (stream, endobj, R, ...) are handled by the callers
+            return token, match.end()
+
+    def _parse_dict(self, pos: int) -> Tuple[dict, int]:
+        buf = self.buf
+        result = {}
+        while True:
+            pos = self.skip_ws(pos)
+            if buf[pos:pos + 2] == b'>>':
+                return result, pos + 2
+            key, pos = self.parse(pos)
+            if not isinstance(key, Name):
+                raise AcroFormError("dictionary key is not a name")
+            value, pos = self.parse(pos)
+            result[key] = value
+
+    def _parse_literal(self, pos: int) -> Tuple[bytes, int]:
+        buf = self.buf
+        out = bytearray()
+        depth = 1
+        pos += 1
+        end = len(buf)
+        while True:
+            # Copy runs of ordinary bytes in one step
+            run = _LITERAL_RUN_RE.match(buf, pos)
+            if run:
+                out += run.group()
+                pos = run.end()
+            if pos >= end:
+                if not self.at_eof:
+                    raise _Truncated()
+                raise AcroFormError("unterminated string")
+            c = buf[pos]
+            pos += 1
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(out), pos
+            else:  # backslash
+                if pos >= end:
+                    raise _Truncated() if not self.at_eof else AcroFormError("unterminated string")
+                c = buf[pos]
+                pos += 1
+                if c in _LITERAL_ESCAPES:
+                    out += _LITERAL_ESCAPES[c]
+                    continue
+                if 0x30 <= c <= 0x37:
+                    digits = bytes((c,))
+                    while len(digits) < 3 and pos < end and 0x30 <= buf[pos] <= 0x37:
+                        digits += buf[pos:pos + 1]
+                        pos += 1
+                    value = int(digits, 8)
+                    out += bytes((value,)) if value < 256 else chr(value).encode('utf-8')
+                    continue
+                if c in (0x0A, 0x0D):
+                    # Escaped line break: skip it (and the second half of CRLF)
+                    if pos < end and buf[pos] in (0x0A, 0x0D):
+                        pos += 1
+                    continue
+                # Unknown escape: keep the character, drop the backslash
+            out.append(c)
+
+
+class AcroFormReader:
+    """Resolves the trailer, cross-reference data and AcroForm tree of a PDF."""
+
+    def __init__(self, source):
+        """
+        Args:
+            source: PDF content as bytes, or a seekable binary file object
+                (e.g. a GCS BlobReader) from which only the needed byte
+                ranges are read
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._data = bytes(source)
+            self._file = None
+            self.size = len(self._data)
+        else:
+            self._data = None
+            self._file = source
+            self.size = source.seek(0, 2)
+        self._blocks = OrderedDict()  # block index -> bytes (file sources only)
+
+        self._xref = {}           # object number -> ('o', offset) or ('s', stream number, index)
+        self._objects = {}        # object number -> parsed object
+        self._object_streams = {}  # stream number -> (data, {object number: offset})
+        self.trailer = {}
+        self._read_xref_chain()
+
+        if '/Encrypt' in self.trailer:
+            raise AcroFormError("encrypted documents are not supported")
+
+    # ── Byte access ─────────────────────────────────────────────────
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self._data is not None:
+            return self._data[offset:offset + length]
+
+        first = offset // _BLOCK_SIZE
+        last = min(offset + length, self.size) // _BLOCK_SIZE
+        index = first
+        while index <= last:
+            if index in self._blocks:
+                self._blocks.move_to_end(index)
+                index += 1
+                continue
+            # Fetch each run of missing blocks with a single read
+            run_end = index
+            while run_end < last and run_end + 1 not in self._blocks:
+                run_end += 1
+            self._file.seek(index * _BLOCK_SIZE)
+            data = self._file.read((run_end - index + 1) * _BLOCK_SIZE)
+            for block in range(index, run_end + 1):
+                start = (block - index) * _BLOCK_SIZE
+                self._blocks[block] = data[start:start + _BLOCK_SIZE]
+            index = run_end + 1
+
+        data = b''.join(self._blocks[block] for block in range(first, last + 1))
+        while len(self._blocks) > _CACHED_BLOCKS:
+            self._blocks.popitem(last=False)
+        start = offset - first * _BLOCK_SIZE
+        return data[start:start + length]
+
+    def _parse_at(self, offset: int, parse):
+        """Run parse(parser, position) against the bytes starting at offset."""
+        if self._data is not None:
+            return parse(_Parser(self._data, True), offset)
+
+        window = _WINDOW
+        while True:
+            buf = self._read(offset, window)
+            at_eof = offset + len(buf) >= self.size
+            try:
+                result, end = parse(_Parser(buf, at_eof), 0)
+                return result, offset + end
+            except _Truncated:
+                if at_eof or window >= _MAX_WINDOW:
+                    raise AcroFormError(f"object at {offset} is too large or truncated")
+                window *= 4
+
+    # ── Cross-reference data ────────────────────────────────────────
+
+    def _read_xref_chain(self):
+        tail = self._read(max(0, self.size - 2048), 2048)
+        index = tail.rfind(b'startxref')
+        if index < 0:
+            raise AcroFormError("startxref not found")
+        match = _INT_RE.search(tail, index + 9)
+        if not match:
+            raise AcroFormError("startxref offset missing")
+
+        offset = int(match.group())
+        seen = set()
+        first = True
+        while offset is not None:
+            if offset in seen or not 0 <= offset < self.size:
+                raise AcroFormError(f"bad xref offset {offset}")
+            seen.add(offset)
+
+            trailer = self._read_xref_section(offset)
+            if first:
+                self.trailer = trailer
+                first = False
+
+            # Hybrid files: entries in the /XRefStm stream take part in this section
+            if '/XRefStm' in trailer and trailer['/XRefStm'] not in seen:
+                seen.add(trailer['/XRefStm'])
+                self._read_xref_section(trailer['/XRefStm'])
+            offset = trailer.get('/Prev')
+
+    def _read_xref_section(self, offset: int) -> dict:
+        head = self._read(offset, 4)
+        if head == b'xref':
+            return self._read_xref_table(offset + 4)
+        return self._read_xref_stream(offset)
+
+    def _set_entry(self, number: int, entry):
+        # Sections are read newest first, so the first entry for an object wins.
+        # Free entries are not recorded: in hybrid files the /XRefStm stream
+        # supplies objects that the classic table lists as free.
+        if entry is not None and number not in self._xref:
+            self._xref[number] = entry
+
+    def _read_xref_table(self, offset: int) -> dict:
+        def parse(parser, pos):
+            buf = parser.buf
+            while True:
+                pos = parser.skip_ws(pos)
+                if buf[pos:pos + 7] == b'trailer':
+                    trailer, pos = parser.parse(pos + 7)
+                    return trailer, pos
+                start, pos = parser.parse(pos)
+                count, pos = parser.parse(pos)
+                if not isinstance(start, int) or not isinstance(count, int):
+                    raise AcroFormError("malformed xref subsection header")
+                for number in range(start, start + count):
+                    pos = parser.skip_ws(pos)
+                    entry = buf[pos:pos + 18]
+                    if len(entry) < 18:
+                        raise _Truncated() if not parser.at_eof else AcroFormError("truncated xref table")
+                    if entry[17:18] == b'n':
+                        self._set_entry(number, ('o', int(entry[0:10])))
+                    elif entry[17:18] == b'f':
+                        self._set_entry(number, None)
+                    else:
+                        raise AcroFormError("malformed xref entry")
+                    pos += 18
+
+        trailer, _ = self._parse_at(offset, parse)
+        return trailer
+
+    def _read_xref_stream(self, offset: int) -> dict:
+        stream = self._parse_indirect_at(offset)
+        if not isinstance(stream, Stream) or stream.dictionary.get('/Type') != '/XRef':
+            raise AcroFormError(f"no xref data at offset {offset}")
+
+        info = stream.dictionary
+        data = self._stream_data(stream)
+        widths = info['/W']
+        index = info.get('/Index', [0, info['/Size']])
+
+        rows = _xref_stream_rows(data, widths)
+        row_number = 0
+        for start, count in zip(index[0::2], index[1::2]):
+            for number in range(start, start + count):
+                if row_number >= len(rows):
+                    raise AcroFormError("xref stream shorter than its /Index")
+                entry_type, field2, field3 = rows[row_number]
+                row_number += 1
+                if entry_type == 1:
+                    self._set_entry(number, ('o', field2))
+                elif entry_type == 2:
+                    self._set_entry(number, ('s', field2, field3))
+        return info
+
+    # ── Objects ─────────────────────────────────────────────────────
+
+    def _parse_indirect_at(self, offset: int):
+        def parse(parser, pos):
+            header = _OBJ_HEADER_RE.match(parser.buf, pos)
+            if not header:
+                if not parser.at_eof and len(parser.buf) - pos < 64:
+                    raise _Truncated()
+                raise AcroFormError(f"no object header at offset {offset}")
+            value, pos = parser.parse(header.end())
+            if isinstance(value, dict):
+                after = parser.skip_ws(pos)
+                if parser.buf[after:after + 6] == b'stream':
+                    pos = after + 6
+                    # The keyword is followed by CRLF or LF before the data
+                    if parser.buf[pos:pos + 2] == b'\r\n':
+                        pos += 2
+                    elif parser.buf[pos:pos + 1] in (b'\n', b'\r'):
+                        pos += 1
+                    return Stream(value, pos), pos
+            return value, pos
+
+        value, end = self._parse_at(offset, parse)
+        if isinstance(value, Stream) and self._data is None:
+            # Window-relative offsets from _parse_at are converted back to file offsets
+            value.data_offset = end
+        return value
+
+    def _stream_data(self, stream: Stream) -> bytes:
+        info = stream.dictionary
+        length = self.resolve(info.get('/Length'))
+        if not isinstance(length, int):
+            raise AcroFormError("stream without a usable /Length")
+        data = self._read(stream.data_offset, length)
+
+        filters = info.get('/Filter')
+        params = info.get('/DecodeParms')
+        if isinstance(filters, list):
+            if len(filters) > 1:
+                raise AcroFormError("chained stream filters are not supported")
+            filters = filters[0] if filters else None
+            params = params[0] if isinstance(params, list) and params else params
+        if filters is None:
+            return data
+        if filters != '/FlateDecode':
+            raise AcroFormError(f"unsupported stream filter {filters}")
+
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            # Some writers omit the end-of-stream marker; keep what decodes
+            data = zlib.decompressobj().decompress(data)
+        params = self.resolve(params) or {}
+        predictor = params.get('/Predictor', 1)
+        if predictor >= 10:
+            data = _undo_png_predictor(data, params.get('/Columns', 1))
+        elif predictor != 1:
+            raise AcroFormError(f"unsupported predictor {predictor}")
+        return data
+
+    def _load_object_stream(self, number: int):
+        if number not in self._object_streams:
+            stream = self.get_object(number)
+            if not isinstance(stream, Stream):
+                raise AcroFormError(f"object {number} is not an object stream")
+            data = self._stream_data(stream)
+            count = stream.dictionary['/N']
+            first = stream.dictionary['/First']
+            header = _Parser(data[:first], True)
+            offsets = {}
+            pos = 0
+            for _ in range(count):
+                obj_number, pos = header.parse(pos)
+                obj_offset, pos = header.parse(pos)
+                offsets[obj_number] = first + obj_offset
+            self._object_streams[number] = (data, offsets)
+        return self._object_streams[number]
+
+    def get_object(self, number: int):
+        """Parse (once) and return the object with the given number."""
+        if number in self._objects:
+            return self._objects[number]
+
+        entry = self._xref.get(number)
+        if entry is None:
+            value = None
+        elif entry[0] == 'o':
+            value = self._parse_indirect_at(entry[1])
+        else:
+            data, offsets = self._load_object_stream(entry[1])
+            if number not in offsets:
+                raise AcroFormError(f"object {number} missing from object stream {entry[1]}")
+            value, _ = _Parser(data, True).parse(offsets[number])
+
+        self._objects[number] = value
+        return value
+
+    def resolve(self, value):
+        """Follow indirect references until a direct object is reached."""
+        seen = set()
+        while isinstance(value, Ref):
+            if value in seen:
+                raise AcroFormError("reference cycle")
+            seen.add(value)
+            value = self.get_object(value[0])
+        return value
+
+    # ── Forms ───────────────────────────────────────────────────────
+
+    def _catalog(self) -> dict:
+        catalog = self.resolve(self.trailer.get('/Root'))
+        if not isinstance(catalog, dict):
+            raise AcroFormError("document catalog not found")
+        return catalog
+
+    def page_count(self) -> int:
+        """Number of pages, from the page tree root's /Count."""
+        pages = self.resolve(self._catalog().get('/Pages'))
+        if not isinstance(pages, dict) or not isinstance(self.resolve(pages.get('/Count')), int):
+            raise AcroFormError("page tree root without /Count")
+        return self.resolve(pages['/Count'])
+
+    def fields(self) -> Dict[str, str]:
+        """
+        Extract form field values.
+
+        Returns:
+            Dictionary of field names and values; empty if the document has
+            no AcroForm or no named fields
+        """
+        acroform = self.resolve(self._catalog().get('/AcroForm'))
+        if not isinstance(acroform, dict):
+            return {}
+
+        raw_fields = {}
+        visiting = set()
+
+        def visit(node_ref, node):
+            # Post-order: kids first, then the node itself (PyPDF2's ordering)
+            if node_ref is not None:
+                if node_ref in visiting:
+                    raise AcroFormError("cycle in field tree")
+                visiting.add(node_ref)
+
+            for kid_ref in self.resolve(node.get('/Kids')) or []:
+                kid = self.resolve(kid_ref)
+                if isinstance(kid, dict):
+                    visit(kid_ref if isinstance(kid_ref, Ref) else None, kid)
+
+            if node is not acroform and any(attr in node for attr in _FIELD_ATTRIBUTES):
+                name = self.resolve(node.get('/TM', node.get('/T')))
+                if name is not None:
+                    if not isinstance(name, bytes):
+                        raise AcroFormError("field name is not a string")
+                    raw_fields[decode_text(name)] = node.get('/V')
+
+            if node_ref is not None:
+                visiting.discard(node_ref)
+
+        visit(None, acroform)
+        for field_ref in self.resolve(acroform.get('/Fields')) or []:
+            field = self.resolve(field_ref)
+            if isinstance(field, dict):
+                visit(field_ref if isinstance(field_ref, Ref) else None, field)
+
+        # Decode each surviving value exactly once
+        return {name: self._render_value(value) for name, value in raw_fields.items()}
+
+    def _render_value(self, value) -> str:
+        """Render a /V value as str() of the equivalent PyPDF2 object."""
+        value = self.resolve(value)
+        if value is None:
+            return ''
+        if isinstance(value, bytes):
+            return decode_text(value)
+        if isinstance(value, Name):
+            return str(value)
+        if isinstance(value, list):
+            items = [self.resolve(item) for item in value]
+            if all(isinstance(item, (bytes, Name)) for item in items):
+                rendered = [decode_text(item) if isinstance(item, bytes) else str(item) for item in items]
+                return repr(rendered)
+        raise AcroFormError(f"unsupported field value type {type(value).__name__}")
+
+
+def _xref_stream_rows(data: bytes, widths) -> list:
+    """Split decoded xref stream data into (type, field 2, field 3) rows."""
+    if len(widths) != 3:
+        raise AcroFormError("xref stream /W must have three entries")
+    row_size = sum(widths)
+    usable = len(data) - len(data) % row_size
+
+    if widths[1] and all(width in _STRUCT_CODES for width in widths):
+        layout = '>' + ''.join(_STRUCT_CODES[width] for width in widths)
+        rows = struct.iter_unpack(layout, data[:usable])
+        if widths[0] == 0:
+            # A zero-width type column defaults every entry to type 1
+            return [(1,) + tuple(row) + (0,) * (2 - len(row)) for row in rows]
+        return [tuple(row) + (0,) * (3 - len(row)) for row in rows]
+
+    rows = []
+    for start in range(0, usable, row_size):
+        row = []
+        column = start
+        for width in widths:
+            row.append(int.from_bytes(data[column:column + width], 'big') if width else None)
+            column += width
+        rows.append((1 if row[0] is None else row[0], row[1] or 0, row[2] or 0))
+    return rows
+
+
+def _undo_png_predictor(data: bytes, columns: int) -> bytes:
+    """Reverse PNG row predictors (used by xref and object streams)."""
+    row_size = columns + 1
+    if len(data) % row_size:
+        raise AcroFormError("PNG predictor data is not a whole number of rows")
+
+    output = bytearray()
+    previous = bytearray(columns)
+    for start in range(0, len(data), row_size):
+        filter_type = data[start]
+        row = bytearray(data[start + 1:start + row_size])
+        if filter_type == 0:
+            pass
+        elif filter_type == 1:
+            for i in range(1, columns):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif filter_type == 2:
+            for i in range(columns):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif filter_type == 3:
+            for i in range(columns):
+                left = row[i - 1] if i else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for i in range(columns):
+                left = row[i - 1] if i else 0
+                up = previous[i]
+                up_left = previous[i - 1] if i else 0
+                estimate = left + up - up_left
+                distances = (abs(estimate - left), abs(estimate - up), abs(estimate - up_left))
+                if distances[0] <= distances[1] and distances[0] <= distances[2]:
+                    predicted = left
+                elif distances[1] <= distances[2]:
+                    predicted = up
+                else:
+                    predicted = up_left
+                row[i] = (row[i] + predicted) & 0xFF
+        else:
+            raise AcroFormError(f"unknown PNG filter type {filter_type}")
+        output += row
+        previous = row
+    return bytes(output)
@@ -0,0 +1,179 @@
+"""
+Awards ID allocation backed by a small per-year counter object.
+
+Each year has one JSON object in the pipeline state bucket
+(awards-ids/2025.json -> {"year": "2025", "last": 42}). Claiming an ID is a
+compare-and-set: read the counter and its generation, then write the
+incremented value with if_generation_match. If another instance wrote first
+the precondition fails, and the loser re-reads and tries again after a short
+jittered backoff. Every successful write hands out exactly one number, so
+concurrent submissions can never receive the same ID, and the cost of an
+allocation no longer depends on how many rows the sheet has.
+
+InMemoryCounterStore implements the same generation semantics locally so the
+allocator can be stress-tested without GCS
+(see backend/benchmarks/stress_awards_ids.py).
+"""
+import json
+import random
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+
+class CounterConflict(Exception):
+    """Raised when a conditional counter write loses a race with another writer."""
+
+
+class AllocationError(Exception):
+    """Raised when no Awards ID could be claimed within the retry budget."""
+
+
+def format_awards_id(year: str, number: int) -> str:
+    """Format an Awards ID: AW-YYYY-NNN."""
+    return f"AW-{year}-{number:03d}"
+
+
+class GcsCounterStore:
+    """Per-year counters stored as JSON objects, updated with generation preconditions."""
+
+    def __init__(self, bucket, prefix: str = 'awards-ids/'):
+        """
+        Args:
+            bucket: google.cloud.storage Bucket holding the counter objects
+            prefix: Object name prefix for the counters
+        """
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _blob_name(self, year: str) -> str:
+        return f"{self.prefix}{year}.json"
+
+    def read(self, year: str) -> Tuple[Optional[int], int]:
+        """
+        Read a counter.
+
+        Returns:
+            Tuple of (last allocated number or None if the counter does not
+            exist yet, generation to use as the write precondition)
+        """
+        from google.api_core.exceptions import NotFound
+
+        blob = self.bucket.blob(self._blob_name(year))
+        try:
+            data = json.loads(blob.download_as_bytes())
+        except NotFound:
+            return None, 0
+        # The download response carries the generation it read
+        return int(data['last']), blob.generation
+
+    def write(self, year: str, value: int, generation: int):
+        """
+        Write a counter only if it is still at the given generation.
+
+        Raises:
+            CounterConflict: If another writer updated the counter first
+        """
+        from google.api_core.exceptions import PreconditionFailed, TooManyRequests
+
+        blob = self.bucket.blob(self._blob_name(year))
+        try:
+            blob.upload_from_string(
+                json.dumps({'year': year, 'last': value}),
+                content_type='application/json',
+                if_generation_match=generation
+            )
+        except PreconditionFailed as e:
+            raise CounterConflict(str(e)) from e
+        except TooManyRequests as e:
+            # GCS throttles rapid updates to a single object; back off like a lost race
+            raise CounterConflict(str(e)) from e
+
+
+class InMemoryCounterStore:
+    """
+    Local stand-in for GcsCounterStore with the same generation semantics.
+
+    Generation 0 means "must not exist", matching GCS. An optional latency is
+    applied between the read and the write path to widen race windows when
+    stress testing.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._counters = {}  # year -> (value, generation)
+        self._next_generation = 1
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.conflicts = 0
+
+    def read(self, year: str) -> Tuple[Optional[int], int]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if year not in self._counters:
+                return None, 0
+            return self._counters[year]
+
+    def write(self, year: str, value: int, generation: int):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            current_generation = self._counters.get(year, (None, 0))[1]
+            if current_generation != generation:
+                self.conflicts += 1
+                raise CounterConflict(
+                    f"generation mismatch for {year}: expected {generation}, found {current_generation}"
+                )
+            self._counters[year] = (value, self._next_generation)
+            self._next_generation += 1
+            self.writes += 1
+
+
+class AwardsIdAllocator:
+    """Hands out sequential Awards IDs per year using a compare-and-set counter store."""
+
+    def __init__(self, store, max_attempts: int = 25, base_delay: float = 0.05,
+                 max_delay: float = 2.0):
+        """
+        Args:
+            store: Counter store (GcsCounterStore or InMemoryCounterStore)
+            max_attempts: Conditional writes to try before giving up
+            base_delay: Initial backoff in seconds after a lost race
+            max_delay: Upper bound on a single backoff sleep
+        """
+        self.store = store
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def allocate(self, year: str, seed: Optional[Callable[[str], int]] = None) -> str:
+        """
+        Claim the next Awards ID for a year.
+
+        Args:
+            year: Year (YYYY format string)
+            seed: Called only when the year's counter does not exist yet;
+                returns the highest number already in use so numbering
+                continues from existing submissions
+
+        Returns:
+            Unique Awards ID (e.g., "AW-2025-042")
+
+        Raises:
+            AllocationError: If every attempt lost a race
+        """
+        for attempt in range(self.max_attempts):
+            last, generation = self.store.read(year)
+            if last is None:
+                last = seed(year) if seed else 0
+
+            try:
+                self.store.write(year, last + 1, generation)
+                return format_awards_id(year, last + 1)
+            except CounterConflict:
+                # Full jitter keeps contending instances from retrying in lockstep
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                time.sleep(random.uniform(0, delay))
+
+        raise AllocationError(f"Could not allocate an Awards ID for {year} after {self.max_attempts} attempts")
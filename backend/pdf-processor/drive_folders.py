@@ -0,0 +1,468 @@
+"""
+Drive folder-ID resolution with a two-tier cache and single-flight creation.
+
+Resolving Root > Year > Project > Photos used to cost one files().list query
+per level per event, and photos arriving in parallel could each create their
+own "Photos" folder. FolderResolver caches (parent_id, name) -> folder_id:
+
+- Memory tier: per instance, with a long TTL for hits and a short negative
+  TTL for "not found" so a missing folder isn't re-queried on every event.
+- Persisted tier: one small JSON record per folder in the state bucket,
+  shared by every instance of both processors.
+
+Creation is single-flight. Inside an instance a per-key lock serializes
+creators; across instances the persisted record doubles as a claim. It is
+written with if_generation_match=0, so exactly one instance wins the right
+to create the folder. Everyone else waits for the winner to fill in the
+folder ID.
+
+A folder ID read from the persisted tier is checked with one files.get
+before it is trusted (a memory-tier miss, so about once per TTL per
+instance). If staff deleted, trashed or moved the folder, the record is
+deleted (compare-and-set on its generation) and the folder is searched for
+or created again. A caller whose request fails with 404 on a resolved ID
+(e.g. an upload into a deleted folder) calls forget() on it; so does
+find_or_create() when the parent it creates in has gone. The next lookup
+then resolves it afresh.
+
+Project folders are also indexed by submission ID. pdf-processor stamps each
+project folder with appProperties (submission_id, awards_id). find_project()
+resolves a submission's folder with one indexed appProperties query, served
+from the same two tiers when possible. appProperties are private to the
+OAuth client that set them, so both processors must use the same client.
+
+This file is duplicated in backend/pdf-processor and backend/photo-processor
+because each Cloud Function deploys only its own source directory. Keep the
+two copies identical.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+import google_api
+
+logger = logging.getLogger(__name__)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+PROJECT_INDEX_KEY = 'submission_id'
+
+
+class FolderResolver:
+    """Cached find / find-or-create of Drive folders keyed by (parent_id, name)."""
+
+    def __init__(self, state_bucket=None, prefix: str = 'drive-folders/',
+                 ttl: float = 3600, negative_ttl: float = 30,
+                 claim_timeout: float = 30, poll_interval: float = 0.5):
+        """
+        Args:
+            state_bucket: google.cloud.storage Bucket for the persisted tier
+                (None keeps the cache in memory only)
+            prefix: Object name prefix for persisted folder records
+            ttl: Seconds a resolved folder ID is served from memory
+            negative_ttl: Seconds a "folder not found" result is remembered
+            claim_timeout: Seconds before another instance's unfinished
+                creation claim is considered abandoned and taken over
+            poll_interval: Initial delay between checks while waiting on
+                another instance's claim
+        """
+        self.state_bucket = state_bucket
+        self.prefix = prefix
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self._cache = {}  # (parent_id, name) -> (folder_id or None, expires_at)
+        self._cache_lock = threading.Lock()
+        self._key_locks = {}
+
+    # ── Memory tier ─────────────────────────────────────────────────
+
+    def _cached(self, key):
+        """Return (hit, folder_id) from the memory tier."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry and entry[1] > time.monotonic():
+                return True, entry[0]
+        return False, None
+
+    def _remember(self, key, folder_id: Optional[str]):
+        ttl = self.ttl if folder_id else self.negative_ttl
+        with self._cache_lock:
+            self._cache[key] = (folder_id, time.monotonic() + ttl)
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._cache_lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def invalidate(self, parent_id: str, name: str, folder_id: Optional[str] = None):
+        """
+        Forget a folder in both tiers (e.g. after it was deleted in Drive).
+
+        Given folder_id, the persisted record is only deleted while it still
+        holds that ID, so a folder another instance has since recreated stays.
+        """
+        with self._cache_lock:
+            self._cache.pop((parent_id, name), None)
+        if self.state_bucket is not None:
+            record, generation = self._read_record(parent_id, name)
+            # An unfinished creation claim (no folder ID yet) is left to its owner
+            if record and record.get('folder_id') and folder_id in (None, record['folder_id']):
+                self._delete_record(parent_id, name, generation)
+
+    def invalidate_project(self, submission_id: str, folder_id: Optional[str] = None):
+        """Forget a submission's project folder in both tiers (or that it wasn't found), as invalidate()."""
+        with self._cache_lock:
+            self._cache.pop(('project', submission_id), None)
+        if self.state_bucket is not None:
+            self._delete_index(submission_id, folder_id)
+
+    def forget(self, folder_id: str):
+        """
+        Forget every resolution to a folder ID, in both tiers.
+
+        For a caller whose request on a resolved folder failed with 404
+        (see is_missing); the next lookup searches for or creates it again.
+        """
+        with self._cache_lock:
+            keys = [key for key, (cached_id, _) in self._cache.items() if cached_id == folder_id]
+        logger.warning(f"Folder {folder_id} is gone from Drive, forgetting {len(keys)} cached resolution(s)")
+        for key in keys:
+            if key[0] == 'project':
+                self.invalidate_project(key[1], folder_id)
+            else:
+                self.invalidate(*key, folder_id)
+
+    @staticmethod
+    def is_missing(error: Exception) -> bool:
+        """Whether a Drive error means a file or folder ID no longer exists (404)."""
+        from googleapiclient.errors import HttpError
+
+        return isinstance(error, HttpError) and error.resp.status == 404
+
+    # ── Persisted tier ──────────────────────────────────────────────
+
+    def _record_blob(self, parent_id: str, name: str):
+        digest = hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]
+        return self.state_bucket.blob(f"{self.prefix}{parent_id}/{digest}.json")
+
+    def _read_record(self, parent_id: str, name: str):
+        """Return (record dict or None, generation) from the persisted tier."""
+        from google.api_core.exceptions import NotFound
+
+        blob = self._record_blob(parent_id, name)
+        try:
+            record = json.loads(blob.download_as_bytes())
+        except NotFound:
+            return None, 0
+        return record, blob.generation
+
+    def _write_record(self, parent_id: str, name: str, record: dict, generation: int) -> Optional[int]:
+        """Write a record if it is still at `generation`; return the new generation or None if we lost."""
+        from google.api_core.exceptions import PreconditionFailed
+
+        blob = self._record_blob(parent_id, name)
+        try:
+            blob.upload_from_string(
+                json.dumps(record),
+                content_type='application/json',
+                if_generation_match=generation
+            )
+        except PreconditionFailed:
+            return None
+        return blob.generation
+
+    def _delete_record(self, parent_id: str, name: str, generation: int):
+        """Delete a record if it is still at `generation` (a claim, or a stale folder ID)."""
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        try:
+            self._record_blob(parent_id, name).delete(if_generation_match=generation)
+        except (NotFound, PreconditionFailed):
+            pass
+
+    # ── Drive ───────────────────────────────────────────────────────
+
+    def _exists_in_drive(self, service, folder_id: str, parent_id: Optional[str] = None) -> bool:
+        """Whether a folder ID still names a folder that isn't trashed (and, given parent_id, is still in it)."""
+        try:
+            folder = google_api.execute('drive', service.files().get(
+                fileId=folder_id,
+                fields='id, trashed, parents',
+                supportsAllDrives=True
+            ))
+        except Exception as e:
+            if self.is_missing(e):
+                return False
+            raise
+        if folder.get('trashed'):
+            return False
+        return parent_id is None or parent_id in folder.get('parents', [])
+
+    @staticmethod
+    def _query_drive(service, parent_id: str, name: str) -> Optional[str]:
+        escaped_name = name.replace('\\', '\\\\').replace("'", "\\'")
+        query = f"name='{escaped_name}' and mimeType='{FOLDER_MIME_TYPE}' and '{parent_id}' in parents and trashed=false"
+
+        results = google_api.execute('drive', service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id, name)',
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        ))
+
+        files = results.get('files', [])
+        return files[0]['id'] if files else None
+
+    @staticmethod
+    def _create_in_drive(service, parent_id: str, name: str) -> str:
+        file_metadata = {
+            'name': name,
+            'mimeType': FOLDER_MIME_TYPE,
+            'parents': [parent_id]
+        }
+        folder = google_api.execute('drive', service.files().create(
+            body=file_metadata,
+            fields='id',
+            supportsAllDrives=True
+        ), idempotent=False)
+        logger.info(f"Created folder: {name} (ID: {folder.get('id')})")
+        return folder.get('id')
+
+    # ── Project index ───────────────────────────────────────────────
+
+    def _index_blob(self, submission_id: str):
+        digest = hashlib.sha256(submission_id.encode('utf-8')).hexdigest()[:32]
+        return self.state_bucket.blob(f"{self.prefix}by-submission/{digest}.json")
+
+    def _delete_index(self, submission_id: str, folder_id: Optional[str] = None):
+        """Delete a submission's index record (only while it holds folder_id, if given)."""
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        blob = self._index_blob(submission_id)
+        try:
+            record = json.loads(blob.download_as_bytes())
+            if folder_id in (None, record.get('folder_id')):
+                blob.delete(if_generation_match=blob.generation)
+        except (NotFound, PreconditionFailed):
+            pass
+
+    @staticmethod
+    def _query_drive_index(service, submission_id: str) -> Optional[str]:
+        escaped_id = submission_id.replace('\\', '\\\\').replace("'", "\\'")
+        query = (f"appProperties has {{ key='{PROJECT_INDEX_KEY}' and value='{escaped_id}' }} "
+                 f"and mimeType='{FOLDER_MIME_TYPE}' and trashed=false")
+
+        results = google_api.execute('drive', service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id)',
+            pageSize=1,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        ))
+
+        files = results.get('files', [])
+        return files[0]['id'] if files else None
+
+    def index_project(self, service, folder_id: str, submission_id: str,
+                      awards_id: Optional[str] = None):
+        """
+        Stamp a project folder with its submission so find_project() can locate it.
+
+        Args:
+            service: Authenticated Drive service
+            folder_id: Project folder ID
+            submission_id: Submission ID (the index key)
+            awards_id: Awards ID, stored alongside for reference
+        """
+        properties = {PROJECT_INDEX_KEY: submission_id}
+        if awards_id:
+            properties['awards_id'] = awards_id
+        google_api.execute('drive', service.files().update(
+            fileId=folder_id,
+            body={'appProperties': properties},
+            fields='id',
+            supportsAllDrives=True
+        ))
+
+        self._remember(('project', submission_id), folder_id)
+        if self.state_bucket is not None:
+            self._index_blob(submission_id).upload_from_string(
+                json.dumps(dict(properties, folder_id=folder_id)),
+                content_type='application/json'
+            )
+
+    def find_project(self, service, submission_id: str, fresh: bool = False) -> Optional[str]:
+        """
+        Find the project folder stamped with a submission ID by index_project().
+
+        Args:
+            service: Authenticated Drive service
+            submission_id: Submission ID
+            fresh: Look again even if the folder was recently not found
+                (when polling for pdf-processor to create it)
+
+        Returns:
+            Folder ID if found, None otherwise (not created or not indexed yet)
+        """
+        key = ('project', submission_id)
+        hit, folder_id = self._cached(key)
+        if hit and (folder_id or not fresh):
+            return folder_id
+
+        if self.state_bucket is not None:
+            from google.api_core.exceptions import NotFound
+
+            try:
+                record = json.loads(self._index_blob(submission_id).download_as_bytes())
+            except NotFound:
+                record = None
+            if record and record.get('folder_id'):
+                if self._exists_in_drive(service, record['folder_id']):
+                    self._remember(key, record['folder_id'])
+                    return record['folder_id']
+                logger.warning(f"Project folder {record['folder_id']} of {submission_id} is gone, dropping its record")
+                self._delete_index(submission_id, record['folder_id'])
+
+        folder_id = self._query_drive_index(service, submission_id)
+        self._remember(key, folder_id)
+        if folder_id and self.state_bucket is not None:
+            # Backfill the persisted tier, e.g. for folders indexed by another deployment
+            self._index_blob(submission_id).upload_from_string(
+                json.dumps({PROJECT_INDEX_KEY: submission_id, 'folder_id': folder_id}),
+                content_type='application/json'
+            )
+        return folder_id
+
+    # ── Public API ──────────────────────────────────────────────────
+
+    def find(self, service, parent_id: str, name: str) -> Optional[str]:
+        """
+        Find a folder by name in a parent folder.
+
+        Args:
+            service: Authenticated Drive service
+            parent_id: Parent folder ID
+            name: Folder name to search for
+
+        Returns:
+            Folder ID if found, None otherwise
+        """
+        key = (parent_id, name)
+        hit, folder_id = self._cached(key)
+        if hit:
+            return folder_id
+
+        if self.state_bucket is not None:
+            record, generation = self._read_record(parent_id, name)
+            if record and record.get('folder_id'):
+                if self._exists_in_drive(service, record['folder_id'], parent_id):
+                    self._remember(key, record['folder_id'])
+                    return record['folder_id']
+                self._drop_stale(parent_id, name, record['folder_id'], generation)
+
+        folder_id = self._query_drive(service, parent_id, name)
+        self._remember(key, folder_id)
+        if folder_id and self.state_bucket is not None:
+            # Backfill the persisted tier for folders created before it existed
+            self._write_record(parent_id, name, {'name': name, 'folder_id': folder_id}, 0)
+        return folder_id
+
+    def find_or_create(self, service, parent_id: str, name: str) -> str:
+        """
+        Find a folder by name, creating it if it doesn't exist.
+
+        Only one caller - across threads and instances - creates a missing
+        folder; the others wait for and return the winner's folder ID.
+
+        Args:
+            service: Authenticated Drive service
+            parent_id: Parent folder ID
+            name: Folder name
+
+        Returns:
+            ID of found or created folder
+        """
+        key = (parent_id, name)
+        hit, folder_id = self._cached(key)
+        if hit and folder_id:
+            return folder_id
+
+        with self._key_lock(key):
+            # Another thread may have resolved it while we waited for the lock
+            hit, folder_id = self._cached(key)
+            if hit and folder_id:
+                return folder_id
+
+            try:
+                if self.state_bucket is None:
+                    folder_id = self._query_drive(service, parent_id, name)
+                    if not folder_id:
+                        folder_id = self._create_in_drive(service, parent_id, name)
+                else:
+                    folder_id = self._find_or_create_claimed(service, parent_id, name)
+            except Exception as e:
+                # Creating in a parent that no longer exists: the parent's ID is stale
+                if self.is_missing(e):
+                    self.forget(parent_id)
+                raise
+
+            self._remember(key, folder_id)
+            return folder_id
+
+    def _find_or_create_claimed(self, service, parent_id: str, name: str) -> str:
+        """Resolve a folder through the persisted tier, claiming creation if needed."""
+        deadline = time.monotonic() + self.claim_timeout
+        delay = self.poll_interval
+
+        while True:
+            record, generation = self._read_record(parent_id, name)
+            dropped = False
+
+            if record and record.get('folder_id'):
+                if self._exists_in_drive(service, record['folder_id'], parent_id):
+                    return record['folder_id']
+                self._drop_stale(parent_id, name, record['folder_id'], generation)
+                dropped = True
+            elif record is None or record.get('claimed_at', 0) + self.claim_timeout < time.time():
+                # Nobody has claimed this folder (or the claimant died): try to claim it
+                claim = {'name': name, 'folder_id': None, 'claimed_at': time.time()}
+                claim_generation = self._write_record(parent_id, name, claim, generation)
+                if claim_generation is not None:
+                    return self._create_as_claimant(service, parent_id, name, claim_generation)
+                # Lost the claim race; fall through and wait for the winner
+
+            # Every path that goes round again, including lost claims, is bounded
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for another instance to create folder '{name}'")
+            if not dropped:
+                # A dropped stale record is claimed right away
+                time.sleep(delay)
+                delay = min(delay * 2, 4)
+
+    def _drop_stale(self, parent_id: str, name: str, folder_id: str, generation: int):
+        """Delete the record of a folder deleted, trashed or moved in Drive, unless it was rewritten meanwhile."""
+        logger.warning(f"Folder '{name}' ({folder_id}) is no longer in its parent, dropping its record")
+        self._delete_record(parent_id, name, generation)
+
+    def _create_as_claimant(self, service, parent_id: str, name: str, claim_generation: int) -> str:
+        """Create the folder after winning the claim, then publish its ID."""
+        try:
+            # The folder may predate the persisted tier; don't create a duplicate
+            folder_id = self._query_drive(service, parent_id, name)
+            if folder_id:
+                logger.info(f"Found existing folder: {name} (ID: {folder_id})")
+            else:
+                folder_id = self._create_in_drive(service, parent_id, name)
+        except Exception:
+            self._delete_record(parent_id, name, claim_generation)
+            raise
+
+        record = {'name': name, 'folder_id': folder_id}
+        if self._write_record(parent_id, name, record, claim_generation) is None:
+            logger.warning(f"Folder record for '{name}' changed while creating it")
+        return folder_id
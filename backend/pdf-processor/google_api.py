@@ -0,0 +1,316 @@
+"""
+Rate limiting, retries and a circuit breaker for Drive and Sheets requests.
+
+Every Drive and Sheets request goes through execute(api, request) instead
+of request.execute():
+
+    results = google_api.execute('drive', service.files().list(q=query))
+
+Each API has a guard shared by all threads of the process:
+
+- A token bucket spaces requests to the API's budget, so a burst waits
+  briefly on our side instead of being answered with 429. The budget
+  adapts: every throttled answer halves the rate and drops saved-up burst,
+  and every success wins back a twentieth of the configured rate.
+- Retryable failures are retried with jittered exponential backoff,
+  honouring Retry-After. Retryable means 429, 403 rateLimitExceeded,
+  5xx and connection errors. Requests that are not idempotent
+  (idempotent=False: appends, metadata-only creates) are only retried on
+  throttling answers, because those are rejected before anything is done.
+- After breaker_threshold throttled answers in a row, the circuit breaker
+  opens. For breaker_cooldown seconds, requests fail at once with
+  CircuitOpenError instead of adding to the load. One trial request is then
+  let through, and it closes the breaker if it succeeds.
+
+Budgets are per process. Every instance of a function uses the same user
+OAuth token and so shares the per-user quota. Size requests_per_minute to
+the quota divided by the instances expected to be busy at once, not the
+maximum instance count.
+
+This file is duplicated in backend/pdf-processor and backend/photo-processor
+because each Cloud Function deploys only its own source directory. Keep the
+two copies identical.
+"""
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying; 403 only with a rate-limit reason (see is_throttled)
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_REASONS = frozenset({'rateLimitExceeded', 'userRateLimitExceeded'})
+
+# Per-process defaults. Sheets allows 60 read and 60 write requests per minute
+# per user; Drive allows far more, but writes are limited to a few per second.
+DEFAULTS = {
+    'drive': {'requests_per_minute': 600, 'burst': 20},
+    'sheets': {'requests_per_minute': 60, 'burst': 10},
+}
+_FALLBACK = {'requests_per_minute': 600, 'burst': 20}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an API that has been throttling us."""
+
+    def __init__(self, api: str, retry_in: float):
+        super().__init__(f"{api} API circuit open after repeated throttling; retry in {retry_in:.0f}s")
+        self.api = api
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() waits for a token instead of failing."""
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until it is available. Returns the seconds waited."""
+        with self._lock:
+            self._refill()
+            # Reserve the token now so waiting threads are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    @property
+    def requests_per_minute(self) -> float:
+        return self.rate * 60.0
+
+    def set_rate(self, requests_per_minute: float, drain: bool = False):
+        """Change the refill rate; drain=True also drops any saved-up burst."""
+        with self._lock:
+            self._refill()
+            self.rate = requests_per_minute / 60.0
+            if drain:
+                self._tokens = min(self._tokens, 0.0)
+
+
+class CircuitBreaker:
+    """Opens after consecutive throttled answers; lets one trial request through after a cooldown."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._throttled = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_call(self, api: str):
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(api, max(remaining, 0.0))
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit closed: trial request succeeded")
+            self._throttled = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_other(self):
+        """A request that failed without throttling; a running trial ends without reopening."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_throttled(self, api: str):
+        with self._lock:
+            self._throttled += 1
+            self._trial_running = False
+            if self._throttled >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Circuit opened for {api} API after {self._throttled} throttled requests")
+                self._opened_at = time.monotonic()
+
+
+class ApiGuard:
+    """Rate limit, retry and circuit breaker for one API."""
+
+    def __init__(self, api: str, requests_per_minute: float, burst: int, max_attempts: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 32.0,
+                 min_requests_per_minute: Optional[float] = None,
+                 breaker_threshold: int = 12, breaker_cooldown: float = 30.0):
+        """
+        Args:
+            api: API name, for messages
+            requests_per_minute: Sustained request budget for this process
+            burst: Requests that may be sent back to back before spacing starts
+            max_attempts: Attempts per request, including the first
+            base_delay: Backoff before the first retry, doubled for each later one (seconds)
+            max_delay: Upper bound for a single backoff (seconds)
+            min_requests_per_minute: Floor for the adapted rate (default: a tenth of the budget)
+            breaker_threshold: Consecutive throttled answers that open the circuit
+            breaker_cooldown: Seconds the circuit stays open before a trial request
+        """
+        self.api = api
+        self.requests_per_minute = requests_per_minute
+        self.min_requests_per_minute = min_requests_per_minute or requests_per_minute / 10
+        self.bucket = TokenBucket(requests_per_minute, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def execute(self, request, idempotent: bool = True):
+        """Execute a googleapiclient request under the rate limit, with retries."""
+        # Already loaded by the discovery client that built the request
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        transport_errors = (ConnectionError, TimeoutError, socket.timeout, httplib2.HttpLib2Error)
+        for attempt in range(1, self.max_attempts + 1):
+            self.breaker.before_call(self.api)
+            self.bucket.acquire()
+            try:
+                response = request.execute()
+            except HttpError as e:
+                throttled = is_throttled(e)
+                if throttled:
+                    self.breaker.record_throttled(self.api)
+                    self._slow_down()
+                else:
+                    self.breaker.record_other()
+                retryable = throttled or (idempotent and e.resp.status in RETRYABLE_STATUSES)
+                if not retryable or attempt == self.max_attempts:
+                    raise
+                delay = self._backoff(attempt, retry_after(e))
+                logger.warning(f"{self.api} request failed with {e.resp.status} "
+                               f"(attempt {attempt}/{self.max_attempts}); retrying in {delay:.1f}s")
+            except transport_errors as e:
+                self.breaker.record_other()
+                if not idempotent or attempt == self.max_attempts:
+                    raise
+                delay = self._backoff(attempt, None)
+                logger.warning(f"{self.api} request failed: {e!r} "
+                               f"(attempt {attempt}/{self.max_attempts}); retrying in {delay:.1f}s")
+            else:
+                self.breaker.record_success()
+                self._speed_up()
+                return response
+
+            time.sleep(delay)
+
+    def _slow_down(self):
+        rate = max(self.min_requests_per_minute, self.bucket.requests_per_minute / 2)
+        self.bucket.set_rate(rate, drain=True)
+
+    def _speed_up(self):
+        rate = self.bucket.requests_per_minute
+        if rate < self.requests_per_minute:
+            self.bucket.set_rate(min(self.requests_per_minute, rate + self.requests_per_minute / 20))
+
+    def _backoff(self, attempt: int, retry_after_seconds: Optional[float]) -> float:
+        # Full jitter spreads retries from concurrent callers apart
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after_seconds is not None:
+            delay = max(delay, min(retry_after_seconds, self.max_delay))
+        return delay
+
+
+def error_reasons(error: 'HttpError') -> set:
+    """The 'reason' values in an HttpError's JSON body (e.g. rateLimitExceeded)."""
+    try:
+        body = json.loads(error.content.decode('utf-8') if isinstance(error.content, bytes) else error.content)
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return set()
+    details = body.get('error', {}) if isinstance(body, dict) else {}
+    if not isinstance(details, dict):
+        return set()
+    reasons = {item.get('reason') for item in details.get('errors', []) if isinstance(item, dict)}
+    reasons.update(item.get('reason') for item in details.get('details', []) if isinstance(item, dict))
+    if details.get('status') == 'RESOURCE_EXHAUSTED':
+        reasons.add('rateLimitExceeded')
+    reasons.discard(None)
+    return reasons
+
+
+def is_throttled(error: 'HttpError') -> bool:
+    """Whether the API rejected the request for rate or quota reasons (nothing was done)."""
+    status = error.resp.status
+    if status == 429:
+        return True
+    return status == 403 and bool(error_reasons(error) & THROTTLE_REASONS)
+
+
+def retry_after(error: 'HttpError') -> Optional[float]:
+    """Seconds from a Retry-After header, if the response carried one."""
+    value = error.resp.get('retry-after') if hasattr(error.resp, 'get') else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_guards: Dict[str, ApiGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def configure(api: str, **settings) -> ApiGuard:
+    """Replace an API's guard, e.g. configure('sheets', requests_per_minute=120)."""
+    options = dict(DEFAULTS.get(api, _FALLBACK))
+    options.update(settings)
+    guard = ApiGuard(api, **options)
+    with _guards_lock:
+        _guards[api] = guard
+    return guard
+
+
+def get_guard(api: str) -> ApiGuard:
+    """The process-wide guard for an API, created with DEFAULTS on first use."""
+    with _guards_lock:
+        guard = _guards.get(api)
+        if guard is None:
+            guard = _guards[api] = ApiGuard(api, **DEFAULTS.get(api, _FALLBACK))
+    return guard
+
+
+def execute(api: str, request, idempotent: bool = True):
+    """
+    Execute a googleapiclient request through the API's shared guard.
+
+    Args:
+        api: 'drive' or 'sheets' (selects the rate limit and circuit breaker)
+        request: An unexecuted request, e.g. service.files().list(...)
+        idempotent: False for requests that must not run twice (appends,
+            metadata-only creates); those are retried only when throttled
+
+    Returns:
+        The response, as from request.execute()
+
+    Raises:
+        HttpError: Non-retryable failure, or retries exhausted
+        CircuitOpenError: The API has been throttling us; nothing was sent
+    """
+    return get_guard(api).execute(request, idempotent=idempotent)
@@ -0,0 +1,156 @@
+"""
+Pooled keep-alive HTTP connections for the Drive and Sheets clients.
+
+googleapiclient sends requests through an httplib2.Http. That object keeps
+one open connection per host, but it must not be used by two threads at
+once. A client built for each thread or event starts without connections,
+so its first request to www.googleapis.com pays for a TCP connect and TLS
+handshake.
+
+HttpPool keeps idle httplib2.Http objects and their open connections.
+Discovery clients are built on a PooledHttp:
+
+    service = build('drive', 'v3', http=http_pool.authorized(credentials))
+
+Each request borrows an Http from the pool and returns it when done. The
+most recently used one is lent first, so its connection is still open.
+Rebuilt clients (new credentials after reset_google_clients()) keep using
+the same connections. No connection is ever used by two threads at once.
+
+Every request is counted: requests, and connections opened (a new socket
+for a host, i.e. a handshake). The current invocation's span carries the
+counts (tracing.count), and stats() gives the totals since start, from
+which reuse_rate = 1 - opened / requests.
+
+GCS and Secret Manager are not routed through here. The storage client's
+requests session pools connections (urllib3), and Secret Manager uses one
+gRPC channel. Both stay open as long as their client, which the processors
+create once per instance.
+
+This file is duplicated in backend/pdf-processor and backend/photo-processor
+because each Cloud Function deploys only its own source directory. Keep the
+two copies identical.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class HttpPool:
+    """Thread-safe LIFO pool of httplib2.Http objects (and their keep-alive connections)."""
+
+    def __init__(self, max_idle: int = 8):
+        """
+        Args:
+            max_idle: Http objects kept for reuse; extra ones are closed when
+                returned. Size it to the requests in flight at once.
+        """
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'connections_opened': 0, 'http_created': 0}
+
+    @contextmanager
+    def connection(self):
+        """Borrow an httplib2.Http for one request."""
+        from googleapiclient.http import build_http
+
+        with self._lock:
+            http = self._idle.pop() if self._idle else None
+        if http is None:
+            # build_http() stops httplib2 from following Drive's resumable-upload 308s
+            http = build_http()
+            with self._lock:
+                self._stats['http_created'] += 1
+
+        # Sockets before the request; a new or replaced socket means a new connection
+        sockets = {key: conn.sock for key, conn in http.connections.items()}
+        try:
+            yield http
+        finally:
+            opened = sum(1 for key, conn in http.connections.items()
+                         if conn.sock is not None and conn.sock is not sockets.get(key))
+            with self._lock:
+                self._stats['requests'] += 1
+                self._stats['connections_opened'] += opened
+                keep = len(self._idle) < self.max_idle
+                if keep:
+                    self._idle.append(http)
+            tracing.count(http_requests=1, connections_opened=opened)
+            if not keep:
+                http.close()
+
+    def stats(self) -> dict:
+        """Totals since start: requests, connections_opened, http_created, reuse_rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats['requests']
+        stats['reuse_rate'] = round(1 - stats['connections_opened'] / requests, 4) if requests else None
+        return stats
+
+    def close(self):
+        """Close every idle connection (borrowed ones are closed when returned)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.max_idle = 0
+        for http in idle:
+            http.close()
+
+
+class PooledHttp:
+    """httplib2.Http stand-in for build(http=...) that authorizes each request and sends it on a pooled connection."""
+
+    def __init__(self, pool: HttpPool, credentials=None):
+        self.pool = pool
+        self.credentials = credentials
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5,
+                connection_type=None, **kwargs):
+        with self.pool.connection() as http:
+            if self.credentials is None:
+                return http.request(uri, method, body=body, headers=headers,
+                                    redirections=redirections, connection_type=connection_type)
+            from google_auth_httplib2 import AuthorizedHttp
+
+            return AuthorizedHttp(self.credentials, http=http).request(
+                uri, method, body=body, headers=headers, redirections=redirections,
+                connection_type=connection_type, **kwargs
+            )
+
+    def close(self):
+        """Connections belong to the pool, which outlives any one client."""
+
+
+_pool: Optional[HttpPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HttpPool:
+    """The process-wide pool, created on first use."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = HttpPool()
+        return _pool
+
+
+def configure(max_idle: int) -> HttpPool:
+    """Replace the process-wide pool, e.g. configure(max_idle=16) for more concurrent requests."""
+    global _pool
+
+    with _pool_lock:
+        old, _pool = _pool, HttpPool(max_idle)
+    if old is not None:
+        old.close()
+    return _pool
+
+
+def authorized(credentials) -> PooledHttp:
+    """An http for build() that sends requests with these credentials over the shared pool."""
+    return PooledHttp(get_pool(), credentials)
@@ -5,17 +5,27 @@ Extracts form fields and creates organized folders in Google Drive.
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import BinaryIO, Dict, Any, Optional, List, Tuple, Union
+import threading
+import time
 import functions_framework
-from google.cloud import storage, secretmanager
-from google.oauth2 import service_account
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-import PyPDF2
+import hashlib
+from google.auth.exceptions import RefreshError
 import io
 
+from awards_ids import AwardsIdAllocator, GcsCounterStore, format_awards_id
+from drive_folders import FolderResolver
+import google_api
+import http_pool
+from ledger import HashingReader, LedgerEntry, SubmissionLedger
+from narratives import GcsNarrativeStore
+from sheet_batch import BatchSheetWriter, GcsRowStore
+from submission import SHEET_COLUMNS, extract_pdf_fields, format_submission_row
+import submission_store
+import tracing
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,26 +35,124 @@ PROJECT_ID = os.environ.get('GCP_PROJECT_ID')
 DRIVE_FOLDER_SECRET = os.environ.get('DRIVE_FOLDER_SECRET')
 AWARDS_SHEET_ID_SECRET = os.environ.get('AWARDS_SHEET_ID_SECRET')
 SUBMISSIONS_BUCKET = os.environ.get('SUBMISSIONS_BUCKET')
+STATE_BUCKET = os.environ.get('STATE_BUCKET')  # Pipeline state (Awards ID counters, folder index)
+# Primary submission store: "firestore", "firestore://<database>" or "sqlite:///<path>"
+# (see submission_store.py). Unset, the sheet is the only record of submissions.
+SUBMISSION_STORE = os.environ.get('SUBMISSION_STORE')
 MAX_PDF_SIZE_MB = int(os.environ.get('MAX_PDF_SIZE_MB', 50))
+# Files above this size are streamed from GCS instead of downloaded in one piece
+STREAM_THRESHOLD_MB = int(os.environ.get('STREAM_THRESHOLD_MB', 8))
+# Chunk size for streamed GCS reads and resumable Drive uploads (multiple of 256 KB)
+STREAM_CHUNK_SIZE_MB = int(os.environ.get('STREAM_CHUNK_SIZE_MB', 8))
+# Staged sheet rows are appended in one request once this many are waiting...
+SHEET_BATCH_MAX_ROWS = int(os.environ.get('SHEET_BATCH_MAX_ROWS', 25))
+# ...or once the oldest has waited this long (flush_sheet_rows runs on a schedule)
+SHEET_BATCH_MAX_WAIT_SECONDS = int(os.environ.get('SHEET_BATCH_MAX_WAIT_SECONDS', 60))
+# Characters of each narrative answer kept in the sheet; the full text goes to STATE_BUCKET/narratives/
+NARRATIVE_EXCERPT_CHARS = int(os.environ.get('NARRATIVE_EXCERPT_CHARS', 120))
 DRIVE_OWNER_EMAIL = os.environ.get('DRIVE_OWNER_EMAIL')  # Email of Drive folder owner
-
-# Initialize clients
-storage_client = storage.Client()
-secret_client = secretmanager.SecretManagerServiceClient()
+# Refresh the cached OAuth access token this many seconds before it expires
+CREDENTIAL_REFRESH_MARGIN_SECONDS = int(os.environ.get('CREDENTIAL_REFRESH_MARGIN_SECONDS', 300))
+# How long secrets read from the 'latest' version are served from memory
+SECRET_CACHE_TTL_SECONDS = int(os.environ.get('SECRET_CACHE_TTL_SECONDS', 600))
+# Secret IDs may be pinned to a version: "projects/P/secrets/NAME/versions/3"
+USER_OAUTH_SECRET = os.environ.get('USER_OAUTH_SECRET', 'awards-production-user-oauth-token')
+# Fraction of invocations run under cProfile + tracemalloc, written to STATE_BUCKET/profiles/
+PROFILE_INVOCATIONS = float(os.environ.get('PROFILE_INVOCATIONS', 0))
+# Request budgets for this instance (the per-user quotas are shared by all instances)
+DRIVE_REQUESTS_PER_MINUTE = float(os.environ.get('DRIVE_REQUESTS_PER_MINUTE', 600))
+SHEETS_REQUESTS_PER_MINUTE = float(os.environ.get('SHEETS_REQUESTS_PER_MINUTE', 60))
+
+google_api.configure('drive', requests_per_minute=DRIVE_REQUESTS_PER_MINUTE)
+google_api.configure('sheets', requests_per_minute=SHEETS_REQUESTS_PER_MINUTE)
+
+# The Google client libraries are imported, and the GCS and Secret Manager
+# clients created, on first use (get_storage_client, get_secret_client,
+# _get_service) rather than at import, so a cold instance loads only what
+# the function it serves actually calls.
+_storage_client = None
+_secret_client = None
+_init_lock = threading.Lock()
+
+# Credentials and API clients are cached at module level so warm instances
+# reuse them across invocations instead of re-reading the OAuth secret,
+# refreshing the token and rebuilding discovery clients for every event.
+# Clients are cached per thread: {(api, version, thread_id): service}
+_credentials = None
+_services = {}
+_auth_request = None
+_client_lock = threading.Lock()
+
+# Secret values keyed by full version path: {name: (value, expires_at)}
+_secret_cache = {}
+_secret_lock = threading.Lock()
+
+_awards_id_allocator = None
+_folder_resolver = None
+_sheet_writer = None
+_submission_store = None
+_narrative_store = None
+_ledger = None
+
+# Range size for the random-access reads field extraction makes on streamed PDFs
+RANGE_READ_SIZE = 64 * 1024
+
+# Written by the frontend at submissions/YYYY/submission_id/ for the photo
+# processor; the bucket trigger delivers it here too
+COMPLETION_MARKER = 'complete.json'
+
+# Runs the Drive and Sheets stages of process_pdf alongside field extraction
+# and the upload. Kept across invocations. A discovery client and the
+# httplib2.Http under it must not be used by two threads at once, so every
+# thread gets its own clients from _get_service. Stages return IDs, never
+# clients: a thread calls get_drive_service() / get_sheets_service() itself.
+_stage_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='pdf-stage')
+
+
+def get_storage_client():
+    """Get the instance-wide GCS client, creating it on first use."""
+    global _storage_client
+
+    with _init_lock:
+        if _storage_client is None:
+            from google.cloud import storage
+            _storage_client = storage.Client()
+        return _storage_client
+
+
+def get_secret_client():
+    """Get the instance-wide Secret Manager client, creating it on first use."""
+    global _secret_client
+
+    with _init_lock:
+        if _secret_client is None:
+            from google.cloud import secretmanager
+            _secret_client = secretmanager.SecretManagerServiceClient()
+        return _secret_client
 
 
 def get_secret(secret_id: str) -> str:
-    """Retrieve a secret from Secret Manager."""
-    # Extract just the secret name from various possible formats:
+    """
+    Retrieve a secret from Secret Manager, served from memory when cached.
+
+    Values read from the 'latest' version are cached for
+    SECRET_CACHE_TTL_SECONDS; pinned versions never change and are cached
+    for the lifetime of the instance.
+    """
+    # Extract the secret name (and optional version) from various possible formats:
     # 1. Just the name: "awards-production-drive-folder"
     # 2. Full path: "projects/PROJECT/secrets/NAME"
     # 3. Full path with version: "projects/PROJECT/secrets/NAME/versions/VERSION"
+    version = 'latest'
     
     if '/secrets/' in secret_id:
         # Extract the secret name from the path
         parts = secret_id.split('/secrets/')
         if len(parts) > 1:
-            secret_name = parts[1].split('/')[0]  # Get just the name, ignore /versions/... if present
+            path_parts = parts[1].split('/')
+            secret_name = path_parts[0]
+            if len(path_parts) >= 3 and path_parts[1] == 'versions':
+                version = path_parts[2]
         else:
             secret_name = secret_id
     else:
@@ -52,17 +160,38 @@ def get_secret(secret_id: str) -> str:
         secret_name = secret_id
     
     # Construct the full path
-    name = f"projects/{PROJECT_ID}/secrets/{secret_name}/versions/latest"
-    
-    response = secret_client.access_secret_version(request={"name": name})
-    return response.payload.data.decode('UTF-8')
+    name = f"projects/{PROJECT_ID}/secrets/{secret_name}/versions/{version}"
 
+    with tracing.span('secret', secret=secret_name) as span:
+        now = time.monotonic()
+        with _secret_lock:
+            cached = _secret_cache.get(name)
+            if cached and (cached[1] is None or cached[1] > now):
+                span['cached'] = True
+                return cached[0]
 
-def get_user_credentials():
-    """Get user OAuth credentials from Secret Manager."""
-    secret_name = f"projects/{PROJECT_ID}/secrets/awards-production-user-oauth-token/versions/latest"
-    response = secret_client.access_secret_version(request={"name": secret_name})
-    token_data = json.loads(response.payload.data.decode('UTF-8'))
+        span['cached'] = False
+        response = get_secret_client().access_secret_version(request={"name": name})
+        value = response.payload.data.decode('UTF-8')
+
+        expires_at = None if version != 'latest' else now + SECRET_CACHE_TTL_SECONDS
+        with _secret_lock:
+            _secret_cache[name] = (value, expires_at)
+
+        return value
+
+
+def invalidate_secrets():
+    """Forget all cached secret values so the next lookup hits Secret Manager."""
+    with _secret_lock:
+        _secret_cache.clear()
+
+
+def _load_user_credentials():
+    """Build user OAuth credentials from the refresh token in Secret Manager."""
+    from google.oauth2.credentials import Credentials
+
+    token_data = json.loads(get_secret(USER_OAUTH_SECRET))
 
     # Create credentials from the user's OAuth token
     credentials = Credentials(
@@ -82,221 +211,116 @@ def get_user_credentials():
     return credentials
 
 
+def _credentials_need_refresh(credentials) -> bool:
+    """Check whether the access token is missing or within the refresh margin."""
+    if not credentials.token or credentials.expiry is None:
+        return True
+    remaining = (credentials.expiry - datetime.utcnow()).total_seconds()
+    return remaining <= CREDENTIAL_REFRESH_MARGIN_SECONDS
+
+
+def get_user_credentials():
+    """
+    Get user OAuth credentials, cached for the lifetime of the instance.
+
+    The OAuth secret is only read on the first call (or after
+    reset_google_clients()), and the access token is only refreshed when it
+    is missing or close to expiry.
+    """
+    global _credentials, _auth_request
+
+    with _client_lock:
+        if _credentials is None:
+            _credentials = _load_user_credentials()
+
+        if _credentials_need_refresh(_credentials):
+            if _auth_request is None:
+                from google.auth.transport.requests import Request
+                _auth_request = Request()
+            with tracing.span('token_refresh'):
+                _credentials.refresh(_auth_request)
+            logger.info(f"Refreshed OAuth access token (expires {_credentials.expiry.isoformat()}Z)")
+
+        return _credentials
+
+
+def _get_service(api: str, version: str):
+    """
+    Get the calling thread's cached discovery client, building it on first use.
+
+    googleapiclient clients are not thread-safe, so each thread (request
+    threads and _stage_executor workers) has its own and must not pass it to
+    another. Clients are built from the discovery documents bundled with
+    google-api-python-client (static_discovery), never fetched over HTTP, in
+    a few milliseconds. Requests go over the shared keep-alive connection
+    pool (http_pool.py), so every thread's client reuses the same connections.
+    """
+    from googleapiclient.discovery import build
+
+    credentials = get_user_credentials()
+    key = (api, version, threading.get_ident())
+
+    with _client_lock:
+        service = _services.get(key)
+    if service is not None:
+        return service
+
+    # Build outside the lock so Drive and Sheets clients can be built in parallel
+    with tracing.span('client', api=api):
+        service = build(api, version, http=http_pool.authorized(credentials),
+                        cache_discovery=False, static_discovery=True)
+    with _client_lock:
+        _services[key] = service
+    logger.info(f"Built {api} {version} client")
+    return service
+
+
 def get_drive_service():
     """Get authenticated Google Drive service using user OAuth credentials."""
-    credentials = get_user_credentials()
-    return build('drive', 'v3', credentials=credentials)
+    return _get_service('drive', 'v3')
 
 
 def get_sheets_service():
     """Get authenticated Google Sheets service using user OAuth credentials."""
-    credentials = get_user_credentials()
-    return build('sheets', 'v4', credentials=credentials)
+    return _get_service('sheets', 'v4')
 
 
-def extract_pdf_fields(pdf_bytes: bytes) -> Dict[str, Any]:
-    """
-    Extract form fields from a fillable PDF (AcroForm).
-    
-    Args:
-        pdf_bytes: PDF file as bytes
-        
-    Returns:
-        Dictionary of field names and values
-    """
-    try:
-        pdf_file = io.BytesIO(pdf_bytes)
-        reader = PyPDF2.PdfReader(pdf_file)
-        
-        fields = {}
-        
-        # Try to extract form fields
-        if reader.get_fields():
-            for field_name, field_data in reader.get_fields().items():
-                value = field_data.get('/V', '')
-                if isinstance(value, bytes):
-                    value = value.decode('utf-8', errors='ignore')
-                fields[field_name] = str(value)
-        else:
-            logger.warning("No form fields found in PDF - may need OCR")
-            # Return basic metadata
-            fields['_pages'] = len(reader.pages)
-            fields['_has_form_fields'] = False
-            
-        return fields
-        
-    except Exception as e:
-        logger.error(f"Error extracting PDF fields: {e}")
-        return {'_error': str(e)}
+def reset_google_clients():
+    """Drop cached credentials and API clients so the next call rebuilds them."""
+    global _credentials
 
+    with _client_lock:
+        _credentials = None
+        _services.clear()
 
-def extract_project_team(fields: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
-    """
-    Extract and structure project team member information from PDF fields.
-    
-    This organizes all team member data for easy export to team sheets,
-    yearbook materials, and awards ceremony programs.
-    
-    Args:
-        fields: Dictionary of all PDF form fields
-    
-    Returns:
-        Dictionary organized by team category with member details
-        
-    Example return structure:
-        {
-            'project_info': {
-                'name': 'Black Desert Resort',
-                'location': 'Ivins, Utah',
-                ...
-            },
-            'owner': {
-                'company': 'Black Desert Development',
-                'rep': 'John Smith'
-            },
-            'design_team': {
-                'architect': 'Smith Architecture',
-                'civil': 'Jones Engineering',
-                ...
-            },
-            'construction_team': {
-                'general_contractor': 'ABC Construction',
-                'concrete': 'XYZ Concrete',
-                ...
-            }
-        }
-    """
-    team_data = {
-        'project_info': {
-            'name': fields.get('Official Name', ''),
-            'location': fields.get('Location', ''),
-            'category': fields.get('Project Category or Categories for Consideration', ''),
-            'cost': fields.get('Cost', ''),
-            'date_completed': fields.get('Date Completed', ''),
-            'square_feet': fields.get('Square Feet', ''),
-            'levels': fields.get('LevelsStories 1', ''),
-        },
-        'owner': {
-            'company': fields.get('Owner', ''),
-            'rep_project_manager': fields.get('Owners RepProject Manager', ''),
-        },
-        'design_team': {
-            'firm': fields.get('Design Team Firm PrincipalinCharge or Proj Mngr', ''),
-            'architect': fields.get('Architect', ''),
-            'civil': fields.get('Civil', ''),
-            'structural': fields.get('Structural', ''),
-            'electrical': fields.get('Electrical', ''),
-            'mechanical': fields.get('Mechanical', ''),
-            'geotech': fields.get('Geotech', ''),
-            'interior_design': fields.get('Interior Design', ''),
-            'furniture': fields.get('Furniture', ''),
-            'landscape_architect': fields.get('Landscape Architect', ''),
-        },
-        'construction_team': {
-            'firm': fields.get('Construction Team Firm Project Manager', ''),
-            'general_contractor': fields.get('General Contractor', ''),
-            'plumbing': fields.get('Plumbing', ''),
-            'hvac': fields.get('HVAC', ''),
-            'electrical': fields.get('Electrical_2', ''),
-            'concrete': fields.get('Concrete', ''),
-            'steel_fabrication': fields.get('Steel Fabrication', ''),
-            'steel_erection': fields.get('Steel Erection', ''),
-            'glass_curtain_wall': fields.get('GlassCurtain Wall', ''),
-            'masonry': fields.get('Masonry', ''),
-            'drywall_acoustics': fields.get('DrywallAcoustics', ''),
-            'painting': fields.get('Painting', ''),
-            'tile_stone': fields.get('TileStone', ''),
-            'carpentry': fields.get('Carpentry', ''),
-            'flooring': fields.get('Flooring', ''),
-            'roofing': fields.get('Roofing', ''),
-            'waterproofing': fields.get('Waterproofing', ''),
-            'excavation': fields.get('Excavation', ''),
-            'demolition': fields.get('Demolition', ''),
-            'precast': fields.get('Precast', ''),
-            'landscaping': fields.get('Landscaping 1', ''),
-        },
-        'contact': {
-            'firm': fields.get('Name of Firm', ''),
-            'name': fields.get('Contact Name', ''),
-            'title': fields.get('Title', ''),
-            'phone': fields.get('Phone 1', ''),
-            'email': fields.get('Email', ''),
-        }
-    }
-    
-    return team_data
 
+def is_auth_error(error: Exception) -> bool:
+    """Check whether an exception means the cached credentials are no longer usable."""
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, RefreshError):
+        return True
+    return isinstance(error, HttpError) and error.resp.status == 401
 
-def format_team_for_sheet_row(awards_id: str, team_data: Dict[str, Dict[str, str]]) -> List[str]:
-    """
-    Format project team data as a flat row for Google Sheets export.
-    
-    This creates a row suitable for the "Project Team" sheet that's used
-    for awards ceremony materials, yearbook, and video presentations.
-    
-    Args:
-        awards_id: Awards ID (e.g., "AW-2025-042")
-        team_data: Structured team data from extract_project_team()
-    
-    Returns:
-        List of values in the correct column order for the team sheet
-    """
-    project = team_data['project_info']
-    owner = team_data['owner']
-    design = team_data['design_team']
-    construction = team_data['construction_team']
-    contact = team_data['contact']
-    
-    return [
-        awards_id,                              # Awards ID
-        project['name'],                        # Project Name
-        project['location'],                    # Location
-        project['category'],                    # Category
-        project['cost'],                        # Cost
-        project['date_completed'],              # Date Completed
-        project['square_feet'],                 # Square Feet
-        owner['company'],                       # Owner
-        owner['rep_project_manager'],           # Owner's Rep
-        design['architect'],                    # Architect
-        design['firm'],                         # Design Firm
-        design['civil'],                        # Civil Engineer
-        design['structural'],                   # Structural Engineer
-        design['mechanical'],                   # Mechanical Engineer
-        design['electrical'],                   # Electrical Engineer
-        design['interior_design'],              # Interior Design
-        design['landscape_architect'],          # Landscape Architect
-        construction['general_contractor'],     # General Contractor
-        construction['firm'],                   # Construction Firm
-        construction['concrete'],               # Concrete
-        construction['steel_fabrication'],      # Steel Fabrication
-        construction['steel_erection'],         # Steel Erection
-        construction['plumbing'],               # Plumbing
-        construction['hvac'],                   # HVAC
-        construction['electrical'],             # Electrical (construction)
-        construction['glass_curtain_wall'],     # Glass/Curtain Wall
-        construction['masonry'],                # Masonry
-        construction['drywall_acoustics'],      # Drywall/Acoustics
-        construction['painting'],               # Painting
-        construction['tile_stone'],             # Tile/Stone
-        construction['carpentry'],              # Carpentry
-        construction['flooring'],               # Flooring
-        construction['roofing'],                # Roofing
-        construction['waterproofing'],          # Waterproofing
-        construction['excavation'],             # Excavation
-        construction['demolition'],             # Demolition
-        construction['precast'],                # Precast
-        construction['landscaping'],            # Landscaping
-        contact['firm'],                        # Contact Firm
-        contact['name'],                        # Contact Name
-        contact['email'],                       # Contact Email
-        contact['phone'],                       # Contact Phone
-    ]
+
+def get_folder_resolver() -> FolderResolver:
+    """Get the instance-wide Drive folder resolver (persisted tier when STATE_BUCKET is set)."""
+    global _folder_resolver
+
+    if _folder_resolver is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET) if STATE_BUCKET else None
+        with _init_lock:
+            if _folder_resolver is None:
+                _folder_resolver = FolderResolver(state_bucket)
+    return _folder_resolver
 
 
 def find_or_create_folder(service, parent_id: str, folder_name: str) -> str:
     """
     Find existing folder or create new one in Google Drive.
-    With impersonation, folders will be owned by the impersonated user.
+
+    Lookups are served from the folder cache when possible, and creation is
+    single-flight so parallel events never create duplicate folders.
 
     Args:
         service: Authenticated Drive service
@@ -306,87 +330,157 @@ def find_or_create_folder(service, parent_id: str, folder_name: str) -> str:
     Returns:
         ID of found or created folder
     """
-    # First, try to find existing folder
-    query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
-
-    results = service.files().list(
-        q=query,
-        spaces='drive',
-        fields='files(id, name)',
-        supportsAllDrives=True,
-        includeItemsFromAllDrives=True
-    ).execute()
-
-    files = results.get('files', [])
-
-    if files:
-        logger.info(f"Found existing folder: {folder_name} (ID: {files[0]['id']})")
-        return files[0]['id']
-
-    # Folder doesn't exist, create it
-    file_metadata = {
-        'name': folder_name,
-        'mimeType': 'application/vnd.google-apps.folder',
-        'parents': [parent_id]
-    }
-
     try:
-        folder = service.files().create(
-            body=file_metadata,
-            fields='id',
-            supportsAllDrives=True
-        ).execute()
-
-        logger.info(f"Created folder: {folder_name} (ID: {folder.get('id')})")
-        return folder.get('id')
+        with tracing.span('folder', folder=folder_name):
+            folder_id = get_folder_resolver().find_or_create(service, parent_id, folder_name)
+        logger.info(f"Resolved folder: {folder_name} (ID: {folder_id})")
+        return folder_id
     except Exception as e:
-        logger.error(f"Error creating folder '{folder_name}': {e}")
+        logger.error(f"Error resolving folder '{folder_name}': {e}")
         raise
 
 
-def upload_to_drive(service, file_bytes: bytes, filename: str,
-                   folder_id: str, mime_type: str = 'application/pdf') -> str:
+def upload_to_drive(service, file_data: Union[bytes, BinaryIO], filename: str,
+                   folder_id: str, mime_type: str = 'application/pdf') -> tuple[str, str]:
     """
     Upload a file to Google Drive.
 
+    The upload is resumable and sent in STREAM_CHUNK_SIZE_MB chunks, so a
+    streamed source is never held in memory as a whole.
+
     Args:
         service: Authenticated Drive service
-        file_bytes: File content as bytes
+        file_data: File content as bytes or a seekable binary file
         filename: Name for the file
         folder_id: Parent folder ID
         mime_type: MIME type of file
 
     Returns:
-        ID of uploaded file
+        Tuple of (file_id, web_view_link) of the uploaded file
     """
     file_metadata = {
         'name': filename,
         'parents': [folder_id]
     }
 
+    if isinstance(file_data, (bytes, bytearray)):
+        file_data = io.BytesIO(file_data)
+
+    from googleapiclient.http import MediaIoBaseUpload
+
     media = MediaIoBaseUpload(
-        io.BytesIO(file_bytes),
+        file_data,
         mimetype=mime_type,
+        chunksize=STREAM_CHUNK_SIZE_MB * 1024 * 1024,
         resumable=True
     )
 
-    file = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id,webViewLink',
-        supportsAllDrives=True
-    ).execute()
+    # A retried resumable upload continues its session, so it cannot create two files
+    try:
+        file = google_api.execute('drive', service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id,webViewLink',
+            supportsAllDrives=True
+        ))
+    except Exception as e:
+        if FolderResolver.is_missing(e):
+            # The folder was deleted in Drive: stop serving its cached ID
+            get_folder_resolver().forget(folder_id)
+        raise
 
     logger.info(f"Uploaded file: {filename} (ID: {file.get('id')})")
     return file.get('id'), file.get('webViewLink')
 
 
+def find_highest_awards_number(service, sheet_id: str, year: str) -> int:
+    """
+    Scan the sheet for the highest Awards ID number used in a year.
+
+    This reads every cell of the sheet, so it is only used to seed a year's
+    counter the first time it is allocated from, or when no state bucket is
+    configured (local development).
+
+    Args:
+        service: Authenticated Sheets service
+        sheet_id: Spreadsheet ID
+        year: Year (YYYY format string)
+
+    Returns:
+        Highest existing number for the year, or 0 if there are none
+    """
+    # Query the entire sheet to find all Awards IDs
+    # Awards ID is in the last 4 columns we're adding (see schema update guide)
+    # We'll scan all columns to find existing IDs
+    result = google_api.execute('sheets', service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range='Sheet1!A:ZZ'  # Get all columns
+    ))
+    
+    values = result.get('values', [])
+    
+    # Search all cells for Awards IDs matching current year pattern
+    prefix = f'AW-{year}-'
+    highest = 0
+    
+    for row in values:
+        for cell in row:
+            if isinstance(cell, str) and cell.startswith(prefix):
+                try:
+                    # Extract the number part: AW-YYYY-NNN → NNN
+                    parts = cell.split('-')
+                    if len(parts) == 3:
+                        highest = max(highest, int(parts[2]))
+                except (ValueError, IndexError):
+                    # Skip malformed IDs
+                    continue
+
+    logger.info(f"Highest Awards ID number in sheet for {year}: {highest}")
+    return highest
+
+
+def get_awards_id_allocator() -> Optional[AwardsIdAllocator]:
+    """Get the counter-based Awards ID allocator, or None without a state bucket."""
+    global _awards_id_allocator
+
+    if not STATE_BUCKET:
+        return None
+    if _awards_id_allocator is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET)
+        with _init_lock:
+            if _awards_id_allocator is None:
+                _awards_id_allocator = AwardsIdAllocator(GcsCounterStore(state_bucket))
+    return _awards_id_allocator
+
+
+def get_submission_store():
+    """Get the primary submission store, or None when SUBMISSION_STORE is not set."""
+    global _submission_store
+
+    if not SUBMISSION_STORE:
+        return None
+    with _init_lock:
+        if _submission_store is None:
+            _submission_store = submission_store.open_store(SUBMISSION_STORE, project=PROJECT_ID)
+    return _submission_store
+
+
+def highest_awards_number(service, sheet_id: str, year: str) -> int:
+    """Highest Awards ID number used in a year: an indexed store query, or a sheet scan without a store."""
+    store = get_submission_store()
+    if store is None:
+        return find_highest_awards_number(service, sheet_id, year)
+    return store.highest_number(year)
+
+
 def generate_awards_id(service, sheet_id: str, year: str) -> str:
     """
     Generate unique Awards ID in format: AW-YYYY-NNN
     
-    This function queries the sheet for existing IDs from the current year,
-    finds the highest number, and increments by 1.
+    IDs are claimed from a per-year counter in the state bucket with an
+    atomic compare-and-set, so concurrent submissions never share an ID.
+    The counter is seeded once per year from the highest existing ID, read
+    from the submission store (or, without one, by scanning the sheet).
     
     Args:
         service: Authenticated Sheets service
@@ -402,52 +496,24 @@ def generate_awards_id(service, sheet_id: str, year: str) -> str:
         - First submission of 2026: AW-2026-001
     """
     try:
-        # Query the entire sheet to find all Awards IDs
-        # Awards ID is in the last 4 columns we're adding (see schema update guide)
-        # We'll scan all columns to find existing IDs
-        result = service.spreadsheets().values().get(
-            spreadsheetId=sheet_id,
-            range='Sheet1!A:ZZ'  # Get all columns
-        ).execute()
-        
-        values = result.get('values', [])
-        
-        # Search all cells for Awards IDs matching current year pattern
-        prefix = f'AW-{year}-'
-        current_year_numbers = []
-        
-        for row in values:
-            for cell in row:
-                if isinstance(cell, str) and cell.startswith(prefix):
-                    try:
-                        # Extract the number part: AW-YYYY-NNN → NNN
-                        parts = cell.split('-')
-                        if len(parts) == 3:
-                            number = int(parts[2])
-                            current_year_numbers.append(number)
-                    except (ValueError, IndexError):
-                        # Skip malformed IDs
-                        continue
-        
-        # Determine next number
-        if not current_year_numbers:
-            # First submission of the year
-            next_number = 1
-            logger.info(f"Generating first Awards ID for year {year}")
+        allocator = get_awards_id_allocator()
+
+        if allocator is None:
+            # No state bucket (local development): no counter, so IDs can race
+            logger.warning("STATE_BUCKET not set - generating Awards ID from the highest existing ID")
+            awards_id = format_awards_id(year, highest_awards_number(service, sheet_id, year) + 1)
         else:
-            # Increment from highest existing number
-            next_number = max(current_year_numbers) + 1
-            logger.info(f"Generating Awards ID #{next_number} for year {year}")
-        
-        # Format with leading zeros: AW-YYYY-NNN
-        awards_id = f"AW-{year}-{next_number:03d}"
+            awards_id = allocator.allocate(
+                year,
+                seed=lambda y: highest_awards_number(service, sheet_id, y)
+            )
+
         logger.info(f"Generated Awards ID: {awards_id}")
-        
         return awards_id
         
     except Exception as e:
         logger.error(f"Error generating Awards ID: {e}")
-        # Fallback to timestamp-based ID if generation fails
+        # Last resort: timestamp-based ID if the counter store is unavailable
         fallback_id = f"AW-{year}-TMP{int(datetime.now().timestamp())}"
         logger.warning(f"Using fallback ID: {fallback_id}")
         return fallback_id
@@ -556,34 +622,270 @@ def append_to_sheet(service, sheet_id: str, values: list):
         sheet_id: Spreadsheet ID
         values: List of values to append
     """
+    append_rows_to_sheet(service, sheet_id, [values])
+
+
+def append_rows_to_sheet(service, sheet_id: str, rows: List[list]):
+    """
+    Append several rows to Google Sheets in a single write request.
+    
+    Args:
+        service: Authenticated Sheets service
+        sheet_id: Spreadsheet ID
+        rows: Rows to append, each a list of values in column order
+    """
     body = {
-        'values': [values]
+        'values': rows
     }
     
-    result = service.spreadsheets().values().append(
-        spreadsheetId=sheet_id,
-        range='Sheet1!A:Z',
-        valueInputOption='RAW',
-        insertDataOption='INSERT_ROWS',
-        body=body
-    ).execute()
+    with tracing.span('sheets_append', rows=len(rows)):
+        result = google_api.execute('sheets', service.spreadsheets().values().append(
+            spreadsheetId=sheet_id,
+            range='Sheet1!A:Z',
+            valueInputOption='RAW',
+            insertDataOption='INSERT_ROWS',
+            body=body
+        ), idempotent=False)
     
-    logger.info(f"Appended row to sheet: {result.get('updates')}")
+    logger.info(f"Appended {len(rows)} row(s) to sheet: {result.get('updates')}")
+
+
+def find_awards_ids_in_sheet(service, sheet_id: str) -> set:
+    """Collect every Awards ID present in the sheet (reads the whole sheet)."""
+    result = google_api.execute('sheets', service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range='Sheet1!A:ZZ'
+    ))
+
+    return {
+        cell for row in result.get('values', []) for cell in row
+        if isinstance(cell, str) and cell.startswith('AW-')
+    }
+
+
+def get_sheet_writer() -> Optional[BatchSheetWriter]:
+    """Get the batching sheet row writer, or None without a state bucket."""
+    global _sheet_writer
+
+    if not STATE_BUCKET:
+        return None
+    if _sheet_writer is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET)
+        with _init_lock:
+            if _sheet_writer is None:
+                _sheet_writer = BatchSheetWriter(
+                    GcsRowStore(state_bucket),
+                    append_rows=lambda rows: append_rows_to_sheet(
+                        get_sheets_service(), get_secret(AWARDS_SHEET_ID_SECRET), rows
+                    ),
+                    existing_keys=lambda: find_awards_ids_in_sheet(
+                        get_sheets_service(), get_secret(AWARDS_SHEET_ID_SECRET)
+                    ),
+                    max_rows=SHEET_BATCH_MAX_ROWS,
+                    max_wait=SHEET_BATCH_MAX_WAIT_SECONDS
+                )
+    return _sheet_writer
+
+
+def log_sheet_backlog(backlog):
+    """Log the sheet backlog in the format the sheet-backlog log metric parses."""
+    logger.info(
+        f"Sheet row backlog: pending_rows={backlog.pending_rows} "
+        f"oldest_age_seconds={backlog.oldest_age_seconds:.1f}"
+    )
+
+
+def write_sheet_row(service, sheet_id: str, awards_id: str, values: list) -> int:
+    """
+    Add a submission row to the master sheet.
+
+    With a state bucket the row is staged durably and appended together with
+    other staged rows; without one it is appended immediately.
+
+    Args:
+        service: Authenticated Sheets service
+        sheet_id: Spreadsheet ID
+        awards_id: The row's Awards ID (unique row key)
+        values: List of values to append
+
+    Returns:
+        Number of rows staged but not yet in the sheet
+    """
+    writer = get_sheet_writer()
+    if writer is None:
+        append_to_sheet(service, sheet_id, values)
+        return 0
+
+    backlog = writer.submit(awards_id, values)
+    log_sheet_backlog(backlog)
+    return backlog.pending_rows
+
+
+def get_narrative_store() -> Optional[GcsNarrativeStore]:
+    """Get the narrative store, or None without a state bucket (narratives then stay in the sheet)."""
+    global _narrative_store
+
+    if not STATE_BUCKET:
+        return None
+    if _narrative_store is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET)
+        with _init_lock:
+            if _narrative_store is None:
+                _narrative_store = GcsNarrativeStore(state_bucket)
+    return _narrative_store
+
+
+def save_narratives(year: str, submission_id: str, fields: Dict[str, Any]) -> bool:
+    """
+    Narratives stage: save the full narrative answers outside the sheet.
+
+    Returns:
+        True if they were saved, so the sheet row can carry excerpts
+    """
+    store = get_narrative_store()
+    if store is None:
+        return False
+    with tracing.span('narratives'):
+        store.save(year, submission_id, fields)
+    return True
+
+
+def open_blob_readers(blob) -> Tuple[BinaryIO, BinaryIO]:
+    """
+    Open a GCS object for field extraction and for the Drive upload.
+
+    Objects up to STREAM_THRESHOLD_MB are downloaded in one request and both
+    readers share that buffer. Larger objects are never loaded whole: the
+    first reader fetches small byte ranges on demand (field extraction only
+    needs the trailer, xref data and form objects) and the second streams the
+    object sequentially in upload-sized chunks.
+
+    Args:
+        blob: Reloaded GCS blob (size and generation known, so every read
+            sees the same object version)
+
+    Returns:
+        Tuple of (random-access reader, sequential reader)
+    """
+    if blob.size <= STREAM_THRESHOLD_MB * 1024 * 1024:
+        buffer = io.BytesIO(blob.download_as_bytes())
+        return buffer, buffer
+
+    return (
+        blob.open('rb', chunk_size=RANGE_READ_SIZE),
+        blob.open('rb', chunk_size=STREAM_CHUNK_SIZE_MB * 1024 * 1024)
+    )
+
+
+def prepare_year_folder(year: str):
+    """
+    Drive stage: read the root folder secret, build the client and resolve Root > Year.
 
+    Returns:
+        Year folder ID
+    """
+    drive_root_id = get_secret(DRIVE_FOLDER_SECRET)
+    # With impersonation, folders will be owned by the impersonated user
+    return find_or_create_folder(get_drive_service(), drive_root_id, year)
+
+
+def upload_pdf(drive_service, year_folder_id: str, project_name: str, upload_file: BinaryIO,
+               filename: str, size: int) -> Tuple[str, str, str, Optional[str]]:
+    """
+    Drive stage: resolve the project folder and upload the PDF into it.
+
+    Returns:
+        Tuple of (project_folder_id, file_id, file_link, sha256 of the
+        uploaded bytes or None)
+    """
+    project_folder_id = find_or_create_folder(drive_service, year_folder_id, project_name)
+
+    upload_file.seek(0)
+    upload_reader = HashingReader(upload_file)
+    with tracing.span('upload', bytes=size):
+        file_id, file_link = upload_to_drive(drive_service, upload_reader, filename, project_folder_id)
+    return project_folder_id, file_id, file_link, upload_reader.hexdigest()
+
+
+def prepare_sheets():
+    """
+    Sheets stage: read the sheet ID secret and build the client.
+
+    Returns:
+        Sheet ID
+    """
+    sheet_id = get_secret(AWARDS_SHEET_ID_SECRET)
+    # Build this thread's client (and refresh the token) alongside field extraction
+    get_sheets_service()
+    return sheet_id
 
 
+def allocate_awards_id(sheets_future, year: str, entry: LedgerEntry) -> str:
+    """Sheets stage: claim the next Awards ID once the Sheets client is ready."""
+    if entry.done('awards_id'):
+        return entry.get('awards_id')['awards_id']
+
+    sheet_id = sheets_future.result()
+    with tracing.span('awards_id'):
+        awards_id = generate_awards_id(get_sheets_service(), sheet_id, year)
+    # Record it right away so a retry reuses this ID instead of minting another
+    entry.finish('awards_id', awards_id=awards_id)
+    return awards_id
+
+
+def open_ledger_entry(bucket_name: str, file_path: str, generation: int,
+                      sha256: Optional[str] = None) -> LedgerEntry:
+    """
+    Load the processing ledger entry for a submitted object.
+
+    Without a state bucket the entry only lives for this invocation, so
+    every delivery is processed from scratch as before.
+    """
+    global _ledger
+
+    if not STATE_BUCKET:
+        return LedgerEntry()
+    if _ledger is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET)
+        with _init_lock:
+            if _ledger is None:
+                _ledger = SubmissionLedger(state_bucket)
+    return _ledger.open(bucket_name, file_path, generation, sha256)
+
+
+def get_profile_bucket():
+    """Bucket for invocation profiles (profiles/ in the state bucket), or None."""
+    return get_storage_client().bucket(STATE_BUCKET) if STATE_BUCKET else None
+
 
 @functions_framework.cloud_event
+@tracing.traced('process_pdf', profile_rate=PROFILE_INVOCATIONS, profile_bucket=get_profile_bucket)
 def process_pdf(cloud_event):
     """
     Cloud Function triggered when a PDF is uploaded to GCS.
     
     Workflow:
-    1. Download PDF from GCS
+    1. Open PDF from GCS (large files are streamed, never held in memory whole)
     2. Extract form fields using PyPDF2
     3. Create organized folder structure in Drive (Year/Project)
     4. Upload PDF to Drive
-    5. Append extracted data to master Google Sheet
+    5. Stamp the project folder with the submission and Awards IDs
+       (appProperties), which photo-processor looks it up by
+    6. Save the full narrative answers to the state bucket
+    7. Record the submission in the primary store (SUBMISSION_STORE)
+    8. Append extracted data to master Google Sheet, narratives excerpted
+
+    Independent stages overlap: the Drive client and year folder are resolved
+    while fields are extracted, the Sheets client is built meanwhile, and the
+    Awards ID is allocated and the narratives saved while the PDF uploads.
+    The sheet row is only appended once every stage it depends on has
+    finished.
+
+    Finished stages (upload, Awards ID, index, row) are recorded in the processing
+    ledger, so a retried event skips them instead of creating duplicates.
+
+    Every stage is timed as a JSON span tagged with the submission ID (see
+    tracing.py); set PROFILE_INVOCATIONS to profile a share of invocations.
     
     The function uses actual field names from the PDF form directly,
     making it easy to maintain and update.
@@ -594,10 +896,14 @@ def process_pdf(cloud_event):
         bucket_name = data['bucket']
         file_path = data['name']
         
-        logger.info(f"Processing PDF: gs://{bucket_name}/{file_path}")
-
         # Parse submission ID from path: submissions/YYYY/submission_id/pdf/filename.pdf
         path_parts = file_path.split('/')
+        if path_parts[-1] == COMPLETION_MARKER:
+            logger.info(f"Skipping completion marker: {file_path}")
+            return
+
+        logger.info(f"Processing PDF: gs://{bucket_name}/{file_path}")
+
         if len(path_parts) < 5:
             logger.error(f"Invalid path structure: {file_path}")
             return
@@ -610,29 +916,58 @@ def process_pdf(cloud_event):
         year = path_parts[1]
         submission_id = path_parts[2]
         filename = path_parts[4]
+        tracing.annotate(submission_id=submission_id, object=file_path)
         
         # Download PDF
-        bucket = storage_client.bucket(bucket_name)
+        bucket = get_storage_client().bucket(bucket_name)
         blob = bucket.blob(file_path)
 
         # Check if blob exists (handle deleted files)
-        if not blob.exists():
+        with tracing.span('exists'):
+            exists = blob.exists()
+        if not exists:
             logger.warning(f"File not found (may have been deleted): {file_path}")
             return {'status': 'skipped', 'reason': 'file_not_found'}
 
         # Reload blob to get metadata including size
-        blob.reload()
+        with tracing.span('reload'):
+            blob.reload()
 
         # Check file size
         if blob.size > MAX_PDF_SIZE_MB * 1024 * 1024:
             logger.error(f"PDF too large: {blob.size} bytes")
             raise ValueError(f"PDF exceeds maximum size of {MAX_PDF_SIZE_MB}MB")
         
-        pdf_bytes = blob.download_as_bytes()
-        logger.info(f"Downloaded PDF: {len(pdf_bytes)} bytes")
+        with tracing.span('download', bytes=blob.size) as span:
+            pdf_file, upload_file = open_blob_readers(blob)
+            span['streamed'] = not isinstance(upload_file, io.BytesIO)
+        logger.info(f"Opened PDF: {blob.size} bytes")
+
+        # Hash small files now; streamed files are hashed as they upload
+        sha256 = None
+        if isinstance(upload_file, io.BytesIO):
+            sha256 = hashlib.sha256(upload_file.getbuffer()).hexdigest()
+        with tracing.span('ledger'):
+            entry = open_ledger_entry(bucket_name, file_path, blob.generation, sha256)
+
+        if entry.done('row'):
+            logger.info(f"Already processed (ledger): {file_path}")
+            return {
+                'status': 'skipped',
+                'reason': 'already_processed',
+                'submission_id': submission_id,
+                'awards_id': entry.get('awards_id')['awards_id']
+            }
+
+        # Start the stages that don't need the form fields
+        if not entry.done('upload'):
+            drive_future = tracing.submit(_stage_executor, prepare_year_folder, year)
+        sheets_future = tracing.submit(_stage_executor, prepare_sheets)
         
         # Extract form fields
-        fields = extract_pdf_fields(pdf_bytes)
+        with tracing.span('parse') as span:
+            fields = extract_pdf_fields(pdf_file)
+            span['fields'] = len(fields)
         logger.info(f"Extracted {len(fields)} fields from PDF")
         
         # Use "Official Name" field for project folder name
@@ -640,101 +975,72 @@ def process_pdf(cloud_event):
         if not project_name:
             # Fallback to submission ID if no project name
             project_name = f"Submission-{submission_id[:8]}"
+
+        # Generate unique Awards ID for this submission while the PDF uploads
+        awards_id_future = tracing.submit(_stage_executor, allocate_awards_id, sheets_future, year, entry)
+        narratives_future = tracing.submit(_stage_executor, save_narratives, year, submission_id, fields)
+
+        if entry.done('upload'):
+            upload = entry.get('upload')
+            project_folder_id, file_id, file_link = upload['folder_id'], upload['file_id'], upload['file_link']
+            logger.info(f"PDF already in Drive (ledger): {file_id}")
+        else:
+            # Create folder structure: Root > Year > Project
+            year_folder_id = drive_future.result()
+            drive_service = get_drive_service()
+            # A folder deleted in Drive is forgotten when it 404s, one level per attempt
+            for attempt in range(3):
+                try:
+                    project_folder_id, file_id, file_link, upload_sha256 = upload_pdf(
+                        drive_service, year_folder_id, project_name, upload_file, filename, blob.size
+                    )
+                    break
+                except Exception as e:
+                    if attempt == 2 or not FolderResolver.is_missing(e):
+                        raise
+                    logger.warning(f"Drive folder missing, resolving Root > Year > Project again: {e}")
+                    year_folder_id = prepare_year_folder(year)
+            entry.finish('upload', folder_id=project_folder_id, file_id=file_id, file_link=file_link)
+            entry.set_sha256(upload_sha256)
         
-        # Get Drive root folder ID
-        drive_root_id = get_secret(DRIVE_FOLDER_SECRET)
-        
-        # Initialize Drive service
-        drive_service = get_drive_service()
-        
-        # Create folder structure: Root > Year > Project
-        # With impersonation, folders will be owned by the impersonated user
-        year_folder_id = find_or_create_folder(drive_service, drive_root_id, year)
-        project_folder_id = find_or_create_folder(drive_service, year_folder_id, project_name)
-        
-        # Upload PDF to Drive
-        file_id, file_link = upload_to_drive(
-            drive_service,
-            pdf_bytes,
-            filename,
-            project_folder_id
-        )
-        
-        # Prepare row for Sheets
-        sheet_id = get_secret(AWARDS_SHEET_ID_SECRET)
+        sheet_id = sheets_future.result()
         sheets_service = get_sheets_service()
-        
-        # Generate unique Awards ID for this submission
-        awards_id = generate_awards_id(sheets_service, sheet_id, year)
+        awards_id = awards_id_future.result()
         logger.info(f"Generated Awards ID: {awards_id} for submission {submission_id}")
+
+        # Stamp the project folder so photo-processor finds it by submission ID
+        if not entry.done('index'):
+            with tracing.span('index'):
+                get_folder_resolver().index_project(
+                    get_drive_service(), project_folder_id, submission_id, awards_id
+                )
+            entry.finish('index')
         
-        # Build row data matching the exact column order from the Sheet
-        row_data = [
-            datetime.now().isoformat(),                                      # Submission Timestamp
-            submission_id,                                                   # Submission ID (GCS)
-            file_link,                                                       # PDF Link
-            f"https://drive.google.com/drive/folders/{project_folder_id}",  # Project Folder
-            fields.get('Official Name', ''),                                 # Official Name
-            fields.get('Location', ''),                                      # Location
-            fields.get('Project Category or Categories for Consideration', ''),  # Project Category
-            fields.get('Cost', ''),                                          # Cost
-            fields.get('Date Completed', ''),                                # Date Completed
-            fields.get('Delivery Method', ''),                               # Delivery Method
-            fields.get('Square Feet', ''),                                   # Square Feet
-            fields.get('LevelsStories 1', ''),                               # Levels/Stories
-            fields.get('Name of Firm', ''),                                  # Name of Firm
-            fields.get('Contact Name', ''),                                  # Contact Name
-            fields.get('Title', ''),                                         # Title
-            fields.get('Phone 1', ''),                                       # Phone
-            fields.get('Email', ''),                                         # Email
-            fields.get('Owner', ''),                                         # Owner
-            fields.get('Owners RepProject Manager', ''),                     # Owner's Rep/Project Manager
-            fields.get('Design Team Firm PrincipalinCharge or Proj Mngr', ''),  # Design Team Firm
-            fields.get('Architect', ''),                                     # Architect
-            fields.get('Civil', ''),                                         # Civil
-            fields.get('Electrical', ''),                                    # Electrical
-            fields.get('Mechanical', ''),                                    # Mechanical
-            fields.get('Structural', ''),                                    # Structural
-            fields.get('Geotech', ''),                                       # Geotech
-            fields.get('Interior Design', ''),                               # Interior Design
-            fields.get('Furniture', ''),                                     # Furniture
-            fields.get('Landscape Architect', ''),                           # Landscape Architect
-            fields.get('Construction Team Firm Project Manager', ''),        # Construction Team Firm
-            fields.get('General Contractor', ''),                            # General Contractor
-            fields.get('Plumbing', ''),                                      # Plumbing
-            fields.get('HVAC', ''),                                          # HVAC
-            fields.get('Electrical_2', ''),                                  # Electrical_2
-            fields.get('Concrete', ''),                                      # Concrete
-            fields.get('Steel Fabrication', ''),                             # Steel Fabrication
-            fields.get('Steel Erection', ''),                                # Steel Erection
-            fields.get('GlassCurtain Wall', ''),                             # Glass/Curtain Wall
-            fields.get('Masonry', ''),                                       # Masonry
-            fields.get('DrywallAcoustics', ''),                              # Drywall/Acoustics
-            fields.get('Painting', ''),                                      # Painting
-            fields.get('TileStone', ''),                                     # Tile/Stone
-            fields.get('Carpentry', ''),                                     # Carpentry
-            fields.get('Flooring', ''),                                      # Flooring
-            fields.get('Roofing', ''),                                       # Roofing
-            fields.get('Waterproofing', ''),                                 # Waterproofing
-            fields.get('Excavation', ''),                                    # Excavation
-            fields.get('Demolition', ''),                                    # Demolition
-            fields.get('Precast', ''),                                       # Precast
-            fields.get('Landscaping 1', ''),                                 # Landscaping
-            fields.get('Project Overview', ''),                              # Project Overview
-            fields.get('Innovation in Design and Construction', ''),         # Innovation
-            fields.get('Aesthetics/Design Elements', ''),                    # Aesthetics/Design Elements
-            fields.get('Safety, Quality, Craftsmanship', ''),                # Safety, Quality, Craftsmanship
-            fields.get('Contribution to the Industry and Community', ''),    # Contribution to Industry
-            fields.get('Overcoming Unique Challenges/Obstacles', ''),        # Overcoming Challenges
-            # NEW FIELDS for Phase 1: Awards ID System
-            awards_id,                                                       # Awards ID (AW-YYYY-NNN)
-            'pending',                                                       # Status (pending/winner/not_selected)
-            '',                                                              # Winner Category (empty initially)
-            '',                                                              # Winner Notes (empty initially)
-        ]
+        # Build row data matching the exact column order from the Sheet.
+        # Narratives saved in full elsewhere are only excerpted in the row.
+        narratives_saved = narratives_future.result()
+        row_data = format_submission_row(
+            fields,
+            submission_id=submission_id,
+            file_link=file_link,
+            project_folder_id=project_folder_id,
+            awards_id=awards_id,
+            excerpt_chars=NARRATIVE_EXCERPT_CHARS if narratives_saved else None
+        )
         
-        # Append to master sheet
-        append_to_sheet(sheets_service, sheet_id, row_data)
+        # Record the submission in the primary store (a no-op on retries)
+        store = get_submission_store()
+        if store is not None:
+            with tracing.span('store'):
+                store.add(submission_store.new_record(
+                    awards_id, submission_id, year, SHEET_COLUMNS, row_data
+                ))
+
+        # Append to master sheet (staged and batched when a state bucket is configured)
+        with tracing.span('append') as span:
+            sheet_backlog = write_sheet_row(sheets_service, sheet_id, awards_id, row_data)
+            span['sheet_backlog'] = sheet_backlog
+        entry.finish('row')
         
         # Generate and log confirmation email
         contact_name = fields.get('Contact Name', 'Submitter')
@@ -759,11 +1065,62 @@ def process_pdf(cloud_event):
             'submission_id': submission_id,
             'awards_id': awards_id,
             'drive_folder_id': project_folder_id,
-            'file_id': file_id
+            'file_id': file_id,
+            'sheet_backlog': sheet_backlog
         }
         
     except Exception as e:
         logger.error(f"Error processing PDF: {e}", exc_info=True)
+        if is_auth_error(e):
+            logger.warning("Authentication failed - discarding cached secrets, credentials and API clients")
+            invalidate_secrets()
+            reset_google_clients()
         # Re-raise to trigger retry
         raise
 
+
+
+@functions_framework.http
+@tracing.traced('flush_sheet_rows')
+def flush_sheet_rows(request):
+    """
+    HTTP Cloud Function run by Cloud Scheduler to keep the sheet in sync.
+
+    Flushes staged sheet rows when a batch threshold has been reached, so
+    rows staged during a quiet period still reach the sheet within
+    SHEET_BATCH_MAX_WAIT_SECONDS plus the schedule interval. Pass ?force=1
+    to flush regardless. Then mirrors status changes made in the submission
+    store (winner marking) to the sheet.
+
+    Returns:
+        JSON backlog: {"pending_rows": N, "oldest_age_seconds": S, "mirrored": M}
+    """
+    writer = get_sheet_writer()
+    store = get_submission_store()
+    if writer is None and store is None:
+        return ('Neither STATE_BUCKET nor SUBMISSION_STORE configured', 500)
+
+    result = {}
+    try:
+        if writer is not None:
+            if request.args.get('force'):
+                backlog = writer.flush()
+            else:
+                backlog = writer.flush_if_due()
+            log_sheet_backlog(backlog)
+            result.update(backlog._asdict())
+        if store is not None:
+            mirrored = submission_store.mirror_changes(
+                store, get_sheets_service(), get_secret(AWARDS_SHEET_ID_SECRET)
+            )
+            if mirrored:
+                logger.info(f"Mirrored {mirrored} status change(s) to the sheet")
+            result['mirrored'] = mirrored
+    except Exception as e:
+        logger.error(f"Error syncing the sheet: {e}", exc_info=True)
+        if is_auth_error(e):
+            invalidate_secrets()
+            reset_google_clients()
+        raise
+
+    return result
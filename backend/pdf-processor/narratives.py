@@ -0,0 +1,85 @@
+"""
+Full text of the narrative answers, kept out of the awards sheet.
+
+The six narrative answers (Project Overview, Innovation, Aesthetics,
+Safety, Contribution, Challenges) run to a few kilobytes each, most of a
+sheet row. Everything that reads the sheet downloads them, although only
+judges reading a submission need them. With a state bucket, process_pdf
+saves them as one JSON object per submission:
+
+    narratives/<year>/<submission_id>.json
+    {"submission_id": "...", "year": "2025", "saved_at": "...",
+     "narratives": {"Project Overview": "...", "Innovation": "...", ...}}
+
+Narratives are keyed by SHEET header. The sheet cells hold an excerpt
+(submission.excerpt_narratives), and tools fetch the full text on demand
+(scripts/get-narratives.py). The year and submission ID that name the
+object are in every sheet row and submission store record.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from schema import FIELD_KEYS, NARRATIVE_KEYS, SHEET, field_vector
+
+# SHEET header and field vector position of each narrative answer
+_NARRATIVES = tuple(
+    (SHEET.headers[SHEET.form_columns[SHEET.form_keys.index(key)]], FIELD_KEYS.index(key))
+    for key in NARRATIVE_KEYS
+)
+
+
+def narrative_texts(fields: Dict[str, Any]) -> Dict[str, str]:
+    """The narrative answers in a PDF fields dict, keyed by SHEET header."""
+    vector = field_vector(fields)
+    return {header: str(vector[index]) for header, index in _NARRATIVES}
+
+
+class GcsNarrativeStore:
+    """Per-submission narrative JSON objects in a GCS bucket."""
+
+    def __init__(self, bucket, prefix: str = 'narratives/'):
+        """
+        Args:
+            bucket: google.cloud.storage Bucket (the pipeline state bucket)
+            prefix: Object name prefix for the narrative objects
+        """
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def blob_name(self, year: str, submission_id: str) -> str:
+        return f"{self.prefix}{year}/{submission_id}.json"
+
+    def save(self, year: str, submission_id: str, fields: Dict[str, Any]) -> str:
+        """
+        Save a submission's narrative answers, replacing any earlier copy.
+
+        Args:
+            year: Year (YYYY)
+            submission_id: Submission ID (GCS path segment)
+            fields: PDF form fields from extract_pdf_fields()
+
+        Returns:
+            Object name
+        """
+        name = self.blob_name(year, submission_id)
+        self.bucket.blob(name).upload_from_string(
+            json.dumps({
+                'submission_id': submission_id,
+                'year': year,
+                'saved_at': datetime.now().isoformat(),
+                'narratives': narrative_texts(fields),
+            }),
+            content_type='application/json'
+        )
+        return name
+
+    def load(self, year: str, submission_id: str) -> Optional[Dict[str, str]]:
+        """A submission's narrative answers keyed by SHEET header, or None if none were saved."""
+        from google.api_core.exceptions import NotFound
+
+        try:
+            data = self.bucket.blob(self.blob_name(year, submission_id)).download_as_bytes()
+        except NotFound:
+            return None
+        return json.loads(data)['narratives']
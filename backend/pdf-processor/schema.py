@@ -0,0 +1,421 @@
+"""
+Declarative column schema for every row built from submission form fields.
+
+The master sheet row, the Project Team rows (PDF processor and
+scripts/export-winners-teams.py) and the winner formatting notebook all pull
+the same PDF form fields in different orders. Each of those outputs is
+declared here once as a Layout: a list of (header, source) columns, where
+the source is a form field key, an Extra value supplied by the caller
+(Awards ID, Drive links, ...) or a Const.
+
+Layouts are compiled at import into a single operator.itemgetter over a
+field vector, a tuple with every form field's value in FORM_FIELDS order.
+A fields dict is walked once to build its vector, and any number of
+layouts are then cut from that vector without further dict lookups.
+project_rows() does this in bulk for thousands of submissions.
+"""
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# Every PDF form field any layout uses: (key, PDF form field name).
+# Keys are "<team group>.<name>"; extract_project_team() groups by the prefix.
+FORM_FIELDS = (
+    ('project_info.name', 'Official Name'),
+    ('project_info.location', 'Location'),
+    ('project_info.category', 'Project Category or Categories for Consideration'),
+    ('project_info.cost', 'Cost'),
+    ('project_info.date_completed', 'Date Completed'),
+    ('project_info.square_feet', 'Square Feet'),
+    ('project_info.levels', 'LevelsStories 1'),
+    ('owner.company', 'Owner'),
+    ('owner.rep_project_manager', 'Owners RepProject Manager'),
+    ('design_team.firm', 'Design Team Firm PrincipalinCharge or Proj Mngr'),
+    ('design_team.architect', 'Architect'),
+    ('design_team.civil', 'Civil'),
+    ('design_team.structural', 'Structural'),
+    ('design_team.electrical', 'Electrical'),
+    ('design_team.mechanical', 'Mechanical'),
+    ('design_team.geotech', 'Geotech'),
+    ('design_team.interior_design', 'Interior Design'),
+    ('design_team.furniture', 'Furniture'),
+    ('design_team.landscape_architect', 'Landscape Architect'),
+    ('construction_team.firm', 'Construction Team Firm Project Manager'),
+    ('construction_team.general_contractor', 'General Contractor'),
+    ('construction_team.plumbing', 'Plumbing'),
+    ('construction_team.hvac', 'HVAC'),
+    ('construction_team.electrical', 'Electrical_2'),
+    ('construction_team.concrete', 'Concrete'),
+    ('construction_team.steel_fabrication', 'Steel Fabrication'),
+    ('construction_team.steel_erection', 'Steel Erection'),
+    ('construction_team.glass_curtain_wall', 'GlassCurtain Wall'),
+    ('construction_team.masonry', 'Masonry'),
+    ('construction_team.drywall_acoustics', 'DrywallAcoustics'),
+    ('construction_team.painting', 'Painting'),
+    ('construction_team.tile_stone', 'TileStone'),
+    ('construction_team.carpentry', 'Carpentry'),
+    ('construction_team.flooring', 'Flooring'),
+    ('construction_team.roofing', 'Roofing'),
+    ('construction_team.waterproofing', 'Waterproofing'),
+    ('construction_team.excavation', 'Excavation'),
+    ('construction_team.demolition', 'Demolition'),
+    ('construction_team.precast', 'Precast'),
+    ('construction_team.landscaping', 'Landscaping 1'),
+    ('contact.firm', 'Name of Firm'),
+    ('contact.name', 'Contact Name'),
+    ('contact.title', 'Title'),
+    ('contact.phone', 'Phone 1'),
+    ('contact.email', 'Email'),
+    # Not part of the project team
+    ('details.delivery_method', 'Delivery Method'),
+    ('details.overview', 'Project Overview'),
+    ('details.innovation', 'Innovation in Design and Construction'),
+    ('details.aesthetics', 'Aesthetics/Design Elements'),
+    ('details.safety', 'Safety, Quality, Craftsmanship'),
+    ('details.contribution', 'Contribution to the Industry and Community'),
+    ('details.challenges', 'Overcoming Unique Challenges/Obstacles'),
+)
+
+TEAM_GROUPS = ('project_info', 'owner', 'design_team', 'construction_team', 'contact')
+
+# Long free-text answers, several kilobytes each. With a state bucket the
+# full text is kept in narratives.py's store and the sheet shows an excerpt.
+NARRATIVE_KEYS = (
+    'details.overview',
+    'details.innovation',
+    'details.aesthetics',
+    'details.safety',
+    'details.contribution',
+    'details.challenges',
+)
+
+FIELD_KEYS = tuple(key for key, _ in FORM_FIELDS)
+PDF_FIELD_NAMES = tuple(name for _, name in FORM_FIELDS)
+_FIELD_INDEX = {key: index for index, key in enumerate(FIELD_KEYS)}
+_BLANKS = ('',) * len(FORM_FIELDS)
+
+# Lookup key for Const columns; never present in an extras dict
+_CONST = object()
+
+FieldVector = Tuple[Any, ...]
+
+
+class Extra(NamedTuple):
+    """A column whose value the caller passes in (e.g. the Awards ID)."""
+    name: str
+    default: str = ''
+
+
+class Const(NamedTuple):
+    """A column with a fixed value."""
+    value: str
+
+
+def field_vector(fields: Dict[str, Any]) -> FieldVector:
+    """Walk a PDF fields dict once, returning every form value in FORM_FIELDS order."""
+    return tuple(map(fields.get, PDF_FIELD_NAMES, _BLANKS))
+
+
+def team_vector(team_data: Dict[str, Dict[str, str]]) -> FieldVector:
+    """Field vector for a nested project team dict from extract_project_team()."""
+    values = []
+    for key in FIELD_KEYS:
+        group, name = key.split('.', 1)
+        values.append(team_data.get(group, {}).get(name, ''))
+    return tuple(values)
+
+
+class Layout:
+    """An output row layout, compiled to one itemgetter over field vector + extras."""
+
+    def __init__(self, name: str, columns: Sequence[Tuple[str, Union[str, Extra, Const]]]):
+        """
+        Args:
+            name: Layout name (key in project_rows() results)
+            columns: (header, source) pairs in output order; source is a
+                FORM_FIELDS key, an Extra or a Const
+        """
+        self.name = name
+        self.headers = tuple(header for header, _ in columns)
+
+        indices = []
+        form_columns = []
+        form_keys = []
+        tail = []  # (extra name or _CONST, default value)
+        for position, (header, source) in enumerate(columns):
+            if isinstance(source, Extra):
+                indices.append(len(FIELD_KEYS) + len(tail))
+                tail.append((source.name, source.default))
+            elif isinstance(source, Const):
+                indices.append(len(FIELD_KEYS) + len(tail))
+                tail.append((_CONST, source.value))
+            else:
+                indices.append(_FIELD_INDEX[source])
+                form_columns.append(position)
+                form_keys.append(source)
+
+        # Positions of the columns filled from the form
+        self.form_columns = tuple(form_columns)
+        self.form_keys = tuple(form_keys)
+        self.extra_names = tuple(name for name, _ in tail if name is not _CONST)
+        self._tail_names = tuple(name for name, _ in tail)
+        self._default_tail = tuple(default for _, default in tail)
+        self._getter = itemgetter(*indices)
+
+    def _tail(self, extras: Optional[Dict[str, Any]]) -> tuple:
+        if not extras:
+            return self._default_tail
+        return tuple(map(extras.get, self._tail_names, self._default_tail))
+
+    def row(self, fields: Union[Dict[str, Any], FieldVector], **extras) -> List[Any]:
+        """
+        Build one row.
+
+        Args:
+            fields: PDF fields dict, or a field vector already built from one
+            **extras: Values for this layout's Extra columns
+        """
+        vector = fields if isinstance(fields, tuple) else field_vector(fields)
+        return list(self._getter(vector + self._tail(extras)))
+
+    def rows(self, fields_list: Iterable[Union[Dict[str, Any], FieldVector]],
+             extras: Optional[Iterable[Dict[str, Any]]] = None) -> List[List[Any]]:
+        """Build rows for many submissions at once (see project_rows)."""
+        return project_rows(fields_list, [self], extras)[self.name]
+
+
+def project_rows(fields_list: Iterable[Union[Dict[str, Any], FieldVector]], layouts: Sequence[Layout],
+                 extras: Optional[Iterable[Dict[str, Any]]] = None) -> Dict[str, List[List[Any]]]:
+    """
+    Map many submissions to rows for several layouts in a single pass.
+
+    Each fields dict is walked once; every layout's row is then cut from
+    the same vector.
+
+    Args:
+        fields_list: PDF fields dicts (or field vectors)
+        layouts: Layouts to produce
+        extras: Per-submission Extra values, parallel to fields_list
+
+    Returns:
+        {layout.name: [row, ...]} in input order
+    """
+    results = {layout.name: [] for layout in layouts}
+    outputs = [(layout, results[layout.name].append) for layout in layouts]
+
+    for fields, row_extras in zip(fields_list, repeat(None) if extras is None else extras):
+        vector = fields if isinstance(fields, tuple) else field_vector(fields)
+        for layout, append in outputs:
+            append(list(layout._getter(vector + layout._tail(row_extras))))
+    return results
+
+
+# ── Layouts ─────────────────────────────────────────────────────────
+
+# Master awards sheet (one row per submission, appended by process_pdf)
+SHEET = Layout('sheet', [
+    ('Submission Timestamp', Extra('submitted_at')),
+    ('Submission ID (GCS)', Extra('submission_id')),
+    ('PDF Link', Extra('file_link')),
+    ('Project Folder', Extra('project_folder_link')),
+    ('Official Name', 'project_info.name'),
+    ('Location', 'project_info.location'),
+    ('Project Category', 'project_info.category'),
+    ('Cost', 'project_info.cost'),
+    ('Date Completed', 'project_info.date_completed'),
+    ('Delivery Method', 'details.delivery_method'),
+    ('Square Feet', 'project_info.square_feet'),
+    ('Levels/Stories', 'project_info.levels'),
+    ('Name of Firm', 'contact.firm'),
+    ('Contact Name', 'contact.name'),
+    ('Title', 'contact.title'),
+    ('Phone', 'contact.phone'),
+    ('Email', 'contact.email'),
+    ('Owner', 'owner.company'),
+    ("Owner's Rep/Project Manager", 'owner.rep_project_manager'),
+    ('Design Team Firm', 'design_team.firm'),
+    ('Architect', 'design_team.architect'),
+    ('Civil', 'design_team.civil'),
+    ('Electrical', 'design_team.electrical'),
+    ('Mechanical', 'design_team.mechanical'),
+    ('Structural', 'design_team.structural'),
+    ('Geotech', 'design_team.geotech'),
+    ('Interior Design', 'design_team.interior_design'),
+    ('Furniture', 'design_team.furniture'),
+    ('Landscape Architect', 'design_team.landscape_architect'),
+    ('Construction Team Firm', 'construction_team.firm'),
+    ('General Contractor', 'construction_team.general_contractor'),
+    ('Plumbing', 'construction_team.plumbing'),
+    ('HVAC', 'construction_team.hvac'),
+    ('Electrical_2', 'construction_team.electrical'),
+    ('Concrete', 'construction_team.concrete'),
+    ('Steel Fabrication', 'construction_team.steel_fabrication'),
+    ('Steel Erection', 'construction_team.steel_erection'),
+    ('Glass/Curtain Wall', 'construction_team.glass_curtain_wall'),
+    ('Masonry', 'construction_team.masonry'),
+    ('Drywall/Acoustics', 'construction_team.drywall_acoustics'),
+    ('Painting', 'construction_team.painting'),
+    ('Tile/Stone', 'construction_team.tile_stone'),
+    ('Carpentry', 'construction_team.carpentry'),
+    ('Flooring', 'construction_team.flooring'),
+    ('Roofing', 'construction_team.roofing'),
+    ('Waterproofing', 'construction_team.waterproofing'),
+    ('Excavation', 'construction_team.excavation'),
+    ('Demolition', 'construction_team.demolition'),
+    ('Precast', 'construction_team.precast'),
+    ('Landscaping', 'construction_team.landscaping'),
+    ('Project Overview', 'details.overview'),
+    ('Innovation', 'details.innovation'),
+    ('Aesthetics/Design Elements', 'details.aesthetics'),
+    ('Safety, Quality, Craftsmanship', 'details.safety'),
+    ('Contribution to Industry', 'details.contribution'),
+    ('Overcoming Challenges', 'details.challenges'),
+    ('Awards ID', Extra('awards_id')),
+    ('Status', Extra('status', 'pending')),
+    ('Winner Category', Extra('winner_category')),
+    ('Winner Notes', Extra('winner_notes')),
+])
+
+# Project Team row built by the PDF processor (format_team_for_sheet_row)
+TEAM = Layout('team', [
+    ('Awards ID', Extra('awards_id')),
+    ('Project Name', 'project_info.name'),
+    ('Location', 'project_info.location'),
+    ('Category', 'project_info.category'),
+    ('Cost', 'project_info.cost'),
+    ('Date Completed', 'project_info.date_completed'),
+    ('Square Feet', 'project_info.square_feet'),
+    ('Owner', 'owner.company'),
+    ("Owner's Rep", 'owner.rep_project_manager'),
+    ('Architect', 'design_team.architect'),
+    ('Design Firm', 'design_team.firm'),
+    ('Civil Engineer', 'design_team.civil'),
+    ('Structural Engineer', 'design_team.structural'),
+    ('Mechanical Engineer', 'design_team.mechanical'),
+    ('Electrical Engineer', 'design_team.electrical'),
+    ('Interior Design', 'design_team.interior_design'),
+    ('Landscape Architect', 'design_team.landscape_architect'),
+    ('General Contractor', 'construction_team.general_contractor'),
+    ('Construction Firm', 'construction_team.firm'),
+    ('Concrete', 'construction_team.concrete'),
+    ('Steel Fabrication', 'construction_team.steel_fabrication'),
+    ('Steel Erection', 'construction_team.steel_erection'),
+    ('Plumbing', 'construction_team.plumbing'),
+    ('HVAC', 'construction_team.hvac'),
+    ('Electrical (construction)', 'construction_team.electrical'),
+    ('Glass/Curtain Wall', 'construction_team.glass_curtain_wall'),
+    ('Masonry', 'construction_team.masonry'),
+    ('Drywall/Acoustics', 'construction_team.drywall_acoustics'),
+    ('Painting', 'construction_team.painting'),
+    ('Tile/Stone', 'construction_team.tile_stone'),
+    ('Carpentry', 'construction_team.carpentry'),
+    ('Flooring', 'construction_team.flooring'),
+    ('Roofing', 'construction_team.roofing'),
+    ('Waterproofing', 'construction_team.waterproofing'),
+    ('Excavation', 'construction_team.excavation'),
+    ('Demolition', 'construction_team.demolition'),
+    ('Precast', 'construction_team.precast'),
+    ('Landscaping', 'construction_team.landscaping'),
+    ('Contact Firm', 'contact.firm'),
+    ('Contact Name', 'contact.name'),
+    ('Contact Email', 'contact.email'),
+    ('Contact Phone', 'contact.phone'),
+])
+
+# "Project Team YYYY" sheet written by scripts/export-winners-teams.py
+WINNER_TEAM_EXPORT = Layout('winner_team_export', [
+    ('Awards ID', Extra('awards_id')),
+    ('Project Name', 'project_info.name'),
+    ('Location', 'project_info.location'),
+    ('Award Won', Extra('winner_category')),
+    ('Project Category', 'project_info.category'),
+    ('Cost', 'project_info.cost'),
+    ('Date Completed', 'project_info.date_completed'),
+    ('Square Feet', 'project_info.square_feet'),
+    ('Levels/Stories', 'project_info.levels'),
+    ('Owner', 'owner.company'),
+    ("Owner's Rep/PM", 'owner.rep_project_manager'),
+    ('Design Team Firm', 'design_team.firm'),
+    ('Architect', 'design_team.architect'),
+    ('Civil Engineer', 'design_team.civil'),
+    ('Structural Engineer', 'design_team.structural'),
+    ('Electrical Engineer', 'design_team.electrical'),
+    ('Mechanical Engineer', 'design_team.mechanical'),
+    ('Geotech', 'design_team.geotech'),
+    ('Interior Design', 'design_team.interior_design'),
+    ('Landscape Architect', 'design_team.landscape_architect'),
+    ('Construction Team Firm', 'construction_team.firm'),
+    ('General Contractor', 'construction_team.general_contractor'),
+    ('Plumbing', 'construction_team.plumbing'),
+    ('HVAC', 'construction_team.hvac'),
+    ('Electrical (Construction)', 'construction_team.electrical'),
+    ('Concrete', 'construction_team.concrete'),
+    ('Steel Fabrication', 'construction_team.steel_fabrication'),
+    ('Steel Erection', 'construction_team.steel_erection'),
+    ('Glass/Curtain Wall', 'construction_team.glass_curtain_wall'),
+    ('Masonry', 'construction_team.masonry'),
+    ('Drywall/Acoustics', 'construction_team.drywall_acoustics'),
+    ('Painting', 'construction_team.painting'),
+    ('Tile/Stone', 'construction_team.tile_stone'),
+    ('Carpentry', 'construction_team.carpentry'),
+    ('Flooring', 'construction_team.flooring'),
+    ('Roofing', 'construction_team.roofing'),
+    ('Waterproofing', 'construction_team.waterproofing'),
+    ('Excavation', 'construction_team.excavation'),
+    ('Demolition', 'construction_team.demolition'),
+    ('Precast', 'construction_team.precast'),
+    ('Landscaping', 'construction_team.landscaping'),
+    ('Submitter Firm', 'contact.firm'),
+    ('Contact Name', 'contact.name'),
+    ('Contact Email', 'contact.email'),
+    ('Contact Phone', 'contact.phone'),
+])
+
+# Project team listing in the winner formatting notebook (yearbook layout)
+NOTEBOOK_TEAM = Layout('notebook_team', [
+    ('Owner', 'owner.company'),
+    ('Architect', 'design_team.architect'),
+    ('General Contractor', 'construction_team.general_contractor'),
+    ('Civil Engineer', 'design_team.civil'),
+    ('Electrical Engineer', 'design_team.electrical'),
+    ('Mechanical Engineer', 'design_team.mechanical'),
+    ('Structural Engineer', 'design_team.structural'),
+    ('Interior Design', 'design_team.interior_design'),
+    ('Landscape Design', 'design_team.landscape_architect'),
+    ('Geotech', 'design_team.geotech'),
+    ('Structural Concrete', 'construction_team.concrete'),
+    ('GFRC Panels & Precast', 'construction_team.precast'),
+    ('Plumbing', 'construction_team.plumbing'),
+    ('HVAC', 'construction_team.hvac'),
+    ('Electrical', 'construction_team.electrical'),
+    ('Masonry', 'construction_team.masonry'),
+    ('Tile/Stone', 'construction_team.tile_stone'),
+    ('Glass/Curtain Wall', 'construction_team.glass_curtain_wall'),
+    ('Flooring', 'construction_team.flooring'),
+    ('Roofing', 'construction_team.roofing'),
+    ('Steel', 'construction_team.steel_fabrication'),
+    ('Excavation', 'construction_team.excavation'),
+    ('Metal Framing and Drywall', 'construction_team.drywall_acoustics'),
+    ('Other Specialty Contractors', Const('')),
+])
+
+
+def sheet_row_vector(row: Sequence[str], header_row: Optional[Sequence[str]] = None) -> FieldVector:
+    """
+    Field vector for a row read back from the master sheet.
+
+    Form columns are found by header, matching either the SHEET header or the
+    PDF field name (older sheets used the PDF names), and fall back to the
+    SHEET column position when the header row has neither.
+    """
+    positions = {}
+    for index, header in enumerate(header_row or ()):
+        positions.setdefault(header, index)
+
+    sheet_columns = dict(zip(SHEET.form_keys, SHEET.form_columns))
+    values = []
+    for key, pdf_name in FORM_FIELDS:
+        position = positions.get(SHEET.headers[sheet_columns[key]],
+                                 positions.get(pdf_name, sheet_columns[key]))
+        values.append(row[position] if position < len(row) else '')
+    return tuple(values)
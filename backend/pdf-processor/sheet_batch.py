@@ -0,0 +1,362 @@
+"""
+Coalescing writer for submission rows in the awards sheet.
+
+Appending one row per submission means one Sheets write request per upload,
+and deadline-hour bursts run into the per-minute write quota. Instead,
+process_pdf stages each finished row as a small JSON object in the pipeline
+state bucket (sheet-rows/pending/...). Once the row is staged it is durable,
+and the submission counts as processed. Staged rows are flushed to the sheet
+in one values().append call when either threshold is reached:
+
+- max_rows rows are waiting, or
+- the oldest staged row has waited max_wait seconds. The flush_sheet_rows
+  entry point is run on a schedule, so a lone row is still flushed when no
+  further uploads arrive.
+
+Only one instance flushes at a time. It holds a lease object created with
+if_generation_match=0 and taken over once it expires. Before each append
+the flusher records the batch in an in-flight manifest. If a flusher dies
+between the append and deleting the staged rows, the next lease holder sees
+the manifest and skips rows whose key (the Awards ID) is already in the
+sheet. A crash therefore never duplicates a row.
+
+Every key appended is also marked as written (sheet-rows/written/<key>).
+A retried submission may stage its row again before its first delivery
+recorded the row as done, possibly after that first copy was flushed;
+flushes skip rows whose key is marked, so the copy is dropped however
+many flushes apart the two arrive.
+
+InMemoryRowStore implements the same semantics locally so the writer can be
+exercised without GCS.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import namedtuple
+import os
+from typing import Callable, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# pending_rows: rows staged but not yet in the sheet
+# oldest_age_seconds: how long the oldest of them has been waiting (0 if none)
+Backlog = namedtuple('Backlog', ['pending_rows', 'oldest_age_seconds'])
+
+
+class GcsRowStore:
+    """Staged rows, flush lease and in-flight manifest stored in a GCS bucket."""
+
+    def __init__(self, bucket, prefix: str = 'sheet-rows/'):
+        """
+        Args:
+            bucket: google.cloud.storage Bucket holding the staged rows
+            prefix: Object name prefix for everything the writer stores
+        """
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def stage(self, key: str, row: list) -> str:
+        """Durably stage a row; returns its entry name."""
+        # Zero-padded staging time keeps listing order equal to staging order
+        name = f"{time.time_ns():020d}-{key}"
+        blob = self.bucket.blob(f"{self.prefix}pending/{name}.json")
+        blob.upload_from_string(
+            json.dumps({'key': key, 'row': row}),
+            content_type='application/json',
+            if_generation_match=0
+        )
+        return name
+
+    def pending(self) -> List[str]:
+        """Entry names of staged rows, oldest first."""
+        pending_prefix = f"{self.prefix}pending/"
+        names = [
+            blob.name[len(pending_prefix):-len('.json')]
+            for blob in self.bucket.list_blobs(prefix=pending_prefix)
+        ]
+        return sorted(names)
+
+    def read(self, name: str) -> dict:
+        blob = self.bucket.blob(f"{self.prefix}pending/{name}.json")
+        return json.loads(blob.download_as_bytes())
+
+    def delete(self, names: Iterable[str]):
+        from google.api_core.exceptions import NotFound
+
+        for name in names:
+            try:
+                self.bucket.blob(f"{self.prefix}pending/{name}.json").delete()
+            except NotFound:
+                pass
+
+    def written(self, keys: Iterable[str]) -> Set[str]:
+        """Keys among these already marked as appended to the sheet."""
+        keys = set(keys)
+        if not keys:
+            return set()
+        written_prefix = f"{self.prefix}written/"
+        # One listing for a batch: Awards IDs of a year share their prefix
+        common = os.path.commonprefix(sorted(keys))
+        return {
+            blob.name[len(written_prefix):]
+            for blob in self.bucket.list_blobs(prefix=written_prefix + common)
+        } & keys
+
+    def mark_written(self, keys: Iterable[str]):
+        """Record keys as appended to the sheet."""
+        for key in keys:
+            self.bucket.blob(f"{self.prefix}written/{key}").upload_from_string(
+                b'', content_type='application/octet-stream'
+            )
+
+    def acquire_lease(self, holder: str, ttl: float) -> bool:
+        """Take the flush lease if it is free or expired."""
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        blob = self.bucket.blob(f"{self.prefix}flush.lease")
+        generation = 0
+        try:
+            lease = json.loads(blob.download_as_bytes())
+            if lease['expires_at'] > time.time():
+                return False
+            generation = blob.generation
+        except NotFound:
+            pass
+
+        try:
+            blob.upload_from_string(
+                json.dumps({'holder': holder, 'expires_at': time.time() + ttl}),
+                content_type='application/json',
+                if_generation_match=generation
+            )
+        except PreconditionFailed:
+            return False
+        return True
+
+    def release_lease(self, holder: str):
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+
+        blob = self.bucket.blob(f"{self.prefix}flush.lease")
+        try:
+            lease = json.loads(blob.download_as_bytes())
+            if lease['holder'] == holder:
+                blob.delete(if_generation_match=blob.generation)
+        except (NotFound, PreconditionFailed):
+            pass
+
+    def read_inflight(self) -> Optional[List[str]]:
+        """Entry names of a batch whose append may or may not have landed."""
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return json.loads(self.bucket.blob(f"{self.prefix}inflight.json").download_as_bytes())
+        except NotFound:
+            return None
+
+    def write_inflight(self, names: List[str]):
+        self.bucket.blob(f"{self.prefix}inflight.json").upload_from_string(
+            json.dumps(names), content_type='application/json'
+        )
+
+    def clear_inflight(self):
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.bucket.blob(f"{self.prefix}inflight.json").delete()
+        except NotFound:
+            pass
+
+
+class InMemoryRowStore:
+    """Local stand-in for GcsRowStore with the same lease and manifest semantics."""
+
+    def __init__(self):
+        self._rows = {}
+        self._written = set()
+        self._lease = None  # (holder, expires_at)
+        self._inflight = None
+        self._lock = threading.Lock()
+
+    def stage(self, key: str, row: list) -> str:
+        with self._lock:
+            name = f"{time.time_ns():020d}-{key}"
+            self._rows[name] = {'key': key, 'row': row}
+            return name
+
+    def pending(self) -> List[str]:
+        with self._lock:
+            return sorted(self._rows)
+
+    def read(self, name: str) -> dict:
+        with self._lock:
+            return self._rows[name]
+
+    def delete(self, names: Iterable[str]):
+        with self._lock:
+            for name in names:
+                self._rows.pop(name, None)
+
+    def written(self, keys: Iterable[str]) -> Set[str]:
+        with self._lock:
+            return self._written & set(keys)
+
+    def mark_written(self, keys: Iterable[str]):
+        with self._lock:
+            self._written.update(keys)
+
+    def acquire_lease(self, holder: str, ttl: float) -> bool:
+        with self._lock:
+            if self._lease and self._lease[1] > time.time():
+                return False
+            self._lease = (holder, time.time() + ttl)
+            return True
+
+    def release_lease(self, holder: str):
+        with self._lock:
+            if self._lease and self._lease[0] == holder:
+                self._lease = None
+
+    def read_inflight(self) -> Optional[List[str]]:
+        with self._lock:
+            return self._inflight
+
+    def write_inflight(self, names: List[str]):
+        with self._lock:
+            self._inflight = list(names)
+
+    def clear_inflight(self):
+        with self._lock:
+            self._inflight = None
+
+
+def _staged_at(name: str) -> float:
+    """Staging time (epoch seconds) encoded in an entry name."""
+    return int(name.split('-', 1)[0]) / 1e9
+
+
+class BatchSheetWriter:
+    """Stages rows durably and appends them to the sheet in batches."""
+
+    def __init__(self, store, append_rows: Callable[[List[list]], None],
+                 existing_keys: Callable[[], Set[str]], max_rows: int = 25,
+                 max_wait: float = 60, max_batch_rows: int = 500,
+                 lease_ttl: float = 120):
+        """
+        Args:
+            store: Row store (GcsRowStore or InMemoryRowStore)
+            append_rows: Appends a list of rows to the sheet in one request
+            existing_keys: Returns the keys (Awards IDs) already in the
+                sheet; only called to recover an interrupted flush
+            max_rows: Staged rows that trigger a flush
+            max_wait: Age in seconds of the oldest staged row that triggers
+                a flush
+            max_batch_rows: Upper bound on rows sent in one append
+            lease_ttl: Seconds a flush lease is held before another
+                instance may take it over
+        """
+        self.store = store
+        self.append_rows = append_rows
+        self.existing_keys = existing_keys
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.max_batch_rows = max_batch_rows
+        self.lease_ttl = lease_ttl
+
+    def backlog(self, pending: Optional[List[str]] = None) -> Backlog:
+        """Report how far the sheet is behind the staged rows."""
+        if pending is None:
+            pending = self.store.pending()
+        if not pending:
+            return Backlog(0, 0.0)
+        return Backlog(len(pending), max(0.0, time.time() - _staged_at(pending[0])))
+
+    def submit(self, key: str, row: list) -> Backlog:
+        """
+        Stage a row and flush if a threshold has been reached.
+
+        Args:
+            key: Unique row key (the Awards ID), used to detect rows that
+                already reached the sheet when recovering a flush
+            row: Row values in sheet column order
+
+        Returns:
+            Backlog after staging (and flushing, if one ran)
+        """
+        self.store.stage(key, row)
+        try:
+            return self.flush_if_due()
+        except Exception as e:
+            # The row is staged durably; the next flush (scheduled or not) retries it
+            logger.warning(f"Flushing staged sheet rows failed, will retry: {e}")
+            return self.backlog()
+
+    def flush_if_due(self) -> Backlog:
+        """Flush if either threshold has been reached; return the backlog."""
+        pending = self.store.pending()
+        backlog = self.backlog(pending)
+        if backlog.pending_rows >= self.max_rows or (
+                backlog.pending_rows and backlog.oldest_age_seconds >= self.max_wait):
+            return self.flush()
+        return backlog
+
+    def flush(self) -> Backlog:
+        """
+        Append every staged row to the sheet, max_batch_rows per request.
+
+        Returns immediately if another instance holds the flush lease.
+
+        Returns:
+            Backlog after flushing
+        """
+        holder = uuid.uuid4().hex
+        if not self.store.acquire_lease(holder, self.lease_ttl):
+            return self.backlog()
+
+        try:
+            started = time.monotonic()
+            # Keys known to be in the sheet beyond those marked written (see
+            # _append_batch), e.g. the sheet's own when recovering a batch
+            written = set()
+
+            inflight = self.store.read_inflight()
+            if inflight:
+                # The previous flusher died mid-batch: some rows may already be in the sheet
+                written.update(self.existing_keys())
+                staged = set(self.store.pending())
+                self._append_batch([name for name in inflight if name in staged], written)
+
+            # Stay well inside the lease so another flusher can't overlap us
+            while time.monotonic() - started < self.lease_ttl / 2:
+                batch = self.store.pending()[:self.max_batch_rows]
+                if not batch:
+                    break
+                self._append_batch(batch, written)
+        finally:
+            self.store.release_lease(holder)
+        return self.backlog()
+
+    def _append_batch(self, names: List[str], written: Set[str]):
+        """
+        Append one batch in a single request, skipping keys already written.
+
+        A retried submission may stage its row twice, in the same batch or
+        after the first copy was flushed; only the first copy is appended.
+        """
+        self.store.write_inflight(names)
+        entries = [self.store.read(name) for name in names]
+        keys = {entry['key'] for entry in entries}
+        marked = self.store.written(keys)
+        written.update(marked)
+        rows = []
+        for entry in entries:
+            if entry['key'] not in written:
+                written.add(entry['key'])
+                rows.append(entry['row'])
+        if rows:
+            self.append_rows(rows)
+        # Also marks keys found in the sheet while recovering an interrupted batch
+        self.store.mark_written(keys - marked)
+        self.store.delete(names)
+        self.store.clear_inflight()
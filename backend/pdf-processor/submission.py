@@ -0,0 +1,224 @@
+"""
+Submission data extraction and sheet row formatting.
+
+Pure functions shared by the PDF processor Cloud Function and the admin
+scripts (scripts/reprocess-submissions.py imports this module directly), so
+nothing here creates API clients or reads configuration at import time.
+"""
+import io
+import logging
+from datetime import datetime
+from typing import BinaryIO, Dict, Any, List, Optional, Union
+
+from acroform import AcroFormReader
+from schema import SHEET, TEAM, TEAM_GROUPS, FIELD_KEYS, NARRATIVE_KEYS, field_vector, team_vector
+
+logger = logging.getLogger(__name__)
+
+# Master sheet columns, in the order format_submission_row() writes them
+SHEET_COLUMNS = list(SHEET.headers)
+
+# Project Team sheet columns, in the order format_team_for_sheet_row() writes them
+TEAM_COLUMNS = list(TEAM.headers)
+
+# Columns filled from the PDF form; the others are set by the pipeline
+# (timestamp, IDs, Drive links) or by judges (status, winner columns)
+FORM_COLUMNS = SHEET.form_columns
+
+# Columns holding the narrative answers, which can be cut to an excerpt
+NARRATIVE_COLUMNS = tuple(SHEET.form_columns[SHEET.form_keys.index(key)] for key in NARRATIVE_KEYS)
+
+
+def extract_pdf_fields(pdf_source: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+    """
+    Extract form fields from a fillable PDF (AcroForm).
+
+    Uses the AcroForm-only reader, which resolves just the cross-reference
+    data and the field tree. Documents it can't handle (encrypted, unusual
+    filters, damaged xref tables) fall back to PyPDF2.
+    
+    Args:
+        pdf_source: PDF file as bytes or a seekable binary file. With a
+            file only the byte ranges holding the form are read.
+        
+    Returns:
+        Dictionary of field names and values
+    """
+    try:
+        reader = AcroFormReader(pdf_source)
+        fields = reader.fields()
+
+        if not fields:
+            logger.warning("No form fields found in PDF - may need OCR")
+            # Return basic metadata
+            return {'_pages': reader.page_count(), '_has_form_fields': False}
+
+        return fields
+
+    except Exception as e:
+        logger.info(f"AcroForm fast path unavailable ({e}) - falling back to PyPDF2")
+        return extract_pdf_fields_pypdf2(pdf_source)
+
+
+def extract_pdf_fields_pypdf2(pdf_source: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+    """
+    Extract form fields with PyPDF2's full document reader.
+    
+    Args:
+        pdf_source: PDF file as bytes or a seekable binary file
+        
+    Returns:
+        Dictionary of field names and values
+    """
+    # Only needed when the AcroForm fast path gives up, so loaded on demand
+    import PyPDF2
+
+    try:
+        if isinstance(pdf_source, (bytes, bytearray)):
+            pdf_file = io.BytesIO(pdf_source)
+        else:
+            pdf_file = pdf_source
+            pdf_file.seek(0)
+        reader = PyPDF2.PdfReader(pdf_file)
+        
+        fields = {}
+        
+        # Try to extract form fields
+        form_fields = reader.get_fields()
+        if form_fields:
+            for field_name, field_data in form_fields.items():
+                value = field_data.get('/V', '')
+                if isinstance(value, bytes):
+                    value = value.decode('utf-8', errors='ignore')
+                fields[field_name] = str(value)
+        else:
+            logger.warning("No form fields found in PDF - may need OCR")
+            # Return basic metadata
+            fields['_pages'] = len(reader.pages)
+            fields['_has_form_fields'] = False
+            
+        return fields
+        
+    except Exception as e:
+        logger.error(f"Error extracting PDF fields: {e}")
+        return {'_error': str(e)}
+
+
+def extract_project_team(fields: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """
+    Extract and structure project team member information from PDF fields.
+    
+    This organizes all team member data for easy export to team sheets,
+    yearbook materials, and awards ceremony programs.
+    
+    Args:
+        fields: Dictionary of all PDF form fields
+    
+    Returns:
+        Dictionary organized by team category with member details
+        
+    Example return structure:
+        {
+            'project_info': {
+                'name': 'Black Desert Resort',
+                'location': 'Ivins, Utah',
+                ...
+            },
+            'owner': {
+                'company': 'Black Desert Development',
+                'rep': 'John Smith'
+            },
+            'design_team': {
+                'architect': 'Smith Architecture',
+                'civil': 'Jones Engineering',
+                ...
+            },
+            'construction_team': {
+                'general_contractor': 'ABC Construction',
+                'concrete': 'XYZ Concrete',
+                ...
+            }
+        }
+    """
+    team_data = {group: {} for group in TEAM_GROUPS}
+    for key, value in zip(FIELD_KEYS, field_vector(fields)):
+        group, name = key.split('.', 1)
+        if group in team_data:
+            team_data[group][name] = value
+    
+    return team_data
+
+
+def format_team_for_sheet_row(awards_id: str, team_data: Dict[str, Dict[str, str]]) -> List[str]:
+    """
+    Format project team data as a flat row for Google Sheets export.
+    
+    This creates a row suitable for the "Project Team" sheet that's used
+    for awards ceremony materials, yearbook, and video presentations.
+    
+    Args:
+        awards_id: Awards ID (e.g., "AW-2025-042")
+        team_data: Structured team data from extract_project_team()
+    
+    Returns:
+        List of values in the correct column order for the team sheet
+    """
+    return TEAM.row(team_vector(team_data), awards_id=awards_id)
+
+
+def excerpt(text: str, limit: int) -> str:
+    """Shorten text to at most limit characters, cut at a word boundary and marked with an ellipsis."""
+    text = ' '.join(str(text).split())
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    if ' ' in cut:
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' ,;:.') + '…'
+
+
+def excerpt_narratives(row: List[str], limit: int) -> List[str]:
+    """Replace the narrative cells of a SHEET row with excerpts (in place); returns the row."""
+    for column in NARRATIVE_COLUMNS:
+        row[column] = excerpt(row[column], limit)
+    return row
+
+
+def format_submission_row(fields: Dict[str, Any], submission_id: str, file_link: str,
+                          project_folder_id: str, awards_id: str,
+                          submitted_at: Optional[str] = None, status: str = 'pending',
+                          winner_category: str = '', winner_notes: str = '',
+                          excerpt_chars: Optional[int] = None) -> List[str]:
+    """
+    Build a master sheet row for a submission.
+
+    Args:
+        fields: PDF form fields from extract_pdf_fields()
+        submission_id: Submission ID (GCS path segment)
+        file_link: Drive link to the uploaded PDF
+        project_folder_id: Drive ID of the project folder
+        awards_id: Awards ID (e.g., "AW-2025-042")
+        submitted_at: ISO timestamp (defaults to now)
+        status: Status (pending/winner/not_selected)
+        winner_category: Winner category (empty initially)
+        winner_notes: Winner notes (empty initially)
+        excerpt_chars: Cut the narrative answers to this many characters,
+            for when the full text is kept in the narrative store
+
+    Returns:
+        List of values in SHEET_COLUMNS order
+    """
+    row = SHEET.row(
+        fields,
+        submitted_at=submitted_at or datetime.now().isoformat(),
+        submission_id=submission_id,
+        file_link=file_link,
+        project_folder_link=f"https://drive.google.com/drive/folders/{project_folder_id}",
+        awards_id=awards_id,
+        status=status,
+        winner_category=winner_category,
+        winner_notes=winner_notes
+    )
+    if excerpt_chars is not None:
+        excerpt_narratives(row, excerpt_chars)
+    return row
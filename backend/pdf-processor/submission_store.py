@@ -0,0 +1,423 @@
+"""
+Primary store for awards submissions, with the sheet as a mirror for staff.
+
+Every lookup used to read Sheet1!A:ZZ in full. Allocating an Awards ID,
+marking a winner, listing submissions and exporting winners all got slower
+as submissions accumulated, and each of those reads counted against the
+Sheets quota. The store keeps one record per submission, keyed by Awards ID:
+
+    {"awards_id": "AW-2025-042", "year": "2025", "number": 42,
+     "submission_id": "...", "status": "pending", "winner_category": "",
+     "winner_notes": "", "row": {<sheet header>: <value>, ...},
+     "created_at": "...", "updated_at": "...", "version": 1,
+     "mirror_pending": false}
+
+Records are read by Awards ID or submission ID and listed by year and
+status, all through indexes. None of this touches the sheet.
+
+The sheet stays the view staff work in, and it is kept in sync
+asynchronously. New rows still reach it through the batching writer in
+sheet_batch.py. Status changes set mirror_pending. mirror_changes(), run by
+the scheduled flush_sheet_rows, writes the changed cells in one
+values.batchUpdate and then clears the flag, unless the record changed
+again in the meantime.
+
+Backends (open_store() picks one from a SUBMISSION_STORE URL):
+- FirestoreSubmissionStore ("firestore" or "firestore://<database>"):
+  production. The client uses the emulator when FIRESTORE_EMULATOR_HOST is
+  set.
+- SqliteSubmissionStore ("sqlite:///path/to/store.db"): local development,
+  scripts and benchmarks.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import google_api
+
+# Sheet columns a status change rewrites, and the record fields they mirror
+MIRRORED_COLUMNS = (
+    ('Status', 'status'),
+    ('Winner Category', 'winner_category'),
+    ('Winner Notes', 'winner_notes'),
+)
+STATUSES = ('pending', 'winner', 'not_selected')
+
+
+def awards_number(awards_id: str) -> int:
+    """AW-2025-042 -> 42 (0 for IDs without a numeric suffix, e.g. timestamp fallbacks)."""
+    try:
+        return int(awards_id.rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def new_record(awards_id: str, submission_id: str, year: str, headers: Sequence[str],
+               row: Sequence[str]) -> dict:
+    """
+    Build a store record for a submission row.
+
+    Args:
+        awards_id: Awards ID (e.g., "AW-2025-042")
+        submission_id: Submission ID (GCS path segment)
+        year: Year (YYYY)
+        headers: Sheet headers, in row order
+        row: Sheet row values (status columns are taken from here too)
+
+    Returns:
+        Record dict, ready for add()
+    """
+    values = dict(zip(headers, row))
+    now = datetime.now().isoformat()
+    return {
+        'awards_id': awards_id,
+        'year': year,
+        'number': awards_number(awards_id),
+        'submission_id': submission_id,
+        'status': values.get('Status') or 'pending',
+        'winner_category': values.get('Winner Category', ''),
+        'winner_notes': values.get('Winner Notes', ''),
+        'row': values,
+        'created_at': now,
+        'updated_at': now,
+        'version': 1,
+        # The row carries its status when it is appended to the sheet
+        'mirror_pending': False,
+    }
+
+
+def sheet_row(record: dict, headers: Sequence[str]) -> List[str]:
+    """A record as a sheet row in the given header order, with its current status."""
+    values = dict(record['row'])
+    for header, field in MIRRORED_COLUMNS:
+        values[header] = record[field]
+    return [values.get(header, '') for header in headers]
+
+
+class SqliteSubmissionStore:
+    """Submission records in a local SQLite database, indexed like the Firestore collection."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS submissions (
+            awards_id TEXT PRIMARY KEY,
+            year TEXT NOT NULL,
+            number INTEGER NOT NULL,
+            submission_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            winner_category TEXT NOT NULL,
+            winner_notes TEXT NOT NULL,
+            row TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            mirror_pending INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS submissions_by_submission ON submissions (submission_id);
+        CREATE INDEX IF NOT EXISTS submissions_by_year_number ON submissions (year, number);
+        CREATE INDEX IF NOT EXISTS submissions_by_year_status ON submissions (year, status);
+        CREATE INDEX IF NOT EXISTS submissions_by_status ON submissions (status);
+        CREATE INDEX IF NOT EXISTS submissions_mirror_pending ON submissions (awards_id)
+            WHERE mirror_pending = 1;
+    """
+    _COLUMNS = ('awards_id', 'year', 'number', 'submission_id', 'status', 'winner_category',
+                'winner_notes', 'row', 'created_at', 'updated_at', 'version', 'mirror_pending')
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file (created if missing), or ':memory:'
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+
+    def _record(self, values) -> dict:
+        record = dict(zip(self._COLUMNS, values))
+        record['row'] = json.loads(record['row'])
+        record['mirror_pending'] = bool(record['mirror_pending'])
+        return record
+
+    def _select(self, where: str = '', params: tuple = (), suffix: str = '') -> List[dict]:
+        sql = f"SELECT {', '.join(self._COLUMNS)} FROM submissions {where} {suffix}"
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [self._record(row) for row in rows]
+
+    def add(self, record: dict) -> bool:
+        """Insert a record unless its Awards ID exists; returns whether it was added."""
+        values = dict(record, row=json.dumps(record['row']), mirror_pending=int(record['mirror_pending']))
+        with self._lock:
+            cursor = self._db.execute(
+                f"INSERT OR IGNORE INTO submissions ({', '.join(self._COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                tuple(values[column] for column in self._COLUMNS)
+            )
+        return cursor.rowcount == 1
+
+    def add_many(self, records: Iterable[dict]) -> int:
+        """add() for many records in one transaction; returns how many were added."""
+        added = 0
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                for record in records:
+                    values = dict(record, row=json.dumps(record['row']),
+                                  mirror_pending=int(record['mirror_pending']))
+                    cursor = self._db.execute(
+                        f"INSERT OR IGNORE INTO submissions ({', '.join(self._COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                        tuple(values[column] for column in self._COLUMNS)
+                    )
+                    added += cursor.rowcount
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+        return added
+
+    def get(self, awards_id: str) -> Optional[dict]:
+        records = self._select('WHERE awards_id = ?', (awards_id,))
+        return records[0] if records else None
+
+    def find_by_submission(self, submission_id: str) -> Optional[dict]:
+        records = self._select('WHERE submission_id = ?', (submission_id,), 'LIMIT 1')
+        return records[0] if records else None
+
+    def list(self, year: Optional[str] = None, status: Optional[str] = None) -> List[dict]:
+        """Records filtered by year and/or status, in Awards ID order."""
+        clauses, params = [], []
+        if year:
+            clauses.append('year = ?')
+            params.append(year)
+        if status:
+            clauses.append('status = ?')
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self._select(where, tuple(params), 'ORDER BY year, number, awards_id')
+
+    def highest_number(self, year: str) -> int:
+        """Highest Awards ID number used in a year (0 if none)."""
+        with self._lock:
+            value = self._db.execute('SELECT MAX(number) FROM submissions WHERE year = ?', (year,)).fetchone()[0]
+        return value or 0
+
+    def set_status(self, awards_id: str, status: str, winner_category: str = '',
+                   winner_notes: str = '') -> Optional[dict]:
+        """Change a submission's status and queue it for the sheet mirror; None if not found."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE submissions SET status = ?, winner_category = ?, winner_notes = ?, "
+                "updated_at = ?, version = version + 1, mirror_pending = 1 WHERE awards_id = ?",
+                (status, winner_category, winner_notes, datetime.now().isoformat(), awards_id)
+            )
+        return self.get(awards_id) if cursor.rowcount else None
+
+    def unmirrored(self, limit: int = 500) -> List[dict]:
+        """Records whose status change has not reached the sheet yet."""
+        return self._select('WHERE mirror_pending = 1', (), f'ORDER BY awards_id LIMIT {int(limit)}')
+
+    def mark_mirrored(self, versions: Dict[str, int]):
+        """Clear mirror_pending for records still at the version that was mirrored."""
+        with self._lock:
+            self._db.executemany(
+                'UPDATE submissions SET mirror_pending = 0 WHERE awards_id = ? AND version = ?',
+                list(versions.items())
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM submissions').fetchone()[0]
+
+
+class FirestoreSubmissionStore:
+    """
+    Submission records as Firestore documents (ID = Awards ID).
+
+    Equality filters (submission_id, year, status, mirror_pending) use the
+    automatic single-field indexes. highest_number() needs the composite
+    (year ASC, number DESC) index declared in terraform/firestore.tf.
+    """
+
+    def __init__(self, client, collection: str = 'submissions'):
+        """
+        Args:
+            client: google.cloud.firestore.Client
+            collection: Collection holding the submission documents
+        """
+        self.client = client
+        self.collection = client.collection(collection)
+
+    def _where(self, query, field: str, value):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        return query.where(filter=FieldFilter(field, '==', value))
+
+    def add(self, record: dict) -> bool:
+        from google.api_core.exceptions import AlreadyExists
+
+        try:
+            self.collection.document(record['awards_id']).create(record)
+        except AlreadyExists:
+            return False
+        return True
+
+    def add_many(self, records: Iterable[dict]) -> int:
+        return sum(self.add(record) for record in records)
+
+    def get(self, awards_id: str) -> Optional[dict]:
+        snapshot = self.collection.document(awards_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def find_by_submission(self, submission_id: str) -> Optional[dict]:
+        for snapshot in self._where(self.collection, 'submission_id', submission_id).limit(1).stream():
+            return snapshot.to_dict()
+        return None
+
+    def list(self, year: Optional[str] = None, status: Optional[str] = None) -> List[dict]:
+        query = self.collection
+        if year:
+            query = self._where(query, 'year', year)
+        if status:
+            query = self._where(query, 'status', status)
+        records = [snapshot.to_dict() for snapshot in query.stream()]
+        # Sorted here: ordering a multi-field equality query would need another composite index
+        return sorted(records, key=lambda r: (r['year'], r['number'], r['awards_id']))
+
+    def highest_number(self, year: str) -> int:
+        from google.cloud import firestore
+
+        query = self._where(self.collection, 'year', year).order_by(
+            'number', direction=firestore.Query.DESCENDING).limit(1)
+        for snapshot in query.stream():
+            return snapshot.get('number')
+        return 0
+
+    def set_status(self, awards_id: str, status: str, winner_category: str = '',
+                   winner_notes: str = '') -> Optional[dict]:
+        from google.api_core.exceptions import NotFound
+        from google.cloud import firestore
+
+        reference = self.collection.document(awards_id)
+        try:
+            reference.update({
+                'status': status,
+                'winner_category': winner_category,
+                'winner_notes': winner_notes,
+                'updated_at': datetime.now().isoformat(),
+                'version': firestore.Increment(1),
+                'mirror_pending': True,
+            })
+        except NotFound:
+            return None
+        return self.get(awards_id)
+
+    def unmirrored(self, limit: int = 500) -> List[dict]:
+        query = self._where(self.collection, 'mirror_pending', True).limit(limit)
+        return [snapshot.to_dict() for snapshot in query.stream()]
+
+    def mark_mirrored(self, versions: Dict[str, int]):
+        from google.cloud import firestore
+
+        @firestore.transactional
+        def clear(transaction, reference, version):
+            snapshot = reference.get(transaction=transaction)
+            if snapshot.exists and snapshot.get('version') == version:
+                transaction.update(reference, {'mirror_pending': False})
+
+        for awards_id, version in versions.items():
+            clear(self.client.transaction(), self.collection.document(awards_id), version)
+
+    def count(self) -> int:
+        return self.collection.count().get()[0][0].value
+
+
+def open_store(url: Optional[str], project: Optional[str] = None):
+    """
+    Open the store a SUBMISSION_STORE URL names, or None if it is empty.
+
+    Args:
+        url: "firestore", "firestore://<database>" or "sqlite:///<path>"
+        project: GCP project for Firestore (default: from the environment)
+    """
+    if not url:
+        return None
+    if url.startswith('sqlite://'):
+        return SqliteSubmissionStore(url[len('sqlite://'):] or ':memory:')
+    if url == 'firestore' or url.startswith('firestore://'):
+        from google.cloud import firestore
+
+        database = url[len('firestore://'):] if url.startswith('firestore://') else None
+        return FirestoreSubmissionStore(firestore.Client(project=project, database=database or '(default)'))
+    raise ValueError(f"Unsupported SUBMISSION_STORE: {url!r} (use firestore, firestore://DB or sqlite:///PATH)")
+
+
+def column_letter(index: int) -> str:
+    """Convert a column index (0-based) to its letter: 0 -> A, 26 -> AA."""
+    result = ""
+    while index >= 0:
+        result = chr(index % 26 + 65) + result
+        index = index // 26 - 1
+    return result
+
+
+def mirror_changes(store, service, sheet_id: str, sheet_title: str = 'Sheet1',
+                   limit: int = 500) -> int:
+    """
+    Write pending status changes to the sheet in one values.batchUpdate.
+
+    Reads the header row and the Awards ID column (not the whole sheet) to
+    find the changed rows. Records whose row has not reached the sheet yet
+    stay pending for the next run.
+
+    Args:
+        store: Submission store
+        service: Authenticated Sheets service
+        sheet_id: Spreadsheet ID
+        sheet_title: Tab holding the submission rows
+        limit: Records mirrored per call
+
+    Returns:
+        Number of records mirrored
+    """
+    records = store.unmirrored(limit)
+    if not records:
+        return 0
+
+    header = google_api.execute('sheets', service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range=f"{sheet_title}!1:1"
+    )).get('values', [[]])[0]
+    if 'Awards ID' not in header:
+        raise ValueError(f"No 'Awards ID' column in {sheet_title}")
+    awards_column = column_letter(header.index('Awards ID'))
+    column = google_api.execute('sheets', service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range=f"{sheet_title}!{awards_column}:{awards_column}"
+    )).get('values', [])
+    row_numbers = {cells[0]: number for number, cells in enumerate(column, start=1) if cells}
+
+    data = []
+    versions = {}
+    for record in records:
+        row_number = row_numbers.get(record['awards_id'])
+        if row_number is None:
+            continue
+        for header_name, field in MIRRORED_COLUMNS:
+            if header_name in header:
+                data.append({
+                    'range': f"{sheet_title}!{column_letter(header.index(header_name))}{row_number}",
+                    'values': [[record[field]]],
+                })
+        versions[record['awards_id']] = record['version']
+
+    if data:
+        google_api.execute('sheets', service.spreadsheets().values().batchUpdate(
+            spreadsheetId=sheet_id,
+            body={'valueInputOption': 'RAW', 'data': data}
+        ))
+    store.mark_mirrored(versions)
+    return len(versions)
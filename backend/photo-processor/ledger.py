@@ -0,0 +1,191 @@
+"""
+Per-object processing ledger so retried events resume where they failed.
+
+Both processors re-raise every error so the event is retried, and a retry
+used to start from scratch: another Drive file, possibly another Awards ID
+and another sheet row. The ledger keeps one small JSON record per submitted
+object in the state bucket (ledger/<bucket>/<object name>.json) holding the
+results of every stage that already finished:
+
+    {"generation": 1712345, "sha256": "...", "stages": {
+        "upload": {"file_id": "...", "file_link": "..."},
+        "awards_id": {"awards_id": "AW-2025-042"},
+        "row": {}}}
+
+A record applies to an event when it was written for the same object
+generation or for identical content (same SHA-256), so re-uploading the
+same bytes to the same path is recognised too. A record for different
+content is started over.
+
+Writes use if_generation_match on the record's own generation, so two
+deliveries of the same event can't overwrite each other's progress; the
+loser gets LedgerConflict and is retried later, by which point the record
+shows what the winner finished.
+
+This file is duplicated in backend/pdf-processor and backend/photo-processor
+because each Cloud Function deploys only its own source directory. Keep the
+two copies identical.
+"""
+import hashlib
+import io
+import json
+import threading
+import time
+from typing import Optional
+
+
+class LedgerConflict(Exception):
+    """Raised when another delivery of the same event updated the record first."""
+
+
+class LedgerEntry:
+    """Finished stages for one object; persisted when created by a SubmissionLedger."""
+
+    def __init__(self, blob=None, record: Optional[dict] = None, generation: int = 0):
+        """
+        Args:
+            blob: GCS blob holding the record (None keeps progress in memory only)
+            record: Existing record to resume from
+            generation: Generation of the stored record (0 if none exists)
+        """
+        self._blob = blob
+        self.record = record or {'stages': {}}
+        self._generation = generation
+        self._lock = threading.Lock()
+
+    def done(self, stage: str) -> bool:
+        """Check whether a stage already finished."""
+        return stage in self.record['stages']
+
+    def get(self, stage: str) -> Optional[dict]:
+        """Return the saved result of a finished stage, or None."""
+        return self.record['stages'].get(stage)
+
+    def finish(self, stage: str, **result):
+        """Mark a stage finished and persist its result."""
+        with self._lock:
+            self.record['stages'][stage] = result
+            self._save()
+
+    def set_sha256(self, sha256: Optional[str]):
+        """Record the content hash once it is known (e.g. after a streamed upload)."""
+        if not sha256 or self.record.get('sha256') == sha256:
+            return
+        with self._lock:
+            self.record['sha256'] = sha256
+            self._save()
+
+    def _save(self):
+        if self._blob is None:
+            return
+        from google.api_core.exceptions import PreconditionFailed
+
+        self.record['updated_at'] = time.time()
+        try:
+            self._blob.upload_from_string(
+                json.dumps(self.record),
+                content_type='application/json',
+                if_generation_match=self._generation
+            )
+        except PreconditionFailed as e:
+            raise LedgerConflict(f"ledger record {self._blob.name} was updated concurrently") from e
+        self._generation = self._blob.generation
+
+
+class SubmissionLedger:
+    """Opens ledger entries for submitted objects in the state bucket."""
+
+    def __init__(self, state_bucket, prefix: str = 'ledger/'):
+        """
+        Args:
+            state_bucket: google.cloud.storage Bucket holding ledger records
+            prefix: Object name prefix for ledger records
+        """
+        self.state_bucket = state_bucket
+        self.prefix = prefix
+
+    def open(self, bucket_name: str, object_name: str, generation: int,
+             sha256: Optional[str] = None) -> LedgerEntry:
+        """
+        Load the entry for an object, starting a new one if the stored record
+        was written for different content.
+
+        Args:
+            bucket_name: Bucket of the submitted object
+            object_name: Name of the submitted object
+            generation: Generation of the submitted object
+            sha256: Hex SHA-256 of the content, if already known
+        """
+        from google.api_core.exceptions import NotFound
+
+        blob = self.state_bucket.blob(f"{self.prefix}{bucket_name}/{object_name}.json")
+        try:
+            record = json.loads(blob.download_as_bytes())
+            record_generation = blob.generation
+        except NotFound:
+            record, record_generation = None, 0
+
+        same_content = record is not None and (
+            record.get('generation') == generation
+            or (sha256 is not None and record.get('sha256') == sha256)
+        )
+        if not same_content:
+            record = {'bucket': bucket_name, 'name': object_name, 'stages': {}}
+
+        record['generation'] = generation
+        if sha256:
+            record['sha256'] = sha256
+        return LedgerEntry(blob, record, record_generation)
+
+
+class HashingReader(io.RawIOBase):
+    """
+    Seekable reader that computes the SHA-256 of everything read through it.
+
+    Chunked uploads may seek back to resend a chunk; bytes are only hashed
+    the first time they are read, in order. hexdigest() returns None unless
+    the whole stream was read without skipping ahead.
+    """
+
+    def __init__(self, raw):
+        super().__init__()
+        self._raw = raw
+        self._hash = hashlib.sha256()
+        self._hashed_to = 0
+        self._gap = False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        return self._raw.seek(pos, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._raw.tell()
+        data = self._raw.read(size)
+        end = start + len(data)
+        if start > self._hashed_to:
+            self._gap = True
+        elif end > self._hashed_to:
+            self._hash.update(data[self._hashed_to - start:])
+            self._hashed_to = end
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def hexdigest(self) -> Optional[str]:
+        if self._gap:
+            return None
+        size = self._raw.seek(0, io.SEEK_END)
+        if self._hashed_to != size:
+            return None
+        return self._hash.hexdigest()
@@ -5,48 +5,204 @@ Organizes photos into Drive folders and optionally processes images.
 import os
 import json
 import logging
-from typing import Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, BinaryIO, Dict, NamedTuple, Optional, Sequence, Union
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import functions_framework
-from google.cloud import storage, secretmanager
-from google.oauth2 import service_account
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from PIL import Image
+import hashlib
+import importlib
+import math
+import multiprocessing
+from google.auth.exceptions import RefreshError
 import io
 
+from drive_folders import FolderResolver
+import google_api
+import http_pool
+from ledger import LedgerEntry, SubmissionLedger
+import tracing
+
+if TYPE_CHECKING:
+    from PIL import Image
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Environment variables
 PROJECT_ID = os.environ.get('GCP_PROJECT_ID')
-DRIVE_FOLDER_SECRET = os.environ.get('DRIVE_FOLDER_SECRET')
 SUBMISSIONS_BUCKET = os.environ.get('SUBMISSIONS_BUCKET')
+STATE_BUCKET = os.environ.get('STATE_BUCKET')  # Pipeline state (folder index)
+RENDITIONS_BUCKET = os.environ.get('RENDITIONS_BUCKET')  # Photo renditions (see rendition_path)
 MAX_PHOTO_SIZE_MB = int(os.environ.get('MAX_PHOTO_SIZE_MB', 20))
+# Files above this size are streamed from GCS instead of downloaded in one piece
+STREAM_THRESHOLD_MB = int(os.environ.get('STREAM_THRESHOLD_MB', 8))
+# Chunk size for streamed GCS reads and resumable Drive uploads (multiple of 256 KB)
+STREAM_CHUNK_SIZE_MB = int(os.environ.get('STREAM_CHUNK_SIZE_MB', 8))
 DRIVE_OWNER_EMAIL = os.environ.get('DRIVE_OWNER_EMAIL')  # Email of Drive folder owner
+# Refresh the cached OAuth access token this many seconds before it expires
+CREDENTIAL_REFRESH_MARGIN_SECONDS = int(os.environ.get('CREDENTIAL_REFRESH_MARGIN_SECONDS', 300))
+# How long secrets read from the 'latest' version are served from memory
+SECRET_CACHE_TTL_SECONDS = int(os.environ.get('SECRET_CACHE_TTL_SECONDS', 600))
+# Secret IDs may be pinned to a version: "projects/P/secrets/NAME/versions/3"
+USER_OAUTH_SECRET = os.environ.get('USER_OAUTH_SECRET', 'awards-production-user-oauth-token')
+# Fraction of invocations run under cProfile + tracemalloc, written to STATE_BUCKET/profiles/
+PROFILE_INVOCATIONS = float(os.environ.get('PROFILE_INVOCATIONS', 0))
+# Drive request budget for this instance (the per-user quota is shared by all instances)
+DRIVE_REQUESTS_PER_MINUTE = float(os.environ.get('DRIVE_REQUESTS_PER_MINUTE', 600))
+# How long a photo or completion marker waits for the PDF processor to create its
+# project folder; events are not redelivered, so photos arriving first would be lost
+PROJECT_FOLDER_WAIT_SECONDS = float(os.environ.get('PROJECT_FOLDER_WAIT_SECONDS', 60))
+# Batch mode: photos are processed together when their submission's completion
+# marker arrives (process_submission_photos), not one invocation per photo
+PHOTO_BATCH = os.environ.get('PHOTO_BATCH', '').lower() in ('1', 'true')
+# Worker processes decoding and encoding photos in batch mode (one per vCPU)
+PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', os.cpu_count() or 1))
+# Concurrent GCS downloads and Drive uploads in batch mode
+PHOTO_IO_THREADS = int(os.environ.get('PHOTO_IO_THREADS', 8))
+# Threads libheif decodes the tiles of one HEIF photo with (iPhones store 512 px
+# tiles); in batch mode every vCPU already has a photo worker of its own
+HEIF_DECODE_THREADS = int(os.environ.get('HEIF_DECODE_THREADS', 1 if PHOTO_BATCH else os.cpu_count() or 1))
+
+google_api.configure('drive', requests_per_minute=DRIVE_REQUESTS_PER_MINUTE)
+
+# Written by the frontend at submissions/YYYY/submission_id/ once every file is uploaded
+COMPLETION_MARKER = 'complete.json'
 
 # Image processing settings
 MAX_DIMENSION = 4096  # Max width/height in pixels
 JPEG_QUALITY = 90
+# Most pixels a photo is decoded at, after reduced-scale JPEG decoding (about
+# 3 bytes each, twice over while resizing). probe_image checks the header
+# against it, so a photo over budget is rejected before its pixels are read.
+MAX_DECODE_MEGAPIXELS = float(os.environ.get('MAX_DECODE_MEGAPIXELS', 50))
+
+# ISO BMFF brands of HEIF files (HEIC, AVIF); register_heif_decoder is only called for these
+HEIF_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1', b'avif'}
+# MIME types of originals uploaded as is, by extension (anything else: image/jpeg)
+ORIGINAL_MIME_TYPES = {
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.heic': 'image/heic',
+    '.heif': 'image/heif',
+    '.avif': 'image/avif',
+}
+# Image.Transpose member that displays the pixels as the EXIF orientation says (EXIF is not kept)
+ORIENTATION_TRANSPOSE = {
+    2: 'FLIP_LEFT_RIGHT',
+    3: 'ROTATE_180',
+    4: 'FLIP_TOP_BOTTOM',
+    5: 'TRANSPOSE',
+    6: 'ROTATE_270',
+    7: 'TRANSVERSE',
+    8: 'ROTATE_90',
+}
+
+
+class Rendition(NamedTuple):
+    """A smaller copy every photo is rendered to, besides the full-size one uploaded to Drive."""
+    name: str
+    max_dimension: int
+    quality: int
+
+
+def parse_renditions(spec: str) -> tuple:
+    """Renditions from a 'name:max_dimension:quality,...' list (PHOTO_RENDITIONS)."""
+    renditions = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, max_dimension, quality = item.split(':')
+        if name == FULL_RENDITION:
+            raise ValueError(f"Rendition name '{FULL_RENDITION}' is reserved for the full-size photo")
+        renditions.append(Rendition(name, int(max_dimension), int(quality)))
+    return tuple(renditions)
+
+
+# The processed full-size photo, written to RENDITIONS_BUCKET alongside the others
+FULL_RENDITION = 'full'
+# Smaller renditions for galleries and previews; empty to write only the full-size one
+RENDITIONS = parse_renditions(os.environ.get('PHOTO_RENDITIONS', 'thumb:400:80,preview:1600:85'))
+
+# The Google client libraries are imported, and the GCS and Secret Manager
+# clients created, on first use (get_storage_client, get_secret_client,
+# _get_service) rather than at import, so a cold instance loads only what
+# the function it serves actually calls.
+_storage_client = None
+_secret_client = None
+_init_lock = threading.Lock()
+
+# Credentials and API clients are cached at module level so warm instances
+# reuse them across invocations instead of re-reading the OAuth secret,
+# refreshing the token and rebuilding discovery clients for every event.
+# Clients are cached per thread: {(api, version, thread_id): service}
+_credentials = None
+_services = {}
+_auth_request = None
+_client_lock = threading.Lock()
+
+# Secret values keyed by full version path: {name: (value, expires_at)}
+_secret_cache = {}
+_secret_lock = threading.Lock()
+
+_folder_resolver = None
+_ledger = None
 
-# Initialize clients
-storage_client = storage.Client()
-secret_client = secretmanager.SecretManagerServiceClient()
+# Batch mode: photo worker processes (get_photo_pool) and download/upload threads
+_photo_pool = None
+_io_executor = ThreadPoolExecutor(max_workers=PHOTO_IO_THREADS, thread_name_prefix='photo-io')
+
+# pillow-heif's openers, registered with Pillow by the first HEIF photo
+_heif_registered = None
+_heif_lock = threading.Lock()
+
+
+def get_storage_client():
+    """Get the instance-wide GCS client, creating it on first use."""
+    global _storage_client
+
+    with _init_lock:
+        if _storage_client is None:
+            from google.cloud import storage
+            _storage_client = storage.Client()
+        return _storage_client
+
+
+def get_secret_client():
+    """Get the instance-wide Secret Manager client, creating it on first use."""
+    global _secret_client
+
+    with _init_lock:
+        if _secret_client is None:
+            from google.cloud import secretmanager
+            _secret_client = secretmanager.SecretManagerServiceClient()
+        return _secret_client
 
 
 def get_secret(secret_id: str) -> str:
-    """Retrieve a secret from Secret Manager."""
-    # Extract just the secret name from various possible formats:
+    """
+    Retrieve a secret from Secret Manager, served from memory when cached.
+
+    Values read from the 'latest' version are cached for
+    SECRET_CACHE_TTL_SECONDS; pinned versions never change and are cached
+    for the lifetime of the instance.
+    """
+    # Extract the secret name (and optional version) from various possible formats:
     # 1. Just the name: "awards-production-drive-folder"
     # 2. Full path: "projects/PROJECT/secrets/NAME"
     # 3. Full path with version: "projects/PROJECT/secrets/NAME/versions/VERSION"
+    version = 'latest'
     
     if '/secrets/' in secret_id:
         # Extract the secret name from the path
         parts = secret_id.split('/secrets/')
         if len(parts) > 1:
-            secret_name = parts[1].split('/')[0]  # Get just the name, ignore /versions/... if present
+            path_parts = parts[1].split('/')
+            secret_name = path_parts[0]
+            if len(path_parts) >= 3 and path_parts[1] == 'versions':
+                version = path_parts[2]
         else:
             secret_name = secret_id
     else:
@@ -54,17 +210,38 @@ def get_secret(secret_id: str) -> str:
         secret_name = secret_id
     
     # Construct the full path
-    name = f"projects/{PROJECT_ID}/secrets/{secret_name}/versions/latest"
-    
-    response = secret_client.access_secret_version(request={"name": name})
-    return response.payload.data.decode('UTF-8')
+    name = f"projects/{PROJECT_ID}/secrets/{secret_name}/versions/{version}"
 
+    with tracing.span('secret', secret=secret_name) as span:
+        now = time.monotonic()
+        with _secret_lock:
+            cached = _secret_cache.get(name)
+            if cached and (cached[1] is None or cached[1] > now):
+                span['cached'] = True
+                return cached[0]
+
+        span['cached'] = False
+        response = get_secret_client().access_secret_version(request={"name": name})
+        value = response.payload.data.decode('UTF-8')
+
+        expires_at = None if version != 'latest' else now + SECRET_CACHE_TTL_SECONDS
+        with _secret_lock:
+            _secret_cache[name] = (value, expires_at)
+
+        return value
 
-def get_user_credentials():
-    """Get user OAuth credentials from Secret Manager."""
-    secret_name = f"projects/{PROJECT_ID}/secrets/awards-production-user-oauth-token/versions/latest"
-    response = secret_client.access_secret_version(request={"name": secret_name})
-    token_data = json.loads(response.payload.data.decode('UTF-8'))
+
+def invalidate_secrets():
+    """Forget all cached secret values so the next lookup hits Secret Manager."""
+    with _secret_lock:
+        _secret_cache.clear()
+
+
+def _load_user_credentials():
+    """Build user OAuth credentials from the refresh token in Secret Manager."""
+    from google.oauth2.credentials import Credentials
+
+    token_data = json.loads(get_secret(USER_OAUTH_SECRET))
 
     # Create credentials from the user's OAuth token
     credentials = Credentials(
@@ -81,35 +258,345 @@ def get_user_credentials():
     return credentials
 
 
+def _credentials_need_refresh(credentials) -> bool:
+    """Check whether the access token is missing or within the refresh margin."""
+    if not credentials.token or credentials.expiry is None:
+        return True
+    remaining = (credentials.expiry - datetime.utcnow()).total_seconds()
+    return remaining <= CREDENTIAL_REFRESH_MARGIN_SECONDS
+
+
+def get_user_credentials():
+    """
+    Get user OAuth credentials, cached for the lifetime of the instance.
+
+    The OAuth secret is only read on the first call (or after
+    reset_google_clients()), and the access token is only refreshed when it
+    is missing or close to expiry.
+    """
+    global _credentials, _auth_request
+
+    with _client_lock:
+        if _credentials is None:
+            _credentials = _load_user_credentials()
+
+        if _credentials_need_refresh(_credentials):
+            if _auth_request is None:
+                from google.auth.transport.requests import Request
+                _auth_request = Request()
+            with tracing.span('token_refresh'):
+                _credentials.refresh(_auth_request)
+            logger.info(f"Refreshed OAuth access token (expires {_credentials.expiry.isoformat()}Z)")
+
+        return _credentials
+
+
+def _get_service(api: str, version: str):
+    """
+    Get the calling thread's cached discovery client, building it on first use.
+
+    googleapiclient clients are not thread-safe, so each thread (request
+    threads and the batch I/O threads) has its own and must not pass it to
+    another. Clients are built from the discovery documents bundled with
+    google-api-python-client (static_discovery), never fetched over HTTP.
+    Requests go over the shared keep-alive connection pool (http_pool.py),
+    so every thread's client reuses the same connections.
+    """
+    from googleapiclient.discovery import build
+
+    credentials = get_user_credentials()
+    key = (api, version, threading.get_ident())
+
+    with _client_lock:
+        service = _services.get(key)
+        if service is None:
+            with tracing.span('client', api=api):
+                service = build(api, version, http=http_pool.authorized(credentials),
+                                cache_discovery=False, static_discovery=True)
+            _services[key] = service
+            logger.info(f"Built {api} {version} client")
+        return service
+
+
 def get_drive_service():
     """Get authenticated Google Drive service using user OAuth credentials."""
-    credentials = get_user_credentials()
-    return build('drive', 'v3', credentials=credentials)
+    return _get_service('drive', 'v3')
+
+
+def reset_google_clients():
+    """Drop cached credentials and API clients so the next call rebuilds them."""
+    global _credentials
+
+    with _client_lock:
+        _credentials = None
+        _services.clear()
+
+
+def is_auth_error(error: Exception) -> bool:
+    """Check whether an exception means the cached credentials are no longer usable."""
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, RefreshError):
+        return True
+    return isinstance(error, HttpError) and error.resp.status == 401
 
 
-def process_image(image_bytes: bytes, filename: str) -> tuple[bytes, str]:
+class PhotoRejected(ValueError):
+    """
+    A photo process_image() won't decode: not an image, or too many pixels.
+
+    Raised with (reason, message); reason is 'not_an_image',
+    'bad_dimensions' or 'over_pixel_budget'.
+    """
+
+    @property
+    def reason(self) -> str:
+        return self.args[0]
+
+
+class ImageProbe(NamedTuple):
+    """What a photo's header says, and how process_image() decodes it (see probe_image)."""
+    format: Optional[str]         # Pillow format name (also without a HEIF decoder), None if unknown
+    width: int
+    height: int
+    mode: Optional[str]
+    orientation: int              # EXIF orientation, 1 when there is none
+    icc_profile: Optional[bytes]
+    scale: int                    # Decoded at 1/scale (JPEG reduced-scale decoding)
+    strategy: str                 # 'decode', 'passthrough' (no decoder, upload as is) or 'reject'
+    reason: str = ''              # Why it is passed through, rejected or decoded below MAX_DIMENSION
+
+
+def register_heif_decoder() -> bool:
+    """
+    Register pillow-heif's HEIF and AVIF openers with Pillow, on first use.
+
+    pillow-heif is imported only once a HEIF photo turns up, so instances
+    that only see JPEGs don't load libheif. The openers decode with
+    HEIF_DECODE_THREADS threads and skip the embedded thumbnails and depth
+    maps, which process_image never uses.
+
+    Returns:
+        False if pillow-heif isn't installed (HEIF photos are then uploaded as is)
+    """
+    global _heif_registered
+
+    with _heif_lock:
+        if _heif_registered is None:
+            try:
+                import pillow_heif
+            except ImportError:
+                logger.warning("pillow-heif not installed, HEIF photos are uploaded as is")
+                _heif_registered = False
+            else:
+                options = dict(decode_threads=HEIF_DECODE_THREADS, thumbnails=False, depth_images=False)
+                pillow_heif.register_heif_opener(**options)
+                pillow_heif.register_avif_opener(**options)
+                _heif_registered = True
+        return _heif_registered
+
+
+def draft_scale(width: int, height: int, max_dimension: int) -> int:
+    """
+    Reduced-scale decoding factor for a JPEG resized to max_dimension.
+
+    libjpeg decodes at 1/2, 1/4 or 1/8 scale straight from the DCT
+    coefficients, which skips most of the decoding work and never holds the
+    full-size pixels (a 60 MP photo is 180 MB decoded). This is the smallest
+    scale that keeps the image at least as large as its final size, so the
+    LANCZOS resample that follows still sets the final pixels.
+
+    Returns:
+        Scale denominator (1: full size)
+    """
+    scale = 1
+    while scale < 8 and max(width, height) // (scale * 2) >= max_dimension:
+        scale *= 2
+    return scale
+
+
+def draft_image(image: 'Image.Image', scale: int) -> int:
+    """
+    Have the JPEG decoder scale an opened image down by `scale` while decoding.
+
+    Does nothing for other formats or once the image is loaded.
+
+    Args:
+        image: Image from Image.open(), not yet loaded
+        scale: 2, 4 or 8, from draft_scale() or probe_image()
+
+    Returns:
+        Scale denominator the image will be decoded at (1: full size)
+    """
+    if image.format != 'JPEG' or scale <= 1:
+        return 1
+
+    width, height = image.size
+    # draft() picks the largest reduction that leaves the image at least this size
+    if image.draft(image.mode, (max(width // scale, 1), max(height // scale, 1))) is None:
+        return 1
+    return round(width / image.width)
+
+
+def exif_orientation(exif_data: Optional[bytes]) -> int:
+    """EXIF orientation (1-8) from a raw EXIF block, 1 if missing or unreadable."""
+    if not exif_data:
+        return 1
+    from PIL import ExifTags, Image
+
+    try:
+        exif = Image.Exif()
+        exif.load(exif_data)
+        orientation = exif.get(ExifTags.Base.Orientation, 1)
+    except Exception:
+        # A damaged EXIF block only costs the orientation
+        return 1
+    return orientation if orientation in range(1, 9) else 1
+
+
+def probe_image(image_file: BinaryIO) -> tuple[Optional['Image.Image'], ImageProbe]:
+    """
+    Read a photo's header and decide how to decode it, before any pixel data.
+
+    Image.open() parses the header only: format, dimensions, mode and the
+    metadata stored ahead of the pixels (JPEG APP segments, PNG chunks
+    before IDAT). That is enough to check the pixel count against
+    MAX_DECODE_MEGAPIXELS, the memory the decode will take, whatever the
+    file size says: a 200 KB PNG can declare 30000x30000 pixels (2.7 GB
+    decoded). A JPEG over budget is decoded at a smaller DCT scale if one
+    fits; anything else over budget is rejected. A file Pillow can't
+    identify is rejected too, unless it is a HEIF container: that registers
+    the HEIF decoder and is opened again (without pillow-heif it is passed
+    through as uploaded). The HEIF opener reads the whole container, but
+    decodes nothing until the image is loaded.
+
+    Args:
+        image_file: Seekable binary file with the original photo
+
+    Returns:
+        Tuple of (image opened for decoding, not yet loaded, or None unless
+        the strategy is 'decode'; the probe)
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    # Pillow's own decompression bomb check refuses photos that reduced-scale
+    # decoding fits in the budget; the budget below applies instead
+    Image.MAX_IMAGE_PIXELS = None
+
+    image_file.seek(0)
+    try:
+        image = Image.open(image_file)
+    except UnidentifiedImageError:
+        image_file.seek(0)
+        head = image_file.read(12)
+        image_file.seek(0)
+        if head[4:8] != b'ftyp' or head[8:12] not in HEIF_BRANDS:
+            return None, ImageProbe(None, 0, 0, None, 1, None, 1, 'reject', 'not_an_image')
+        if not register_heif_decoder():
+            return None, ImageProbe('HEIF', 0, 0, None, 1, None, 1, 'passthrough', 'no_decoder')
+        # Not the pixels yet: the HEIF opener parses the container only
+        image = Image.open(image_file)
+
+    width, height = image.size
+    # Only EXIF already read with the header: PNG's eXIf chunk may follow the pixels
+    probe = ImageProbe(image.format, width, height, image.mode, exif_orientation(image.info.get('exif')),
+                       image.info.get('icc_profile'), 1, 'decode')
+    if width < 1 or height < 1:
+        return None, probe._replace(strategy='reject', reason='bad_dimensions')
+
+    budget = MAX_DECODE_MEGAPIXELS * 1_000_000
+    scale = draft_scale(width, height, MAX_DIMENSION) if image.format == 'JPEG' else 1
+    reason = ''
+    while image.format == 'JPEG' and scale < 8 and math.ceil(width / scale) * math.ceil(height / scale) > budget:
+        # Smaller than MAX_DIMENSION, but a photo rather than a rejection
+        scale *= 2
+        reason = 'over_pixel_budget'
+    if math.ceil(width / scale) * math.ceil(height / scale) > budget:
+        return None, probe._replace(scale=scale, strategy='reject', reason='over_pixel_budget')
+    return image, probe._replace(scale=scale, reason=reason)
+
+
+def encode_jpeg(image: 'Image.Image', quality: int, icc_profile: Optional[bytes] = None) -> io.BytesIO:
+    """Encode an image as JPEG (no EXIF) into a file positioned at the start."""
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=quality, optimize=True, icc_profile=icc_profile)
+    output.seek(0)
+    return output
+
+
+def original_photo(image_file: BinaryIO, filename: str) -> tuple[BinaryIO, str, Dict[str, BinaryIO]]:
+    """process_image() result for a photo uploaded as is: image_file rewound, no renditions."""
+    image_file.seek(0)
+    extension = os.path.splitext(filename)[1].lower()
+    return image_file, ORIGINAL_MIME_TYPES.get(extension, 'image/jpeg'), {}
+
+
+def processed_filename(filename: str, mime_type: str) -> str:
+    """Drive file name for a photo: a processed one (JPEG) gets a .jpg extension."""
+    if mime_type != 'image/jpeg' or filename.lower().endswith(('.jpg', '.jpeg')):
+        return filename
+    return filename.rsplit('.', 1)[0] + '.jpg'
+
+
+def process_image(image_file: BinaryIO, filename: str,
+                  renditions: Sequence[Rendition] = ()) -> tuple[BinaryIO, str, Dict[str, BinaryIO]]:
     """
     Process image: normalize format, resize if needed, strip EXIF.
+
+    The header is probed first (probe_image), which picks the decode scale
+    and turns away photos over the pixel budget without decoding them. The
+    photo is then decoded once, turned upright per its EXIF orientation and
+    keeps its ICC profile. Each rendition is resized from the next larger
+    output (the full-size image first), so it costs a resize and an encode
+    but no second decode.
     
     Args:
-        image_bytes: Original image bytes
+        image_file: Seekable binary file with the original image
         filename: Original filename
+        renditions: Smaller renditions to produce as well (RENDITIONS)
         
     Returns:
-        Tuple of (processed_bytes, mime_type)
+        Tuple of (seekable file positioned at the start of the processed
+        image, mime_type, {rendition name: JPEG file}). The renditions
+        include FULL_RENDITION, the processed image itself. If processing
+        fails, image_file itself is returned rewound with no renditions, so
+        the original is uploaded without being copied.
+
+    Raises:
+        PhotoRejected: If the file is not an image or is over the pixel budget
     """
+    from PIL import Image
+
     try:
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert HEIC or other formats to JPEG
-        if image.format in ['HEIC', 'HEIF']:
+        with tracing.span('probe') as span:
+            image, probe = probe_image(image_file)
+            span.update(format=probe.format, pixels=probe.width * probe.height, strategy=probe.strategy)
+
+        if probe.strategy == 'reject':
+            raise PhotoRejected(probe.reason, f"{probe.format or 'Unknown'} file {filename}: "
+                                f"{probe.width}x{probe.height} px, budget {MAX_DECODE_MEGAPIXELS:g} MP")
+        if probe.strategy == 'passthrough':
+            logger.info(f"No {probe.format} decoder, using original: {filename}")
+            return original_photo(image_file, filename)
+
+        # Convert HEIC or other formats to JPEG (libheif has already applied the orientation)
+        if image.format in ('HEIF', 'AVIF'):
             logger.info(f"Converting {image.format} to JPEG")
-            filename = filename.rsplit('.', 1)[0] + '.jpg'
         
-        # Resize if too large
+        # Resize if too large, decoding JPEGs at reduced scale where possible
         if max(image.size) > MAX_DIMENSION:
-            logger.info(f"Resizing image from {image.size}")
-            image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+            with tracing.span('decode', pixels=image.width * image.height) as span:
+                original_size = image.size
+                span['scale'] = draft_image(image, probe.scale)
+                if probe.reason:
+                    logger.warning(f"Decoding at 1/{span['scale']} to stay within {MAX_DECODE_MEGAPIXELS:g} MP, "
+                                   f"below {MAX_DIMENSION} px: {filename}")
+                logger.info(f"Resizing image from {original_size} (decoded at 1/{span['scale']})")
+                image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+
+        # EXIF isn't kept, so apply its orientation to the (resized) pixels
+        if probe.orientation in ORIENTATION_TRANSPOSE:
+            image = image.transpose(Image.Transpose[ORIENTATION_TRANSPOSE[probe.orientation]])
         
         # Convert to RGB if necessary (for JPEG)
         if image.mode in ('RGBA', 'LA', 'P'):
@@ -118,106 +605,246 @@ def process_image(image_bytes: bytes, filename: str) -> tuple[bytes, str]:
                 image = image.convert('RGBA')
             background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
             image = background
+
+        # A grayscale profile doesn't describe LA flattened to RGB
+        icc_profile = probe.icc_profile if probe.mode != 'LA' else None
         
         # Save as JPEG with no EXIF
-        output = io.BytesIO()
-        image.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
-        processed_bytes = output.getvalue()
-        
-        logger.info(f"Processed image: {len(image_bytes)} -> {len(processed_bytes)} bytes")
-        return processed_bytes, 'image/jpeg'
-        
+        output = encode_jpeg(image, JPEG_QUALITY, icc_profile)
+        logger.info(f"Processed image: {image_file.seek(0, io.SEEK_END)} -> {output.getbuffer().nbytes} bytes")
+
+        rendered = {FULL_RENDITION: output}
+        if renditions:
+            with tracing.span('render', renditions=len(renditions)):
+                # Largest first; thumbnail() resizes in place and never enlarges. A
+                # reducing gap of 1 box-reduces by whole factors before LANCZOS,
+                # twice as fast and 45+ dB from LANCZOS alone, plenty for screens.
+                for rendition in sorted(renditions, key=lambda r: -r.max_dimension):
+                    image.thumbnail((rendition.max_dimension, rendition.max_dimension), Image.Resampling.LANCZOS,
+                                    reducing_gap=1.0)
+                    rendered[rendition.name] = encode_jpeg(image, rendition.quality, icc_profile)
+        return output, 'image/jpeg', rendered
+
+    except PhotoRejected:
+        raise
     except Exception as e:
         logger.warning(f"Error processing image, using original: {e}")
         # Return original if processing fails
-        mime_type = 'image/jpeg'
-        if filename.lower().endswith('.png'):
-            mime_type = 'image/png'
-        elif filename.lower().endswith('.gif'):
-            mime_type = 'image/gif'
-        return image_bytes, mime_type
+        return original_photo(image_file, filename)
+
+
+def render_photo(data: bytes, filename: str, renditions: Sequence[Rendition]) -> tuple:
+    """
+    process_image() in a batch worker process, with bytes in and out.
+
+    Returns:
+        Tuple of (processed image bytes, mime_type, {rendition name: JPEG
+        bytes}, CPU seconds)
+
+    Raises:
+        PhotoRejected: As process_image does (it pickles, reason and all)
+    """
+    started = time.process_time()
+    processed, mime_type, rendered = process_image(io.BytesIO(data), filename, renditions)
+    return (processed.getvalue(), mime_type, {name: f.getvalue() for name, f in rendered.items()},
+            time.process_time() - started)
+
+
+def _worker_ready(_) -> int:
+    # Load Pillow while the worker starts rather than with its first photo
+    importlib.import_module('PIL.Image')
+    return os.getpid()
+
+
+def get_photo_pool() -> ProcessPoolExecutor:
+    """
+    Get the instance-wide pool of PHOTO_WORKERS photo worker processes.
+
+    Workers are started by a forkserver, not forked from this process: by
+    the time a batch runs, the Secret Manager client's gRPC threads are
+    live here, and gRPC does not survive fork. The forkserver is a fresh
+    interpreter that has imported this module (no clients), so a worker,
+    including a replacement after reset_photo_pool(), starts in
+    milliseconds. Every worker is started as soon as the pool is created.
+    """
+    global _photo_pool
+
+    with _init_lock:
+        if _photo_pool is None:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload([__name__])
+            _photo_pool = ProcessPoolExecutor(max_workers=PHOTO_WORKERS, mp_context=context)
+            with tracing.span('workers', count=PHOTO_WORKERS):
+                list(_photo_pool.map(_worker_ready, range(PHOTO_WORKERS)))
+        return _photo_pool
+
+
+def reset_photo_pool():
+    """Drop a broken worker pool (e.g. a worker killed for memory); the next batch starts a new one."""
+    global _photo_pool
+
+    with _init_lock:
+        if _photo_pool is not None:
+            _photo_pool.shutdown(wait=False, cancel_futures=True)
+        _photo_pool = None
+
+
+def rendition_path(file_path: str, rendition: str) -> str:
+    """
+    Object name of a photo's rendition in RENDITIONS_BUCKET.
+
+    The original's object name with the photos/ segment replaced by the
+    rendition name and the extension by .jpg, so clients derive it from the
+    path they uploaded to:
+
+        submissions/2025/<submission_id>/photos/IMG_0412.HEIC
+        -> submissions/2025/<submission_id>/preview/IMG_0412.jpg
+
+    Listing submissions/<year>/<submission_id>/thumb/ gives a project's
+    gallery.
+    """
+    parts = file_path.split('/')
+    parts[3] = rendition
+    parts[4] = parts[4].rsplit('.', 1)[0] + '.jpg'
+    return '/'.join(parts)
 
 
-def find_folder_by_name(service, parent_id: str, folder_name: str) -> Optional[str]:
+def upload_renditions(file_path: str, renditions: Dict[str, BinaryIO]) -> Dict[str, str]:
     """
-    Find a folder by name in a parent folder.
+    Write a photo's renditions to RENDITIONS_BUCKET, replacing earlier ones.
 
     Args:
-        service: Authenticated Drive service
-        parent_id: Parent folder ID
-        folder_name: Name to search for
+        file_path: Object name of the original photo
+        renditions: JPEG files by rendition name, from process_image()
 
     Returns:
-        Folder ID if found, None otherwise
+        Object names by rendition name
     """
-    query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
+    bucket = get_storage_client().bucket(RENDITIONS_BUCKET)
+    names = {}
+    for name, data in renditions.items():
+        blob = bucket.blob(rendition_path(file_path, name))
+        blob.cache_control = 'private, max-age=86400'
+        blob.upload_from_string(data.getvalue(), content_type='image/jpeg')
+        names[name] = blob.name
+    return names
 
-    results = service.files().list(
-        q=query,
-        spaces='drive',
-        fields='files(id, name)',
-        supportsAllDrives=True,
-        includeItemsFromAllDrives=True
-    ).execute()
 
-    files = results.get('files', [])
-    if files:
-        return files[0]['id']
-    return None
+def get_folder_resolver() -> FolderResolver:
+    """Get the instance-wide Drive folder resolver (persisted tier when STATE_BUCKET is set)."""
+    global _folder_resolver
 
+    if _folder_resolver is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET) if STATE_BUCKET else None
+        with _init_lock:
+            if _folder_resolver is None:
+                _folder_resolver = FolderResolver(state_bucket)
+    return _folder_resolver
 
-def get_project_folder(service, root_id: str, year: str, 
-                       submission_id: str) -> Optional[str]:
+
+def get_project_folder(service, submission_id: str, wait_seconds: float = 0) -> Optional[str]:
     """
-    Navigate the folder structure to find the project folder.
-    Structure: Root > Year > Project
-    
+    Find the project folder the PDF processor created for a submission.
+
+    pdf-processor stamps each project folder with the submission ID in its
+    appProperties, so this is one indexed lookup - served from the folder
+    cache after the first photo - however many projects the year holds.
+
+    Photos, and the completion marker, can arrive before the PDF processor
+    has created the folder, so a folder not found is looked up again with
+    backoff (2 s doubling up to 30 s) for up to wait_seconds.
+
     Args:
         service: Authenticated Drive service
-        root_id: Root folder ID
-        year: Year (YYYY)
-        submission_id: Submission ID to identify project
-        
+        submission_id: Submission ID from the object path
+        wait_seconds: How long to keep looking for a folder not created yet
+
     Returns:
         Project folder ID if found, None otherwise
     """
-    # Find year folder
-    year_folder_id = find_folder_by_name(service, root_id, year)
-    if not year_folder_id:
-        logger.warning(f"Year folder not found: {year}")
-        return None
-    
-    # Find project folder - it should be created by PDF processor
-    # We'll search for folders in this year and look for metadata matching submission_id
-    query = f"mimeType='application/vnd.google-apps.folder' and '{year_folder_id}' in parents and trashed=false"
-
-    results = service.files().list(
-        q=query,
-        spaces='drive',
-        fields='files(id, name, description)',
-        supportsAllDrives=True,
-        includeItemsFromAllDrives=True
-    ).execute()
-
-    folders = results.get('files', [])
-    
-    # For now, return the first folder (assumes PDF created it)
-    # In production, you might add description/properties to match submission_id
-    if folders:
-        return folders[0]['id']
-    
-    logger.warning(f"Project folder not found for submission: {submission_id}")
-    return None
+    resolver = get_folder_resolver()
+    folder_id = resolver.find_project(service, submission_id)
+    deadline = time.monotonic() + wait_seconds
+    delay = 2
+    while not folder_id and time.monotonic() < deadline:
+        pause = min(delay, deadline - time.monotonic())
+        logger.info(f"Project folder not created yet, looking again in {pause:.0f}s: {submission_id}")
+        time.sleep(pause)
+        delay = min(delay * 2, 30)
+        folder_id = resolver.find_project(service, submission_id, fresh=True)
+    if not folder_id:
+        logger.warning(f"Project folder not found for submission: {submission_id}")
+    return folder_id
+
+
+def get_photos_folder(service, submission_id: str) -> str:
+    """
+    Find the Photos folder in a submission's project folder, creating it if needed.
+
+    Raises:
+        ValueError: If the project folder still doesn't exist after
+            PROJECT_FOLDER_WAIT_SECONDS (the PDF processor failed or is
+            far behind)
+    """
+    with tracing.span('folder', folder='project'):
+        project_folder_id = get_project_folder(service, submission_id, PROJECT_FOLDER_WAIT_SECONDS)
+
+    if not project_folder_id:
+        logger.error(f"Could not find project folder for submission: {submission_id}")
+        raise ValueError(f"Project folder not found after {PROJECT_FOLDER_WAIT_SECONDS:g}s")
+
+    # Find or create Photos subfolder (single-flight, so parallel photos share one folder)
+    with tracing.span('folder', folder='Photos'):
+        return get_folder_resolver().find_or_create(service, project_folder_id, "Photos")
+
+
+def store_photo(service, submission_id: str, photos_folder_id: str, file_path: str, filename: str,
+                entry: LedgerEntry, processed_file: BinaryIO, mime_type: str,
+                renditions: Dict[str, BinaryIO]) -> str:
+    """
+    Write a processed photo's renditions and upload it to the Photos folder.
+
+    Each step is recorded in the photo's ledger entry once done, so a retry
+    only repeats what didn't finish. If the Photos folder (or the project
+    folder above it) was deleted in Drive, it is resolved again and the
+    upload repeated.
+
+    Returns:
+        Drive file ID of the uploaded photo
+    """
+    if RENDITIONS_BUCKET and renditions and not entry.done('renditions'):
+        with tracing.span('renditions', count=len(renditions)):
+            objects = upload_renditions(file_path, renditions)
+        entry.finish('renditions', objects=objects)
 
+    # A folder deleted in Drive is forgotten when it 404s, one level per attempt
+    for attempt in range(3):
+        try:
+            with tracing.span('upload'):
+                processed_file.seek(0)
+                file_id = upload_photo_to_drive(service, processed_file, processed_filename(filename, mime_type),
+                                                photos_folder_id, mime_type)
+            break
+        except Exception as e:
+            if attempt == 2 or not FolderResolver.is_missing(e):
+                raise
+            logger.warning(f"Drive folder missing, resolving Photos folder again: {e}")
+            photos_folder_id = get_photos_folder(service, submission_id)
+    entry.finish('upload', folder_id=photos_folder_id, file_id=file_id)
+    return file_id
 
-def upload_photo_to_drive(service, photo_bytes: bytes, filename: str, 
+
+def upload_photo_to_drive(service, photo_data: Union[bytes, BinaryIO], filename: str, 
                          folder_id: str, mime_type: str = 'image/jpeg') -> str:
     """
     Upload a photo to Google Drive.
+
+    The upload is resumable and sent in STREAM_CHUNK_SIZE_MB chunks, so a
+    streamed source is never held in memory as a whole.
     
     Args:
         service: Authenticated Drive service
-        photo_bytes: Photo content as bytes
+        photo_data: Photo content as bytes or a seekable binary file
         filename: Name for the file
         folder_id: Parent folder ID
         mime_type: MIME type of photo
@@ -230,33 +857,237 @@ def upload_photo_to_drive(service, photo_bytes: bytes, filename: str,
         'parents': [folder_id]
     }
     
+    if isinstance(photo_data, (bytes, bytearray)):
+        photo_data = io.BytesIO(photo_data)
+
+    from googleapiclient.http import MediaIoBaseUpload
+
     media = MediaIoBaseUpload(
-        io.BytesIO(photo_bytes),
+        photo_data,
         mimetype=mime_type,
+        chunksize=STREAM_CHUNK_SIZE_MB * 1024 * 1024,
         resumable=True
     )
     
-    file = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id,webViewLink',
-        supportsAllDrives=True
-    ).execute()
+    # A retried resumable upload continues its session, so it cannot create two files
+    try:
+        file = google_api.execute('drive', service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id,webViewLink',
+            supportsAllDrives=True
+        ))
+    except Exception as e:
+        if FolderResolver.is_missing(e):
+            # The folder was deleted in Drive: stop serving its cached ID
+            get_folder_resolver().forget(folder_id)
+        raise
 
     logger.info(f"Uploaded photo: {filename} (ID: {file.get('id')})")
     return file.get('id')
 
 
+def open_blob_reader(blob) -> BinaryIO:
+    """
+    Open a GCS object as a seekable binary file with bounded memory.
+
+    Objects up to STREAM_THRESHOLD_MB are downloaded in one request. Larger
+    objects are read lazily in STREAM_CHUNK_SIZE_MB ranges, so only the part
+    currently being decoded or uploaded is held in memory.
+
+    Args:
+        blob: Reloaded GCS blob (size and generation known, so every read
+            sees the same object version)
+    """
+    if blob.size <= STREAM_THRESHOLD_MB * 1024 * 1024:
+        return io.BytesIO(blob.download_as_bytes())
+    return blob.open('rb', chunk_size=STREAM_CHUNK_SIZE_MB * 1024 * 1024)
+
+
+def open_ledger_entry(bucket_name: str, file_path: str, generation: int,
+                      sha256: Optional[str] = None) -> LedgerEntry:
+    """
+    Load the processing ledger entry for a submitted object.
+
+    Without a state bucket the entry only lives for this invocation, so
+    every delivery is processed from scratch as before.
+    """
+    global _ledger
+
+    if not STATE_BUCKET:
+        return LedgerEntry()
+    if _ledger is None:
+        state_bucket = get_storage_client().bucket(STATE_BUCKET)
+        with _init_lock:
+            if _ledger is None:
+                _ledger = SubmissionLedger(state_bucket)
+    return _ledger.open(bucket_name, file_path, generation, sha256)
+
+
+def process_submission_photos(bucket_name: str, year: str, submission_id: str) -> dict:
+    """
+    Process every photo of a submission in one invocation (batch mode).
+
+    Run when the submission's completion marker arrives. The photos/ prefix
+    is listed once, and credentials and the Photos folder are looked up once
+    for all photos. Downloads and uploads run PHOTO_IO_THREADS at a time;
+    decoding and encoding run in PHOTO_WORKERS processes, so every core
+    works on a photo. A photo is handed to the workers as soon as it is
+    downloaded, and uploaded as soon as it is processed.
+
+    Each photo keeps its own ledger entry, exactly as in process_photo, so a
+    redelivered marker only processes the photos that didn't finish; finished
+    ones are recognized by name and generation without downloading them. Photos
+    process_image rejects are reported in the summary, not retried.
+
+    Args:
+        bucket_name: Submissions bucket
+        year: Year (YYYY) from the marker's path
+        submission_id: Submission ID from the marker's path
+
+    Returns:
+        Summary of the batch
+
+    Raises:
+        ValueError: If the project folder doesn't exist after PROJECT_FOLDER_WAIT_SECONDS
+        RuntimeError: If any photo failed, after the others are done
+    """
+    prefix = f"submissions/{year}/{submission_id}/photos/"
+    tracing.annotate(submission_id=submission_id, object=prefix)
+
+    with tracing.span('list') as span:
+        blobs = [blob for blob in get_storage_client().bucket(bucket_name).list_blobs(prefix=prefix)
+                 if blob.name[len(prefix):] and '/' not in blob.name[len(prefix):]]
+        span['photos'] = len(blobs)
+    logger.info(f"Batch of {len(blobs)} photo(s) for submission: {submission_id}")
+
+    errors = {}
+    for blob in blobs:
+        if blob.size > MAX_PHOTO_SIZE_MB * 1024 * 1024:
+            logger.error(f"Photo too large: {blob.name} ({blob.size} bytes)")
+            errors[blob.name] = ValueError(f"Photo exceeds maximum size of {MAX_PHOTO_SIZE_MB}MB")
+    blobs = [blob for blob in blobs if blob.name not in errors]
+
+    if not blobs:
+        return {'status': 'skipped', 'reason': 'no_photos', 'submission_id': submission_id}
+
+    drive_service = get_drive_service()
+    photos_folder_id = get_photos_folder(drive_service, submission_id)
+    pool = get_photo_pool()
+    renditions = RENDITIONS if RENDITIONS_BUCKET else ()
+
+    def fetch(blob):
+        # The ledger is checked by name and generation first, so finished photos aren't downloaded
+        with tracing.span('ledger'):
+            entry = open_ledger_entry(bucket_name, blob.name, blob.generation)
+        if entry.done('upload'):
+            return None, entry, None
+        with tracing.span('download', bytes=blob.size):
+            data = blob.download_as_bytes()
+        return data, entry, hashlib.sha256(data).hexdigest()
+
+    def store(blob, entry, sha256, result):
+        processed, mime_type, rendered, cpu_seconds = result
+        tracing.count(transform_cpu_ms=round(cpu_seconds * 1000))
+        # An I/O thread uses its own Drive client
+        file_id = store_photo(get_drive_service(), submission_id, photos_folder_id, blob.name,
+                              blob.name[len(prefix):], entry, io.BytesIO(processed), mime_type,
+                              {name: io.BytesIO(data) for name, data in rendered.items()})
+        entry.set_sha256(sha256)
+        return file_id
+
+    file_ids = {}
+    skipped = 0
+    fetches = {tracing.submit(_io_executor, fetch, blob): blob for blob in blobs}
+    renders = {}
+    for future in as_completed(fetches):
+        blob = fetches[future]
+        try:
+            data, entry, sha256 = future.result()
+        except Exception as e:
+            errors[blob.name] = e
+            continue
+        if entry.done('upload'):
+            logger.info(f"Already processed (ledger): {blob.name}")
+            file_ids[blob.name] = entry.get('upload')['file_id']
+            skipped += 1
+            continue
+        renders[pool.submit(render_photo, data, blob.name[len(prefix):], renditions)] = (blob, entry, sha256)
+
+    uploads = {}
+    rejected = {}
+    with tracing.span('transform', photos=len(renders), workers=PHOTO_WORKERS):
+        for future in as_completed(renders):
+            blob, entry, sha256 = renders[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                reset_photo_pool()
+                raise
+            except PhotoRejected as e:
+                logger.warning(f"Photo rejected ({e.reason}): {e.args[1]}")
+                rejected[blob.name] = e.reason
+                continue
+            except Exception as e:
+                errors[blob.name] = e
+                continue
+            uploads[tracing.submit(_io_executor, store, blob, entry, sha256, result)] = blob
+
+    for future in as_completed(uploads):
+        blob = uploads[future]
+        try:
+            file_ids[blob.name] = future.result()
+        except Exception as e:
+            errors[blob.name] = e
+
+    for name, error in errors.items():
+        logger.error(f"Error processing photo {name}: {error}")
+    if errors:
+        # Raise for the auth check and retry in process_photo; finished photos are in the ledger
+        auth_error = next((e for e in errors.values() if is_auth_error(e)), None)
+        raise auth_error or RuntimeError(f"{len(errors)} of {len(errors) + len(file_ids)} photo(s) failed")
+
+    logger.info(f"Successfully processed {len(file_ids)} photo(s) for submission: {submission_id}")
+    return {
+        'status': 'success',
+        'submission_id': submission_id,
+        'photos': len(file_ids),
+        'skipped': skipped,
+        'rejected': rejected,
+        'file_ids': file_ids
+    }
+
+
+def get_profile_bucket():
+    """Bucket for invocation profiles (profiles/ in the state bucket), or None."""
+    return get_storage_client().bucket(STATE_BUCKET) if STATE_BUCKET else None
+
+
 @functions_framework.cloud_event
+@tracing.traced('process_photo', profile_rate=PROFILE_INVOCATIONS, profile_bucket=get_profile_bucket)
 def process_photo(cloud_event):
     """
     Cloud Function triggered when a photo is uploaded to GCS.
     
     Workflow:
-    1. Download photo from GCS
-    2. Process/normalize image (resize, convert format, strip EXIF)
-    3. Find corresponding Drive folder (created by PDF processor)
-    4. Upload processed photo to Drive
+    1. Open photo from GCS (large files are streamed, never held in memory whole)
+    2. Probe the header (files that aren't images, or are over the pixel
+       budget, are rejected here), process/normalize image (resize,
+       convert format, strip EXIF) and render the smaller RENDITIONS from
+       the same decode
+    3. Write the renditions to RENDITIONS_BUCKET (see rendition_path)
+    4. Find corresponding Drive folder (created by PDF processor)
+    5. Upload processed photo to Drive
+
+    The upload is recorded in the processing ledger, so a retried or
+    duplicate event doesn't put a second copy of the photo in Drive.
+
+    With PHOTO_BATCH set, photo events are skipped and the submission's
+    completion marker processes all its photos at once instead (see
+    process_submission_photos).
+
+    Every stage is timed as a JSON span tagged with the submission ID (see
+    tracing.py); set PROFILE_INVOCATIONS to profile a share of invocations.
     """
     try:
         # Extract event data
@@ -268,6 +1099,12 @@ def process_photo(cloud_event):
 
         # Parse submission ID from path: submissions/YYYY/submission_id/photos/filename.jpg
         path_parts = file_path.split('/')
+        if len(path_parts) == 4 and path_parts[3] == COMPLETION_MARKER:
+            if not PHOTO_BATCH:
+                logger.info(f"Batch mode off, photos were processed as they arrived: {file_path}")
+                return {'status': 'skipped', 'reason': 'batch_mode_off'}
+            return process_submission_photos(bucket_name, path_parts[1], path_parts[2])
+
         if len(path_parts) < 5:
             logger.error(f"Invalid path structure: {file_path}")
             return
@@ -277,88 +1114,84 @@ def process_photo(cloud_event):
             logger.info(f"Skipping non-photo path: {file_path}")
             return
 
-        year = path_parts[1]
+        if PHOTO_BATCH:
+            logger.info(f"Batch mode: processed with the rest of its submission: {file_path}")
+            return {'status': 'skipped', 'reason': 'batched'}
+
         submission_id = path_parts[2]
         filename = path_parts[4]
+        tracing.annotate(submission_id=submission_id, object=file_path)
         
         # Download photo
-        bucket = storage_client.bucket(bucket_name)
+        bucket = get_storage_client().bucket(bucket_name)
         blob = bucket.blob(file_path)
 
         # Check if blob exists (handle deleted files)
-        if not blob.exists():
+        with tracing.span('exists'):
+            exists = blob.exists()
+        if not exists:
             logger.warning(f"File not found (may have been deleted): {file_path}")
             return {'status': 'skipped', 'reason': 'file_not_found'}
 
         # Reload blob to get metadata including size
-        blob.reload()
+        with tracing.span('reload'):
+            blob.reload()
 
         # Check file size
         if blob.size > MAX_PHOTO_SIZE_MB * 1024 * 1024:
             logger.error(f"Photo too large: {blob.size} bytes")
             raise ValueError(f"Photo exceeds maximum size of {MAX_PHOTO_SIZE_MB}MB")
         
-        photo_bytes = blob.download_as_bytes()
-        logger.info(f"Downloaded photo: {len(photo_bytes)} bytes")
+        with tracing.span('download', bytes=blob.size) as span:
+            photo_file = open_blob_reader(blob)
+            span['streamed'] = not isinstance(photo_file, io.BytesIO)
+        logger.info(f"Opened photo: {blob.size} bytes")
+
+        sha256 = None
+        if isinstance(photo_file, io.BytesIO):
+            sha256 = hashlib.sha256(photo_file.getbuffer()).hexdigest()
+        with tracing.span('ledger'):
+            entry = open_ledger_entry(bucket_name, file_path, blob.generation, sha256)
+
+        if entry.done('upload'):
+            logger.info(f"Already processed (ledger): {file_path}")
+            return {
+                'status': 'skipped',
+                'reason': 'already_processed',
+                'submission_id': submission_id,
+                'file_id': entry.get('upload')['file_id']
+            }
         
         # Process image
-        processed_bytes, mime_type = process_image(photo_bytes, filename)
-        
-        # Get Drive root folder ID
-        drive_root_id = get_secret(DRIVE_FOLDER_SECRET)
-        
-        # Initialize Drive service
+        try:
+            with tracing.span('transform'):
+                processed_file, mime_type, renditions = process_image(
+                    photo_file, filename, RENDITIONS if RENDITIONS_BUCKET else ())
+        except PhotoRejected as e:
+            # Retrying can't change the file, so the event is done
+            logger.warning(f"Photo rejected ({e.reason}): {e.args[1]}")
+            return {'status': 'rejected', 'reason': e.reason, 'submission_id': submission_id}
+
         drive_service = get_drive_service()
-        
-        # Find project folder
-        project_folder_id = get_project_folder(
-            drive_service,
-            drive_root_id,
-            year,
-            submission_id
-        )
-        
-        if not project_folder_id:
-            logger.error(f"Could not find project folder for submission: {submission_id}")
-            # Retry later - PDF processor might not have run yet
-            raise ValueError("Project folder not found - will retry")
-
-        # Find or create Photos subfolder
-        photos_folder_id = find_folder_by_name(drive_service, project_folder_id, "Photos")
-        if not photos_folder_id:
-            # Create Photos folder
-            file_metadata = {
-                'name': 'Photos',
-                'mimeType': 'application/vnd.google-apps.folder',
-                'parents': [project_folder_id]
-            }
-            folder = drive_service.files().create(
-                body=file_metadata,
-                fields='id',
-                supportsAllDrives=True
-            ).execute()
-            photos_folder_id = folder.get('id')
-            logger.info(f"Created Photos folder (ID: {photos_folder_id})")
-
-        # Upload photo to Photos subfolder
-        file_id = upload_photo_to_drive(
-            drive_service,
-            processed_bytes,
-            filename,
-            photos_folder_id,
-            mime_type
-        )
+        photos_folder_id = get_photos_folder(drive_service, submission_id)
+        file_id = store_photo(drive_service, submission_id, photos_folder_id, file_path, filename, entry,
+                              processed_file, mime_type, renditions)
         
         logger.info(f"Successfully processed photo for submission: {submission_id}")
         
         return {
             'status': 'success',
             'submission_id': submission_id,
-            'file_id': file_id
+            'file_id': file_id,
+            'renditions': sorted(renditions) if RENDITIONS_BUCKET else []
         }
         
     except Exception as e:
         logger.error(f"Error processing photo: {e}", exc_info=True)
+        if is_auth_error(e):
+            logger.warning("Authentication failed - discarding cached secrets, credentials and API clients")
+            invalidate_secrets()
+            reset_google_clients()
         # Re-raise to trigger retry
         raise
 
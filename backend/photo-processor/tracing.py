@@ -0,0 +1,257 @@
+"""
+Structured per-stage timing spans and on-demand profiling for the processors.
+
+Each stage of an invocation runs inside span(name). When the stage ends, one
+JSON line is written to stdout:
+
+    {"severity": "INFO", "message": "span parse 41.2ms", "span": "parse",
+     "duration_ms": 41.2, "status": "ok", "function": "process_pdf",
+     "invocation_id": "...", "submission_id": "...", "object": "submissions/..."}
+
+Cloud Logging turns JSON lines into jsonPayload. Stage latency can then be
+filtered by submission ID and charted; terraform/monitoring.tf extracts
+duration_ms into a distribution metric labelled by span. When an invocation
+ends, an "invocation" span is written with the total time of each stage
+and any counters added with count() (e.g. connections opened).
+
+Spans find their invocation through a context variable. Stages handed to a
+thread pool stay attached to the invocation when started with submit(),
+which runs them in a copy of the caller's context. Outside an invocation
+span() records nothing.
+
+Sampled invocations (see traced()) run under cProfile and tracemalloc. The
+results are written to the given bucket:
+
+    profiles/<function>/<UTC time>-<invocation id>.pstats  (pstats.Stats(path))
+    profiles/<function>/<UTC time>-<invocation id>.txt     (top functions, allocations)
+
+cProfile only sees the invoking thread. Work done in pool threads shows up
+as time spent waiting on their futures; their spans still report it.
+
+This file is duplicated in backend/pdf-processor and backend/photo-processor
+because each Cloud Function deploys only its own source directory. Keep the
+two copies identical.
+"""
+import contextvars
+import io
+import json
+import logging
+import marshal
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+logger = logging.getLogger(__name__)
+
+# Span lines go to stdout unformatted so Cloud Logging parses them as JSON
+_span_logger = logging.getLogger(f"{__name__}.spans")
+_span_logger.setLevel(logging.INFO)
+_span_logger.propagate = False
+if not _span_logger.handlers:
+    _span_handler = logging.StreamHandler(sys.stdout)
+    _span_handler.setFormatter(logging.Formatter('%(message)s'))
+    _span_logger.addHandler(_span_handler)
+
+_current = contextvars.ContextVar('tracing_invocation', default=None)
+
+# cProfile allows one active profiler per process
+_profile_lock = threading.Lock()
+
+# Frames kept per tracemalloc allocation traceback
+TRACEMALLOC_FRAMES = 10
+
+
+class Invocation:
+    """Labels and per-stage totals for one function invocation."""
+
+    def __init__(self, function: str):
+        self.function = function
+        self.invocation_id = uuid.uuid4().hex[:16]
+        self.labels = {}
+        self.stages = {}  # span name -> total milliseconds
+        self.counters = {}  # counter name -> total, see count()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration_ms: float, status: str, attrs: dict):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+            labels = dict(self.labels)
+
+        payload = {
+            'severity': 'INFO' if status == 'ok' else 'WARNING',
+            'message': f"span {name} {duration_ms:.1f}ms",
+            'span': name,
+            'duration_ms': round(duration_ms, 1),
+            'status': status,
+            'function': self.function,
+            'invocation_id': self.invocation_id,
+            'thread': threading.current_thread().name,
+        }
+        payload.update(labels)
+        payload.update(attrs)
+        _span_logger.info(json.dumps(payload, default=str))
+
+
+def annotate(**labels):
+    """Add labels (e.g. submission_id) to every later span of the current invocation."""
+    invocation = _current.get()
+    if invocation is not None:
+        with invocation._lock:
+            invocation.labels.update(labels)
+
+
+def count(**counters):
+    """Add to counters (e.g. connections_opened=1) reported on the current invocation's span."""
+    invocation = _current.get()
+    if invocation is not None:
+        with invocation._lock:
+            for name, value in counters.items():
+                invocation.counters[name] = invocation.counters.get(name, 0) + value
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a stage of the current invocation.
+
+    Yields the span's attribute dict, so the stage can add details it only
+    learns while running (e.g. attrs['cached'] = True).
+    """
+    invocation = _current.get()
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield attrs
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        if invocation is not None:
+            invocation.record(name, (time.perf_counter() - started) * 1000, status, attrs)
+
+
+def submit(executor, fn: Callable, *args, **kwargs):
+    """executor.submit() that keeps the task's spans attached to the current invocation."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def traced(function: str, profile_rate: float = 0.0, profile_bucket: Optional[Callable] = None):
+    """
+    Decorate a Cloud Function entry point so its spans share one invocation.
+
+    Args:
+        function: Function name recorded on every span
+        profile_rate: Fraction of invocations to profile (0 disables, 1 profiles all)
+        profile_bucket: Returns the GCS bucket for profiles, or None to skip
+            profiling (called only for sampled invocations)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            invocation = Invocation(function)
+            token = _current.set(invocation)
+            try:
+                bucket = None
+                if profile_rate > 0 and random.random() < profile_rate and profile_bucket is not None:
+                    bucket = profile_bucket()
+                if bucket is not None:
+                    with _profiled(invocation, bucket):
+                        return _run(invocation, fn, args, kwargs)
+                return _run(invocation, fn, args, kwargs)
+            finally:
+                _current.reset(token)
+        return wrapper
+    return decorator
+
+
+def _run(invocation: Invocation, fn: Callable, args, kwargs):
+    with span('invocation') as attrs:
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with invocation._lock:
+                attrs['stages_ms'] = {
+                    name: round(total, 1) for name, total in invocation.stages.items()
+                }
+                if invocation.counters:
+                    attrs['counters'] = dict(invocation.counters)
+
+
+@contextmanager
+def _profiled(invocation: Invocation, bucket):
+    """Run the body under cProfile and tracemalloc and write the results to bucket."""
+    # Imported here: invocations that aren't sampled never load the profilers
+    import cProfile
+    import tracemalloc
+
+    if not _profile_lock.acquire(blocking=False):
+        # Another invocation on this instance is being profiled
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            wall_ms = (time.perf_counter() - started) * 1000
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            try:
+                _write_profile(invocation, bucket, profiler, snapshot, current, peak, wall_ms)
+            except Exception as e:
+                logger.warning(f"Could not write profile for invocation {invocation.invocation_id}: {e}")
+    finally:
+        _profile_lock.release()
+
+
+def _write_profile(invocation: Invocation, bucket, profiler: 'cProfile.Profile',
+                   snapshot, current: int, peak: int, wall_ms: float):
+    import pstats
+
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    name = f"profiles/{invocation.function}/{stamp}-{invocation.invocation_id}"
+
+    profiler.create_stats()
+    bucket.blob(f"{name}.pstats").upload_from_string(
+        marshal.dumps(profiler.stats), content_type='application/octet-stream'
+    )
+
+    report = io.StringIO()
+    report.write(f"function: {invocation.function}\n")
+    report.write(f"invocation_id: {invocation.invocation_id}\n")
+    for key, value in sorted(invocation.labels.items()):
+        report.write(f"{key}: {value}\n")
+    report.write(f"wall_ms: {wall_ms:.1f}\n")
+    report.write(f"traced_memory_peak_bytes: {peak}\n")
+    report.write(f"traced_memory_end_bytes: {current}\n")
+    report.write("stages_ms: " + json.dumps(
+        {stage: round(total, 1) for stage, total in invocation.stages.items()}) + "\n")
+
+    report.write("\n== cProfile: top 40 by cumulative time ==\n")
+    pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(40)
+
+    report.write("\n== tracemalloc: top 25 allocation sites still held ==\n")
+    for stat in snapshot.statistics('lineno')[:25]:
+        report.write(f"{stat}\n")
+
+    bucket.blob(f"{name}.txt").upload_from_string(report.getvalue(), content_type='text/plain')
+    logger.info(f"Wrote profile gs://{bucket.name}/{name}.pstats")
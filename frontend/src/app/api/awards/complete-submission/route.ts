@@ -0,0 +1,67 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { Storage } from '@google-cloud/storage';
+
+// Force this route to be dynamic (not pre-rendered at build time)
+export const dynamic = 'force-dynamic';
+export const runtime = 'nodejs';
+
+const storage = new Storage();
+const bucketName = process.env.NEXT_PUBLIC_GCS_BUCKET!;
+
+// Read by the photo processor, which processes the submission's photos together
+// once this marker exists (batch mode)
+const COMPLETION_MARKER = 'complete.json';
+
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+    const { submissionId, year, photoCount } = body;
+
+    // Validate required fields
+    if (!submissionId || !year) {
+      return NextResponse.json(
+        { error: 'Missing required fields' },
+        { status: 400 }
+      );
+    }
+
+    if (!/^[0-9a-f-]{36}$/i.test(submissionId) || !/^\d{4}$/.test(year)) {
+      return NextResponse.json(
+        { error: 'Invalid submission' },
+        { status: 400 }
+      );
+    }
+
+    const bucket = storage.bucket(bucketName);
+    const file = bucket.file(`submissions/${year}/${submissionId}/${COMPLETION_MARKER}`);
+
+    try {
+      // Written once: a second write would process the photos again
+      await file.save(
+        JSON.stringify({
+          submission_id: submissionId,
+          year,
+          photos: Number(photoCount) || 0,
+          completed_at: new Date().toISOString(),
+        }),
+        {
+          contentType: 'application/json',
+          resumable: false,
+          preconditionOpts: { ifGenerationMatch: 0 },
+        }
+      );
+    } catch (error: any) {
+      if (error.code !== 412) {
+        throw error;
+      }
+    }
+
+    return NextResponse.json({ success: true });
+  } catch (error: any) {
+    console.error('Error completing submission:', error);
+    return NextResponse.json(
+      { error: 'Failed to complete submission' },
+      { status: 500 }
+    );
+  }
+}
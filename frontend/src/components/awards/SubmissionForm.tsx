@@ -59,6 +59,17 @@ export default function SubmissionForm() {
       // Upload photos in parallel (with concurrency limit)
       await uploadPhotosInBatches(photoFiles, submissionId, year, recaptchaToken);
 
+      // Mark the submission complete, so its photos are processed together
+      const completeResponse = await fetch('/api/awards/complete-submission', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ submissionId, year, photoCount: photoFiles.length }),
+      });
+
+      if (!completeResponse.ok) {
+        throw new Error('Failed to complete submission');
+      }
+
       // Finalize submission
       setSubmissionStatus({
         status: 'processing',
@@ -14,9 +14,12 @@ Usage:
     python export-winners-teams.py --year 2025
     python export-winners-teams.py --output-sheet-id SHEET_ID
     python export-winners-teams.py --dry-run  # Preview without writing
+    python export-winners-teams.py --store sqlite:///awards.db
 
 The script will:
-1. Find all winners in the main awards sheet
+1. Find all winners: a year/status query against the submission store
+   (SUBMISSION_STORE or --store), or without one a read of the whole
+   main awards sheet
 2. Extract team member data from their submissions
 3. Create or update a "Project Team YYYY" sheet with formatted data
 4. Include all relevant team members and project details
@@ -31,6 +34,7 @@ import os
 import sys
 import argparse
 import json
+from pathlib import Path
 from typing import List, Dict, Tuple
 from datetime import datetime
 from google.oauth2.credentials import Credentials
@@ -38,9 +42,17 @@ from google.cloud import secretmanager
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend' / 'pdf-processor'))
+
+import google_api  # noqa: E402
+import http_pool  # noqa: E402
+from schema import SHEET, WINNER_TEAM_EXPORT, sheet_row_vector  # noqa: E402
+import submission_store  # noqa: E402
+
 # Configuration
 PROJECT_ID = os.environ.get('GCP_PROJECT_ID', 'your-project-id')
 AWARDS_SHEET_ID = os.environ.get('AWARDS_SHEET_ID', None)
+SUBMISSION_STORE = os.environ.get('SUBMISSION_STORE')
 
 
 def get_secret(secret_id: str) -> str:
@@ -69,7 +81,7 @@ def get_sheets_service():
             quota_project_id=PROJECT_ID
         )
         
-        return build('sheets', 'v4', credentials=credentials)
+        return build('sheets', 'v4', http=http_pool.authorized(credentials))
         
     except Exception as e:
         print(f"✗ Could not authenticate: {e}")
@@ -121,10 +133,10 @@ def get_winners(service, sheet_id: str, year: str = None) -> List[Tuple[str, Lis
     """
     print("📊 Reading submissions from sheet...")
     
-    result = service.spreadsheets().values().get(
+    result = google_api.execute('sheets', service.spreadsheets().values().get(
         spreadsheetId=sheet_id,
         range='Sheet1!A:ZZ'
-    ).execute()
+    ))
     
     data = result.get('values', [])
     
@@ -157,137 +169,61 @@ def get_winners(service, sheet_id: str, year: str = None) -> List[Tuple[str, Lis
     return winners
 
 
-def extract_team_data_from_row(row: List[str], header_row: List[str]) -> Dict[str, str]:
+def get_store_winners(store, year: str = None) -> List[Tuple[str, List[str]]]:
     """
-    Extract team member data from a submission row.
-    
+    Get all winning submissions from the submission store.
+
     Args:
-        row: Row data from the sheet
-        header_row: Header row for column mapping
-    
+        store: Submission store
+        year: Optional year filter (e.g., "2025")
+
     Returns:
-        Dictionary with all team member fields
+        List of tuples: (awards_id, row_data), rows in SHEET column order
     """
-    # Create a map of header -> value
-    row_dict = {}
-    for i, header in enumerate(header_row):
-        if i < len(row):
-            row_dict[header] = row[i]
-        else:
-            row_dict[header] = ''
-    
-    return row_dict
+    print("📊 Reading winners from the submission store...")
+
+    headers = list(SHEET.headers)
+    winners = [
+        (record['awards_id'], submission_store.sheet_row(record, headers))
+        for record in store.list(year=year, status='winner')
+    ]
+
+    print(f"✓ Found {len(winners)} winning submissions")
+    return winners
 
 
-def format_team_row(awards_id: str, row_dict: Dict[str, str]) -> List[str]:
+def format_team_rows(winners: List[Tuple[str, List[str]]], header_row: List[str]) -> List[List[str]]:
     """
-    Format a row for the Project Team sheet.
+    Format rows for the Project Team sheet.
+    
+    Column layout is WINNER_TEAM_EXPORT in backend/pdf-processor/schema.py,
+    shared with the PDF processor so the two can't drift apart.
     
     Args:
-        awards_id: Awards ID
-        row_dict: Dictionary of field_name -> value
+        winners: (awards_id, row_data) tuples from get_winners()
+        header_row: Header row of the main sheet, for column mapping
     
     Returns:
-        List of values in team sheet column order
+        List of rows in team sheet column order
     """
-    return [
-        awards_id,
-        row_dict.get('Official Name', ''),
-        row_dict.get('Location', ''),
-        row_dict.get('Winner_Category', ''),
-        row_dict.get('Project Category or Categories for Consideration', ''),
-        row_dict.get('Cost', ''),
-        row_dict.get('Date Completed', ''),
-        row_dict.get('Square Feet', ''),
-        row_dict.get('LevelsStories 1', ''),
-        row_dict.get('Owner', ''),
-        row_dict.get('Owners RepProject Manager', ''),
-        row_dict.get('Design Team Firm PrincipalinCharge or Proj Mngr', ''),
-        row_dict.get('Architect', ''),
-        row_dict.get('Civil', ''),
-        row_dict.get('Structural', ''),
-        row_dict.get('Electrical', ''),
-        row_dict.get('Mechanical', ''),
-        row_dict.get('Geotech', ''),
-        row_dict.get('Interior Design', ''),
-        row_dict.get('Landscape Architect', ''),
-        row_dict.get('Construction Team Firm Project Manager', ''),
-        row_dict.get('General Contractor', ''),
-        row_dict.get('Plumbing', ''),
-        row_dict.get('HVAC', ''),
-        row_dict.get('Electrical_2', ''),
-        row_dict.get('Concrete', ''),
-        row_dict.get('Steel Fabrication', ''),
-        row_dict.get('Steel Erection', ''),
-        row_dict.get('GlassCurtain Wall', ''),
-        row_dict.get('Masonry', ''),
-        row_dict.get('DrywallAcoustics', ''),
-        row_dict.get('Painting', ''),
-        row_dict.get('TileStone', ''),
-        row_dict.get('Carpentry', ''),
-        row_dict.get('Flooring', ''),
-        row_dict.get('Roofing', ''),
-        row_dict.get('Waterproofing', ''),
-        row_dict.get('Excavation', ''),
-        row_dict.get('Demolition', ''),
-        row_dict.get('Precast', ''),
-        row_dict.get('Landscaping 1', ''),
-        row_dict.get('Name of Firm', ''),
-        row_dict.get('Contact Name', ''),
-        row_dict.get('Email', ''),
-        row_dict.get('Phone 1', ''),
-    ]
+    winner_category = header_row.index('Winner Category') if 'Winner Category' in header_row else None
+    
+    extras = []
+    for awards_id, row in winners:
+        category = ''
+        if winner_category is not None and winner_category < len(row):
+            category = row[winner_category]
+        extras.append({'awards_id': awards_id, 'winner_category': category})
+    
+    return WINNER_TEAM_EXPORT.rows(
+        [sheet_row_vector(row, header_row) for _, row in winners],
+        extras
+    )
 
 
 def create_team_sheet_headers() -> List[str]:
     """Create header row for Project Team sheet."""
-    return [
-        'Awards ID',
-        'Project Name',
-        'Location',
-        'Award Won',
-        'Project Category',
-        'Cost',
-        'Date Completed',
-        'Square Feet',
-        'Levels/Stories',
-        'Owner',
-        "Owner's Rep/PM",
-        'Design Team Firm',
-        'Architect',
-        'Civil Engineer',
-        'Structural Engineer',
-        'Electrical Engineer',
-        'Mechanical Engineer',
-        'Geotech',
-        'Interior Design',
-        'Landscape Architect',
-        'Construction Team Firm',
-        'General Contractor',
-        'Plumbing',
-        'HVAC',
-        'Electrical (Construction)',
-        'Concrete',
-        'Steel Fabrication',
-        'Steel Erection',
-        'Glass/Curtain Wall',
-        'Masonry',
-        'Drywall/Acoustics',
-        'Painting',
-        'Tile/Stone',
-        'Carpentry',
-        'Flooring',
-        'Roofing',
-        'Waterproofing',
-        'Excavation',
-        'Demolition',
-        'Precast',
-        'Landscaping',
-        'Submitter Firm',
-        'Contact Name',
-        'Contact Email',
-        'Contact Phone',
-    ]
+    return list(WINNER_TEAM_EXPORT.headers)
 
 
 def write_team_sheet(service, sheet_id: str, year: str, team_rows: List[List[str]], dry_run: bool = False):
@@ -323,7 +259,7 @@ def write_team_sheet(service, sheet_id: str, year: str, team_rows: List[List[str
     
     try:
         # Check if sheet exists
-        spreadsheet = service.spreadsheets().get(spreadsheetId=sheet_id).execute()
+        spreadsheet = google_api.execute('sheets', service.spreadsheets().get(spreadsheetId=sheet_id))
         sheets = spreadsheet.get('sheets', [])
         
         sheet_exists = any(s['properties']['title'] == sheet_name for s in sheets)
@@ -331,10 +267,10 @@ def write_team_sheet(service, sheet_id: str, year: str, team_rows: List[List[str
         if sheet_exists:
             print(f"✓ Sheet '{sheet_name}' exists, will update")
             # Clear existing data
-            service.spreadsheets().values().clear(
+            google_api.execute('sheets', service.spreadsheets().values().clear(
                 spreadsheetId=sheet_id,
                 range=f"'{sheet_name}'!A:ZZ"
-            ).execute()
+            ))
         else:
             print(f"✓ Creating new sheet '{sheet_name}'")
             # Create new sheet
@@ -347,22 +283,22 @@ def write_team_sheet(service, sheet_id: str, year: str, team_rows: List[List[str
                     }
                 }]
             }
-            service.spreadsheets().batchUpdate(
+            google_api.execute('sheets', service.spreadsheets().batchUpdate(
                 spreadsheetId=sheet_id,
                 body=request_body
-            ).execute()
+            ), idempotent=False)
         
         # Write data
         body = {
             'values': all_data
         }
         
-        result = service.spreadsheets().values().update(
+        result = google_api.execute('sheets', service.spreadsheets().values().update(
             spreadsheetId=sheet_id,
             range=f"'{sheet_name}'!A1",
             valueInputOption='RAW',
             body=body
-        ).execute()
+        ))
         
         print(f"✅ Successfully wrote {len(team_rows)} winner teams to '{sheet_name}'")
         print(f"   Updated {result.get('updatedCells', 0)} cells")
@@ -383,6 +319,9 @@ def main():
     parser.add_argument('--sheet-id', help='Source sheet ID')
     parser.add_argument('--output-sheet-id', help='Output sheet ID (defaults to same as source)')
     parser.add_argument('--dry-run', action='store_true', help='Preview without writing')
+    parser.add_argument('--store', default=SUBMISSION_STORE,
+                        help='Submission store URL: firestore, firestore://DB or sqlite:///PATH '
+                             '(default: SUBMISSION_STORE environment variable)')
     
     args = parser.parse_args()
     
@@ -408,7 +347,10 @@ def main():
     service = get_sheets_service()
     
     # Get winners
-    winners = get_winners(service, sheet_id, year)
+    if args.store:
+        winners = get_store_winners(submission_store.open_store(args.store, project=PROJECT_ID), year)
+    else:
+        winners = get_winners(service, sheet_id, year)
     
     if not winners:
         print("\n⚠️  No winners found")
@@ -417,19 +359,18 @@ def main():
         sys.exit(0)
     
     # Get header row for column mapping
-    result = service.spreadsheets().values().get(
-        spreadsheetId=sheet_id,
-        range='Sheet1!1:1'
-    ).execute()
-    header_row = result.get('values', [[]])[0]
+    if args.store:
+        header_row = list(SHEET.headers)
+    else:
+        result = google_api.execute('sheets', service.spreadsheets().values().get(
+            spreadsheetId=sheet_id,
+            range='Sheet1!1:1'
+        ))
+        header_row = result.get('values', [[]])[0]
     
     # Format team data
     print("\n📋 Formatting team data...")
-    team_rows = []
-    for awards_id, row in winners:
-        row_dict = extract_team_data_from_row(row, header_row)
-        team_row = format_team_row(awards_id, row_dict)
-        team_rows.append(team_row)
+    team_rows = format_team_rows(winners, header_row)
     
     print(f"✓ Formatted {len(team_rows)} team rows")
     
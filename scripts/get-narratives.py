@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Print the full narrative answers of a submission.
+
+The awards sheet only shows an excerpt of each narrative answer (Project
+Overview, Innovation, ...); the PDF processor keeps the full text in the
+pipeline state bucket (backend/pdf-processor/narratives.py). This script
+fetches it.
+
+Usage:
+    python get-narratives.py AW-2025-042
+    python get-narratives.py --submission-id 3f2a... --year 2025
+    python get-narratives.py AW-2025-042 --json narratives.json
+
+The Awards ID is resolved to its submission through the submission store
+(SUBMISSION_STORE or --store) or, without one, from the sheet's Awards ID
+and Submission ID columns.
+
+Requirements:
+    - Google Cloud credentials configured
+    - Read access to the pipeline state bucket (STATE_BUCKET or --state-bucket)
+    - Access to the Awards spreadsheet when resolving an Awards ID without a store
+"""
+
+import os
+import sys
+import argparse
+import json
+from pathlib import Path
+from typing import Optional, Tuple
+from google.oauth2.credentials import Credentials
+from google.cloud import secretmanager
+from googleapiclient.discovery import build
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend' / 'pdf-processor'))
+
+import google_api  # noqa: E402
+import http_pool  # noqa: E402
+from narratives import GcsNarrativeStore  # noqa: E402
+import submission_store  # noqa: E402
+
+# Configuration
+PROJECT_ID = os.environ.get('GCP_PROJECT_ID', 'your-project-id')
+AWARDS_SHEET_ID = os.environ.get('AWARDS_SHEET_ID', None)
+STATE_BUCKET = os.environ.get('STATE_BUCKET')
+SUBMISSION_STORE = os.environ.get('SUBMISSION_STORE')
+
+
+def get_secret(secret_id: str) -> str:
+    """Retrieve a secret from Secret Manager."""
+    client = secretmanager.SecretManagerServiceClient()
+    name = f"projects/{PROJECT_ID}/secrets/{secret_id}/versions/latest"
+    response = client.access_secret_version(request={"name": name})
+    return response.payload.data.decode('UTF-8')
+
+
+def get_sheets_service():
+    """Get authenticated Google Sheets service."""
+    try:
+        secret_name = f"projects/{PROJECT_ID}/secrets/awards-production-user-oauth-token/versions/latest"
+        client = secretmanager.SecretManagerServiceClient()
+        response = client.access_secret_version(request={"name": secret_name})
+        token_data = json.loads(response.payload.data.decode('UTF-8'))
+
+        credentials = Credentials(
+            token=None,
+            refresh_token=token_data['refresh_token'],
+            token_uri='https://oauth2.googleapis.com/token',
+            client_id=token_data['client_id'],
+            client_secret=token_data['client_secret'],
+            scopes=['https://www.googleapis.com/auth/spreadsheets'],
+            quota_project_id=PROJECT_ID
+        )
+
+        return build('sheets', 'v4', http=http_pool.authorized(credentials))
+
+    except Exception as e:
+        print(f"✗ Could not authenticate: {e}")
+        sys.exit(1)
+
+
+def find_in_sheet(service, sheet_id: str, awards_id: str) -> Optional[str]:
+    """
+    Submission ID for an Awards ID, read from the sheet's Awards ID and Submission ID columns only.
+
+    Returns:
+        Submission ID, or None if the Awards ID is not in the sheet
+    """
+    header_row = google_api.execute('sheets', service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range='Sheet1!1:1'
+    )).get('values', [[]])[0]
+    if 'Awards ID' not in header_row or 'Submission ID (GCS)' not in header_row:
+        print("✗ Required columns not found (Awards ID, Submission ID (GCS))")
+        sys.exit(1)
+
+    def column(header):
+        letter = submission_store.column_letter(header_row.index(header))
+        return [cells[0] if cells else '' for cells in google_api.execute(
+            'sheets', service.spreadsheets().values().get(
+                spreadsheetId=sheet_id,
+                range=f'Sheet1!{letter}:{letter}'
+            )).get('values', [])]
+
+    for row_awards_id, submission_id in zip(column('Awards ID'), column('Submission ID (GCS)')):
+        if row_awards_id == awards_id:
+            return submission_id
+    return None
+
+
+def resolve(args) -> Tuple[str, str]:
+    """(year, submission_id) of the submission the arguments name."""
+    if args.submission_id:
+        if not args.year:
+            print("✗ --year is required with --submission-id")
+            sys.exit(1)
+        return args.year, args.submission_id
+
+    if not args.awards_id:
+        print("✗ Give an Awards ID or --submission-id and --year")
+        sys.exit(1)
+
+    if args.store:
+        record = submission_store.open_store(args.store, project=PROJECT_ID).get(args.awards_id)
+        if record is None:
+            print(f"✗ Submission {args.awards_id} not found in the submission store")
+            sys.exit(1)
+        return record['year'], record['submission_id']
+
+    sheet_id = args.sheet_id or AWARDS_SHEET_ID or get_secret('ucd-production-awards-sheet-id')
+    submission_id = find_in_sheet(get_sheets_service(), sheet_id, args.awards_id)
+    if not submission_id:
+        print(f"✗ Submission {args.awards_id} not found in sheet")
+        sys.exit(1)
+    return args.awards_id.split('-')[1], submission_id
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Print the full narrative answers of a submission",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('awards_id', nargs='?', help='Awards ID (e.g., AW-2025-042)')
+    parser.add_argument('--submission-id', help='Submission ID, instead of an Awards ID')
+    parser.add_argument('--year', help='Submission year (with --submission-id)')
+    parser.add_argument('--state-bucket', default=STATE_BUCKET,
+                        help='Pipeline state bucket (default: STATE_BUCKET environment variable)')
+    parser.add_argument('--store', default=SUBMISSION_STORE,
+                        help='Submission store URL: firestore, firestore://DB or sqlite:///PATH '
+                             '(default: SUBMISSION_STORE environment variable)')
+    parser.add_argument('--sheet-id', help='Override AWARDS_SHEET_ID environment variable')
+    parser.add_argument('--json', metavar='PATH', help='Write the narratives to this JSON file instead')
+
+    args = parser.parse_args()
+
+    if not args.state_bucket:
+        print("✗ No state bucket given: set STATE_BUCKET or use --state-bucket")
+        sys.exit(1)
+
+    year, submission_id = resolve(args)
+
+    from google.cloud import storage
+
+    store = GcsNarrativeStore(storage.Client(project=PROJECT_ID).bucket(args.state_bucket))
+    narratives = store.load(year, submission_id)
+    if narratives is None:
+        print(f"✗ No narratives saved for {submission_id} ({year})")
+        print("   Submissions processed before narratives were offloaded have them in the sheet")
+        sys.exit(1)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(narratives, f, indent=2, ensure_ascii=False)
+        print(f"✓ Wrote {len(narratives)} narratives to {args.json}")
+        return
+
+    print(f"📄 {args.awards_id or submission_id}")
+    for header, text in narratives.items():
+        print(f"\n{header}")
+        print("=" * 60)
+        print(text or "(no answer)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Backfill the submission store from the master awards sheet.
+
+Run once before setting SUBMISSION_STORE on the Cloud Functions: the PDF
+processor seeds each year's Awards ID counter from the store, so the store
+must already hold the submissions the sheet has. Safe to re-run; records
+already in the store are left as they are.
+
+Usage:
+    python import-submissions-to-store.py --store firestore
+    python import-submissions-to-store.py --store sqlite:///awards.db
+    python import-submissions-to-store.py --store sqlite:///awards.db --dry-run
+
+Requirements:
+    - Google Cloud credentials configured
+    - Access to the Awards spreadsheet (same authentication as Cloud Functions)
+    - Firestore access for --store firestore
+"""
+
+import os
+import sys
+import argparse
+import json
+from pathlib import Path
+from google.oauth2.credentials import Credentials
+from google.cloud import secretmanager
+from googleapiclient.discovery import build
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend' / 'pdf-processor'))
+
+import google_api  # noqa: E402
+import http_pool  # noqa: E402
+import submission_store  # noqa: E402
+
+# Configuration
+PROJECT_ID = os.environ.get('GCP_PROJECT_ID', 'your-project-id')
+AWARDS_SHEET_ID = os.environ.get('AWARDS_SHEET_ID', None)
+SUBMISSION_STORE = os.environ.get('SUBMISSION_STORE')
+
+
+def get_secret(secret_id: str) -> str:
+    """Retrieve a secret from Secret Manager."""
+    client = secretmanager.SecretManagerServiceClient()
+    name = f"projects/{PROJECT_ID}/secrets/{secret_id}/versions/latest"
+    response = client.access_secret_version(request={"name": name})
+    return response.payload.data.decode('UTF-8')
+
+
+def get_sheets_service():
+    """Get authenticated Google Sheets service."""
+    try:
+        secret_name = f"projects/{PROJECT_ID}/secrets/awards-production-user-oauth-token/versions/latest"
+        client = secretmanager.SecretManagerServiceClient()
+        response = client.access_secret_version(request={"name": secret_name})
+        token_data = json.loads(response.payload.data.decode('UTF-8'))
+
+        credentials = Credentials(
+            token=None,
+            refresh_token=token_data['refresh_token'],
+            token_uri='https://oauth2.googleapis.com/token',
+            client_id=token_data['client_id'],
+            client_secret=token_data['client_secret'],
+            scopes=['https://www.googleapis.com/auth/spreadsheets'],
+            quota_project_id=PROJECT_ID
+        )
+
+        return build('sheets', 'v4', http=http_pool.authorized(credentials))
+
+    except Exception as e:
+        print(f"✗ Could not authenticate: {e}")
+        sys.exit(1)
+
+
+def sheet_records(data):
+    """
+    Build store records from the sheet's rows.
+
+    Args:
+        data: Sheet values, header row first
+
+    Returns:
+        Tuple of (records, skipped rows)
+    """
+    header_row = data[0]
+    if 'Awards ID' not in header_row:
+        print("✗ No 'Awards ID' column in the sheet")
+        sys.exit(1)
+
+    records = []
+    skipped = 0
+    for row in data[1:]:
+        row = row + [''] * (len(header_row) - len(row))
+        values = dict(zip(header_row, row))
+        awards_id = values['Awards ID']
+        if not awards_id.startswith('AW-'):
+            skipped += 1
+            continue
+        records.append(submission_store.new_record(
+            awards_id,
+            values.get('Submission ID (GCS)', ''),
+            awards_id.split('-')[1],
+            header_row,
+            row
+        ))
+    return records, skipped
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Import the master sheet's submissions into the submission store",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--store', default=SUBMISSION_STORE,
+                        help='Submission store URL: firestore, firestore://DB or sqlite:///PATH '
+                             '(default: SUBMISSION_STORE environment variable)')
+    parser.add_argument('--sheet-id', help='Override AWARDS_SHEET_ID environment variable')
+    parser.add_argument('--dry-run', action='store_true', help='Read the sheet without writing the store')
+
+    args = parser.parse_args()
+
+    if not args.store:
+        print("✗ No submission store given: set SUBMISSION_STORE or use --store")
+        sys.exit(1)
+
+    sheet_id = args.sheet_id or AWARDS_SHEET_ID
+    if not sheet_id:
+        try:
+            sheet_id = get_secret('ucd-production-awards-sheet-id')
+        except Exception:
+            print("✗ AWARDS_SHEET_ID not provided")
+            sys.exit(1)
+
+    print("📊 Reading submissions from sheet...")
+    result = google_api.execute('sheets', get_sheets_service().spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range='Sheet1!A:ZZ'
+    ))
+    data = result.get('values', [])
+    if len(data) < 2:
+        print("✗ Sheet is empty or has no data")
+        sys.exit(1)
+
+    records, skipped = sheet_records(data)
+    print(f"✓ {len(records)} submission(s) with an Awards ID ({skipped} row(s) without one skipped)")
+
+    if args.dry_run:
+        years = sorted({record['year'] for record in records})
+        print(f"🔍 DRY RUN - would import into {args.store} (years: {', '.join(years)})")
+        return
+
+    store = submission_store.open_store(args.store, project=PROJECT_ID)
+    added = store.add_many(records)
+    print(f"✅ Imported {added} submission(s) into {args.store} "
+          f"({len(records) - added} already present)")
+
+
+if __name__ == '__main__':
+    main()
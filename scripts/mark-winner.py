@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Admin script to mark submissions as winners in Google Sheets.
+Admin script to mark submissions as winners.
 
 Usage:
     python mark-winner.py AW-2025-042 "Best Concrete Project"
@@ -9,6 +9,12 @@ Usage:
     python mark-winner.py --list-pending        # List all pending submissions
     python mark-winner.py --list-winners        # List all winners
 
+With a submission store (SUBMISSION_STORE or --store, see
+backend/pdf-processor/submission_store.py) submissions are looked up and
+updated there by Awards ID, and the sheet is updated by the scheduled
+sheet-row-flusher within a minute (--sync updates it right away). Without
+one, the sheet is read in full and edited directly.
+
 This script provides a command-line interface for winner management
 until the full admin web dashboard is built in Phase 2.
 
@@ -22,6 +28,7 @@ import os
 import sys
 import argparse
 import json
+from pathlib import Path
 from typing import Optional, List, Dict
 from google.oauth2.credentials import Credentials
 from google.oauth2 import service_account
@@ -30,9 +37,16 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend' / 'pdf-processor'))
+
+import google_api  # noqa: E402
+import http_pool  # noqa: E402
+import submission_store  # noqa: E402
+
 # Configuration
 PROJECT_ID = os.environ.get('GCP_PROJECT_ID', 'your-project-id')
 AWARDS_SHEET_ID = os.environ.get('AWARDS_SHEET_ID', None)
+SUBMISSION_STORE = os.environ.get('SUBMISSION_STORE')
 
 
 def get_secret(secret_id: str) -> str:
@@ -68,7 +82,7 @@ def get_sheets_service():
         )
         
         print("✓ Using user OAuth credentials")
-        return build('sheets', 'v4', credentials=credentials)
+        return build('sheets', 'v4', http=http_pool.authorized(credentials))
         
     except Exception as e:
         print(f"⚠ Could not use OAuth credentials: {e}")
@@ -84,10 +98,10 @@ def get_sheet_data(service, sheet_id: str) -> List[List[str]]:
         List of rows (each row is a list of values)
     """
     try:
-        result = service.spreadsheets().values().get(
+        result = google_api.execute('sheets', service.spreadsheets().values().get(
             spreadsheetId=sheet_id,
             range='Sheet1!A:ZZ'
-        ).execute()
+        ))
         
         return result.get('values', [])
     
@@ -199,12 +213,12 @@ def mark_as_winner(service, sheet_id: str, awards_id: str, category: str, notes:
     status_col = column_letter(columns['status'])
     status_range = f'Sheet1!{status_col}{row_num}'
     
-    service.spreadsheets().values().update(
+    google_api.execute('sheets', service.spreadsheets().values().update(
         spreadsheetId=sheet_id,
         range=status_range,
         valueInputOption='RAW',
         body={'values': [['winner']]}
-    ).execute()
+    ))
     
     print(f"✓ Updated Status to 'winner'")
     
@@ -212,12 +226,12 @@ def mark_as_winner(service, sheet_id: str, awards_id: str, category: str, notes:
     category_col = column_letter(columns['winner_category'])
     category_range = f'Sheet1!{category_col}{row_num}'
     
-    service.spreadsheets().values().update(
+    google_api.execute('sheets', service.spreadsheets().values().update(
         spreadsheetId=sheet_id,
         range=category_range,
         valueInputOption='RAW',
         body={'values': [[category]]}
-    ).execute()
+    ))
     
     print(f"✓ Set Winner_Category to '{category}'")
     
@@ -226,12 +240,12 @@ def mark_as_winner(service, sheet_id: str, awards_id: str, category: str, notes:
         notes_col = column_letter(columns['winner_notes'])
         notes_range = f'Sheet1!{notes_col}{row_num}'
         
-        service.spreadsheets().values().update(
+        google_api.execute('sheets', service.spreadsheets().values().update(
             spreadsheetId=sheet_id,
             range=notes_range,
             valueInputOption='RAW',
             body={'values': [[notes]]}
-        ).execute()
+        ))
         
         print(f"✓ Added notes")
     
@@ -280,34 +294,34 @@ def unmark_winner(service, sheet_id: str, awards_id: str):
     status_col = column_letter(columns['status'])
     status_range = f'Sheet1!{status_col}{row_num}'
     
-    service.spreadsheets().values().update(
+    google_api.execute('sheets', service.spreadsheets().values().update(
         spreadsheetId=sheet_id,
         range=status_range,
         valueInputOption='RAW',
         body={'values': [['pending']]}
-    ).execute()
+    ))
     
     # Clear Winner_Category
     category_col = column_letter(columns['winner_category'])
     category_range = f'Sheet1!{category_col}{row_num}'
     
-    service.spreadsheets().values().update(
+    google_api.execute('sheets', service.spreadsheets().values().update(
         spreadsheetId=sheet_id,
         range=category_range,
         valueInputOption='RAW',
         body={'values': [['']]}
-    ).execute()
+    ))
     
     # Clear Winner_Notes
     notes_col = column_letter(columns['winner_notes'])
     notes_range = f'Sheet1!{notes_col}{row_num}'
     
-    service.spreadsheets().values().update(
+    google_api.execute('sheets', service.spreadsheets().values().update(
         spreadsheetId=sheet_id,
         range=notes_range,
         valueInputOption='RAW',
         body={'values': [['']]}
-    ).execute()
+    ))
     
     print(f"\n✅ Successfully unmarked {awards_id} as winner (status = pending)")
 
@@ -371,6 +385,87 @@ def list_submissions(service, sheet_id: str, filter_status: Optional[str] = None
         print(f"Filter: {filter_status}")
 
 
+def mark_in_store(store, awards_id: str, category: str, notes: str = "") -> bool:
+    """
+    Mark a submission as a winner in the submission store.
+
+    Args:
+        store: Submission store
+        awards_id: Awards ID (e.g., "AW-2025-042")
+        category: Award category won
+        notes: Optional judge notes
+
+    Returns:
+        True if the submission was found
+    """
+    print(f"\n🏆 Marking {awards_id} as winner...")
+
+    if store.set_status(awards_id, 'winner', category, notes) is None:
+        print(f"✗ Submission {awards_id} not found in the submission store")
+        return False
+
+    print(f"\n✅ Successfully marked {awards_id} as winner!")
+    print(f"   Category: {category}")
+    if notes:
+        print(f"   Notes: {notes}")
+    return True
+
+
+def unmark_in_store(store, awards_id: str) -> bool:
+    """
+    Remove winner status from a submission in the submission store.
+
+    Returns:
+        True if the submission was found
+    """
+    print(f"\n↩️  Unmarking {awards_id} as winner...")
+
+    if store.set_status(awards_id, 'pending') is None:
+        print(f"✗ Submission {awards_id} not found in the submission store")
+        return False
+
+    print(f"\n✅ Successfully unmarked {awards_id} as winner (status = pending)")
+    return True
+
+
+def list_store_submissions(store, filter_status: Optional[str] = None, year: Optional[str] = None):
+    """
+    List submissions from the submission store with optional status and year filters.
+
+    Args:
+        store: Submission store
+        filter_status: Optional status to filter by (pending, winner, not_selected)
+        year: Optional year (YYYY)
+    """
+    records = store.list(year=year, status=filter_status)
+
+    print(f"\n{'Awards ID':<15} {'Status':<12} {'Project Name':<40} {'Category'}")
+    print("=" * 100)
+
+    for record in records:
+        row_name = record['row'].get('Official Name') or '(unnamed)'
+
+        # Truncate long names
+        if len(row_name) > 38:
+            row_name = row_name[:35] + '...'
+
+        print(f"{record['awards_id']:<15} {record['status']:<12} {row_name:<40} {record['winner_category']}")
+
+    print("=" * 100)
+    print(f"Total: {len(records)} submission(s)")
+    if filter_status:
+        print(f"Filter: {filter_status}")
+
+
+def sync_sheet(store, sheet_id: str):
+    """Push status changes from the submission store to the sheet now."""
+    mirrored = submission_store.mirror_changes(store, get_sheets_service(), sheet_id)
+    print(f"✓ Updated {mirrored} row(s) in the sheet")
+    pending = len(store.unmirrored())
+    if pending:
+        print(f"⚠ {pending} change(s) wait for rows not yet in the sheet; sheet-row-flusher will retry")
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -395,6 +490,9 @@ Examples:
   
   # List all submissions
   python mark-winner.py --list-all
+
+  # Use a local submission store and update the sheet right away
+  python mark-winner.py AW-2025-042 "Best Concrete Project" --store sqlite:///awards.db --sync
 """
     )
     
@@ -405,10 +503,46 @@ Examples:
     parser.add_argument('--list-pending', action='store_true', help='List pending submissions')
     parser.add_argument('--list-winners', action='store_true', help='List all winners')
     parser.add_argument('--list-all', action='store_true', help='List all submissions')
+    parser.add_argument('--year', help='Only list submissions from this year (submission store only)')
     parser.add_argument('--sheet-id', help='Override AWARDS_SHEET_ID environment variable')
+    parser.add_argument('--store', default=SUBMISSION_STORE,
+                        help='Submission store URL: firestore, firestore://DB or sqlite:///PATH '
+                             '(default: SUBMISSION_STORE environment variable)')
+    parser.add_argument('--sync', action='store_true',
+                        help='Update the sheet now instead of on the next scheduled flush (submission store only)')
 
     args = parser.parse_args()
 
+    if args.store:
+        store = submission_store.open_store(args.store, project=PROJECT_ID)
+        print(f"✓ Using submission store {args.store}")
+
+        if args.list_pending or args.list_winners or args.list_all:
+            status = 'pending' if args.list_pending else 'winner' if args.list_winners else None
+            list_store_submissions(store, status, args.year)
+            return
+
+        if not args.awards_id:
+            parser.print_help()
+            sys.exit(1)
+
+        if args.unmark:
+            found = unmark_in_store(store, args.awards_id)
+        else:
+            if not args.category:
+                print("✗ Category is required when marking as winner")
+                print("  Usage: python mark-winner.py AWARDS_ID 'Category'")
+                sys.exit(1)
+            found = mark_in_store(store, args.awards_id, args.category, args.notes or "")
+        if not found:
+            sys.exit(1)
+
+        if args.sync:
+            sync_sheet(store, args.sheet_id or AWARDS_SHEET_ID or get_secret('ucd-production-awards-sheet-id'))
+        else:
+            print("   The sheet is updated on the next scheduled flush (use --sync to update it now)")
+        return
+
     # Get sheet ID
     sheet_id = args.sheet_id or AWARDS_SHEET_ID
     if not sheet_id:
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Re-run form extraction over existing submission PDFs and rewrite their sheet rows.
+
+Use this after the form changes or a field mapping bug is fixed, instead of
+re-uploading PDFs one by one to trigger the Cloud Function.
+
+Usage:
+    python reprocess-submissions.py gs://BUCKET/submissions/2025/
+    python reprocess-submissions.py ./downloaded-pdfs --dry-run rows.csv
+    python reprocess-submissions.py gs://BUCKET/submissions/2025/ --team-csv teams.csv --dry-run rows.csv
+    python reprocess-submissions.py gs://BUCKET/submissions/2025/ --append-missing
+
+The script will:
+1. List every PDF under the prefix or directory (submissions/YYYY/ID/pdf/*.pdf)
+2. Extract form fields in parallel across a process pool, using the same
+   code as the PDF processor (backend/pdf-processor/submission.py)
+3. Match each PDF to its sheet row by Submission ID and rewrite only the
+   form columns; timestamps, Drive links, Awards IDs and winner columns
+   are kept
+4. With a state bucket (STATE_BUCKET or --state-bucket), save each PDF's
+   full narrative answers there like the PDF processor does, and put only
+   excerpts in the sheet
+5. Write the updated rows with a handful of batched Sheets calls
+
+With --dry-run nothing is written to the sheet; the rows that would be
+written go to a CSV file instead.
+
+Requirements:
+    - Google Cloud credentials configured (for gs:// sources)
+    - Access to the Awards spreadsheet (not needed for a dry run without --sheet-id)
+    - Same authentication as Cloud Functions
+"""
+
+import os
+import sys
+import argparse
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend' / 'pdf-processor'))
+
+import google_api  # noqa: E402
+import http_pool  # noqa: E402
+from narratives import GcsNarrativeStore  # noqa: E402
+from schema import SHEET, TEAM, project_rows  # noqa: E402
+from submission import (  # noqa: E402
+    FORM_COLUMNS, SHEET_COLUMNS, TEAM_COLUMNS, excerpt_narratives, extract_pdf_fields
+)
+
+# Configuration
+PROJECT_ID = os.environ.get('GCP_PROJECT_ID', 'your-project-id')
+AWARDS_SHEET_ID = os.environ.get('AWARDS_SHEET_ID', None)
+STATE_BUCKET = os.environ.get('STATE_BUCKET')
+# Same default as the PDF processor
+NARRATIVE_EXCERPT_CHARS = int(os.environ.get('NARRATIVE_EXCERPT_CHARS', 120))
+
+# Per-process storage client, created on first use in each worker
+_storage_client = None
+
+
+def get_secret(secret_id: str) -> str:
+    """Retrieve a secret from Secret Manager."""
+    from google.cloud import secretmanager
+
+    client = secretmanager.SecretManagerServiceClient()
+    name = f"projects/{PROJECT_ID}/secrets/{secret_id}/versions/latest"
+    response = client.access_secret_version(request={"name": name})
+    return response.payload.data.decode('UTF-8')
+
+
+def get_sheets_service():
+    """Get authenticated Google Sheets service."""
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build
+
+    try:
+        token_data = json.loads(get_secret('awards-production-user-oauth-token'))
+
+        credentials = Credentials(
+            token=None,
+            refresh_token=token_data['refresh_token'],
+            token_uri='https://oauth2.googleapis.com/token',
+            client_id=token_data['client_id'],
+            client_secret=token_data['client_secret'],
+            scopes=['https://www.googleapis.com/auth/spreadsheets'],
+            quota_project_id=PROJECT_ID
+        )
+
+        print("✓ Using user OAuth credentials")
+        return build('sheets', 'v4', http=http_pool.authorized(credentials), cache_discovery=False)
+
+    except Exception as e:
+        print(f"⚠ Could not use OAuth credentials: {e}")
+        print("✗ Please configure authentication")
+        sys.exit(1)
+
+
+def list_pdfs(source: str) -> List[str]:
+    """List PDF paths under a gs:// prefix or a local directory."""
+    if source.startswith('gs://'):
+        from google.cloud import storage
+
+        bucket_name, _, prefix = source[len('gs://'):].partition('/')
+        client = storage.Client()
+        return sorted(
+            f"gs://{bucket_name}/{blob.name}"
+            for blob in client.list_blobs(bucket_name, prefix=prefix)
+            if blob.name.lower().endswith('.pdf') and '/pdf/' in f"/{blob.name}"
+        )
+
+    return sorted(str(path) for path in Path(source).rglob('*') if path.suffix.lower() == '.pdf')
+
+
+def submission_id_for(path: str) -> str:
+    """
+    Submission ID for a PDF path.
+
+    Paths follow submissions/YYYY/submission_id/pdf/filename.pdf; local files
+    outside that layout use the file name without extension.
+    """
+    parts = path.split('/')
+    if len(parts) >= 3 and parts[-2] == 'pdf':
+        return parts[-3]
+    return Path(path).stem
+
+
+def year_for(path: str) -> Optional[str]:
+    """Submission year for a PDF path in the submissions/YYYY/submission_id/pdf/ layout, else None."""
+    parts = path.split('/')
+    if len(parts) >= 4 and parts[-2] == 'pdf' and parts[-4].isdigit():
+        return parts[-4]
+    return None
+
+
+def _storage():
+    global _storage_client
+
+    if _storage_client is None:
+        from google.cloud import storage
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def _read_pdf(path: str) -> bytes:
+    if path.startswith('gs://'):
+        bucket_name, _, name = path[len('gs://'):].partition('/')
+        return _storage().bucket(bucket_name).blob(name).download_as_bytes()
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def extract_one(path: str, state_bucket: Optional[str] = None,
+                save: bool = True) -> Tuple[str, Optional[Dict[str, str]], Optional[str], bool]:
+    """
+    Worker: extract form fields from one PDF and save its narratives.
+
+    Narratives are saved to state_bucket when given and the path names the
+    submission's year (with save=False only whether they would be is
+    reported, for a dry run).
+
+    Returns:
+        (path, fields, error, narratives saved)
+    """
+    try:
+        fields = extract_pdf_fields(_read_pdf(path))
+    except Exception as e:
+        return path, None, str(e), False
+
+    year = year_for(path)
+    if not state_bucket or not year or '_error' in fields:
+        return path, fields, None, False
+    if save:
+        try:
+            GcsNarrativeStore(_storage().bucket(state_bucket)).save(year, submission_id_for(path), fields)
+        except Exception as e:
+            return path, None, f"saving narratives: {e}", False
+    return path, fields, None, True
+
+
+def get_sheet_rows(service, sheet_id: str) -> Dict[str, Tuple[int, List[str]]]:
+    """Map Submission ID -> (1-based sheet row number, row values)."""
+    result = google_api.execute('sheets', service.spreadsheets().values().get(
+        spreadsheetId=sheet_id,
+        range='Sheet1!A:ZZ'
+    ))
+
+    rows = {}
+    for index, row in enumerate(result.get('values', [])[1:], start=2):
+        if len(row) > 1 and row[1]:
+            rows[row[1]] = (index, row)
+    return rows
+
+
+def merge_row(row: List[str], existing: Optional[List[str]]) -> List[str]:
+    """Fresh form columns, with every other column kept from the existing row."""
+    if existing is None:
+        # Appended rows have no Drive links or Awards ID yet
+        return row
+
+    existing = existing + [''] * (len(SHEET_COLUMNS) - len(existing))
+    return [row[i] if i in FORM_COLUMNS else existing[i] for i in range(len(SHEET_COLUMNS))]
+
+
+def write_updates(service, sheet_id: str, updates: List[Tuple[int, List[str]]], batch_size: int):
+    """Rewrite existing rows with values().batchUpdate, batch_size rows per request."""
+    for start in range(0, len(updates), batch_size):
+        batch = updates[start:start + batch_size]
+        google_api.execute('sheets', service.spreadsheets().values().batchUpdate(
+            spreadsheetId=sheet_id,
+            body={
+                'valueInputOption': 'RAW',
+                'data': [
+                    {'range': f'Sheet1!A{row_number}', 'values': [row]}
+                    for row_number, row in batch
+                ]
+            }
+        ))
+        print(f"  ✓ Updated rows {start + 1}-{start + len(batch)} of {len(updates)}")
+
+
+def append_rows(service, sheet_id: str, rows: List[List[str]], batch_size: int):
+    """Append new rows, batch_size rows per request."""
+    for start in range(0, len(rows), batch_size):
+        google_api.execute('sheets', service.spreadsheets().values().append(
+            spreadsheetId=sheet_id,
+            range='Sheet1!A:Z',
+            valueInputOption='RAW',
+            insertDataOption='INSERT_ROWS',
+            body={'values': rows[start:start + batch_size]}
+        ), idempotent=False)
+        print(f"  ✓ Appended {min(batch_size, len(rows) - start)} rows")
+
+
+def write_csv(path: str, header: List[str], rows: List[List[str]]):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    print(f"✓ Wrote {len(rows)} rows to {path}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Re-run form extraction over submission PDFs and rewrite their sheet rows",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('source', help='gs://bucket/prefix or local directory of PDFs')
+    parser.add_argument('--sheet-id', help='Awards sheet ID (defaults to AWARDS_SHEET_ID or Secret Manager)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Extraction processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=200, help='Rows per Sheets request (default: 200)')
+    parser.add_argument('--append-missing', action='store_true',
+                        help='Append rows for PDFs with no matching Submission ID in the sheet')
+    parser.add_argument('--dry-run', metavar='CSV', help='Write the rows to this CSV instead of the sheet')
+    parser.add_argument('--team-csv', metavar='CSV', help='Also write project team rows to this CSV')
+    parser.add_argument('--state-bucket', default=STATE_BUCKET,
+                        help='Save full narratives here and excerpt them in the sheet '
+                             '(default: STATE_BUCKET environment variable)')
+
+    args = parser.parse_args()
+
+    print(f"🔄 Reprocessing submissions from {args.source}")
+    print("=" * 60)
+
+    paths = list_pdfs(args.source)
+    if not paths:
+        print("⚠️  No PDFs found")
+        sys.exit(0)
+    print(f"Found {len(paths)} PDFs")
+
+    # Extract in parallel
+    started = time.perf_counter()
+    results = []
+    failures = []
+    offloaded = set()
+    worker = partial(extract_one, state_bucket=args.state_bucket, save=not args.dry_run)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for path, fields, error, saved in pool.map(worker, paths, chunksize=4):
+            if error or fields is None or '_error' in fields:
+                failures.append((path, error or fields.get('_error', 'no fields')))
+            else:
+                results.append((path, fields))
+                if saved:
+                    offloaded.add(path)
+    print(f"✓ Extracted {len(results)} PDFs in {time.perf_counter() - started:.1f}s "
+          f"({args.workers} workers)")
+    if args.state_bucket:
+        print(f"✓ {'Would save' if args.dry_run else 'Saved'} narratives of {len(offloaded)} PDFs "
+              f"to gs://{args.state_bucket}/narratives/")
+    for path, error in failures:
+        print(f"  ✗ {path}: {error}")
+
+    # Read the sheet once so unchanged columns are kept
+    sheet_id = args.sheet_id or AWARDS_SHEET_ID
+    if not sheet_id and not args.dry_run:
+        try:
+            sheet_id = get_secret('ucd-production-awards-sheet-id')
+        except Exception:
+            print("✗ AWARDS_SHEET_ID not provided")
+            sys.exit(1)
+
+    service = None
+    existing_rows = {}
+    if sheet_id:
+        service = get_sheets_service()
+        existing_rows = get_sheet_rows(service, sheet_id)
+
+    # Build every sheet (and team) row in one pass over the extracted fields
+    awards_id_column = SHEET_COLUMNS.index('Awards ID')
+    now = datetime.now().isoformat()
+    matches = []
+    extras = []
+    for path, _ in results:
+        submission_id = submission_id_for(path)
+        row_number, existing = existing_rows.get(submission_id, (None, None))
+        matches.append((path, submission_id, row_number, existing))
+        awards_id = existing[awards_id_column] if existing and awards_id_column < len(existing) else ''
+        extras.append({'submission_id': submission_id, 'submitted_at': now, 'awards_id': awards_id})
+
+    rows = project_rows([fields for _, fields in results], [SHEET, TEAM] if args.team_csv else [SHEET], extras)
+
+    updates = []
+    appends = []
+    for (path, submission_id, row_number, existing), fresh in zip(matches, rows['sheet']):
+        if path in offloaded:
+            excerpt_narratives(fresh, NARRATIVE_EXCERPT_CHARS)
+        row = merge_row(fresh, existing)
+
+        if row_number is not None:
+            updates.append((row_number, row))
+        elif args.append_missing or args.dry_run:
+            appends.append(row)
+        else:
+            print(f"  ⚠ No sheet row for {submission_id} ({path}) - use --append-missing")
+
+    if args.team_csv:
+        write_csv(args.team_csv, TEAM_COLUMNS, rows['team'])
+
+    if args.dry_run:
+        write_csv(args.dry_run, ['Sheet Row'] + SHEET_COLUMNS,
+                  [[row_number] + row for row_number, row in updates] + [[''] + row for row in appends])
+        print("\n🔍 DRY RUN - no changes written to the sheet")
+        return
+
+    print(f"\n📝 Writing {len(updates)} updated and {len(appends)} new rows...")
+    write_updates(service, sheet_id, updates, args.batch_size)
+    if appends:
+        append_rows(service, sheet_id, appends, args.batch_size)
+
+    print("\n✅ Reprocessing complete!")
+    print(f"   View at: https://docs.google.com/spreadsheets/d/{sheet_id}")
+
+
+if __name__ == '__main__':
+    main()
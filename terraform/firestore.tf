@@ -0,0 +1,27 @@
+# Primary store for awards submissions (backend/pdf-processor/submission_store.py).
+# The awards sheet is a mirror of it, kept in sync by the sheet row flusher.
+resource "google_firestore_database" "submissions" {
+  name        = "${local.name_prefix}-submissions"
+  location_id = var.region
+  type        = "FIRESTORE_NATIVE"
+
+  deletion_policy = "ABANDON"
+
+  depends_on = [google_project_service.required_apis]
+}
+
+# Highest Awards ID number per year (seeds the Awards ID counter)
+resource "google_firestore_index" "submissions_year_number" {
+  database   = google_firestore_database.submissions.name
+  collection = "submissions"
+
+  fields {
+    field_path = "year"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "number"
+    order      = "DESCENDING"
+  }
+}
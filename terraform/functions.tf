@@ -56,8 +56,11 @@ resource "google_cloudfunctions2_function" "pdf_processor" {
       DRIVE_FOLDER_SECRET     = google_secret_manager_secret.drive_folder.secret_id
       AWARDS_SHEET_ID_SECRET  = google_secret_manager_secret.awards_sheet_id.secret_id
       SUBMISSIONS_BUCKET      = google_storage_bucket.submissions.name
+      STATE_BUCKET            = google_storage_bucket.pipeline_state.name
+      SUBMISSION_STORE        = "firestore://${google_firestore_database.submissions.name}"
       MAX_PDF_SIZE_MB         = var.max_pdf_size_mb
       DRIVE_OWNER_EMAIL       = var.drive_owner_email
+      PROFILE_INVOCATIONS     = var.profile_invocations
     }
   }
 
@@ -90,6 +93,81 @@ resource "google_cloud_run_service_iam_member" "pdf_processor_invoker" {
   member   = "serviceAccount:${google_service_account.backend.email}"
 }
 
+# Flushes submission rows that process_pdf staged in the state bucket.
+# Same source as the PDF processor, different entry point.
+resource "google_cloudfunctions2_function" "sheet_row_flusher" {
+  name        = "${local.awards_prefix}-sheet-row-flusher"
+  location    = var.region
+  description = "Appends staged submission rows to the awards sheet in batches"
+
+  build_config {
+    runtime     = "python311"
+    entry_point = "flush_sheet_rows"
+    
+    source {
+      storage_source {
+        bucket = google_storage_bucket.functions_source.name
+        object = google_storage_bucket_object.pdf_processor_zip.name
+      }
+    }
+  }
+
+  service_config {
+    max_instance_count               = 1
+    min_instance_count               = 0
+    available_memory                 = "256M"
+    timeout_seconds                  = 300
+    service_account_email            = google_service_account.backend.email
+    ingress_settings                 = "ALLOW_INTERNAL_ONLY"
+    all_traffic_on_latest_revision   = true
+
+    environment_variables = {
+      GCP_PROJECT_ID          = var.project_id
+      AWARDS_SHEET_ID_SECRET  = google_secret_manager_secret.awards_sheet_id.secret_id
+      STATE_BUCKET            = google_storage_bucket.pipeline_state.name
+      SUBMISSION_STORE        = "firestore://${google_firestore_database.submissions.name}"
+    }
+  }
+
+  # No event_trigger block = HTTP-triggered function (invoked by Cloud Scheduler)
+
+  labels = local.common_labels
+
+  depends_on = [
+    google_project_service.required_apis
+  ]
+}
+
+resource "google_cloud_run_service_iam_member" "sheet_row_flusher_invoker" {
+  project  = google_cloudfunctions2_function.sheet_row_flusher.project
+  location = google_cloudfunctions2_function.sheet_row_flusher.location
+  service  = google_cloudfunctions2_function.sheet_row_flusher.name
+  role     = "roles/run.invoker"
+  member   = "serviceAccount:${google_service_account.backend.email}"
+}
+
+# Flush every minute so a staged row waits at most SHEET_BATCH_MAX_WAIT_SECONDS + 1 minute
+resource "google_cloud_scheduler_job" "sheet_row_flush" {
+  name        = "${local.awards_prefix}-sheet-row-flush"
+  region      = var.region
+  description = "Flushes staged submission rows to the awards sheet"
+  schedule    = "* * * * *"
+
+  http_target {
+    http_method = "POST"
+    uri         = google_cloudfunctions2_function.sheet_row_flusher.service_config[0].uri
+
+    oidc_token {
+      service_account_email = google_service_account.backend.email
+      audience              = google_cloudfunctions2_function.sheet_row_flusher.service_config[0].uri
+    }
+  }
+
+  depends_on = [
+    google_project_service.required_apis
+  ]
+}
+
 # Cloud Function for photo processing
 resource "google_cloudfunctions2_function" "photo_processor" {
   name        = "${local.awards_prefix}-photo-processor"
@@ -111,18 +189,28 @@ resource "google_cloudfunctions2_function" "photo_processor" {
   service_config {
     max_instance_count               = 20
     min_instance_count               = 0
-    available_memory                 = "256M"
-    timeout_seconds                  = 120
+    # Batch mode decodes photo_batch_cpu photos at once, one worker process each
+    available_memory                 = var.photo_batch ? "${var.photo_batch_cpu}Gi" : "256M"
+    available_cpu                    = var.photo_batch ? tostring(var.photo_batch_cpu) : null
+    timeout_seconds                  = var.photo_batch ? 540 : 120
     service_account_email            = google_service_account.backend.email
     ingress_settings                 = "ALLOW_INTERNAL_ONLY"
     all_traffic_on_latest_revision   = true
 
     environment_variables = {
-      GCP_PROJECT_ID      = var.project_id
-      DRIVE_FOLDER_SECRET = google_secret_manager_secret.drive_folder.secret_id
-      SUBMISSIONS_BUCKET  = google_storage_bucket.submissions.name
-      MAX_PHOTO_SIZE_MB   = var.max_photo_size_mb
-      DRIVE_OWNER_EMAIL   = var.drive_owner_email
+      GCP_PROJECT_ID              = var.project_id
+      SUBMISSIONS_BUCKET          = google_storage_bucket.submissions.name
+      STATE_BUCKET                = google_storage_bucket.pipeline_state.name
+      RENDITIONS_BUCKET           = google_storage_bucket.photo_renditions.name
+      PHOTO_BATCH                 = var.photo_batch ? "true" : ""
+      PHOTO_WORKERS               = var.photo_batch_cpu
+      MAX_PHOTO_SIZE_MB           = var.max_photo_size_mb
+      # Decoded pixels per photo: about 1 GB per worker in batch mode, 256 MB otherwise
+      MAX_DECODE_MEGAPIXELS       = var.photo_batch ? 80 : 24
+      # The marker or a photo can arrive before pdf-processor creates the project folder
+      PROJECT_FOLDER_WAIT_SECONDS = var.photo_batch ? 240 : 60
+      DRIVE_OWNER_EMAIL           = var.drive_owner_email
+      PROFILE_INVOCATIONS         = var.profile_invocations
     }
   }
 
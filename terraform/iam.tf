@@ -22,6 +22,18 @@ resource "google_storage_bucket_iam_member" "backend_submissions_admin" {
   member = "serviceAccount:${google_service_account.backend.email}"
 }
 
+resource "google_storage_bucket_iam_member" "backend_state_admin" {
+  bucket = google_storage_bucket.pipeline_state.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.backend.email}"
+}
+
+resource "google_storage_bucket_iam_member" "backend_renditions_admin" {
+  bucket = google_storage_bucket.photo_renditions.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.backend.email}"
+}
+
 # Grant Secret Manager access
 resource "google_project_iam_member" "backend_secrets" {
   project = var.project_id
@@ -29,6 +41,13 @@ resource "google_project_iam_member" "backend_secrets" {
   member  = "serviceAccount:${google_service_account.backend.email}"
 }
 
+# Grant Firestore access (submission store)
+resource "google_project_iam_member" "backend_firestore" {
+  project = var.project_id
+  role    = "roles/datastore.user"
+  member  = "serviceAccount:${google_service_account.backend.email}"
+}
+
 # Service account for frontend Cloud Run
 resource "google_service_account" "frontend" {
   account_id   = "${local.name_prefix}-frontend"
@@ -47,6 +66,13 @@ resource "google_storage_bucket_iam_member" "frontend_submissions" {
   member = "serviceAccount:${google_service_account.frontend.email}"
 }
 
+# Grant frontend read access to photo renditions (gallery and admin views)
+resource "google_storage_bucket_iam_member" "frontend_renditions" {
+  bucket = google_storage_bucket.photo_renditions.name
+  role   = "roles/storage.objectViewer"
+  member = "serviceAccount:${google_service_account.frontend.email}"
+}
+
 # Grant frontend access to public assets
 resource "google_storage_bucket_iam_member" "frontend_public_assets" {
   bucket = google_storage_bucket.public_assets.name
@@ -25,6 +25,121 @@ resource "google_logging_metric" "pdf_processing_errors" {
   }
 }
 
+# Log-based metric for rows staged but not yet appended to the awards sheet
+resource "google_logging_metric" "sheet_row_backlog" {
+  name = "${local.awards_prefix}-sheet-row-backlog"
+
+  depends_on = [google_project_service.required_apis]
+  filter = <<-EOT
+    resource.type="cloud_run_revision"
+    textPayload=~"Sheet row backlog: pending_rows="
+  EOT
+
+  metric_descriptor {
+    metric_kind = "DELTA"
+    value_type  = "DISTRIBUTION"
+    unit        = "1"
+  }
+
+  value_extractor = "REGEXP_EXTRACT(textPayload, \"pending_rows=(\\\\d+)\")"
+
+  bucket_options {
+    exponential_buckets {
+      num_finite_buckets = 12
+      growth_factor      = 2
+      scale              = 1
+    }
+  }
+}
+
+# Log-based metric for per-stage latency of the processors (JSON spans from tracing.py)
+resource "google_logging_metric" "stage_latency" {
+  name = "${local.awards_prefix}-stage-latency"
+
+  depends_on = [google_project_service.required_apis]
+  filter = <<-EOT
+    resource.type="cloud_run_revision"
+    jsonPayload.span:*
+    jsonPayload.duration_ms:*
+  EOT
+
+  metric_descriptor {
+    metric_kind = "DELTA"
+    value_type  = "DISTRIBUTION"
+    unit        = "ms"
+    labels {
+      key         = "function"
+      value_type  = "STRING"
+      description = "Entry point (process_pdf, process_photo, ...)"
+    }
+    labels {
+      key         = "span"
+      value_type  = "STRING"
+      description = "Stage name (download, parse, upload, append, invocation, ...)"
+    }
+    labels {
+      key         = "status"
+      value_type  = "STRING"
+      description = "ok or error"
+    }
+  }
+
+  value_extractor = "EXTRACT(jsonPayload.duration_ms)"
+
+  label_extractors = {
+    "function" = "EXTRACT(jsonPayload.function)"
+    "span"     = "EXTRACT(jsonPayload.span)"
+    "status"   = "EXTRACT(jsonPayload.status)"
+  }
+
+  bucket_options {
+    exponential_buckets {
+      num_finite_buckets = 20
+      growth_factor      = 2
+      scale              = 1
+    }
+  }
+}
+
+# Log-based metrics for Drive/Sheets connection reuse (counters on the invocation span,
+# see http_pool.py). Reuse rate = 1 - connections_opened / http_requests.
+resource "google_logging_metric" "http_connections" {
+  for_each = toset(["connections_opened", "http_requests"])
+  name     = "${local.awards_prefix}-${replace(each.key, "_", "-")}"
+
+  depends_on = [google_project_service.required_apis]
+  filter = <<-EOT
+    resource.type="cloud_run_revision"
+    jsonPayload.span="invocation"
+    jsonPayload.counters.${each.key}:*
+  EOT
+
+  metric_descriptor {
+    metric_kind = "DELTA"
+    value_type  = "DISTRIBUTION"
+    unit        = "1"
+    labels {
+      key         = "function"
+      value_type  = "STRING"
+      description = "Entry point (process_pdf, process_photo, ...)"
+    }
+  }
+
+  value_extractor = "EXTRACT(jsonPayload.counters.${each.key})"
+
+  label_extractors = {
+    "function" = "EXTRACT(jsonPayload.function)"
+  }
+
+  bucket_options {
+    exponential_buckets {
+      num_finite_buckets = 10
+      growth_factor      = 2
+      scale              = 1
+    }
+  }
+}
+
 # Alert policy for PDF processing errors
 resource "google_monitoring_alert_policy" "pdf_processing_errors" {
   display_name = "${local.awards_prefix} PDF Processing Errors"
@@ -55,6 +55,11 @@ resource "google_cloud_run_v2_service" "frontend" {
         value = google_storage_bucket.public_assets.name
       }
 
+      env {
+        name  = "RENDITIONS_BUCKET"
+        value = google_storage_bucket.photo_renditions.name
+      }
+
       env {
         name  = "AWARDS_SHEET_ID"
         value = var.awards_sheet_id
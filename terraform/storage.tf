@@ -34,6 +34,56 @@ resource "google_storage_bucket" "submissions" {
   }
 }
 
+# Pipeline state for the Cloud Functions (Awards ID counters, Drive folder index).
+# Kept out of the submissions bucket so state writes don't trigger the processors.
+resource "google_storage_bucket" "pipeline_state" {
+  name          = "${local.name_prefix}-state-${local.name_suffix}"
+  location      = var.region
+  storage_class = "STANDARD"
+
+  uniform_bucket_level_access = true
+
+  depends_on = [google_project_service.required_apis]
+  
+  labels = local.common_labels
+
+  # Invocation profiles (PROFILE_INVOCATIONS) are only useful for a while
+  lifecycle_rule {
+    condition {
+      age            = 14
+      matches_prefix = ["profiles/"]
+    }
+    action {
+      type = "Delete"
+    }
+  }
+}
+
+# Photo renditions (thumb, preview, full) written by the photo processor, at the
+# original's path with "photos" replaced by the rendition name. A bucket of its
+# own, like pipeline state, so rendition writes don't trigger the processors.
+resource "google_storage_bucket" "photo_renditions" {
+  name          = "${local.name_prefix}-renditions-${local.name_suffix}"
+  location      = var.region
+  storage_class = "STANDARD"
+
+  uniform_bucket_level_access = true
+
+  depends_on = [google_project_service.required_apis]
+  
+  labels = local.common_labels
+
+  # Renditions are derived from the submissions, so they go with them
+  lifecycle_rule {
+    condition {
+      age = var.lifecycle_delete_days
+    }
+    action {
+      type = "Delete"
+    }
+  }
+}
+
 # Temporary bucket for Cloud Functions source code
 resource "google_storage_bucket" "functions_source" {
   name          = "${local.name_prefix}-functions-${local.name_suffix}"
@@ -88,6 +138,16 @@ output "submissions_bucket_name" {
   description = "Name of the submissions GCS bucket"
 }
 
+output "pipeline_state_bucket_name" {
+  value       = google_storage_bucket.pipeline_state.name
+  description = "Name of the pipeline state bucket"
+}
+
+output "photo_renditions_bucket_name" {
+  value       = google_storage_bucket.photo_renditions.name
+  description = "Name of the photo renditions bucket"
+}
+
 output "public_assets_bucket_name" {
   value       = google_storage_bucket.public_assets.name
   description = "Name of the public assets bucket"
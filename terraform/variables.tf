@@ -77,6 +77,24 @@ variable "max_photo_size_mb" {
   default     = 20
 }
 
+variable "profile_invocations" {
+  description = "Fraction of processor invocations to run under cProfile + tracemalloc (profiles go to the state bucket under profiles/); 0 disables"
+  type        = number
+  default     = 0
+}
+
+variable "photo_batch" {
+  description = "Process each submission's photos together when the frontend's completion marker arrives, in one multi-core invocation, instead of one invocation per photo"
+  type        = bool
+  default     = true
+}
+
+variable "photo_batch_cpu" {
+  description = "vCPUs of the photo processor in batch mode (one photo worker process per vCPU)"
+  type        = number
+  default     = 4
+}
+
 variable "drive_owner_email" {
   description = "Email of the Google Drive folder owner (for transferring folder ownership)"
   type        = string